@@ -0,0 +1,182 @@
+# batch_reports_v3.py
+#
+# Headless rendering of every financial report chart to PNG or PDF files, e.g. from a nightly cron job:
+#   python batch_reports_v3.py --start 2024-01-01 --end 2024-01-31 --output-dir reports/2024-01 --format png pdf
+
+import matplotlib
+matplotlib.use("Agg")  # Render without a display; must be selected before any figure is created
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from matplotlib.figure import Figure
+from business_logic.downsampling_v3 import MAX_CHART_POINTS, downsample_columns
+from business_logic.report_filters_v3 import ReportFilters
+from business_logic.report_backends_v3 import REPORT_BACKEND_ENV, REPORT_BACKENDS, create_report_manager
+from gui import report_charts_v3 as charts
+
+FORMATS = ("png", "pdf")
+TOP_SUPPLIERS = 10
+TOP_ITEMS = 10
+
+
+def _time_series(calculate, value_name, method):
+    """Compute a per-period report, resolving 'auto' granularity and downsampling it like the report tab."""
+    def compute(manager, filters):
+        granularity = filters["granularity"]
+        if granularity == "auto":
+            granularity = manager.suggest_granularity(filters["start"], filters["end"])
+        data = calculate(manager, dict(filters, granularity=granularity))
+        return granularity, downsample_columns(data, value_name, MAX_CHART_POINTS, method)
+    return compute
+
+
+def _without_granularity(filters):
+    return {name: value for name, value in filters.items() if name != "granularity"}
+
+
+# name -> (compute(manager, filters), draw(ax, data), is_empty(data))
+REPORTS = {
+    "total_sales": (
+        _time_series(lambda manager, filters: manager.calculate_total_sales_per_day(**filters, columnar=True),
+                     "total_sales", "lttb"),
+        lambda ax, result: charts.plot_sales_per_period(ax, result[1], result[0]),
+        lambda result: not len(result[1])
+    ),
+    "sales_by_category": (
+        lambda manager, filters: manager.calculate_sales_by_category(**_without_granularity(filters)),
+        charts.plot_sales_by_category,
+        lambda data: not data
+    ),
+    "total_expenses": (
+        _time_series(lambda manager, filters: manager.calculate_total_expenses_per_day(**filters, columnar=True),
+                     "total_expenses", "minmax"),
+        lambda ax, result: charts.plot_expenses_per_period(ax, result[1], result[0]),
+        lambda result: not len(result[1])
+    ),
+    "expense_vs_sales": (
+        lambda manager, filters: manager.calculate_expense_vs_sales(**_without_granularity(filters)),
+        charts.plot_expense_vs_sales,
+        lambda data: not any(data.values())
+    ),
+    "expenses_by_supplier_and_category": (
+        lambda manager, filters: manager.calculate_expense_pivot(**_without_granularity(filters), top_n=TOP_SUPPLIERS),
+        charts.plot_expenses_by_supplier_and_category,
+        lambda data: not data.rows
+    ),
+    "profit_and_margin": (
+        _time_series(lambda manager, filters: manager.calculate_profit_series(**filters), "profit", "lttb"),
+        lambda ax, result: charts.plot_profit_and_margin(ax, result[1], result[0]),
+        lambda result: not len(result[1])
+    ),
+    "top_items": (
+        lambda manager, filters: manager.calculate_top_items(**_without_granularity(filters), top_n=TOP_ITEMS),
+        charts.plot_top_items,
+        lambda data: not data
+    ),
+    "sales_heatmap": (
+        lambda manager, filters: manager.calculate_sales_heatmap(**_without_granularity(filters)),
+        charts.plot_sales_heatmap,
+        lambda data: not data.values.any()
+    ),
+}
+
+# Each worker process opens its own manager (and database connection) once
+_worker_manager = None
+
+
+def _initialize_worker(db_url, backend):
+    global _worker_manager
+    _worker_manager = create_report_manager(db_url, backend)
+
+
+def render_report(name, filters, path, manager=None):
+    """Compute one report and save its chart to path. Returns the path, or None if there was no data."""
+    compute, draw, is_empty = REPORTS[name]
+    data = compute(manager or _worker_manager, filters)
+    if is_empty(data):
+        return None
+    figure = Figure(figsize=(10, 6), dpi=100)
+    draw(figure.add_subplot(111), data)
+    figure.tight_layout()
+    figure.savefig(path)
+    return path
+
+
+def render_reports(db_url, output_dir, start=None, end=None, granularity="auto", formats=("png",), workers=None,
+                   reports=None, backend=None):
+    """Render the chosen reports (all by default) in every format, fanned out over a process pool.
+
+    Returns a dict of report name -> list of written paths (empty when the report had no data).
+    """
+    # Validate once up front instead of failing in every worker
+    ReportFilters(start, end, "day" if granularity == "auto" else granularity)
+    for file_format in formats:
+        if file_format not in FORMATS:
+            raise ValueError(f"Invalid format: {file_format}")
+    backend = backend or os.environ.get(REPORT_BACKEND_ENV) or "sqlite"
+    if backend == "duckdb-mirror" and workers != 0:
+        raise ValueError("The DuckDB mirror can only be opened by one process; use --workers 0.")
+    names = list(reports or REPORTS)
+    for name in names:
+        if name not in REPORTS:
+            raise ValueError(f"Unknown report: {name}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    filters = {"start": start, "end": end, "granularity": granularity, "category": None, "supplier": None}
+    suffix = f"_{start or 'all'}_{end or 'all'}"
+    tasks = [
+        (name, os.path.join(output_dir, f"{name}{suffix}.{file_format}"))
+        for name in names for file_format in formats
+    ]
+
+    written = {name: [] for name in names}
+    # Creates any missing tables and triggers once, before workers open the database concurrently
+    manager = create_report_manager(db_url, backend)
+    if workers == 0:
+        # In-process, e.g. for debugging
+        for name, path in tasks:
+            if render_report(name, filters, path, manager):
+                written[name].append(path)
+        return written
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_initialize_worker, initargs=(db_url, backend)) as pool:
+        futures = {pool.submit(render_report, name, filters, path): name for name, path in tasks}
+        for future in as_completed(futures):
+            path = future.result()
+            if path:
+                written[futures[future]].append(path)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render the Brew and Bite financial reports to image files.")
+    parser.add_argument("--db-url", default="sqlite:///brew_and_bite_v3.db")
+    parser.add_argument("--start", help="First day, YYYY-MM-DD (default: first day with data)")
+    parser.add_argument("--end", help="Last day, YYYY-MM-DD (default: last day with data)")
+    parser.add_argument("--granularity", default="auto", choices=("auto", "hour", "day", "week", "month"))
+    parser.add_argument("--format", nargs="+", default=["png"], choices=FORMATS, dest="formats")
+    parser.add_argument("--output-dir", default="reports")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count, 0: none)")
+    parser.add_argument("--backend", choices=REPORT_BACKENDS, help="Report engine (default: configured backend)")
+    parser.add_argument("--report", nargs="+", choices=sorted(REPORTS), dest="reports", help="Reports to render (default: all)")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    try:
+        written = render_reports(args.db_url, args.output_dir, args.start, args.end, args.granularity,
+                                 args.formats, args.workers, args.reports, args.backend)
+    except ValueError as ve:
+        parser.error(str(ve))
+    for name, paths in written.items():
+        if paths:
+            for path in sorted(paths):
+                print(f"Saved {path}")
+        else:
+            print(f"Skipped {name}: no data for the selected range.")
+    print(f"Rendered {sum(len(paths) for paths in written.values())} charts in {time.perf_counter() - started:.1f}s.")
+
+
+if __name__ == "__main__":
+    main()
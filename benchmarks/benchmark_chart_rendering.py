@@ -0,0 +1,55 @@
+# benchmark_chart_rendering.py
+#
+# Render time of the daily sales chart against series length, drawn in full (one bar per day)
+# and after downsampling. Run from the project root: python -m benchmarks.benchmark_chart_rendering
+
+import time
+import matplotlib
+matplotlib.use("Agg")  # No display needed
+from matplotlib.figure import Figure
+import numpy as np
+from business_logic.downsampling_v3 import MAX_CHART_POINTS, downsample_columns
+from business_logic.report_columns_v3 import ReportColumns
+from gui.report_charts_v3 import plot_sales_per_period
+
+SERIES_LENGTHS = (100, 1000, 5000, 20000, 100000)
+
+
+def synthetic_sales(days, seed=0):
+    """Daily sales with weekly seasonality, a trend and noise."""
+    rng = np.random.default_rng(seed)
+    dates = np.datetime64("2000-01-01") + np.arange(days)
+    weekly = 1 + 0.3 * np.sin(2 * np.pi * np.arange(days) / 7)
+    totals = (200 + 0.01 * np.arange(days)) * weekly + rng.normal(0, 20, days)
+    return ReportColumns({"date": dates, "total_sales": totals})
+
+
+def render_seconds(draw, repeat=3):
+    """Best time to draw and rasterize a chart on an off-screen figure."""
+    best = float("inf")
+    for _ in range(repeat):
+        figure = Figure(figsize=(10, 6), dpi=100)
+        started = time.perf_counter()
+        draw(figure.add_subplot(111))
+        figure.canvas.draw()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run_benchmark(lengths=SERIES_LENGTHS):
+    print(f"{'days':>8} {'full (s)':>10} {'downsampled (s)':>16} {'points':>7}")
+    for days in lengths:
+        series = synthetic_sales(days)
+        # The full chart is what the report used to draw: one bar per day
+        full = render_seconds(
+            lambda ax: ax.bar(series.date, series.total_sales, width=0.8, color='blue')
+        ) if days <= 5000 else float("nan")  # Beyond this the full bar chart takes many seconds
+        started = time.perf_counter()
+        reduced = downsample_columns(series, "total_sales", MAX_CHART_POINTS)
+        downsample_time = time.perf_counter() - started
+        downsampled = render_seconds(lambda ax: plot_sales_per_period(ax, reduced)) + downsample_time
+        print(f"{days:>8} {full:>10.3f} {downsampled:>16.3f} {len(reduced):>7}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,90 @@
+# benchmark_cost_of_sales.py
+#
+# Times the gross margin reports, which replay FIFO and weighted-average consumption of the cost
+# layers over the whole sales history on every computation (the report cache is cleared first).
+# The replay reads the daily rollups, so its cost grows with items x days of history, not with
+# the number of sales: the dataset has one sale per item and day, which gives the same rollups.
+# Run from the project root: python -m benchmarks.benchmark_cost_of_sales --items 200 --days 730
+
+import argparse
+import os
+import sqlite3
+import time
+import numpy as np
+from business_logic.report_manager_v3 import FinancialReportManager
+
+PURCHASE_EVERY_DAYS = 7
+
+
+def build_dataset(path, items, days, seed=0):
+    """Write a database with a daily sale of every item and a purchase of each item every week."""
+    if os.path.exists(path):
+        os.remove(path)
+    FinancialReportManager(f"sqlite:///{path}").engine.dispose()  # Creates tables, rollups and triggers
+    rng = np.random.default_rng(seed)
+    connection = sqlite3.connect(path)
+    connection.execute(
+        "INSERT INTO users (user_id, username, password, contact, email, registration_type, company_name,"
+        " company_category) VALUES (1, 'supplier1', 'x', '0', 'x@example.com', 'supplier', 'Supplier 1', 'Food')"
+    )
+    connection.executemany(
+        "INSERT INTO inventory (item_id, item_name, category, quantity, unit_cost, supplier_id) VALUES (?, ?, 'Food', 100, 1.0, 1)",
+        [(i, f"Item {i}") for i in range(1, items + 1)]
+    )
+    day_strings = np.datetime_as_string(np.datetime64("2023-01-01") + np.arange(days)).tolist()
+    for day_index, day in enumerate(day_strings):
+        quantities = rng.integers(1, 20, items)
+        connection.executemany(
+            "INSERT INTO sales (item_id, quantity_sold, unit_price, total_cost, sales_date) VALUES (?, ?, 3.0, ?, ?)",
+            [(item_id, quantity, quantity * 3.0, f"{day} 09:00:00.000000")
+             for item_id, quantity in zip(range(1, items + 1), quantities.tolist())]
+        )
+        if day_index % PURCHASE_EVERY_DAYS == 0:
+            unit_costs = rng.uniform(0.5, 1.5, items).round(2)
+            connection.executemany(
+                "INSERT INTO expenses (expense_date, category, supplier_id, expense_name, total_items, unit_cost,"
+                " total_cost) VALUES (?, 'Food', 1, ?, 100, ?, ?)",
+                [(f"{day} 00:00:00.000000", f"Item {item_id}", cost, cost * 100)
+                 for item_id, cost in zip(range(1, items + 1), unit_costs.tolist())]
+            )
+    connection.commit()
+    connection.close()
+
+
+REPORTS = {
+    "gross margin per month (fifo)": lambda manager: manager.calculate_gross_margin(granularity="month"),
+    "gross margin per month (average)": lambda manager: manager.calculate_gross_margin(granularity="month",
+                                                                                       method="average"),
+    "gross margin, last 30 days": lambda manager: manager.calculate_gross_margin("2024-12-01", "2024-12-30"),
+    "item margins (fifo)": lambda manager: manager.calculate_item_margins(),
+}
+
+
+def best_seconds(manager, report, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        manager.cache.clear()  # Time the full recompute, not the report cache
+        started = time.perf_counter()
+        report(manager)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run_benchmark(path, items, days, rebuild=True):
+    if rebuild or not os.path.exists(path):
+        started = time.perf_counter()
+        build_dataset(path, items, days)
+        print(f"Built {items} items x {days} days in {time.perf_counter() - started:.1f}s")
+    manager = FinancialReportManager(f"sqlite:///{path}")
+    for name, report in REPORTS.items():
+        print(f"{name:<34}{best_seconds(manager, report):>8.3f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the cost of sales replay behind the gross margin reports.")
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--path", default="benchmark_cost_of_sales.db")
+    parser.add_argument("--reuse", action="store_true", help="Reuse an existing dataset at --path")
+    args = parser.parse_args()
+    run_benchmark(args.path, args.items, args.days, rebuild=not args.reuse)
@@ -0,0 +1,50 @@
+# benchmark_demand_forecast.py
+#
+# Times the vectorized demand forecast on synthetic daily sales of many items.
+# Run from the project root: python -m benchmarks.benchmark_demand_forecast --items 10000 --days 728
+
+import argparse
+import time
+import numpy as np
+from business_logic.demand_forecast_v3 import demand_matrix, forecast_demand, reorder_quantities
+
+WEEKDAY_PATTERN = np.array([0.8, 0.8, 0.9, 1.0, 1.3, 1.6, 0.6])  # Monday first
+
+
+def synthetic_rollup(items, days, first_day, seed=0):
+    """Daily (item, day, quantity) rows like daily_sales_summary, leaving out days without sales."""
+    rng = np.random.default_rng(seed)
+    base = rng.gamma(1.5, 4.0, items)[:, np.newaxis]  # Slow and fast movers
+    weekday = (np.datetime64(first_day, "D").astype(np.int64) + 3 + np.arange(days)) % 7
+    quantities = rng.poisson(base * WEEKDAY_PATTERN[weekday])
+    item_index, day_index = np.nonzero(quantities)
+    return item_index + 1, np.datetime64(first_day, "D") + day_index, quantities[item_index, day_index]
+
+
+def timed(label, function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    print(f"{label:<28}{time.perf_counter() - started:>8.3f}s")
+    return result
+
+
+def run_benchmark(items, days, horizon=14):
+    first_day = np.datetime64("2023-01-02")
+    item_ids, dates, quantities = synthetic_rollup(items, days, first_day)
+    print(f"{items} items x {days} days, {len(quantities)} rollup rows")
+    started = time.perf_counter()
+    matrix = timed("scatter into matrix", demand_matrix, item_ids, dates, quantities, np.arange(1, items + 1),
+                   first_day, first_day + days - 1)
+    forecast = timed("forecast", forecast_demand, matrix, first_day, horizon)
+    on_hand = np.full(items, 50)
+    timed("reorder quantities", reorder_quantities, forecast, on_hand, matrix[:, -28:])
+    print(f"{'total':<28}{time.perf_counter() - started:>8.3f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the vectorized demand forecast.")
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--days", type=int, default=728)
+    parser.add_argument("--horizon", type=int, default=14)
+    args = parser.parse_args()
+    run_benchmark(args.items, args.days, args.horizon)
@@ -0,0 +1,62 @@
+# benchmark_login.py
+#
+# Login-to-interactive latency per role: from the Login click to the main screen being idle,
+# for the first login of each role (the screen is built) and a later one (the screen is reused).
+# Needs a display. Run from the project root: python -m benchmarks.benchmark_login
+#
+# The application keeps its database in the working directory, so the run happens in a
+# temporary directory with a user of each staff role registered.
+
+import os
+import tempfile
+from main_v3 import MainApplication, SUPER_ADMIN_USERNAME, SUPER_ADMIN_PASSWORD
+
+STAFF_PASSWORD = "benchmark"
+LOGINS = {  # role -> username
+    "super_admin": SUPER_ADMIN_USERNAME,
+    "Office Staff": "office_bench",
+    "Barista": "barista_bench",
+}
+ROUNDS = 3
+
+
+def register_staff(app):
+    for role, username in LOGINS.items():
+        if username == SUPER_ADMIN_USERNAME:
+            continue
+        success, message = app.user_manager.register_user(
+            username=username, password=STAFF_PASSWORD, contact=5550100, email=f"{username}@example.com",
+            registration_type="admin", role_type=role
+        )
+        if not success:
+            raise RuntimeError(message)
+
+
+def login_seconds(app, username):
+    """Log in through the login form and wait until the main screen is idle."""
+    app.initialize_login_form()
+    app.username_entry.insert(0, username)
+    app.password_entry.insert(0, SUPER_ADMIN_PASSWORD if username == SUPER_ADMIN_USERNAME else STAFF_PASSWORD)
+    app.handle_login()
+    while app.login_started is not None:
+        app.update()
+    seconds = app.login_latencies[-1][1]
+    app.end_session()
+    app.update()
+    return seconds
+
+
+def run_benchmark(rounds=ROUNDS):
+    os.chdir(tempfile.mkdtemp(prefix="brew_and_bite_bench_"))
+    app = MainApplication()
+    register_staff(app)
+    print(f"{'role':>14} {'first (s)':>10} {'later (s)':>10}")
+    for role, username in LOGINS.items():
+        first = login_seconds(app, username)
+        later = min(login_seconds(app, username) for _ in range(rounds))
+        print(f"{role:>14} {first:>10.3f} {later:>10.3f}")
+    app.destroy()
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,113 @@
+# benchmark_report_backends.py
+#
+# Times the report API on the SQLite backend (rollup tables, base tables for hourly reports)
+# against DuckDB scanning the SQLite file and DuckDB querying a mirrored copy, on a synthetic dataset.
+# Run from the project root: python -m benchmarks.benchmark_report_backends --sales 2000000
+
+import argparse
+import os
+import sqlite3
+import time
+import numpy as np
+from business_logic.report_backends_v3 import create_report_manager
+
+ITEMS = 200
+SUPPLIERS = 20
+CATEGORIES = ("Coffee", "Tea", "Food", "Snacks", "Merchandise")
+EXPENSE_CATEGORIES = ("Food", "Beverages", "Cleaning", "Maintenance Services", "Other")
+
+
+def build_dataset(path, sales, days=730, seed=0):
+    """Write a synthetic database with the given number of sales spread over days."""
+    if os.path.exists(path):
+        os.remove(path)
+    create_report_manager(f"sqlite:///{path}", "sqlite")  # Creates tables, rollups and triggers
+    rng = np.random.default_rng(seed)
+    connection = sqlite3.connect(path)
+    connection.executemany(
+        "INSERT INTO users (user_id, username, password, contact, email, registration_type, company_name,"
+        " company_category) VALUES (?, ?, 'x', '0', 'x@example.com', 'supplier', ?, ?)",
+        [(i, f"supplier{i}", f"Supplier {i}", EXPENSE_CATEGORIES[i % 5]) for i in range(1, SUPPLIERS + 1)]
+    )
+    connection.executemany(
+        "INSERT INTO inventory (item_id, item_name, category, quantity, unit_cost, supplier_id) VALUES (?, ?, ?, 100, 1.0, ?)",
+        [(i, f"Item {i}", CATEGORIES[i % 5], i % SUPPLIERS + 1) for i in range(1, ITEMS + 1)]
+    )
+    start = np.datetime64("2023-01-01T07:00:00")
+    batch = 100000
+    for offset in range(0, sales, batch):
+        size = min(batch, sales - offset)
+        items = rng.integers(1, ITEMS + 1, size)
+        quantities = rng.integers(1, 4, size)
+        prices = rng.choice([2.5, 3.0, 3.5, 4.2], size)
+        seconds = rng.integers(0, days * 86400, size)
+        dates = np.datetime_as_string(start + seconds.astype("timedelta64[s]"), unit="us")
+        connection.executemany(
+            "INSERT INTO sales (item_id, quantity_sold, unit_price, total_cost, sales_date) VALUES (?, ?, ?, ?, ?)",
+            zip(items.tolist(), quantities.tolist(), prices.tolist(), (quantities * prices).tolist(),
+                [value.replace("T", " ") for value in dates])
+        )
+    expenses = max(sales // 50, 1)
+    suppliers = rng.integers(1, SUPPLIERS + 1, expenses)
+    costs = rng.uniform(5, 500, expenses).round(2)
+    expense_days = np.datetime_as_string(
+        np.datetime64("2023-01-01") + rng.integers(0, days, expenses).astype("timedelta64[D]")
+    )
+    connection.executemany(
+        "INSERT INTO expenses (expense_date, category, supplier_id, expense_name, total_items, unit_cost, total_cost)"
+        " VALUES (?, ?, ?, 'Supplies', 1, ?, ?)",
+        [(f"{day} 00:00:00.000000", EXPENSE_CATEGORIES[supplier % 5], supplier, cost, cost)
+         for day, supplier, cost in zip(expense_days.tolist(), suppliers.tolist(), costs.tolist())]
+    )
+    connection.commit()
+    connection.close()
+
+
+REPORTS = {
+    "sales per day": lambda manager: manager.calculate_total_sales_per_day(),
+    "sales per hour": lambda manager: manager.calculate_total_sales_per_day(granularity="hour"),
+    "sales per month (Coffee)": lambda manager: manager.calculate_total_sales_per_day(granularity="month",
+                                                                                      category="Coffee"),
+    "sales by category": lambda manager: manager.calculate_sales_by_category(),
+    "expenses per week": lambda manager: manager.calculate_total_expenses_per_day(granularity="week"),
+    "expense vs sales": lambda manager: manager.calculate_expense_vs_sales(),
+    "supplier pivot": lambda manager: manager.calculate_expense_pivot(top_n=10),
+    "profit series": lambda manager: manager.calculate_profit_series(),
+    "sales heatmap (one year)": lambda manager: manager.calculate_sales_heatmap("2023-01-01", "2023-12-31"),
+}
+
+
+def best_seconds(manager, report, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        manager.cache.clear()  # Time the query, not the report cache
+        started = time.perf_counter()
+        report(manager)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run_benchmark(path, sales, rebuild=True):
+    if rebuild or not os.path.exists(path):
+        started = time.perf_counter()
+        build_dataset(path, sales)
+        print(f"Built {sales} sales in {time.perf_counter() - started:.1f}s")
+    db_url = f"sqlite:///{path}"
+    managers = {"sqlite": create_report_manager(db_url, "sqlite"), "duckdb": create_report_manager(db_url, "duckdb")}
+    started = time.perf_counter()
+    managers["duckdb-mirror"] = create_report_manager(db_url, "duckdb-mirror")
+    managers["duckdb-mirror"].refresh_mirror()
+    print(f"Mirrored into DuckDB in {time.perf_counter() - started:.1f}s")
+
+    print(f"{'report':<26}" + "".join(f"{name:>15}" for name in managers))
+    for name, report in REPORTS.items():
+        print(f"{name:<26}" + "".join(f"{best_seconds(manager, report):>14.3f}s" for manager in managers.values()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the SQLite and DuckDB report backends.")
+    parser.add_argument("--sales", type=int, default=1000000)
+    parser.add_argument("--path", default="benchmark_reports.db")
+    parser.add_argument("--reuse", action="store_true", help="Reuse an existing dataset at --path")
+    args = parser.parse_args()
+    run_benchmark(args.path, args.sales, rebuild=not args.reuse)
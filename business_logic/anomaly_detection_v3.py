@@ -0,0 +1,170 @@
+# business_logic/anomaly_detection_v3.py
+
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from business_logic.report_filters_v3 import parse_report_date
+from business_logic.report_manager_v3 import FinancialReportManager
+from database.models_v3 import FlaggedDay, AnomalyRun
+
+WINDOW = 28  # Preceding days each day is compared with
+THRESHOLD = 3.5  # Robust z-score beyond which a day is flagged
+CONTEXT_WINDOWS = 4  # Calendar days loaded before new days, in windows; sparse series need more than one
+
+AnomalyRow = namedtuple("AnomalyRow", ["series", "date", "value", "median", "mad", "z_score"])
+
+
+def rolling_median_mad(values, window, min_periods=None):
+    """Median and median absolute deviation of the window values before each value.
+
+    All windows are views of one padded array, reduced with one nanmedian per statistic.
+    Values with fewer than min_periods (default: half a window) preceding values get NaN.
+    Also returns the mean absolute deviation from the median, for windows whose MAD is 0.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if not len(values):
+        return values, values, values
+    min_periods = max(min_periods or window // 2, 1)
+    padded = np.concatenate((np.full(window, np.nan), values))
+    windows = sliding_window_view(padded[:-1], window)  # Row t holds the window values before value t
+    valid = np.count_nonzero(~np.isnan(windows), axis=1) >= min_periods
+    median, mad, mean_deviation = (np.full(len(values), np.nan) for _ in range(3))
+    median[valid] = np.nanmedian(windows[valid], axis=1)
+    deviations = np.abs(windows[valid] - median[valid, np.newaxis])
+    mad[valid] = np.nanmedian(deviations, axis=1)
+    mean_deviation[valid] = np.nanmean(deviations, axis=1)
+    return median, mad, mean_deviation
+
+
+def robust_z_scores(values, window, min_periods=None):
+    """Robust z-score of each value against the preceding window: 0.6745 * (value - median) / MAD.
+
+    Where the MAD is 0 (over half the window is identical) the mean absolute deviation
+    stands in, scaled by 1.2533; where both are 0 any change from the median scores infinite.
+    Returns (z-scores, medians, MADs); the z-score is NaN without enough preceding values.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    median, mad, mean_deviation = rolling_median_mad(values, window, min_periods)
+    deviation = values - median
+    spread = np.where(mad > 0, mad / 0.6745, mean_deviation * 1.2533)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z_scores = np.where(spread > 0, deviation / spread, np.sign(deviation) * np.inf)
+    z_scores[deviation == 0] = 0.0
+    z_scores[np.isnan(median)] = np.nan
+    return z_scores, median, mad
+
+
+def fill_missing_days(dates, values, last_day):
+    """Daily series from the first date to last_day, with 0 on days missing from dates."""
+    if not len(dates):
+        return dates, np.asarray(values, dtype=np.float64)
+    days = np.arange(dates[0], np.datetime64(last_day, "D") + 1)
+    filled = np.zeros(len(days))
+    filled[(dates - dates[0]).astype(np.int64)] = values
+    return days, filled
+
+
+class AnomalyDetector:
+    """Flags unusual days in the daily sales and expense totals and stores them in flagged_days.
+
+    Each day is scored against the window days before it with a robust z-score, which one
+    extreme day cannot skew the way it skews a mean and standard deviation. Sales count days
+    without sales as 0, so a till that stopped recording shows up; expenses only compare days
+    with expenses, as most days have none. Incremental runs only score the days after the last
+    run, loading just enough earlier days to fill their windows.
+    """
+
+    # series -> (daily report, value column, count days without rows as 0)
+    SERIES = {
+        "sales": (lambda manager, start, end: manager.calculate_total_sales_per_day(start, end, columnar=True),
+                  "total_sales", True),
+        "expenses": (lambda manager, start, end: manager.calculate_total_expenses_per_day(start, end, columnar=True),
+                     "total_expenses", False),
+    }
+
+    def __init__(self, db_url="sqlite:///brew_and_bite_v3.db", window=WINDOW, threshold=THRESHOLD):
+        if window < 2:
+            raise ValueError("Anomaly window must be at least 2 days.")
+        if threshold <= 0:
+            raise ValueError("Anomaly threshold must be positive.")
+        self.report_manager = FinancialReportManager(db_url)
+        self.Session = self.report_manager.Session
+        self.window = window
+        self.threshold = threshold
+
+    def run(self, series=None, end=None, incremental=True):
+        """Score the given series (all by default) up to end (default: yesterday, the last complete day).
+
+        Returns the newly flagged days as AnomalyRow tuples.
+        """
+        flagged = []
+        for name in series or self.SERIES:
+            flagged.extend(self.detect(name, end, incremental))
+        return flagged
+
+    def detect(self, series, end=None, incremental=True):
+        """Score one series and replace its stored flags for the scored days."""
+        if series not in self.SERIES:
+            raise ValueError(f"Unknown anomaly series: {series}")
+        end = parse_report_date(end) or date.today() - timedelta(days=1)
+        report, value_name, fill_gaps = self.SERIES[series]
+
+        session = self.Session()
+        try:
+            state = session.get(AnomalyRun, series)
+            first_new = parse_report_date(state.last_date) + timedelta(days=1) if incremental and state else None
+            if first_new and first_new > end:
+                return []
+            context_start = first_new - timedelta(days=self.window * CONTEXT_WINDOWS) if first_new else None
+            columns = report(self.report_manager, context_start, end)
+            dates, values = columns.date, getattr(columns, value_name)
+            if fill_gaps:
+                dates, values = fill_missing_days(dates, values, end)
+            z_scores, medians, mads = robust_z_scores(values, self.window)
+
+            scored = dates >= np.datetime64(first_new) if first_new else np.ones(len(dates), dtype=bool)
+            with np.errstate(invalid="ignore"):
+                flags = np.flatnonzero(scored & (np.abs(z_scores) >= self.threshold))
+            rows = [
+                AnomalyRow(series, str(dates[i]), float(values[i]), float(medians[i]), float(mads[i]),
+                           float(z_scores[i]))
+                for i in flags
+            ]
+
+            stale = session.query(FlaggedDay).filter(FlaggedDay.series == series, FlaggedDay.flag_date <= end.isoformat())
+            if first_new:
+                stale = stale.filter(FlaggedDay.flag_date >= first_new.isoformat())
+            stale.delete(synchronize_session=False)
+            session.add_all(FlaggedDay(series=row.series, flag_date=row.date, value=row.value, median=row.median,
+                                       mad=row.mad, z_score=row.z_score) for row in rows)
+            if state is None:
+                session.add(AnomalyRun(series=series, last_date=end.isoformat()))
+            else:
+                state.last_date = end.isoformat()
+                state.run_at = datetime.now()
+            session.commit()
+            return rows
+        except Exception as e:
+            session.rollback()
+            raise Exception(f"Failed to detect anomalies: {e}")
+        finally:
+            session.close()
+
+    def get_flagged_days(self, series=None, start=None, end=None):
+        """Stored flagged days, newest first, optionally for one series and date range."""
+        start, end = parse_report_date(start), parse_report_date(end)
+        session = self.Session()
+        try:
+            query = session.query(FlaggedDay)
+            if series:
+                query = query.filter(FlaggedDay.series == series)
+            if start:
+                query = query.filter(FlaggedDay.flag_date >= start.isoformat())
+            if end:
+                query = query.filter(FlaggedDay.flag_date <= end.isoformat())
+            return query.order_by(FlaggedDay.flag_date.desc(), FlaggedDay.series).all()
+        except Exception as e:
+            raise Exception(f"Failed to fetch flagged days: {e}")
+        finally:
+            session.close()
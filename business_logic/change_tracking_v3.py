@@ -0,0 +1,31 @@
+# business_logic/change_tracking_v3.py
+
+from sqlalchemy import func
+from database.models_v3 import ChangeLog
+
+
+def changes_since(session, table_name, key_column, mark=None):
+    """Keys of the rows inserted, updated or deleted since mark, and the mark to pass next time.
+
+    A mark is (highest key, last change log sequence number). Inserted rows are the ones keyed
+    above the highest key; updates and deletes come from the change log the triggers write.
+    Returns (mark, []) when mark is None, and (mark, None) when the log has been pruned past
+    mark, in which case the caller has to reload everything.
+    """
+    max_key = session.query(func.max(key_column)).scalar() or 0
+    max_seq = session.query(func.max(ChangeLog.seq)).scalar() or 0
+    if mark is None:
+        return (max_key, max_seq), []
+    last_key, last_seq = mark
+    if max_seq < last_seq:
+        return (max_key, max_seq), None  # The log was emptied
+    keys = set()
+    if max_seq > last_seq:
+        oldest = session.query(func.min(ChangeLog.seq)).scalar()
+        if oldest > last_seq + 1:
+            return (max_key, max_seq), None
+        keys.update(row_id for (row_id,) in session.query(ChangeLog.row_id).filter(
+            ChangeLog.table_name == table_name, ChangeLog.seq > last_seq, ChangeLog.seq <= max_seq))
+    if max_key > last_key:
+        keys.update(key for (key,) in session.query(key_column).filter(key_column > last_key, key_column <= max_key))
+    return (max_key, max_seq), sorted(keys)
@@ -0,0 +1,126 @@
+# business_logic/comprehensive_report_v3.py
+
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import func, literal, null, select, union_all
+from database.models_v3 import User, DailySalesSummary, DailyExpenseSummary, DataVersion
+
+# Rows returned by the combined query, shaped like the single-report results
+DailySalesRow = namedtuple("DailySalesRow", ["date", "total_sales"])
+CategorySalesRow = namedtuple("CategorySalesRow", ["category", "total_sales"])
+DailyExpensesRow = namedtuple("DailyExpensesRow", ["date", "total_expenses"])
+SupplierCategoryRow = namedtuple("SupplierCategoryRow", ["supplier", "category", "total_expenses"])
+
+
+class ComprehensiveReportEngine:
+    """Builds every section of the comprehensive report from one consistent view of the data."""
+
+    def __init__(self, report_manager, max_workers=5):
+        self.report_manager = report_manager
+        self.max_workers = max_workers
+
+    def generate(self, filters, parallel=False):
+        """Generate the comprehensive report, optionally computing sections on a thread pool."""
+        if parallel and self._supports_parallel_reads():
+            report = self._generate_parallel(filters)
+            if report is not None:
+                return report
+        session = self.report_manager.Session()
+        try:
+            return self.generate_snapshot(session, filters)
+        finally:
+            session.close()
+
+    def _supports_parallel_reads(self):
+        # Every connection to an in-memory database sees a different, empty database
+        return self.report_manager.engine.url.database not in (None, "", ":memory:")
+
+    def _combined_query(self, filters):
+        """One UNION ALL statement for all sections, so they are read from a single snapshot."""
+        sales_per_day = filters.filter_sales_summary(select(
+            literal("sales_per_day").label("section"),
+            DailySalesSummary.summary_date.label("label"),
+            null().label("label2"),
+            func.sum(DailySalesSummary.total_sales).label("amount")
+        )).group_by(DailySalesSummary.summary_date)
+        sales_by_category = filters.filter_sales_summary(select(
+            literal("sales_by_category"),
+            DailySalesSummary.category,
+            null(),
+            func.sum(DailySalesSummary.total_sales)
+        )).group_by(DailySalesSummary.category)
+        expenses_per_day = filters.filter_expense_summary(select(
+            literal("expenses_per_day"),
+            DailyExpenseSummary.summary_date,
+            null(),
+            func.sum(DailyExpenseSummary.total_expenses)
+        )).group_by(DailyExpenseSummary.summary_date)
+        expense_by_supplier_and_category = filters.filter_expense_summary(select(
+            literal("expense_by_supplier_and_category"),
+            User.company_name,
+            DailyExpenseSummary.category,
+            func.sum(DailyExpenseSummary.total_expenses)
+        ).join(User, DailyExpenseSummary.supplier_id == User.user_id)).group_by(
+            User.company_name, DailyExpenseSummary.category
+        )
+        return union_all(
+            sales_per_day, sales_by_category, expenses_per_day, expense_by_supplier_and_category
+        ).order_by("section", "label", "label2")
+
+    def generate_snapshot(self, session, filters):
+        """Build all sections from one combined statement on the given session."""
+        rows = session.execute(self._combined_query(filters)).all()
+
+        report = {
+            "sales_per_day": [],
+            "sales_by_category": [],
+            "expenses_per_day": [],
+            "expense_by_supplier_and_category": []
+        }
+        for section, label, label2, amount in rows:
+            if section == "sales_per_day":
+                report[section].append(DailySalesRow(label, amount))
+            elif section == "sales_by_category":
+                report[section].append(CategorySalesRow(label, amount))
+            elif section == "expenses_per_day":
+                report[section].append(DailyExpensesRow(label, amount))
+            else:
+                report[section].append(SupplierCategoryRow(label, label2, amount))
+
+        # Totals come from the same rows, so they always agree with the daily sections
+        total_sales = sum(row.total_sales for row in report["sales_per_day"])
+        total_expenses = sum(row.total_expenses for row in report["expenses_per_day"])
+        report["expense_vs_sales"] = {
+            "total_sales": total_sales,
+            "total_expenses": total_expenses,
+            "difference": total_sales - total_expenses
+        }
+        return report
+
+    def _data_version(self):
+        session = self.report_manager.Session()
+        try:
+            return session.query(DataVersion.version).filter_by(version_id=1).scalar()
+        finally:
+            session.close()
+
+    def _generate_parallel(self, filters):
+        """Run each section on its own pooled connection; returns None if data changed meanwhile."""
+        manager = self.report_manager
+        arguments = {"start": filters.start, "end": filters.end, "category": filters.category, "supplier": filters.supplier}
+        sections = {
+            "sales_per_day": manager.calculate_total_sales_per_day,
+            "sales_by_category": manager.calculate_sales_by_category,
+            "expenses_per_day": manager.calculate_total_expenses_per_day,
+            "expense_vs_sales": manager.calculate_expense_vs_sales,
+            "expense_by_supplier_and_category": manager.calculate_expense_by_supplier_and_category
+        }
+        version = self._data_version()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {name: pool.submit(method, **arguments) for name, method in sections.items()}
+            report = {name: future.result() for name, future in futures.items()}
+
+        # Sections read different snapshots; they are only consistent if nothing was written in between
+        if self._data_version() != version:
+            return None
+        return report
@@ -0,0 +1,130 @@
+# business_logic/cost_layers_v3.py
+
+# Cost of goods sold from purchase cost layers, vectorized with NumPy.
+#
+# Layers are the purchases of an item per day (daily_purchase_summary, kept current by triggers),
+# sales are the item's daily quantities (daily_sales_summary). Both come sorted by item, then day.
+# Sales only draw on layers dated on or before their day; units sold beyond those are costed at
+# Inventory.unit_cost. Purchases are matched to items by name, each name to the item first added under it.
+
+import numpy as np
+from business_logic.report_columns_v3 import MONEY_DTYPE
+
+COST_METHODS = ("fifo", "average")
+
+
+def _group_starts(groups):
+    """Mask of the first element of every run of equal values in a sorted array."""
+    starts = np.ones(len(groups), dtype=bool)
+    starts[1:] = groups[1:] != groups[:-1]
+    return starts
+
+
+def group_cumsum(groups, values):
+    """Running total of values that restarts at every new group; groups must be sorted."""
+    totals = np.cumsum(values, dtype=np.result_type(values, np.int64))
+    starts = np.flatnonzero(_group_starts(groups))
+    offsets = np.concatenate(([0], totals[starts[1:] - 1])) if len(starts) else totals[:0]
+    run_lengths = np.diff(np.append(starts, len(values)))
+    return totals - np.repeat(offsets, run_lengths)
+
+
+def _search(layer_items, layer_keys, items, keys, side):
+    """np.searchsorted over layers sorted by (item, key), with item and key combined into one int64."""
+    span = max(int(np.max(layer_keys, initial=0)), int(np.max(keys, initial=0))) + 1
+    return np.searchsorted(layer_items * span + layer_keys, items * span + keys, side=side)
+
+
+def group_cummin(groups, values):
+    """Running minimum of integer values that restarts at every new group; groups must be sorted."""
+    values = np.asarray(values, dtype=np.int64)
+    if not len(values):
+        return values
+    # Shifting each group below everything before it keeps earlier groups out of its minimum
+    group_index = np.cumsum(_group_starts(groups)) - 1
+    shift = int(np.max(values)) - int(np.min(values)) + 1
+    return np.minimum.accumulate(values - group_index * shift) + group_index * shift
+
+
+def _day_numbers(days):
+    return np.asarray(days, dtype="datetime64[D]").astype(np.int64)
+
+
+def _purchased_by_day(item_ids, day_numbers, layer_items, layer_day_numbers, layer_totals):
+    """Each row's value of layer_totals at its item's last layer on or before its day, 0 without one."""
+    if not len(layer_items):
+        return np.zeros(len(item_ids), dtype=layer_totals.dtype)
+    first_day = min(np.min(day_numbers, initial=0), np.min(layer_day_numbers))  # Keep keys non-negative
+    layer = _search(layer_items, layer_day_numbers - first_day, item_ids, day_numbers - first_day, "right") - 1
+    found = layer >= 0
+    found[found] = layer_items[layer[found]] == item_ids[found]
+    return np.where(found, layer_totals[np.maximum(layer, 0)], 0)
+
+
+def fifo_cost(item_ids, days, quantities, layer_items, layer_days, layer_quantities, layer_costs, fallback_costs):
+    """First-in, first-out cost of each row of sold quantities.
+
+    Rows are consumed in order per item: a row's cost is the cost of the next units in the
+    item's purchase history after everything sold in earlier rows, which gives exact FIFO for
+    daily rows. Only layers dated on or before a row's day can be consumed by it; units sold
+    beyond them are costed at the row's fallback cost and do not use up later purchases.
+    """
+    item_ids = np.asarray(item_ids, dtype=np.int64)
+    quantities = np.asarray(quantities, dtype=np.int64)
+    fallback_costs = np.asarray(fallback_costs, dtype=MONEY_DTYPE)
+    layer_items = np.asarray(layer_items, dtype=np.int64)
+    layer_quantities = np.asarray(layer_quantities, dtype=np.int64)
+    layer_costs = np.asarray(layer_costs, dtype=MONEY_DTYPE)
+    layer_ends = group_cumsum(layer_items, layer_quantities)  # Units purchased up to and including each layer
+    layer_cost_ends = group_cumsum(layer_items, layer_costs)
+    unit_costs = layer_costs / layer_quantities
+    available = _purchased_by_day(item_ids, _day_numbers(days), layer_items, _day_numbers(layer_days), layer_ends)
+
+    # Units taken from layers by the end of each row: c = min(c before + quantity, available),
+    # which unrolls to the running total sold plus the running minimum of (available - sold), capped at 0
+    sold = group_cumsum(item_ids, quantities)
+    taken_after = sold + np.minimum(group_cummin(item_ids, available - sold), 0)
+    taken_before = np.where(_group_starts(item_ids), 0, np.roll(taken_after, 1))
+
+    def cost_of_first(units):
+        # Total cost of the first units of each row's item, all of which come from its layers
+        cost = np.zeros(len(units), dtype=MONEY_DTYPE)
+        within = units > 0
+        # The layer holding the last of those units is the first whose running total reaches it
+        layer = _search(layer_items, layer_ends, item_ids[within], units[within], "left")
+        cost[within] = layer_cost_ends[layer] - (layer_ends[layer] - units[within]) * unit_costs[layer]
+        return cost
+
+    from_layers = taken_after - taken_before
+    return cost_of_first(taken_after) - cost_of_first(taken_before) + (quantities - from_layers) * fallback_costs
+
+
+def average_cost(item_ids, days, quantities, layer_items, layer_days, layer_quantities, layer_costs,
+                 fallback_costs):
+    """Weighted-average cost of each row: quantity times the average cost of all purchases up to its day."""
+    item_ids = np.asarray(item_ids, dtype=np.int64)
+    quantities = np.asarray(quantities, dtype=MONEY_DTYPE)
+    unit_costs = np.array(fallback_costs, dtype=MONEY_DTYPE)
+    layer_items = np.asarray(layer_items, dtype=np.int64)
+    if not len(layer_items):
+        return quantities * unit_costs
+    day_numbers, layer_day_numbers = _day_numbers(days), _day_numbers(layer_days)
+    purchased = _purchased_by_day(item_ids, day_numbers, layer_items, layer_day_numbers,
+                                  group_cumsum(layer_items, np.asarray(layer_quantities, dtype=np.int64)))
+    purchased_cost = _purchased_by_day(item_ids, day_numbers, layer_items, layer_day_numbers,
+                                       group_cumsum(layer_items, np.asarray(layer_costs, dtype=MONEY_DTYPE)))
+    found = purchased > 0
+    unit_costs[found] = purchased_cost[found] / purchased[found]
+    return quantities * unit_costs
+
+
+def cost_of_sales(method, item_ids, days, quantities, layer_items, layer_days, layer_quantities, layer_costs,
+                  fallback_costs):
+    """Cost of goods sold per row of (item, day, quantity), with the given costing method."""
+    if method not in COST_METHODS:
+        raise ValueError(f"Invalid costing method: {method}")
+    if method == "fifo":
+        return fifo_cost(item_ids, days, quantities, layer_items, layer_days, layer_quantities, layer_costs,
+                         fallback_costs)
+    return average_cost(item_ids, days, quantities, layer_items, layer_days, layer_quantities, layer_costs,
+                        fallback_costs)
@@ -0,0 +1,179 @@
+# business_logic/demand_forecast_v3.py
+
+from collections import namedtuple
+from datetime import date, timedelta
+import numpy as np
+from sqlalchemy import func
+from business_logic.report_columns_v3 import ReportColumns, fetch_columns
+from business_logic.report_filters_v3 import ReportFilters, parse_report_date
+from business_logic.report_manager_v3 import FinancialReportManager
+from database.models_v3 import Inventory, DailySalesSummary
+
+HISTORY_DAYS = 728  # Two years of whole weeks
+SMOOTHING = 0.3  # Weight of the newest day in the smoothed level
+SAFETY_FACTOR = 1.65  # Safety stock in standard deviations of daily demand; 1.65 covers ~95% of days
+
+# values is an items x days matrix of expected quantities, one row per item_ids entry
+Forecast = namedtuple("Forecast", ["item_ids", "dates", "values"])
+
+
+def demand_matrix(item_ids, days, quantities, items, first_day, last_day):
+    """Scatter (item, day, quantity) rows into an items x days matrix.
+
+    items are the sorted item ids of the matrix rows; rows for other items are ignored and
+    days without sales are 0.
+    """
+    first_day, last_day = np.datetime64(first_day, "D"), np.datetime64(last_day, "D")
+    days_count = int((last_day - first_day).astype(np.int64)) + 1
+    rows = np.searchsorted(items, item_ids)
+    known = rows < len(items)
+    known[known] = items[rows[known]] == np.asarray(item_ids)[known]
+    columns = (np.asarray(days, dtype="datetime64[D]") - first_day).astype(np.int64)
+    cells = rows[known] * days_count + columns[known]
+    totals = np.bincount(cells, weights=np.asarray(quantities)[known], minlength=len(items) * days_count)
+    return totals.reshape(len(items), days_count)
+
+
+def weekdays(first_day, count):
+    """Weekday (Monday = 0) of count consecutive days from first_day."""
+    return (np.datetime64(first_day, "D").astype(np.int64) + 3 + np.arange(count)) % 7  # 1970-01-01 was a Thursday
+
+
+def weekday_factors(matrix, first_day):
+    """Multiplicative weekday seasonality per item: mean demand on each weekday over the mean of all weekdays.
+
+    Items that never sold get factors of 1.
+    """
+    one_hot = np.eye(7)[weekdays(first_day, matrix.shape[1])]
+    means = (matrix @ one_hot) / np.maximum(one_hot.sum(axis=0), 1)
+    overall = means.mean(axis=1, keepdims=True)
+    return np.divide(means, overall, out=np.ones_like(means), where=overall > 0)
+
+
+def smoothed_level(series, alpha=SMOOTHING, observed=None):
+    """Exponentially smoothed level of every row at once, as of the last day.
+
+    The recursion level = alpha * x + (1 - alpha) * level unrolls to weights alpha * (1 - alpha) ** age,
+    so all rows are smoothed by one matrix-vector product. The weights are normalized over the
+    observed days (all by default), which also removes the need for a starting level.
+    """
+    if not 0 < alpha <= 1:
+        raise ValueError("Smoothing factor must be between 0 and 1.")
+    weights = alpha * (1 - alpha) ** np.arange(series.shape[1] - 1, -1, -1)
+    if observed is None:
+        return series @ weights / weights.sum() if len(weights) else np.zeros(len(series))
+    total_weights = observed @ weights
+    return np.divide(np.where(observed, series, 0) @ weights, total_weights,
+                     out=np.zeros(len(series)), where=total_weights > 0)
+
+
+def forecast_demand(matrix, first_day, horizon, alpha=SMOOTHING):
+    """Forecast the next horizon days after the matrix for every item.
+
+    The weekday pattern is divided out, the remaining series smoothed, and the pattern applied
+    again to the smoothed level for each future weekday. Weekdays an item never sells on carry
+    no information about its level and are left out of the smoothing.
+    """
+    factors = weekday_factors(matrix, first_day)
+    seasonal = factors[:, weekdays(first_day, matrix.shape[1])]
+    observed = seasonal > 0
+    deseasonalized = np.divide(matrix, seasonal, out=np.zeros_like(matrix), where=observed)
+    level = smoothed_level(deseasonalized, alpha, observed)
+    future_weekdays = weekdays(np.datetime64(first_day, "D") + matrix.shape[1], horizon)
+    return level[:, np.newaxis] * factors[:, future_weekdays]
+
+
+def reorder_quantities(forecast, on_hand, recent_demand, safety_factor=SAFETY_FACTOR):
+    """Units to order so stock covers the forecast plus safety stock.
+
+    recent_demand is an items x days matrix of recent daily sales, whose spread sets the safety
+    stock over the forecast horizon. Returns (forecast demand, safety stock, reorder quantity).
+    """
+    demand = forecast.sum(axis=1)
+    safety_stock = safety_factor * recent_demand.std(axis=1) * np.sqrt(forecast.shape[1])
+    shortfall = demand + safety_stock - np.asarray(on_hand, dtype=np.float64)
+    return demand, safety_stock, np.ceil(np.maximum(shortfall, 0)).astype(np.int64)
+
+
+class DemandForecaster:
+    """Forecasts item demand from the daily sales rollup and suggests purchase quantities.
+
+    Daily quantities per item are loaded as one items x days matrix, so smoothing and seasonality
+    run for every item at once with NumPy instead of item by item.
+    """
+
+    RECENT_DAYS = 28  # Days of demand used for the safety stock
+
+    def __init__(self, db_url="sqlite:///brew_and_bite_v3.db"):
+        self.report_manager = FinancialReportManager(db_url)
+        self.Session = self.report_manager.Session
+
+    def forecast(self, horizon=14, end=None, history_days=HISTORY_DAYS, alpha=SMOOTHING, category=None,
+                 supplier=None):
+        """Expected quantity sold per inventory item for each of the horizon days after end.
+
+        end defaults to the last day with sales; the model is fitted on the history_days before it.
+        """
+        if horizon < 1:
+            raise ValueError("Forecast horizon must be at least 1 day.")
+        if history_days < 7:
+            raise ValueError("Forecasting needs at least 7 days of history.")
+        items, first_day, matrix = self._history(end, history_days, category, supplier)[:3]
+        values = forecast_demand(matrix, first_day, horizon, alpha)
+        dates = np.datetime64(first_day, "D") + matrix.shape[1] + np.arange(horizon)
+        return Forecast(items, dates, values)
+
+    def suggest_reorders(self, cover_days=14, end=None, history_days=HISTORY_DAYS, alpha=SMOOTHING,
+                         safety_factor=SAFETY_FACTOR, category=None, supplier=None):
+        """Items whose stock will not cover the next cover_days of forecast demand plus safety stock.
+
+        Returns columns item_id, item_name, on_hand, forecast_demand, safety_stock and
+        reorder_quantity, largest reorder first.
+        """
+        if cover_days < 1:
+            raise ValueError("Cover days must be at least 1.")
+        items, first_day, matrix, names, on_hand = self._history(end, history_days, category, supplier)
+        forecast = forecast_demand(matrix, first_day, cover_days, alpha)
+        demand, safety_stock, quantities = reorder_quantities(
+            forecast, on_hand, matrix[:, -self.RECENT_DAYS:], safety_factor
+        )
+        order = np.argsort(-quantities, kind="stable")
+        order = order[quantities[order] > 0]
+        return ReportColumns({
+            "item_id": items[order],
+            "item_name": names[order],
+            "on_hand": on_hand[order],
+            "forecast_demand": demand[order],
+            "safety_stock": safety_stock[order],
+            "reorder_quantity": quantities[order]
+        })
+
+    def _history(self, end, history_days, category, supplier):
+        """Inventory items and their items x days matrix of quantities sold up to end."""
+        end = parse_report_date(end)
+        session = self.Session()
+        try:
+            if end is None:
+                last_day = session.query(func.max(DailySalesSummary.summary_date)).scalar()
+                end = parse_report_date(last_day) if last_day else date.today()
+            first_day = end - timedelta(days=history_days - 1)
+            filters = ReportFilters(first_day, end, "day", category, supplier)
+
+            inventory = session.query(Inventory.item_id, Inventory.item_name, Inventory.quantity)
+            if filters.category:
+                inventory = inventory.filter(Inventory.category == filters.category)
+            if filters.supplier is not None:
+                inventory = inventory.filter(Inventory.supplier_id == filters.supplier)
+            inventory = fetch_columns(session, inventory.order_by(Inventory.item_id), [
+                ("item_id", "int64"), ("item_name", object), ("quantity", "int64")
+            ])
+            sales = fetch_columns(session, filters.filter_sales_summary(session.query(
+                DailySalesSummary.item_id, DailySalesSummary.summary_date, DailySalesSummary.total_quantity
+            )), [("item_id", "int64"), ("date", "datetime64[D]"), ("quantity", "int64")])
+        except Exception as e:
+            raise Exception(f"Failed to load sales history: {e}")
+        finally:
+            session.close()
+
+        matrix = demand_matrix(sales.item_id, sales.date, sales.quantity, inventory.item_id, first_day, end)
+        return inventory.item_id, first_day, matrix, inventory.item_name, inventory.quantity
@@ -0,0 +1,90 @@
+# business_logic/downsampling_v3.py
+
+import numpy as np
+from business_logic.report_columns_v3 import ReportColumns
+
+# Most points a time series chart draws; longer series are downsampled before plotting
+MAX_CHART_POINTS = 400
+
+
+def choose_granularity(first_day, last_day, max_points=MAX_CHART_POINTS):
+    """Finest granularity that covers first_day..last_day (dates) in at most max_points periods."""
+    days = (last_day - first_day).days + 1
+    if days * 24 <= max_points:
+        return "hour"
+    if days <= max_points:
+        return "day"
+    if days / 7 <= max_points:
+        return "week"
+    return "month"
+
+
+def _as_float(values):
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        values = values.astype("int64")
+    return values.astype(np.float64)
+
+
+def lttb_indices(x, y, max_points):
+    """Indices kept by largest-triangle-three-buckets downsampling.
+
+    The first and last points are always kept. The points between are split into max_points - 2
+    buckets, and from each bucket the point forming the largest triangle with the previously kept
+    point and the average of the next bucket is kept, which preserves the visual shape.
+    """
+    length = len(y)
+    if max_points >= length or max_points < 3:
+        return np.arange(length)
+    x, y = _as_float(x), _as_float(y)
+
+    edges = np.linspace(1, length - 1, max_points - 1).astype(np.int64)
+    # Bucket averages from cumulative sums; the last point stands in for the bucket after the last
+    x_sums = np.concatenate(([0.0], np.cumsum(x)))
+    y_sums = np.concatenate(([0.0], np.cumsum(y)))
+    counts = edges[1:] - edges[:-1]
+    average_x = np.append((x_sums[edges[1:]] - x_sums[edges[:-1]]) / counts, x[-1])
+    average_y = np.append((y_sums[edges[1:]] - y_sums[edges[:-1]]) / counts, y[-1])
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, length - 1
+    previous = 0
+    for bucket in range(max_points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_x, next_y = average_x[bucket + 1], average_y[bucket + 1]
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def min_max_indices(y, max_points):
+    """Indices of the minimum and maximum of each of max_points // 2 equal buckets, in order.
+
+    Keeps every spike and dip, at the cost of up to two points per bucket.
+    """
+    length = len(y)
+    buckets = max_points // 2
+    if max_points >= length or buckets < 1:
+        return np.arange(length)
+    edges = np.linspace(0, length, buckets + 1).astype(np.int64)
+    bucket_ids = np.repeat(np.arange(buckets), np.diff(edges))
+    # Sorting by (bucket, value) keeps each bucket in its own slice, minimum first
+    order = np.lexsort((_as_float(y), bucket_ids))
+    return np.unique(np.concatenate((order[edges[:-1]], order[edges[1:] - 1])))
+
+
+def downsample_columns(columns, value_name, max_points=MAX_CHART_POINTS, method="lttb"):
+    """Downsample a columnar time series on its date column and value_name; all columns are kept in step."""
+    if len(columns) <= max_points:
+        return columns
+    if method == "lttb":
+        indices = lttb_indices(columns["date"], columns[value_name], max_points)
+    elif method == "minmax":
+        indices = min_max_indices(columns[value_name], max_points)
+    else:
+        raise ValueError(f"Invalid downsampling method: {method}")
+    return ReportColumns({name: columns[name][indices] for name in columns.names})
@@ -0,0 +1,228 @@
+# business_logic/duckdb_report_manager_v3.py
+
+import os
+import threading
+from datetime import datetime, timedelta
+import numpy as np
+from business_logic.comprehensive_report_v3 import (
+    DailySalesRow, CategorySalesRow, DailyExpensesRow, SupplierCategoryRow
+)
+from business_logic.report_columns_v3 import (
+    DATE_DTYPES, MONEY_DTYPE, ReportColumns, pivot_matrix, weekday_hour_matrix
+)
+from business_logic.report_manager_v3 import FinancialReportManager
+from database.models_v3 import DataVersion
+
+try:
+    import duckdb
+except ImportError:  # The DuckDB backend is optional
+    duckdb = None
+
+DUCKDB_MODES = ("attach", "mirror")
+
+# DuckDB strftime() formats giving the same period labels as the SQLite reports
+LABEL_FORMATS = {"hour": "%Y-%m-%d %H:00", "day": "%Y-%m-%d", "week": "%Y-W%W", "month": "%Y-%m"}
+
+# Columns copied into a mirror; supplier names are all reports need from users (no password hashes)
+MIRROR_QUERIES = {
+    "users": "SELECT user_id, company_name FROM source.users",
+    "inventory": "SELECT * FROM source.inventory",
+    "sales": "SELECT * FROM source.sales",
+    "expenses": "SELECT * FROM source.expenses",
+}
+
+
+class DuckDBUnavailable(Exception):
+    """DuckDB cannot read the SQLite database here, e.g. its sqlite extension cannot be downloaded offline."""
+
+
+def load_sqlite_extension(connection):
+    """Load DuckDB's sqlite extension, downloading it only when it is not installed yet."""
+    try:
+        connection.execute("LOAD sqlite")
+    except duckdb.Error:
+        try:
+            connection.execute("INSTALL sqlite")  # Needs network access, once per machine
+            connection.execute("LOAD sqlite")
+        except duckdb.Error as e:
+            raise DuckDBUnavailable(f"Failed to load the DuckDB sqlite extension: {e}")
+
+
+class DuckDBReportManager(FinancialReportManager):
+    """FinancialReportManager whose reports run on DuckDB's columnar engine.
+
+    In "attach" mode DuckDB scans the SQLite file live through its sqlite extension. In "mirror"
+    mode the tables are copied into a local DuckDB file, refreshed whenever the data version
+    changes. Reports aggregate the base tables directly, which a columnar engine does fast
+    enough without rollups. Writes, the report cache, granularity suggestions, streaming
+    exports and the snapshot comprehensive report still go through SQLite.
+    """
+
+    def __init__(self, db_url="sqlite:///brew_and_bite_v3.db", cache_size=64, mode="attach", mirror_path=None):
+        if duckdb is None:
+            raise ValueError("The DuckDB report backend requires the duckdb package.")
+        if mode not in DUCKDB_MODES:
+            raise ValueError(f"Invalid DuckDB mode: {mode}")
+        super().__init__(db_url, cache_size)
+        database = self.engine.url.database
+        if database in (None, "", ":memory:"):
+            raise ValueError("The DuckDB report backend needs a SQLite database file.")
+        self.sqlite_path = os.path.abspath(database)
+        self.mode = mode
+        self.mirror_path = mirror_path or os.path.splitext(self.sqlite_path)[0] + ".duckdb"
+        self.schema = "source" if mode == "attach" else "main"
+        self.mirror_lock = threading.Lock()
+        self.mirrored_version = None
+
+        self.duckdb = duckdb.connect(self.mirror_path if mode == "mirror" else ":memory:")
+        try:
+            load_sqlite_extension(self.duckdb)
+        except DuckDBUnavailable:
+            self.duckdb.close()
+            raise
+        escaped_path = self.sqlite_path.replace("'", "''")
+        self.duckdb.execute(f"ATTACH '{escaped_path}' AS source (TYPE sqlite, READ_ONLY)")
+        if mode == "mirror":
+            self.duckdb.execute("CREATE TABLE IF NOT EXISTS mirror_state (version BIGINT)")
+            row = self.duckdb.execute("SELECT max(version) FROM mirror_state").fetchone()
+            self.mirrored_version = row[0] if row else None
+
+    def refresh_mirror(self, version=None):
+        """Copy the SQLite tables into the DuckDB mirror unless it is already at the given data version."""
+        with self.mirror_lock:
+            if version is not None and version == self.mirrored_version:
+                return False
+            cursor = self.duckdb.cursor()
+            cursor.execute("BEGIN TRANSACTION")
+            for table, query in MIRROR_QUERIES.items():
+                cursor.execute(f"CREATE OR REPLACE TABLE main.{table} AS {query}")
+            cursor.execute("DELETE FROM mirror_state")
+            cursor.execute("INSERT INTO mirror_state VALUES (?)", [version])
+            cursor.execute("COMMIT")
+            self.mirrored_version = version
+            return True
+
+    def _cursor(self, session):
+        """A DuckDB cursor for this thread, over data at least as new as the current SQLite version."""
+        if self.mode == "mirror":
+            self.refresh_mirror(session.query(DataVersion.version).filter_by(version_id=1).scalar())
+        return self.duckdb.cursor()  # Cursors are independent connections to the same database
+
+    def _where(self, filters, date_column, category_column, supplier_column):
+        clauses, parameters = [], []
+        if filters.start:
+            clauses.append(f"{date_column} >= ?")
+            parameters.append(datetime.combine(filters.start, datetime.min.time()))
+        if filters.end:
+            clauses.append(f"{date_column} < ?")
+            parameters.append(datetime.combine(filters.end + timedelta(days=1), datetime.min.time()))
+        if filters.category:
+            clauses.append(f"{category_column} = ?")
+            parameters.append(filters.category)
+        if filters.supplier is not None:
+            clauses.append(f"{supplier_column} = ?")
+            parameters.append(filters.supplier)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), parameters
+
+    def _sales_from(self, filters):
+        # Sales of deleted items are kept under 'Unknown', as in the SQLite rollups
+        where, parameters = self._where(filters, "s.sales_date", "COALESCE(i.category, 'Unknown')", "i.supplier_id")
+        return (f" FROM {self.schema}.sales s LEFT JOIN {self.schema}.inventory i ON i.item_id = s.item_id{where}",
+                parameters)
+
+    def _expenses_from(self, filters, join_supplier=False, extra_join=""):
+        where, parameters = self._where(filters, "e.expense_date", "e.category", "e.supplier_id")
+        join = f" JOIN {self.schema}.users u ON u.user_id = e.supplier_id" if join_supplier else ""
+        return f" FROM {self.schema}.expenses e{join}{extra_join}{where}", parameters
+
+    def _per_period(self, session, filters, columnar, date_column, amount_column, from_clause, row_type):
+        source, parameters = from_clause
+        if columnar:
+            period = f"CAST({date_column} AS DATE)" if filters.granularity == "day" else \
+                f"date_trunc('{filters.granularity}', {date_column})"
+            statement = f"SELECT {period} AS date, SUM({amount_column}) AS amount{source} GROUP BY 1 ORDER BY 1"
+        else:
+            # Aggregate per hour or day first, so strftime() formats one value per group, not per row
+            bucket = f"date_trunc('hour', {date_column})" if filters.is_hourly() else f"CAST({date_column} AS DATE)"
+            statement = (
+                f"SELECT strftime(bucket, '{LABEL_FORMATS[filters.granularity]}') AS date, SUM(amount) AS amount"
+                f" FROM (SELECT {bucket} AS bucket, SUM({amount_column}) AS amount{source} GROUP BY 1)"
+                " GROUP BY 1 ORDER BY 1"
+            )
+        result = self._cursor(session).execute(statement, parameters)
+        if columnar:
+            arrays = result.fetchnumpy()
+            return ReportColumns({
+                "date": np.asarray(arrays["date"]).astype(DATE_DTYPES[filters.granularity]),
+                row_type._fields[1]: np.asarray(arrays["amount"], dtype=MONEY_DTYPE)
+            })
+        return [row_type(*row) for row in result.fetchall()]
+
+    def _query_total_sales_per_day(self, session, filters, columnar=False):
+        return self._per_period(session, filters, columnar, "s.sales_date", "s.total_cost",
+                                self._sales_from(filters), DailySalesRow)
+
+    def _query_total_expenses_per_day(self, session, filters, columnar=False):
+        return self._per_period(session, filters, columnar, "e.expense_date", "e.total_cost",
+                                self._expenses_from(filters), DailyExpensesRow)
+
+    def _query_sales_by_category(self, session, filters):
+        source, parameters = self._sales_from(filters)
+        rows = self._cursor(session).execute(
+            f"SELECT COALESCE(i.category, 'Unknown'), SUM(s.total_cost){source} GROUP BY 1 ORDER BY 1", parameters
+        ).fetchall()
+        return [CategorySalesRow(*row) for row in rows]
+
+    def _query_expense_vs_sales(self, session, filters):
+        cursor = self._cursor(session)
+        sales_source, sales_parameters = self._sales_from(filters)
+        expenses_source, expense_parameters = self._expenses_from(filters)
+        total_sales = cursor.execute(f"SELECT SUM(s.total_cost){sales_source}", sales_parameters).fetchone()[0] or 0
+        total_expenses = cursor.execute(
+            f"SELECT SUM(e.total_cost){expenses_source}", expense_parameters
+        ).fetchone()[0] or 0
+        return {
+            "total_sales": total_sales,
+            "total_expenses": total_expenses,
+            "difference": total_sales - total_expenses
+        }
+
+    def _query_expense_by_supplier_and_category(self, session, filters):
+        source, parameters = self._expenses_from(filters, join_supplier=True)
+        rows = self._cursor(session).execute(
+            f"SELECT u.company_name, e.category, SUM(e.total_cost){source} GROUP BY 1, 2 ORDER BY 1, 2", parameters
+        ).fetchall()
+        return [SupplierCategoryRow(*row) for row in rows]
+
+    def _query_expense_pivot(self, session, filters, top_n):
+        rank_source, parameters = self._expenses_from(filters, join_supplier=True)
+        pivot_source, _ = self._expenses_from(
+            filters, join_supplier=True, extra_join=" JOIN ranks r ON r.supplier_id = e.supplier_id"
+        )
+        if top_n is None:
+            row_order, row_label = "r.rank", "u.company_name"
+        else:
+            row_order = f"CASE WHEN r.rank <= {int(top_n)} THEN r.rank ELSE {int(top_n) + 1} END"
+            row_label = f"CASE WHEN r.rank <= {int(top_n)} THEN u.company_name ELSE 'Other' END"
+        arrays = self._cursor(session).execute(
+            "WITH ranks AS (SELECT e.supplier_id,"
+            f" row_number() OVER (ORDER BY SUM(e.total_cost) DESC, e.supplier_id) AS rank{rank_source}"
+            " GROUP BY e.supplier_id) "
+            f"SELECT {row_order} AS row_order, min({row_label}) AS supplier, e.category, SUM(e.total_cost) AS amount"
+            f"{pivot_source} GROUP BY 1, e.category",
+            parameters + parameters  # The ranking and the pivot filter the same rows
+        ).fetchnumpy()
+        return pivot_matrix(
+            np.asarray(arrays["row_order"]), np.asarray(arrays["supplier"], dtype=object),
+            np.asarray(arrays["category"], dtype=object), np.asarray(arrays["amount"], dtype=MONEY_DTYPE)
+        )
+
+    def _query_sales_heatmap(self, session, filters, measure):
+        source, parameters = self._sales_from(filters)
+        value = "SUM(s.total_cost)" if measure == "sales" else "count(*)"
+        # isodow() counts from Monday = 1
+        arrays = self._cursor(session).execute(
+            f"SELECT isodow(s.sales_date) - 1 AS weekday, hour(s.sales_date) AS hour, {value} AS value{source}"
+            " GROUP BY 1, 2", parameters
+        ).fetchnumpy()
+        return weekday_hour_matrix(arrays["weekday"], arrays["hour"], np.asarray(arrays["value"], dtype=MONEY_DTYPE))
@@ -0,0 +1,67 @@
+# business_logic/events_v3.py
+
+import logging
+import threading
+from collections import namedtuple
+
+# Change events the managers publish after a commit
+RowsChanged = namedtuple("RowsChanged", ["table", "keys"])  # Rows of a table inserted, updated or deleted
+StockChanged = namedtuple("StockChanged", ["item_id", "delta"])  # Only the quantity of an inventory item changed
+
+
+class EventBus:
+    """In-process publish/subscribe for change events, keyed by event type.
+
+    publish() calls the handlers synchronously on the publishing thread. A failing handler is
+    logged and skipped: the change it reports has already been committed.
+    """
+
+    def __init__(self):
+        self.handlers = {}  # Event type -> handlers, in subscription order
+        self.lock = threading.Lock()
+
+    def subscribe(self, event_type, handler):
+        with self.lock:
+            self.handlers.setdefault(event_type, []).append(handler)
+
+    def unsubscribe(self, event_type, handler):
+        with self.lock:
+            handlers = self.handlers.get(event_type, [])
+            if handler in handlers:
+                handlers.remove(handler)
+
+    def publish(self, event):
+        with self.lock:
+            handlers = list(self.handlers.get(type(event), ()))
+        for handler in handlers:
+            try:
+                handler(event)
+            except Exception:
+                logging.exception(f"Event handler failed for {event}")
+
+
+def coalesce(events):
+    """Merge a burst of events: row keys per table and stock deltas per item, in first-seen order."""
+    merged = {}
+    for event in events:
+        if isinstance(event, RowsChanged):
+            keys = merged.setdefault((RowsChanged, event.table), set())
+            keys.update(event.keys)
+        elif isinstance(event, StockChanged):
+            key = (StockChanged, event.item_id)
+            merged[key] = merged.get(key, 0) + event.delta
+        else:
+            merged[(type(event), event)] = None
+    result = []
+    for (event_type, value), data in merged.items():
+        if event_type is RowsChanged:
+            result.append(RowsChanged(value, tuple(sorted(data))))
+        elif event_type is StockChanged:
+            if data:
+                result.append(StockChanged(value, data))
+        else:
+            result.append(value)
+    return result
+
+
+event_bus = EventBus()  # The application's bus; managers publish to it unless given another
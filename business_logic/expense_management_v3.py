@@ -6,13 +6,25 @@ from database.models_v3 import Base, Expense, User  # Ensure models_v3.py is cor
 from datetime import date
 from sqlalchemy.orm import joinedload
 from database.models_v3 import Inventory
+from business_logic.pagination_v3 import PAGE_SIZE, keyset_page, list_sort, rows_by_key, starts_with
+from business_logic.change_tracking_v3 import changes_since
+from business_logic.full_text_search_v3 import SEARCH_LIMIT, search_matches
+from business_logic.events_v3 import RowsChanged, StockChanged, event_bus
 
 class ExpenseManager:
-    def __init__(self, db_url="sqlite:///brew_and_bite_v3.db"):
+    # Orders the expense lists can be sorted in, besides expense ID; each column is indexed
+    LIST_SORTS = {
+        "expense_date": Expense.expense_date,
+        "category": Expense.category,
+        "total_cost": Expense.total_cost,
+    }
+
+    def __init__(self, db_url="sqlite:///brew_and_bite_v3.db", events=event_bus):
         # Initialize SQLAlchemy engine and session
         self.engine = create_engine(db_url)
         Base.metadata.create_all(self.engine)  # Create tables if they don't exist
         self.Session = sessionmaker(bind=self.engine)
+        self.events = events  # Change events are published here after each commit
 
     def add_expense(self, expense_date, category, supplier_id, expense_name, total_items, unit_cost):
         """Add an expense to the database."""
@@ -63,14 +75,19 @@ class ExpenseManager:
                     supplier_id=supplier_id
                 )
                 session.add(new_inventory_item)###### testing this
+                inventory_item = new_inventory_item
 
-
+            session.flush()  # Assigns the new IDs
+            events = [RowsChanged("expenses", (new_expense.expense_id,)),
+                      RowsChanged("inventory", (inventory_item.item_id,))]  # Quantity and unit cost changed
             session.commit()
         except Exception as e:
             session.rollback()
             raise Exception(f"Failed to add expense: {e}")
         finally:
             session.close()
+        for event in events:
+            self.events.publish(event)
 
     def sync_expense_from_inventory(self, item_name, category, supplier_id, quantity, unit_cost): ######## testing this
         """Synchronize a new inventory item with expenses."""
@@ -89,7 +106,10 @@ class ExpenseManager:
                     total_cost=quantity * unit_cost
                 )
                 session.add(new_expense)
+                session.flush()
+                expense_id = new_expense.expense_id
                 session.commit()
+                self.events.publish(RowsChanged("expenses", (expense_id,)))
         except Exception as e:
             session.rollback()
             raise Exception(f"Failed to synchronize expense from inventory: {e}")
@@ -107,6 +127,85 @@ class ExpenseManager:
         finally:
             session.close()
 
+    def _expense_list_query(self, session, search=None, category=None, supplier_id=None):
+        """Expenses with their supplier name, as shown in the expense lists, optionally filtered.
+
+        search matches the start of the expense name, ignoring case.
+        """
+        query = session.query(
+            Expense.expense_id,
+            Expense.expense_date,
+            Expense.category,
+            User.username.label("supplier_name"),
+            Expense.expense_name,
+            Expense.total_items,
+            Expense.unit_cost,
+            Expense.total_cost
+        ).outerjoin(User, Expense.supplier_id == User.user_id)
+        if search:
+            query = query.filter(starts_with(Expense.expense_name, search))
+        if category:
+            query = query.filter(Expense.category == category)
+        if supplier_id is not None:
+            query = query.filter(Expense.supplier_id == supplier_id)
+        return query
+
+    def fetch_expenses_page(self, after=None, before=None, limit=PAGE_SIZE, search=None, category=None,
+                            supplier_id=None, sort=None, descending=False):
+        """Fetch one page of expenses with their supplier name, after or before a position in the list.
+
+        Expenses come in expense ID order, or in (sort column, expense ID) order when sort names
+        one of LIST_SORTS, in which case after and before are (sort value, expense ID) pairs.
+        """
+        session = self.Session()
+        try:
+            query = self._expense_list_query(session, search, category, supplier_id)
+            return keyset_page(query, Expense.expense_id, after, before, limit,
+                               list_sort(self.LIST_SORTS, sort), descending)
+        except ValueError:
+            raise
+        except Exception as e:
+            raise Exception(f"Failed to retrieve expenses: {e}")
+        finally:
+            session.close()
+
+    def fetch_expense_rows(self, expense_ids, search=None, category=None, supplier_id=None):
+        """Fetch the expenses with the given IDs, as in fetch_expenses_page(); deleted expenses and ones the filters exclude are left out."""
+        session = self.Session()
+        try:
+            query = self._expense_list_query(session, search, category, supplier_id)
+            return rows_by_key(query, Expense.expense_id, expense_ids)
+        except Exception as e:
+            raise Exception(f"Failed to retrieve expenses: {e}")
+        finally:
+            session.close()
+
+    def search_expenses(self, text, limit=SEARCH_LIMIT):
+        """Search expense names for words starting with each word of text, best matches first, as in fetch_expenses_page()."""
+        session = self.Session()
+        try:
+            matches = search_matches("expenses_search", text, limit)
+            if matches is None:
+                return []
+            query = self._expense_list_query(session).join(matches, matches.c.rowid == Expense.expense_id)
+            return query.order_by(matches.c.rank, Expense.expense_id).all()
+        except ValueError:
+            raise
+        except Exception as e:
+            raise Exception(f"Failed to search expenses: {e}")
+        finally:
+            session.close()
+
+    def fetch_expense_changes(self, mark=None):
+        """Expense IDs inserted, updated or deleted since mark, and the next mark; see changes_since()."""
+        session = self.Session()
+        try:
+            return changes_since(session, "expenses", Expense.expense_id, mark)
+        except Exception as e:
+            raise Exception(f"Failed to retrieve expenses: {e}")
+        finally:
+            session.close()
+
     def update_expense(self, expense_id, field, new_value):
         """Update a specific field of an expense."""
         valid_fields = ['expense_date', 'category', 'supplier_id', 'expense_name', 'total_items', 'unit_cost']
@@ -131,17 +230,21 @@ class ExpenseManager:
                 if new_value not in ['Food', 'Beverages', 'Cleaning', 'Maintenance', 'Other']:
                     raise ValueError(f"Invalid category: {new_value}")
 
+            events = [RowsChanged("expenses", (expense_id,))]
+
             # Adjust inventory if relevant fields are updated ####### testing this
             if field == 'total_items':
                 quantity_diff = new_value - expense.total_items
                 inventory_item = session.query(Inventory).filter_by(item_name=expense.expense_name).first()
                 if inventory_item:
                     inventory_item.quantity += quantity_diff
+                    events.append(StockChanged(inventory_item.item_id, quantity_diff))
 
             if field == 'expense_name':
                 inventory_item = session.query(Inventory).filter_by(item_name=expense.expense_name).first()
                 if inventory_item:
                     inventory_item.item_name = new_value ####### testing this
+                    events.append(RowsChanged("inventory", (inventory_item.item_id,)))
 
             # Update the field
             setattr(expense, field, new_value)
@@ -156,6 +259,8 @@ class ExpenseManager:
             raise Exception(f"Failed to update expense: {e}")
         finally:
             session.close()
+        for event in events:
+            self.events.publish(event)
 
     def delete_expense(self, expense_id):
         """Delete an expense from the database."""
@@ -165,12 +270,17 @@ class ExpenseManager:
             if not expense:
                 raise ValueError(f"No expense found with ID {expense_id}.")
 
+            events = [RowsChanged("expenses", (expense_id,))]
+
             # Adjust inventory ###### testing this
             inventory_item = session.query(Inventory).filter_by(item_name=expense.expense_name).first()
             if inventory_item:
                 inventory_item.quantity -= expense.total_items
                 if inventory_item.quantity <= 0:
                     session.delete(inventory_item)  # Remove item if quantity becomes zero or less ###### testing this
+                    events.append(RowsChanged("inventory", (inventory_item.item_id,)))
+                else:
+                    events.append(StockChanged(inventory_item.item_id, -expense.total_items))
 
             session.delete(expense)
             session.commit()
@@ -179,6 +289,8 @@ class ExpenseManager:
             raise Exception(f"Failed to delete expense: {e}")
         finally:
             session.close()
+        for event in events:
+            self.events.publish(event)
 
     def get_suppliers(self):
         """Fetch all suppliers from the database."""
@@ -0,0 +1,148 @@
+# business_logic/export_manager_v3.py
+
+import csv
+import os
+import time
+from sqlalchemy import Date, DateTime, Float, Integer, Numeric
+from sqlalchemy.orm import aliased
+from business_logic.report_filters_v3 import ReportFilters
+from business_logic.report_manager_v3 import FinancialReportManager
+from database.models_v3 import User, Inventory, Sales, Expense
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet export is optional
+    pyarrow = None
+
+EXPORT_FORMATS = ("csv", "parquet")
+PAGE_SIZE = 5000  # Rows held in memory at a time
+
+
+class ExportManager:
+    """Streams raw ledgers and report results to CSV or Parquet files.
+
+    Rows are read page by page from a streaming cursor and written as they arrive (CSV rows, or
+    one Parquet row group per page), so memory stays flat however many rows are exported.
+    Rows go to a ".part" file beside the target, which replaces the target only once the export
+    completes; a failed or cancelled export removes it and leaves any existing file untouched.
+    Every export returns throughput statistics.
+    """
+
+    def __init__(self, db_url="sqlite:///brew_and_bite_v3.db", page_size=PAGE_SIZE):
+        self.report_manager = FinancialReportManager(db_url)
+        self.engine = self.report_manager.engine
+        self.Session = self.report_manager.Session
+        self.page_size = page_size
+
+    def export_sales(self, path, export_format="csv", start=None, end=None, on_progress=None):
+        """Export the sales ledger, with item names, optionally limited to a date range."""
+        session = self.Session()
+        try:
+            query = session.query(
+                Sales.sales_id, Sales.item_id, Inventory.item_name, Inventory.category, Sales.quantity_sold,
+                Sales.unit_price, Sales.total_cost, Sales.sales_date
+            ).join(Inventory, Sales.item_id == Inventory.item_id)
+            query = ReportFilters(start, end).filter_sales(query).order_by(Sales.sales_id)
+            return self._export(session, query, path, export_format, on_progress)
+        finally:
+            session.close()
+
+    def export_expenses(self, path, export_format="csv", start=None, end=None, on_progress=None):
+        """Export the expense ledger, with supplier names, optionally limited to a date range."""
+        session = self.Session()
+        try:
+            supplier = aliased(User)
+            query = session.query(
+                Expense.expense_id, Expense.expense_date, Expense.category, Expense.supplier_id,
+                supplier.company_name.label("supplier"), Expense.expense_name, Expense.total_items,
+                Expense.unit_cost, Expense.total_cost
+            ).outerjoin(supplier, Expense.supplier_id == supplier.user_id)
+            query = ReportFilters(start, end).filter_expenses(query).order_by(Expense.expense_id)
+            return self._export(session, query, path, export_format, on_progress)
+        finally:
+            session.close()
+
+    def export_report(self, name, path, export_format="csv", on_progress=None, **filters):
+        """Export the rows of a report; name is one of FinancialReportManager.STREAMABLE_REPORTS."""
+        session = self.Session()
+        try:
+            query = self.report_manager.report_query(session, name, **filters)
+            return self._export(session, query, path, export_format, on_progress)
+        finally:
+            session.close()
+
+    def _export(self, session, query, path, export_format, on_progress):
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Invalid export format: {export_format}")
+        if export_format == "parquet" and pyarrow is None:
+            raise ValueError("Parquet export requires the pyarrow package.")
+
+        started = time.perf_counter()
+        result = session.connection().execution_options(yield_per=self.page_size).execute(query.statement)
+        partial_path = path + ".part"
+        try:
+            columns = list(result.keys())
+            pages = result.partitions()
+            if export_format == "csv":
+                rows = self._write_csv(partial_path, columns, pages, on_progress)
+            else:
+                types = [column["type"] for column in query.column_descriptions]
+                rows = self._write_parquet(partial_path, columns, types, pages, on_progress)
+            os.replace(partial_path, path)
+        except Exception as e:
+            # Also reached when a cancelled export's query is interrupted
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise Exception(f"Failed to export data: {e}")
+        finally:
+            result.close()
+
+        seconds = time.perf_counter() - started
+        size = os.path.getsize(path)
+        return {
+            "path": path,
+            "rows": rows,
+            "bytes": size,
+            "seconds": seconds,
+            "rows_per_second": rows / seconds if seconds else 0.0,
+            "megabytes_per_second": size / 1e6 / seconds if seconds else 0.0
+        }
+
+    def _write_csv(self, path, columns, pages, on_progress):
+        rows = 0
+        with open(path, "w", newline="", encoding="utf-8") as output:
+            writer = csv.writer(output)
+            writer.writerow(columns)
+            for page in pages:
+                writer.writerows(page)
+                rows += len(page)
+                if on_progress:
+                    on_progress(rows)
+        return rows
+
+    def _write_parquet(self, path, columns, types, pages, on_progress):
+        schema = pyarrow.schema([(name, _arrow_type(column_type)) for name, column_type in zip(columns, types)])
+        rows = 0
+        with pyarrow.parquet.ParquetWriter(path, schema) as writer:
+            for page in pages:
+                # One row group per page
+                arrays = [pyarrow.array(values, type=field.type) for values, field in zip(zip(*page), schema)]
+                writer.write_batch(pyarrow.record_batch(arrays, schema=schema))
+                rows += len(page)
+                if on_progress:
+                    on_progress(rows)
+        return rows
+
+
+def _arrow_type(column_type):
+    """Parquet column type for a SQLAlchemy column type."""
+    if isinstance(column_type, Integer):
+        return pyarrow.int64()
+    if isinstance(column_type, (Float, Numeric)):
+        return pyarrow.float64()
+    if isinstance(column_type, DateTime):
+        return pyarrow.timestamp("us")
+    if isinstance(column_type, Date):
+        return pyarrow.date32()
+    return pyarrow.string()
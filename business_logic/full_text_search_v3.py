@@ -0,0 +1,41 @@
+# business_logic/full_text_search_v3.py
+
+import re
+from sqlalchemy import column, literal_column, select, table
+
+SEARCH_LIMIT = 50  # Matches returned per search
+
+_WORD = re.compile(r"\w+")
+
+
+def match_prefixes(text):
+    """An FTS5 query matching rows with a word starting with each word of text, or None if text has no words.
+
+    Each word is quoted, so FTS5 operators and punctuation in the text are matched literally
+    instead of being parsed: "oat mil" becomes '"oat"* "mil"*'.
+    """
+    words = _WORD.findall(text or "")
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def search_matches(index, text, limit=SEARCH_LIMIT):
+    """A subquery of the (rowid, rank) of the best limit matches of text in an FTS5 index, or None if text has no words.
+
+    rank is the BM25 score, lower for better matches; join on rowid, which is the row's
+    primary key, and order by rank.
+    """
+    if limit <= 0:
+        raise ValueError("Search limit must be positive.")
+    match = match_prefixes(text)
+    if match is None:
+        return None
+    fts = table(index, column("rowid"), column("rank"))
+    return (
+        select(fts.c.rowid, fts.c.rank)
+        .where(literal_column(index).op("MATCH")(match))
+        .order_by(fts.c.rank)
+        .limit(limit)
+        .subquery()
+    )
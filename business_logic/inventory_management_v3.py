@@ -4,14 +4,25 @@ from sqlalchemy.orm import sessionmaker, joinedload
 from sqlalchemy import create_engine
 from business_logic.expense_management_v3 import ExpenseManager
 from database.models_v3 import Base, Inventory, User, Expense  # Updated import to models_v3
+from business_logic.pagination_v3 import PAGE_SIZE, keyset_page, list_sort, rows_by_key, starts_with
+from business_logic.change_tracking_v3 import changes_since
+from business_logic.full_text_search_v3 import SEARCH_LIMIT, search_matches
+from business_logic.events_v3 import RowsChanged, event_bus
 
 class InventoryManager:
-    def __init__(self, db_url="sqlite:///brew_and_bite_v3.db"):
+    # Orders the inventory lists can be sorted in, besides item ID; each column is indexed
+    LIST_SORTS = {
+        "item_name": Inventory.item_name.collate("NOCASE"),
+        "category": Inventory.category,
+    }
+
+    def __init__(self, db_url="sqlite:///brew_and_bite_v3.db", events=event_bus):
         # Initialize SQLAlchemy engine and session
         self.engine = create_engine(db_url)
         Base.metadata.create_all(self.engine)  # Create tables if they don't exist
         self.Session = sessionmaker(bind=self.engine)
-        self.expense_manager = ExpenseManager(db_url)
+        self.events = events  # Change events are published here after each commit
+        self.expense_manager = ExpenseManager(db_url, events)
 
     def add_inventory_item(self, item_name, category, quantity, unit_cost, supplier_id):
         """Add an item to the inventory."""
@@ -42,6 +53,7 @@ class InventoryManager:
             )
             session.add(new_item)
             session.commit()
+            self.events.publish(RowsChanged("inventory", (new_item.item_id,)))
 
             # Synchronize with expenses
             self.expense_manager.sync_expense_from_inventory(
@@ -70,6 +82,83 @@ class InventoryManager:
         finally:
             session.close()
 
+    def _inventory_list_query(self, session, search=None, category=None, supplier_id=None):
+        """Inventory items with their supplier name, as shown in the inventory lists, optionally filtered.
+
+        search matches the start of the item name, ignoring case.
+        """
+        query = session.query(
+            Inventory.item_id,
+            Inventory.item_name,
+            Inventory.category,
+            Inventory.quantity,
+            Inventory.unit_cost,
+            User.username.label("supplier_name")
+        ).outerjoin(User, Inventory.supplier_id == User.user_id)
+        if search:
+            query = query.filter(starts_with(Inventory.item_name, search))
+        if category:
+            query = query.filter(Inventory.category == category)
+        if supplier_id is not None:
+            query = query.filter(Inventory.supplier_id == supplier_id)
+        return query
+
+    def fetch_inventory_page(self, after=None, before=None, limit=PAGE_SIZE, search=None, category=None,
+                             supplier_id=None, sort=None, descending=False):
+        """Fetch one page of inventory items with their supplier name, after or before a position in the list.
+
+        Items come in item ID order, or in (sort column, item ID) order when sort names one of
+        LIST_SORTS, in which case after and before are (sort value, item ID) pairs.
+        """
+        session = self.Session()
+        try:
+            query = self._inventory_list_query(session, search, category, supplier_id)
+            return keyset_page(query, Inventory.item_id, after, before, limit,
+                               list_sort(self.LIST_SORTS, sort), descending)
+        except ValueError:
+            raise
+        except Exception as e:
+            raise Exception(f"Failed to fetch inventory: {e}")
+        finally:
+            session.close()
+
+    def fetch_inventory_rows(self, item_ids, search=None, category=None, supplier_id=None):
+        """Fetch the inventory items with the given IDs, as in fetch_inventory_page(); deleted items and ones the filters exclude are left out."""
+        session = self.Session()
+        try:
+            query = self._inventory_list_query(session, search, category, supplier_id)
+            return rows_by_key(query, Inventory.item_id, item_ids)
+        except Exception as e:
+            raise Exception(f"Failed to fetch inventory: {e}")
+        finally:
+            session.close()
+
+    def search_inventory(self, text, limit=SEARCH_LIMIT):
+        """Search item names for words starting with each word of text, best matches first, as in fetch_inventory_page()."""
+        session = self.Session()
+        try:
+            matches = search_matches("inventory_search", text, limit)
+            if matches is None:
+                return []
+            query = self._inventory_list_query(session).join(matches, matches.c.rowid == Inventory.item_id)
+            return query.order_by(matches.c.rank, Inventory.item_id).all()
+        except ValueError:
+            raise
+        except Exception as e:
+            raise Exception(f"Failed to search inventory: {e}")
+        finally:
+            session.close()
+
+    def fetch_inventory_changes(self, mark=None):
+        """Item IDs inserted, updated or deleted since mark, and the next mark; see changes_since()."""
+        session = self.Session()
+        try:
+            return changes_since(session, "inventory", Inventory.item_id, mark)
+        except Exception as e:
+            raise Exception(f"Failed to fetch inventory: {e}")
+        finally:
+            session.close()
+
     def update_inventory_item(self, item_id, field, new_value):
         """Update a specific field of an inventory item."""
         valid_fields = ["item_name", "category", "quantity", "unit_cost"]
@@ -97,6 +186,7 @@ class InventoryManager:
             raise Exception(f"Failed to update inventory item: {e}")
         finally:
             session.close()
+        self.events.publish(RowsChanged("inventory", (item_id,)))
 
     def delete_inventory_item(self, item_id):
         """Delete an inventory item by ID."""
@@ -115,6 +205,7 @@ class InventoryManager:
             raise Exception(f"Failed to delete inventory item: {e}")
         finally:
             session.close()
+        self.events.publish(RowsChanged("inventory", (item_id,)))
 
     def fetch_all_suppliers(self):
         """Fetch all suppliers from the database."""
@@ -0,0 +1,68 @@
+# business_logic/pagination_v3.py
+
+from sqlalchemy import and_, literal, tuple_
+
+PAGE_SIZE = 200  # Rows per page for the list tabs
+
+
+def keyset_page(query, key_column, after=None, before=None, limit=PAGE_SIZE, sort_column=None, descending=False):
+    """One page of query in key_column order: the first rows, or the rows just after or before a key.
+
+    Seeks on the key instead of using OFFSET, so a page deep into a large table costs
+    the same as the first one. Rows come back in display order either way.
+
+    With a sort_column the rows are ordered by (sort_column, key_column) and after and before
+    are (sort value, key) pairs; the column must not be NULL and wants an index, which in
+    SQLite ends with the row ID and so serves the pair. descending reverses the order.
+    """
+    if limit <= 0:
+        raise ValueError("Page size must be positive.")
+    columns = (key_column,) if sort_column is None else (sort_column, key_column)
+
+    def past(cursor, ascending):
+        """The rows after cursor in ascending order, or before it."""
+        if sort_column is None:
+            return key_column > cursor if ascending else key_column < cursor
+        value = literal(cursor[0], sort_column.type)
+        pair = tuple_(value, literal(cursor[1], key_column.type))
+        # The bound on the sort column alone is what lets SQLite seek an index on a collated column
+        if ascending:
+            return and_(sort_column >= value, tuple_(*columns) > pair)
+        return and_(sort_column <= value, tuple_(*columns) < pair)
+
+    forward = [column.desc() for column in columns] if descending else list(columns)
+    backward = list(columns) if descending else [column.desc() for column in columns]
+    if before is not None:
+        rows = query.filter(past(before, descending)).order_by(*backward).limit(limit).all()
+        return rows[::-1]
+    if after is not None:
+        query = query.filter(past(after, not descending))
+    return query.order_by(*forward).limit(limit).all()
+
+
+def list_sort(sorts, sort):
+    """The column of sorts, name -> column, to order a list by; None (key order) when sort is None."""
+    if sort is None:
+        return None
+    if sort not in sorts:
+        raise ValueError(f"Cannot sort by {sort}.")
+    return sorts[sort]
+
+
+def starts_with(column, text):
+    """column LIKE 'text%', with text taken literally. Served by an index on column COLLATE NOCASE."""
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return column.like(f"{escaped}%", escape="\\")
+
+
+def rows_by_key(query, key_column, keys, batch_size=500):
+    """The rows of query whose key is in keys, in key order; missing keys are simply left out.
+
+    Keys are looked up in batches to stay under SQLite's limit on bound parameters.
+    """
+    keys = sorted(set(keys))
+    rows = []
+    for start in range(0, len(keys), batch_size):
+        batch = keys[start:start + batch_size]
+        rows.extend(query.filter(key_column.in_(batch)).order_by(key_column).all())
+    return rows
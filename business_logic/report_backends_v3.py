@@ -0,0 +1,33 @@
+# business_logic/report_backends_v3.py
+
+import logging
+import os
+from business_logic.report_manager_v3 import FinancialReportManager
+
+# The report engine is chosen by configuration: this environment variable, or the backend argument
+REPORT_BACKEND_ENV = "BREW_AND_BITE_REPORT_BACKEND"
+REPORT_BACKENDS = ("sqlite", "duckdb", "duckdb-mirror")
+
+
+def create_report_manager(db_url="sqlite:///brew_and_bite_v3.db", backend=None, **kwargs):
+    """Create the report manager for the configured backend.
+
+    "sqlite" (the default) reads the rollup tables; "duckdb" scans the SQLite file with DuckDB;
+    "duckdb-mirror" queries a DuckDB copy of the tables kept next to the database file.
+    When DuckDB cannot load its sqlite extension, as offline before it was ever downloaded,
+    a warning is logged and the SQLite backend is used instead.
+    """
+    backend = backend or os.environ.get(REPORT_BACKEND_ENV) or "sqlite"
+    if backend not in REPORT_BACKENDS:
+        raise ValueError(f"Invalid report backend: {backend}")
+    if backend == "sqlite":
+        return FinancialReportManager(db_url, **kwargs)
+
+    # Imported here so DuckDB is only needed when it is configured
+    from business_logic.duckdb_report_manager_v3 import DuckDBReportManager, DuckDBUnavailable
+    try:
+        return DuckDBReportManager(db_url, mode="mirror" if backend == "duckdb-mirror" else "attach", **kwargs)
+    except DuckDBUnavailable as e:
+        logging.warning(f"{e}. Using the SQLite report backend instead.")
+        kwargs.pop("mirror_path", None)
+        return FinancialReportManager(db_url, **kwargs)
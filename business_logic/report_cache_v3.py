@@ -0,0 +1,60 @@
+# business_logic/report_cache_v3.py
+
+from collections import OrderedDict
+import threading
+
+
+class ReportCache:
+    """Bounded LRU cache for report results, tied to the database data version."""
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()  # Reports may be computed on worker threads
+
+    def get(self, key, version):
+        """Return (True, value) for a fresh entry, otherwise (False, None)."""
+        with self.lock:
+            if version != self.version:
+                # Something was written since the entries were computed
+                self.entries.clear()
+                self.version = version
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return True, self.entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, version, value):
+        """Store a result computed at the given data version."""
+        with self.lock:
+            if version != self.version:
+                return
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every cached result."""
+        with self.lock:
+            self.entries.clear()
+            self.version = None
+
+    def stats(self):
+        """Return hit and miss statistics."""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self.entries),
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,137 @@
+# business_logic/report_columns_v3.py
+
+from collections import namedtuple
+import numpy as np
+
+# NumPy dtypes of the columnar report results: dates by granularity, money as float64
+DATE_DTYPES = {"hour": "datetime64[h]", "day": "datetime64[D]", "week": "datetime64[D]", "month": "datetime64[D]"}
+MONEY_DTYPE = np.float64
+
+
+class ReportColumns:
+    """A report result held as one read-only NumPy array per column.
+
+    Columns are reached as attributes or items (columns.date, columns["total_sales"]);
+    all columns have the same length.
+    """
+
+    def __init__(self, columns):
+        self.names = list(columns)
+        self.columns = {}
+        for name, values in columns.items():
+            array = np.asarray(values)
+            array.flags.writeable = False  # Results are shared through the report cache
+            self.columns[name] = array
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__["columns"][name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __len__(self):
+        return len(self.columns[self.names[0]]) if self.names else 0
+
+    def __deepcopy__(self, memo):
+        return ReportColumns(self.columns)  # The read-only arrays can be shared; the name list and dict cannot
+
+    def __repr__(self):
+        return f"ReportColumns({', '.join(self.names)}; {len(self)} rows)"
+
+
+# Dense pivot: values[i, j] is the amount for rows[i] and columns[j]
+PivotMatrix = namedtuple("PivotMatrix", ["rows", "columns", "values"])
+
+
+def fetch_columns(session, query, dtypes):
+    """Run a query and load its rows straight from the DBAPI cursor into typed arrays.
+
+    dtypes is a list of (column name, NumPy dtype) pairs in select order. The rows go from
+    the cursor into one structured array without building ORM rows or Python lists per column.
+    """
+    result = session.connection().execute(query.statement)
+    try:
+        rows = result.cursor.fetchall()
+    finally:
+        result.close()
+    table = np.array(rows, dtype=np.dtype(dtypes))
+    return ReportColumns({name: np.ascontiguousarray(table[name]) for name, _ in dtypes})
+
+
+def cumulative(values):
+    """Running total of a series."""
+    return np.cumsum(values, dtype=MONEY_DTYPE)
+
+
+def moving_average(values, window):
+    """Trailing moving average; the first window - 1 points average over what is available."""
+    if window < 1:
+        raise ValueError("Moving average window must be at least 1.")
+    values = np.asarray(values, dtype=MONEY_DTYPE)
+    totals = np.concatenate(([0.0], np.cumsum(values)))
+    ends = np.arange(1, len(values) + 1)
+    starts = np.maximum(ends - window, 0)
+    return (totals[ends] - totals[starts]) / (ends - starts)
+
+
+def margin(profit, sales):
+    """Profit as a fraction of sales; 0 where there were no sales."""
+    profit = np.asarray(profit, dtype=MONEY_DTYPE)
+    sales = np.asarray(sales, dtype=MONEY_DTYPE)
+    return np.divide(profit, sales, out=np.zeros_like(profit), where=sales != 0)
+
+
+def align_series(dates_a, values_a, dates_b, values_b):
+    """Put two sorted date series on their common date axis, filling missing periods with 0."""
+    dates = np.union1d(dates_a, dates_b)
+    aligned_a = np.zeros(len(dates), dtype=MONEY_DTYPE)
+    aligned_b = np.zeros(len(dates), dtype=MONEY_DTYPE)
+    aligned_a[np.searchsorted(dates, dates_a)] = values_a
+    aligned_b[np.searchsorted(dates, dates_b)] = values_b
+    return dates, aligned_a, aligned_b
+
+
+def period_starts(dates, granularity):
+    """Bucket datetime64[D] dates by day, week (labelled by its Monday) or month (by its 1st)."""
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    if granularity == "week":
+        return dates - (dates.astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday
+    if granularity == "month":
+        return dates.astype("datetime64[M]").astype("datetime64[D]")
+    return dates
+
+
+def sum_by(keys, *values):
+    """Sorted unique keys and the sum of each values array per key."""
+    unique, inverse = np.unique(keys, return_inverse=True)
+    return (unique,) + tuple(
+        np.bincount(inverse, weights=column, minlength=len(unique)).astype(MONEY_DTYPE) for column in values
+    )
+
+
+def pivot_matrix(row_order, row_labels, column_labels, values):
+    """Scatter (row, column, value) triples into a dense matrix.
+
+    Rows are ordered by row_order and labelled by row_labels; columns are sorted labels.
+    Each (row, column) pair must occur at most once, as it does in a GROUP BY result.
+    """
+    _, first_rows, row_index = np.unique(row_order, return_index=True, return_inverse=True)
+    columns, column_index = np.unique(column_labels, return_inverse=True)
+    matrix = np.zeros((len(first_rows), len(columns)), dtype=MONEY_DTYPE)
+    matrix[row_index, column_index] = values
+    matrix.flags.writeable = False
+    return PivotMatrix(list(row_labels[first_rows]), list(columns), matrix)
+
+
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+
+def weekday_hour_matrix(weekdays, hours, values):
+    """Scatter (weekday, hour, value) triples into a 7 x 24 matrix; weekday 0 is Monday."""
+    matrix = np.zeros((len(WEEKDAYS), 24), dtype=MONEY_DTYPE)
+    matrix[np.asarray(weekdays, dtype=np.intp), np.asarray(hours, dtype=np.intp)] = values
+    matrix.flags.writeable = False
+    return PivotMatrix(list(WEEKDAYS), list(range(24)), matrix)
@@ -0,0 +1,143 @@
+# business_logic/report_filters_v3.py
+
+from datetime import date, datetime, timedelta
+from sqlalchemy import func
+from database.models_v3 import (
+    Sales, Expense, Inventory, DailySalesSummary, DailyExpenseSummary, DailyPurchaseSummary, HourlySalesSummary
+)
+
+GRANULARITIES = ("hour", "day", "week", "month")
+
+# strftime() buckets applied to the 'YYYY-MM-DD' rollup dates
+PERIOD_FORMATS = {"week": "%Y-W%W", "month": "%Y-%m"}
+
+
+def parse_report_date(value):
+    """Accept a date, a datetime or a 'YYYY-MM-DD' string; None means unbounded."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.strptime(value.strip(), "%Y-%m-%d").date()
+    except (AttributeError, ValueError):
+        raise ValueError(f"Invalid date: {value}. Use YYYY-MM-DD.")
+
+
+class ReportFilters:
+    """Date range, granularity and category/supplier filters, compiled into SQL for every report.
+
+    Day, week and month reports read the indexed rollup tables; hourly reports need the time of day,
+    so they range-scan the indexed sales_date/expense_date columns of the base tables instead.
+    """
+
+    def __init__(self, start=None, end=None, granularity="day", category=None, supplier=None):
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Invalid granularity: {granularity}")
+        self.start = parse_report_date(start)
+        self.end = parse_report_date(end)
+        if self.start and self.end and self.start > self.end:
+            raise ValueError("Start date must be on or before end date.")
+        self.granularity = granularity
+        self.category = category or None
+        self.supplier = int(supplier) if supplier not in (None, "") else None
+
+    def key(self):
+        """Hashable form of the filters, used in report cache keys."""
+        return (self.start, self.end, self.granularity, self.category, self.supplier)
+
+    def is_hourly(self):
+        return self.granularity == "hour"
+
+    def period_expression(self, summary_date_column, as_date=False):
+        """Bucket a rollup 'YYYY-MM-DD' column by the requested granularity.
+
+        With as_date=True weeks and months are labelled by their first day (a Monday, or the 1st),
+        so the labels parse as dates for columnar results.
+        """
+        if as_date and self.granularity == "week":
+            return func.date(summary_date_column, "-6 days", "weekday 1")
+        if as_date and self.granularity == "month":
+            return func.strftime("%Y-%m-01", summary_date_column)
+        if self.granularity in PERIOD_FORMATS:
+            return func.strftime(PERIOD_FORMATS[self.granularity], summary_date_column)
+        return summary_date_column
+
+    def hour_expression(self, datetime_column):
+        """Bucket a base-table timestamp by hour."""
+        return func.strftime("%Y-%m-%d %H:00", datetime_column)
+
+    def _summary_date_range(self, query, summary_date_column):
+        if self.start:
+            query = query.filter(summary_date_column >= self.start.isoformat())
+        if self.end:
+            query = query.filter(summary_date_column <= self.end.isoformat())
+        return query
+
+    def _timestamp_range(self, query, datetime_column):
+        if self.start:
+            query = query.filter(datetime_column >= datetime.combine(self.start, datetime.min.time()))
+        if self.end:
+            # Half-open range so the whole end day is included
+            end_exclusive = datetime.combine(self.end + timedelta(days=1), datetime.min.time())
+            query = query.filter(datetime_column < end_exclusive)
+        return query
+
+    def filter_sales_summary(self, query):
+        """Apply the filters to a query over daily_sales_summary."""
+        query = self._summary_date_range(query, DailySalesSummary.summary_date)
+        if self.category:
+            query = query.filter(DailySalesSummary.category == self.category)
+        if self.supplier is not None:
+            query = query.join(Inventory, Inventory.item_id == DailySalesSummary.item_id).filter(
+                Inventory.supplier_id == self.supplier
+            )
+        return query
+
+    def filter_hourly_sales_summary(self, query):
+        """Apply the date range and category to a query over hourly_sales_summary.
+
+        The hourly rollup has no item column, so supplier filters must query the sales table.
+        """
+        query = self._summary_date_range(query, HourlySalesSummary.summary_date)
+        if self.category:
+            query = query.filter(HourlySalesSummary.category == self.category)
+        return query
+
+    def filter_expense_summary(self, query):
+        """Apply the filters to a query over daily_expense_summary."""
+        query = self._summary_date_range(query, DailyExpenseSummary.summary_date)
+        if self.category:
+            query = query.filter(DailyExpenseSummary.category == self.category)
+        if self.supplier is not None:
+            query = query.filter(DailyExpenseSummary.supplier_id == self.supplier)
+        return query
+
+    def filter_purchase_summary(self, query):
+        """Apply the date range to a query over daily_purchase_summary.
+
+        Purchases are rolled up by name, so category and supplier filters go on the inventory items they are joined to.
+        """
+        return self._summary_date_range(query, DailyPurchaseSummary.summary_date)
+
+    def filter_sales(self, query):
+        """Apply the filters to a query over the sales table."""
+        query = self._timestamp_range(query, Sales.sales_date)
+        if self.category or self.supplier is not None:
+            query = query.join(Inventory, Inventory.item_id == Sales.item_id)
+            if self.category:
+                query = query.filter(Inventory.category == self.category)
+            if self.supplier is not None:
+                query = query.filter(Inventory.supplier_id == self.supplier)
+        return query
+
+    def filter_expenses(self, query):
+        """Apply the filters to a query over the expenses table."""
+        query = self._timestamp_range(query, Expense.expense_date)
+        if self.category:
+            query = query.filter(Expense.category == self.category)
+        if self.supplier is not None:
+            query = query.filter(Expense.supplier_id == self.supplier)
+        return query
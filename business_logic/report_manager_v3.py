@@ -1,86 +1,536 @@
 # business_logic/report_manager_v3.py
 
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine, func
-from database.models_v3 import Base, Sales, Expense, Inventory, User
+from sqlalchemy import create_engine, func, case, cast, literal, Integer
+from business_logic.comprehensive_report_v3 import ComprehensiveReportEngine
+from business_logic.report_cache_v3 import ReportCache
+from business_logic.report_columns_v3 import (
+    DATE_DTYPES, MONEY_DTYPE, ReportColumns, fetch_columns, cumulative, moving_average, margin, align_series,
+    pivot_matrix, weekday_hour_matrix, period_starts, sum_by
+)
+from business_logic.cost_layers_v3 import COST_METHODS, cost_of_sales
+from business_logic.downsampling_v3 import MAX_CHART_POINTS, choose_granularity
+from business_logic.report_filters_v3 import ReportFilters, parse_report_date
+from database.models_v3 import (
+    Base, User, Inventory, Sales, Expense, DailySalesSummary, DailyExpenseSummary, DailyPurchaseSummary,
+    HourlySalesSummary, DataVersion
+)
+from database.schema_objects_v3 import rebuild_rollups
+from collections import namedtuple
+from datetime import timedelta
+import copy
+import numpy as np
+
+# previous_total is the measure (sales or quantity) in the previous period; change_percent and
+# previous_rank are None when the item did not sell then
+TopItemRow = namedtuple("TopItemRow", [
+    "rank", "item_id", "item_name", "category", "total_sales", "total_quantity", "previous_total", "change",
+    "change_percent", "previous_rank"
+])
 
 
 class FinancialReportManager:
-    def __init__(self, db_url="sqlite:///brew_and_bite_v3.db"):
+    def __init__(self, db_url="sqlite:///brew_and_bite_v3.db", cache_size=64):
         self.engine = create_engine(db_url)
         Base.metadata.create_all(self.engine)  # Ensure all tables are created
         self.Session = sessionmaker(bind=self.engine)
+        self.cache = ReportCache(cache_size)
+        self.comprehensive_engine = ComprehensiveReportEngine(self)
+
+    # Reports read the daily rollup tables, which triggers keep current on every write.
+    # Their size grows with days x items, not with the number of sales or expenses.
+
+    def rebuild_rollups(self):
+        """Recompute the rollup tables from scratch, e.g. after a bulk import."""
+        with self.engine.begin() as connection:
+            rebuild_rollups(connection)
+        self.cache.clear()
 
-    def calculate_total_sales_per_day(self):
-        """Calculate total sales per day."""
+    def cache_stats(self):
+        """Return hit and miss statistics of the report cache."""
+        return self.cache.stats()
+
+    def _cached_report(self, name, params, query):
+        """Return a cached report result, running the query only if data changed since it was cached."""
         session = self.Session()
         try:
-            results = session.query(
-                func.date(Sales.sales_date).label("date"),
-                func.sum(Sales.total_cost).label("total_sales")
-            ).group_by(func.date(Sales.sales_date)).order_by(func.date(Sales.sales_date)).all()
-            return results
+            # Read the version before the data, so a concurrent write can only make the entry stale, never wrong
+            version = session.query(DataVersion.version).filter_by(version_id=1).scalar()
+            found, result = self.cache.get((name, params), version)
+            if not found:
+                result = query(session)
+                self.cache.put((name, params), version, result)
+            return copy.deepcopy(result)  # Callers get their own lists and dicts, down to nested ones
         finally:
             session.close()
 
-    def calculate_sales_by_category(self):
-        """Calculate total sales by product category."""
-        session = self.Session()
-        try:
-            results = session.query(
-                Inventory.category,
+    # Every report takes the same optional filters: start/end dates (inclusive), granularity
+    # ('hour', 'day', 'week' or 'month'), a category name and a supplier user_id.
+    # Time series reports also take columnar=True, which returns a ReportColumns of NumPy
+    # arrays (datetime64 dates, float64 amounts) instead of a list of rows.
+
+    def calculate_total_sales_per_day(self, start=None, end=None, granularity="day", category=None, supplier=None,
+                                      columnar=False):
+        """Calculate total sales per day (or per hour, week or month)."""
+        filters = ReportFilters(start, end, granularity, category, supplier)
+        return self._cached_report(
+            "sales_per_day", filters.key() + (columnar,),
+            lambda session: self._query_total_sales_per_day(session, filters, columnar)
+        )
+
+    def _query_total_sales_per_day(self, session, filters, columnar=False):
+        query = self._total_sales_per_day_query(session, filters, columnar)
+        if columnar:
+            return fetch_columns(session, query, [("date", DATE_DTYPES[filters.granularity]), ("total_sales", MONEY_DTYPE)])
+        return query.all()
+
+    def _total_sales_per_day_query(self, session, filters, as_date=False):
+        if filters.is_hourly():
+            period = filters.hour_expression(Sales.sales_date)
+            query = filters.filter_sales(session.query(
+                period.label("date"),
                 func.sum(Sales.total_cost).label("total_sales")
-            ).join(Sales, Sales.item_id == Inventory.item_id).group_by(Inventory.category).all()
-            return results
-        finally:
-            session.close()
+            ))
+        else:
+            period = filters.period_expression(DailySalesSummary.summary_date, as_date=as_date)
+            query = filters.filter_sales_summary(session.query(
+                period.label("date"),
+                func.sum(DailySalesSummary.total_sales).label("total_sales")
+            ))
+        return query.group_by(period).order_by(period)
 
-    def calculate_total_expenses_per_day(self):
-        """Calculate total expenses per day."""
-        session = self.Session()
-        try:
-            results = session.query(
-                func.date(Expense.expense_date).label("date"),
+    def calculate_sales_by_category(self, start=None, end=None, category=None, supplier=None):
+        """Calculate total sales by product category."""
+        filters = ReportFilters(start, end, "day", category, supplier)
+        return self._cached_report(
+            "sales_by_category", filters.key(), lambda session: self._query_sales_by_category(session, filters)
+        )
+
+    def _query_sales_by_category(self, session, filters):
+        return self._sales_by_category_query(session, filters).all()
+
+    def _sales_by_category_query(self, session, filters):
+        return filters.filter_sales_summary(session.query(
+            DailySalesSummary.category,
+            func.sum(DailySalesSummary.total_sales).label("total_sales")
+        )).group_by(DailySalesSummary.category)
+
+    def calculate_total_expenses_per_day(self, start=None, end=None, granularity="day", category=None, supplier=None,
+                                         columnar=False):
+        """Calculate total expenses per day (or per hour, week or month)."""
+        filters = ReportFilters(start, end, granularity, category, supplier)
+        return self._cached_report(
+            "expenses_per_day", filters.key() + (columnar,),
+            lambda session: self._query_total_expenses_per_day(session, filters, columnar)
+        )
+
+    def _query_total_expenses_per_day(self, session, filters, columnar=False):
+        query = self._total_expenses_per_day_query(session, filters, columnar)
+        if columnar:
+            return fetch_columns(
+                session, query, [("date", DATE_DTYPES[filters.granularity]), ("total_expenses", MONEY_DTYPE)]
+            )
+        return query.all()
+
+    def _total_expenses_per_day_query(self, session, filters, as_date=False):
+        if filters.is_hourly():
+            period = filters.hour_expression(Expense.expense_date)
+            query = filters.filter_expenses(session.query(
+                period.label("date"),
                 func.sum(Expense.total_cost).label("total_expenses")
-            ).group_by(func.date(Expense.expense_date)).order_by(func.date(Expense.expense_date)).all()
-            return results
-        finally:
-            session.close()
+            ))
+        else:
+            period = filters.period_expression(DailyExpenseSummary.summary_date, as_date=as_date)
+            query = filters.filter_expense_summary(session.query(
+                period.label("date"),
+                func.sum(DailyExpenseSummary.total_expenses).label("total_expenses")
+            ))
+        return query.group_by(period).order_by(period)
+
+    def suggest_granularity(self, start=None, end=None, max_points=MAX_CHART_POINTS):
+        """Pick the finest granularity that keeps a time series chart within max_points periods.
+
+        Open ends of the date range are taken from the first and last day with sales or expenses.
+        """
+        first_day, last_day = parse_report_date(start), parse_report_date(end)
+        if first_day is None or last_day is None:
+            session = self.Session()
+            try:
+                sales_span = session.query(
+                    func.min(DailySalesSummary.summary_date), func.max(DailySalesSummary.summary_date)
+                ).one()
+                expense_span = session.query(
+                    func.min(DailyExpenseSummary.summary_date), func.max(DailyExpenseSummary.summary_date)
+                ).one()
+            finally:
+                session.close()
+            days = [parse_report_date(day) for day in tuple(sales_span) + tuple(expense_span) if day]
+            if not days:
+                return "day"
+            first_day = first_day or min(days)
+            last_day = last_day or max(days)
+        if first_day > last_day:
+            return "day"
+        return choose_granularity(first_day, last_day, max_points)
+
+    def calculate_profit_series(self, start=None, end=None, granularity="day", category=None, supplier=None,
+                                window=7):
+        """Sales, expenses, profit, margin and running totals per period, as columnar arrays.
+
+        Sales and expenses are aligned on one date axis (periods without activity count as 0);
+        the derived columns are computed with vectorized NumPy operations.
+        """
+        filters = ReportFilters(start, end, granularity, category, supplier)
+        return self._cached_report(
+            "profit_series", filters.key() + (window,),
+            lambda session: self._query_profit_series(session, filters, window)
+        )
+
+    def _query_profit_series(self, session, filters, window):
+        sales = self._query_total_sales_per_day(session, filters, columnar=True)
+        expenses = self._query_total_expenses_per_day(session, filters, columnar=True)
+        dates, total_sales, total_expenses = align_series(
+            sales.date, sales.total_sales, expenses.date, expenses.total_expenses
+        )
+        profit = total_sales - total_expenses
+        return ReportColumns({
+            "date": dates,
+            "total_sales": total_sales,
+            "total_expenses": total_expenses,
+            "profit": profit,
+            "margin": margin(profit, total_sales),
+            "cumulative_sales": cumulative(total_sales),
+            "cumulative_profit": cumulative(profit),
+            "sales_moving_average": moving_average(total_sales, window)
+        })
+
+    # Cost of goods sold comes from purchase cost layers: expenses whose name is an inventory item's name,
+    # per day in the daily_purchase_summary rollup. "fifo" costs units in purchase order, "average" at
+    # the weighted average of all purchases up to the day of sale. Units sold beyond all purchases are
+    # costed at Inventory.unit_cost.
+
+    def calculate_gross_margin(self, start=None, end=None, granularity="day", category=None, supplier=None,
+                               method="fifo"):
+        """Sales, cost of goods sold, gross profit and gross margin per day, week or month, as columnar arrays."""
+        filters = self._cost_filters(start, end, granularity, category, supplier, method)
+        return self._cached_report(
+            "gross_margin", filters.key() + (method,),
+            lambda session: self._query_gross_margin(session, filters, method)
+        )
+
+    def _query_gross_margin(self, session, filters, method):
+        costs = self._query_cost_of_sales(session, filters, method)
+        dates, total_sales, cogs = sum_by(period_starts(costs.date, filters.granularity), costs.total_sales, costs.cogs)
+        gross_profit = total_sales - cogs
+        return ReportColumns({
+            "date": dates,
+            "total_sales": total_sales,
+            "cogs": cogs,
+            "gross_profit": gross_profit,
+            "gross_margin": margin(gross_profit, total_sales)
+        })
+
+    def calculate_item_margins(self, start=None, end=None, category=None, supplier=None, method="fifo"):
+        """Quantity, sales, cost of goods sold and gross margin per item, highest gross profit first."""
+        filters = self._cost_filters(start, end, "day", category, supplier, method)
+        return self._cached_report(
+            "item_margins", filters.key() + (method,),
+            lambda session: self._query_item_margins(session, filters, method)
+        )
+
+    def _query_item_margins(self, session, filters, method):
+        costs = self._query_cost_of_sales(session, filters, method)
+        item_ids, quantity, total_sales, cogs = sum_by(costs.item_id, costs.quantity, costs.total_sales, costs.cogs)
+        gross_profit = total_sales - cogs
+        order = np.argsort(-gross_profit, kind="stable")
+        names = dict(self._filter_items(session.query(Inventory.item_id, Inventory.item_name), filters).all())
+        item_ids = item_ids[order]
+        return ReportColumns({
+            "item_id": item_ids,
+            "item_name": np.array([names.get(item_id, "Unknown") for item_id in item_ids.tolist()], dtype=object),
+            "quantity": quantity[order].astype(np.int64),
+            "total_sales": total_sales[order],
+            "cogs": cogs[order],
+            "gross_profit": gross_profit[order],
+            "gross_margin": margin(gross_profit, total_sales)[order]
+        })
 
-    def calculate_expense_vs_sales(self):
+    def _cost_filters(self, start, end, granularity, category, supplier, method):
+        if method not in COST_METHODS:
+            raise ValueError(f"Invalid costing method: {method}")
+        filters = ReportFilters(start, end, granularity, category, supplier)
+        if filters.is_hourly():
+            raise ValueError("Gross margin is reported per day, week or month.")
+        return filters
+
+    def _filter_items(self, query, filters):
+        """Limit a query joined with inventory to the items matching the category and supplier filters."""
+        if filters.category:
+            query = query.filter(Inventory.category == filters.category)
+        if filters.supplier is not None:
+            query = query.filter(Inventory.supplier_id == filters.supplier)
+        return query
+
+    def _query_cost_of_sales(self, session, filters, method):
+        """Per item and day in the date range: quantity, sales and cost of goods sold.
+
+        The cost layers are kept current by triggers, but their consumption is replayed from the start
+        of the history on every computation. Any backdated sale or purchase changes which layers later
+        sales draw on, and the vectorized replay costs far less than reading the rollups it runs over
+        (see benchmarks/benchmark_cost_of_sales.py).
+        """
+        # FIFO needs everything sold before the range too, to know which layers are used up
+        history = ReportFilters(None, filters.end, "day", filters.category, filters.supplier)
+        sales = fetch_columns(session, history.filter_sales_summary(session.query(
+            DailySalesSummary.item_id, DailySalesSummary.summary_date, DailySalesSummary.total_quantity,
+            DailySalesSummary.total_sales
+        )).order_by(DailySalesSummary.item_id, DailySalesSummary.summary_date), [
+            ("item_id", "int64"), ("date", "datetime64[D]"), ("quantity", "int64"), ("total_sales", MONEY_DTYPE)
+        ])
+        # Item names are not unique: each purchase name costs the item first added under it, so
+        # items sharing a name do not each count the whole purchase history
+        purchase_items = session.query(
+            Inventory.item_name, func.min(Inventory.item_id).label("item_id")
+        ).group_by(Inventory.item_name).subquery()
+        layers = fetch_columns(session, self._filter_items(history.filter_purchase_summary(session.query(
+            Inventory.item_id, DailyPurchaseSummary.summary_date, DailyPurchaseSummary.total_items,
+            DailyPurchaseSummary.total_cost
+        ).join(purchase_items, purchase_items.c.item_name == DailyPurchaseSummary.expense_name).join(
+            Inventory, Inventory.item_id == purchase_items.c.item_id
+        )), filters).filter(
+            DailyPurchaseSummary.total_items > 0
+        ).order_by(Inventory.item_id, DailyPurchaseSummary.summary_date), [
+            ("item_id", "int64"), ("date", "datetime64[D]"), ("quantity", "int64"), ("cost", MONEY_DTYPE)
+        ])
+        unit_costs = dict(self._filter_items(session.query(Inventory.item_id, Inventory.unit_cost), filters).all())
+        fallback_costs = np.array([unit_costs.get(item_id, 0.0) for item_id in sales.item_id.tolist()],
+                                  dtype=MONEY_DTYPE)
+
+        cogs = cost_of_sales(method, sales.item_id, sales.date, sales.quantity, layers.item_id, layers.date,
+                             layers.quantity, layers.cost, fallback_costs)
+        in_range = sales.date >= np.datetime64(filters.start) if filters.start else slice(None)
+        return ReportColumns({
+            "item_id": sales.item_id[in_range],
+            "date": sales.date[in_range],
+            "quantity": sales.quantity[in_range],
+            "total_sales": sales.total_sales[in_range],
+            "cogs": cogs[in_range]
+        })
+
+    TOP_ITEM_MEASURES = ("sales", "quantity")
+
+    def calculate_top_items(self, start=None, end=None, category=None, supplier=None, top_n=10, measure="sales"):
+        """Best-selling items by sales or quantity, with their change against the previous period.
+
+        The previous period is the equally long range just before start; open ends of the range are
+        taken from the first and last day with sales. Ranking runs in SQL with LIMIT over the daily
+        rollup, so only the top rows are returned from the database.
+        """
+        if top_n < 1:
+            raise ValueError("Top N must be at least 1.")
+        if measure not in self.TOP_ITEM_MEASURES:
+            raise ValueError(f"Invalid top items measure: {measure}")
+        filters = ReportFilters(start, end, "day", category, supplier)
+        return self._cached_report(
+            "top_items", filters.key() + (top_n, measure),
+            lambda session: self._query_top_items(session, filters, top_n, measure)
+        )
+
+    def _item_totals(self, session, filters, measure):
+        """Sales and quantity per item in the filtered range, with the item's rank by the measure."""
+        total_sales = func.sum(DailySalesSummary.total_sales)
+        total_quantity = func.sum(DailySalesSummary.total_quantity)
+        ranked_by = total_sales if measure == "sales" else total_quantity
+        return filters.filter_sales_summary(session.query(
+            DailySalesSummary.item_id.label("item_id"),
+            total_sales.label("total_sales"),
+            total_quantity.label("total_quantity"),
+            func.row_number().over(order_by=(ranked_by.desc(), DailySalesSummary.item_id)).label("rank")
+        )).group_by(DailySalesSummary.item_id)
+
+    def _query_top_items(self, session, filters, top_n, measure):
+        first_day, last_day = filters.start, filters.end
+        if first_day is None or last_day is None:
+            span = session.query(func.min(DailySalesSummary.summary_date), func.max(DailySalesSummary.summary_date)).one()
+            if span[0] is None:
+                return []
+            first_day = first_day or parse_report_date(span[0])
+            last_day = last_day or parse_report_date(span[1])
+        days = (last_day - first_day).days + 1
+        current_filters = ReportFilters(first_day, last_day, "day", filters.category, filters.supplier)
+        previous_filters = ReportFilters(first_day - timedelta(days=days), first_day - timedelta(days=1), "day",
+                                         filters.category, filters.supplier)
+
+        current = self._item_totals(session, current_filters, measure).order_by("rank").limit(top_n).subquery()
+        previous = self._item_totals(session, previous_filters, measure).subquery()
+        rows = session.query(
+            current.c.rank, current.c.item_id, Inventory.item_name, Inventory.category, current.c.total_sales,
+            current.c.total_quantity, previous.c.total_sales, previous.c.total_quantity, previous.c.rank
+        ).outerjoin(Inventory, Inventory.item_id == current.c.item_id).outerjoin(
+            previous, previous.c.item_id == current.c.item_id
+        ).order_by(current.c.rank).all()
+
+        top_items = []
+        for (rank, item_id, item_name, category, total_sales, total_quantity, previous_sales, previous_quantity,
+             previous_rank) in rows:
+            total = total_sales if measure == "sales" else total_quantity
+            previous_total = (previous_sales if measure == "sales" else previous_quantity) or 0
+            top_items.append(TopItemRow(
+                rank, item_id, item_name or "Unknown", category or "Unknown", total_sales, total_quantity,
+                previous_total, total - previous_total,
+                (total - previous_total) / previous_total * 100 if previous_total else None, previous_rank
+            ))
+        return top_items
+
+    HEATMAP_MEASURES = ("sales", "transactions")
+
+    def calculate_sales_heatmap(self, start=None, end=None, category=None, supplier=None, measure="sales"):
+        """Sales per weekday and hour of day, as a PivotMatrix of 7 weekdays (Monday first) x 24 hours.
+
+        measure is "sales" (revenue) or "transactions" (number of sales). Served from the hourly
+        rollup; with a supplier filter it range-scans the indexed sales_date column instead.
+        """
+        if measure not in self.HEATMAP_MEASURES:
+            raise ValueError(f"Invalid heatmap measure: {measure}")
+        filters = ReportFilters(start, end, "hour", category, supplier)
+        return self._cached_report(
+            "sales_heatmap", filters.key() + (measure,),
+            lambda session: self._query_sales_heatmap(session, filters, measure)
+        )
+
+    def _query_sales_heatmap(self, session, filters, measure):
+        if filters.supplier is None:
+            date_column, hour = HourlySalesSummary.summary_date, HourlySalesSummary.hour
+            value = HourlySalesSummary.total_sales if measure == "sales" else HourlySalesSummary.sale_count
+            apply_filters = filters.filter_hourly_sales_summary
+        else:
+            date_column, hour = Sales.sales_date, cast(func.strftime("%H", Sales.sales_date), Integer)
+            value = Sales.total_cost if measure == "sales" else literal(1)
+            apply_filters = filters.filter_sales
+        # strftime('%w') counts from Sunday; shift so Monday is 0
+        weekday = (cast(func.strftime("%w", date_column), Integer) + 6) % 7
+        query = apply_filters(session.query(
+            weekday.label("weekday"),
+            hour.label("hour"),
+            func.sum(value).label("value")
+        ).select_from(date_column.class_)).group_by(weekday, hour)
+        columns = fetch_columns(session, query, [("weekday", "int64"), ("hour", "int64"), ("value", MONEY_DTYPE)])
+        return weekday_hour_matrix(columns.weekday, columns.hour, columns.value)
+
+    def calculate_expense_vs_sales(self, start=None, end=None, category=None, supplier=None):
         """Calculate total expenses vs total sales."""
-        session = self.Session()
-        try:
-            total_sales = session.query(func.sum(Sales.total_cost)).scalar() or 0
-            total_expenses = session.query(func.sum(Expense.total_cost)).scalar() or 0
-            difference = total_sales - total_expenses
-            return {
-                "total_sales": total_sales,
-                "total_expenses": total_expenses,
-                "difference": difference
-            }
-        finally:
-            session.close()
+        filters = ReportFilters(start, end, "day", category, supplier)
+        return self._cached_report(
+            "expense_vs_sales", filters.key(), lambda session: self._query_expense_vs_sales(session, filters)
+        )
 
-    def calculate_expense_by_supplier_and_category(self):
+    def _query_expense_vs_sales(self, session, filters):
+        total_sales = filters.filter_sales_summary(
+            session.query(func.sum(DailySalesSummary.total_sales))
+        ).scalar() or 0
+        total_expenses = filters.filter_expense_summary(
+            session.query(func.sum(DailyExpenseSummary.total_expenses))
+        ).scalar() or 0
+        difference = total_sales - total_expenses
+        return {
+            "total_sales": total_sales,
+            "total_expenses": total_expenses,
+            "difference": difference
+        }
+
+    def calculate_expense_by_supplier_and_category(self, start=None, end=None, category=None, supplier=None):
         """Calculate expenses by supplier and category."""
+        filters = ReportFilters(start, end, "day", category, supplier)
+        return self._cached_report(
+            "expense_by_supplier_and_category", filters.key(),
+            lambda session: self._query_expense_by_supplier_and_category(session, filters)
+        )
+
+    def _query_expense_by_supplier_and_category(self, session, filters):
+        return self._expense_by_supplier_and_category_query(session, filters).all()
+
+    def _expense_by_supplier_and_category_query(self, session, filters):
+        return filters.filter_expense_summary(session.query(
+            User.company_name.label("supplier"),
+            DailyExpenseSummary.category.label("category"),
+            func.sum(DailyExpenseSummary.total_expenses).label("total_expenses")
+        ).join(User, DailyExpenseSummary.supplier_id == User.user_id)).group_by(
+            User.company_name, DailyExpenseSummary.category
+        )
+
+    def calculate_expense_pivot(self, start=None, end=None, category=None, supplier=None, top_n=None):
+        """Expenses as a dense supplier x category matrix, computed by one SQL query.
+
+        Suppliers are ordered by total expenses, largest first. With top_n, only the top_n
+        suppliers keep their own row and the rest are summed into a final "Other" row.
+        Returns a PivotMatrix(rows=supplier names, columns=categories, values=float64 matrix).
+        """
+        if top_n is not None and top_n < 1:
+            raise ValueError("Top N must be at least 1.")
+        filters = ReportFilters(start, end, "day", category, supplier)
+        return self._cached_report(
+            "expense_pivot", filters.key() + (top_n,),
+            lambda session: self._query_expense_pivot(session, filters, top_n)
+        )
+
+    def _query_expense_pivot(self, session, filters, top_n):
+        total = func.sum(DailyExpenseSummary.total_expenses)
+        # Rank suppliers by their total over the filtered rows
+        ranks = filters.filter_expense_summary(session.query(
+            DailyExpenseSummary.supplier_id.label("supplier_id"),
+            func.row_number().over(order_by=(total.desc(), DailyExpenseSummary.supplier_id)).label("rank")
+        ).join(User, DailyExpenseSummary.supplier_id == User.user_id)).group_by(DailyExpenseSummary.supplier_id).subquery()
+
+        if top_n is None:
+            row_order, row_label = ranks.c.rank, User.company_name
+        else:
+            row_order = case((ranks.c.rank <= top_n, ranks.c.rank), else_=top_n + 1)
+            row_label = case((ranks.c.rank <= top_n, User.company_name), else_=literal("Other"))
+        query = filters.filter_expense_summary(session.query(
+            row_order.label("row_order"),
+            func.min(row_label).label("supplier"),
+            DailyExpenseSummary.category.label("category"),
+            total.label("total_expenses")
+        ).join(User, DailyExpenseSummary.supplier_id == User.user_id).join(
+            ranks, ranks.c.supplier_id == DailyExpenseSummary.supplier_id
+        )).group_by(row_order, DailyExpenseSummary.category)
+
+        columns = fetch_columns(session, query, [
+            ("row_order", "int64"), ("supplier", object), ("category", object), ("total_expenses", MONEY_DTYPE)
+        ])
+        return pivot_matrix(columns.row_order, columns.supplier, columns.category, columns.total_expenses)
+
+    # Reports that can be streamed row by row, e.g. by the exporters
+    STREAMABLE_REPORTS = ("sales_per_day", "sales_by_category", "expenses_per_day", "expense_by_supplier_and_category")
+
+    def report_query(self, session, name, start=None, end=None, granularity="day", category=None, supplier=None):
+        """Return the unexecuted query behind a report, for callers that stream its rows."""
+        filters = ReportFilters(start, end, granularity, category, supplier)
+        if name == "sales_per_day":
+            return self._total_sales_per_day_query(session, filters)
+        if name == "sales_by_category":
+            return self._sales_by_category_query(session, filters)
+        if name == "expenses_per_day":
+            return self._total_expenses_per_day_query(session, filters)
+        if name == "expense_by_supplier_and_category":
+            return self._expense_by_supplier_and_category_query(session, filters)
+        raise ValueError(f"Unknown report: {name}")
+
+    def get_suppliers(self):
+        """Fetch all suppliers, for the supplier filter."""
         session = self.Session()
         try:
-            results = session.query(
-                User.company_name.label("supplier"),
-                Expense.category.label("category"),
-                func.sum(Expense.total_cost).label("total_expenses")
-            ).join(User, Expense.supplier_id == User.user_id).group_by(User.company_name, Expense.category).all()
-            return results
+            return session.query(User).filter_by(registration_type="supplier").all()
+        except Exception as e:
+            raise Exception(f"Failed to fetch suppliers: {e}")
         finally:
             session.close()
 
-    def generate_comprehensive_report(self):
-        """Generate a comprehensive financial report."""
-        report = {}
-        report["sales_per_day"] = self.calculate_total_sales_per_day()
-        report["sales_by_category"] = self.calculate_sales_by_category()
-        report["expenses_per_day"] = self.calculate_total_expenses_per_day()
-        report["expense_vs_sales"] = self.calculate_expense_vs_sales()
-        report["expense_by_supplier_and_category"] = self.calculate_expense_by_supplier_and_category()
-        return report
+    def generate_comprehensive_report(self, start=None, end=None, category=None, supplier=None, parallel=False):
+        """Generate a comprehensive financial report from one consistent snapshot."""
+        filters = ReportFilters(start, end, "day", category, supplier)
+        if parallel:
+            return self.comprehensive_engine.generate(filters, parallel=True)
+        return self._cached_report(
+            "comprehensive", filters.key(), lambda session: self.comprehensive_engine.generate_snapshot(session, filters)
+        )
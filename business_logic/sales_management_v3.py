@@ -4,20 +4,32 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy import create_engine
 from database.models_v3 import Base, Sales, Inventory  # Updated import to models_v3
 from database.setup_v3 import DatabaseRepository
+from business_logic.pagination_v3 import PAGE_SIZE, keyset_page, list_sort, rows_by_key, starts_with
+from business_logic.change_tracking_v3 import changes_since
+from business_logic.events_v3 import RowsChanged, StockChanged, event_bus
 
 
 class SalesManager:
-    def __init__(self, db_url="sqlite:///brew_and_bite_v3.db"):
+    # Orders the sales lists can be sorted in, besides Sales ID; each column is indexed
+    LIST_SORTS = {
+        "sales_date": Sales.sales_date,
+        "total_cost": Sales.total_cost,
+    }
+
+    def __init__(self, db_url="sqlite:///brew_and_bite_v3.db", events=event_bus):
         # Initialize SQLAlchemy engine and session
         self.engine = create_engine(db_url)
         Base.metadata.create_all(self.engine)  # Create tables if they don't exist
         self.Session = sessionmaker(bind=self.engine)
         self.repo = DatabaseRepository()
+        self.events = events  # Change events are published here after each commit
 
 
     def register_sales(self, sales_data):
         """Register multiple sales records and update inventory quantities."""
         session = self.Session()
+        new_sales = []
+        stock_deltas = {}  # item_id -> change in quantity
         try:
             for sale in sales_data:
                 item_id = sale['item_id']
@@ -35,6 +47,7 @@ class SalesManager:
 
                 # Deduct inventory quantity
                 inventory_item.quantity -= quantity_sold
+                stock_deltas[item_id] = stock_deltas.get(item_id, 0) - quantity_sold
 
                 # Add sales record
                 new_sale = Sales(
@@ -44,7 +57,10 @@ class SalesManager:
                     total_cost=total_cost
                 )
                 session.add(new_sale)
+                new_sales.append(new_sale)
 
+            session.flush()  # Assigns the Sales IDs
+            sales_ids = tuple(sale.sales_id for sale in new_sales)
             session.commit()
         except ValueError:
             raise  # Allow ValueError to propagate
@@ -53,6 +69,9 @@ class SalesManager:
             raise Exception(f"Error registering sales: {e}")
         finally:
             session.close()
+        self.events.publish(RowsChanged("sales", sales_ids))
+        for item_id, delta in stock_deltas.items():
+            self.events.publish(StockChanged(item_id, delta))
 
     def fetch_inventory_items(self):
         """Fetch all inventory items."""
@@ -82,6 +101,49 @@ class SalesManager:
         finally:
             session.close()
 
+    def _sales_record_query(self, session, search=None):
+        """Sales records with their item name, as shown in the sales lists; search matches the start of the item name."""
+        query = session.query(
+            Sales.sales_id,
+            Inventory.item_name,
+            Sales.quantity_sold,
+            Sales.unit_price,
+            Sales.total_cost,
+            Sales.sales_date
+        ).join(Inventory, Sales.item_id == Inventory.item_id)
+        if search:
+            query = query.filter(starts_with(Inventory.item_name, search))
+        return query
+
+    def fetch_sales_page(self, after=None, before=None, limit=PAGE_SIZE, search=None, sort=None, descending=False):
+        """Fetch one page of sales records, after or before a position in the list.
+
+        Records come in Sales ID order, or in (sort column, Sales ID) order when sort names one
+        of LIST_SORTS, in which case after and before are (sort value, Sales ID) pairs.
+        """
+        session = self.Session()
+        try:
+            return keyset_page(self._sales_record_query(session, search), Sales.sales_id, after, before, limit,
+                               list_sort(self.LIST_SORTS, sort), descending)
+        finally:
+            session.close()
+
+    def fetch_sales_rows(self, sales_ids, search=None):
+        """Fetch the sales records with the given Sales IDs; deleted records and ones search excludes are left out."""
+        session = self.Session()
+        try:
+            return rows_by_key(self._sales_record_query(session, search), Sales.sales_id, sales_ids)
+        finally:
+            session.close()
+
+    def fetch_sales_changes(self, mark=None):
+        """Sales IDs inserted, updated or deleted since mark, and the next mark; see changes_since()."""
+        session = self.Session()
+        try:
+            return changes_since(session, "sales", Sales.sales_id, mark)
+        finally:
+            session.close()
+
     def delete_sales_record(self, sales_id):
         """Delete a specific sales record."""
         session = self.Session()
@@ -98,6 +160,7 @@ class SalesManager:
             raise Exception(f"Error deleting sales record: {e}")
         finally:
             session.close()
+        self.events.publish(RowsChanged("sales", (sales_id,)))
 
     def update_sales_record(self, sales_id, field, new_value):
         """Update a specific field in a sales record."""
@@ -126,3 +189,4 @@ class SalesManager:
             raise Exception(f"Error updating sales record: {e}")
         finally:
             session.close()
+        self.events.publish(RowsChanged("sales", (sales_id,)))
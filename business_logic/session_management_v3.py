@@ -0,0 +1,165 @@
+# business_logic/session_management_v3.py
+
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine
+from database.models_v3 import Base, User, UserSession
+from business_logic.events_v3 import RowsChanged, event_bus
+from datetime import datetime
+import hashlib
+import hmac
+import os
+import secrets
+import time
+
+# A session lasts for one shift unless revoked at logout
+SESSION_TTL_SECONDS = 8 * 60 * 60
+
+# The role of the built-in administrator, who logs in without a row in the users table
+SUPER_ADMIN_ROLE = "super_admin"
+
+
+class SessionManager:
+    def __init__(self, db_url="sqlite:///brew_and_bite_v3.db", secret_key=None, ttl_seconds=SESSION_TTL_SECONDS,
+                 events=event_bus):
+        # Initialize SQLAlchemy engine and session
+        self.engine = create_engine(db_url)
+        Base.metadata.create_all(self.engine)  # Create tables if they don't exist
+        self.Session = sessionmaker(bind=self.engine)
+        self.ttl_seconds = ttl_seconds
+
+        # Tokens are signed with this key; a fresh key per process invalidates old tokens on restart
+        if secret_key is None:
+            secret_key = os.environ.get("BREW_AND_BITE_SESSION_SECRET") or secrets.token_hex(32)
+        self.secret_key = secret_key.encode("utf-8") if isinstance(secret_key, str) else secret_key
+
+        # session_id -> (username, role_type, expires_at epoch seconds)
+        self.role_cache = {}
+
+        # Cached roles are dropped when a user is edited or deleted, or a session is revoked
+        # through another manager, so the next validation reads them from the database again
+        self.events = events
+        self.events.subscribe(RowsChanged, self._on_rows_changed)
+
+    def close(self):
+        """Stop following change events and release the database connections."""
+        self.events.unsubscribe(RowsChanged, self._on_rows_changed)
+        self.engine.dispose()
+
+    def _on_rows_changed(self, event):
+        if event.table == "users":
+            self.role_cache.clear()  # The event has user IDs, not usernames; user edits are rare
+        elif event.table == "sessions":
+            for session_id in event.keys:
+                self.role_cache.pop(session_id, None)
+
+    def _sign(self, session_id, expires_at):
+        """Return the HMAC signature for a session id and expiry."""
+        message = f"{session_id}.{expires_at}".encode("utf-8")
+        return hmac.new(self.secret_key, message, hashlib.sha256).hexdigest()
+
+    def _parse_token(self, token):
+        """Split a token and verify its signature. Returns (session_id, expires_at) or None."""
+        try:
+            session_id, expires_at, signature = token.split(".")
+            expires_at = int(expires_at)
+        except (AttributeError, ValueError):
+            return None
+        if not hmac.compare_digest(signature, self._sign(session_id, expires_at)):
+            return None
+        return session_id, expires_at
+
+    def create_session(self, username, role_type):
+        """Create a session for an authenticated user and return its signed token."""
+        session_id = secrets.token_hex(16)
+        expires_at = int(time.time()) + self.ttl_seconds
+
+        session = self.Session()
+        try:
+            session.add(UserSession(
+                session_id=session_id,
+                username=username,
+                role_type=role_type,
+                expires_at=datetime.fromtimestamp(expires_at)
+            ))
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            raise Exception(f"Failed to create session: {e}")
+        finally:
+            session.close()
+
+        self.role_cache[session_id] = (username, role_type, expires_at)
+        return f"{session_id}.{expires_at}.{self._sign(session_id, expires_at)}"
+
+    def validate_session(self, token):
+        """Validate a session token without a password check."""
+        parsed = self._parse_token(token)
+        if parsed is None:
+            return False, "Invalid session token."
+
+        session_id, expires_at = parsed
+        if expires_at <= time.time():
+            self.role_cache.pop(session_id, None)
+            return False, "Session expired. Please log in again."
+
+        cached = self.role_cache.get(session_id)
+        if cached is None:
+            # Cache miss: read the session and the user's current role, e.g. after the user was edited
+            session = self.Session()
+            try:
+                record = session.query(
+                    UserSession.username, UserSession.role_type.label("session_role"), User.user_id, User.role_type
+                ).outerjoin(User, User.username == UserSession.username).filter(
+                    UserSession.session_id == session_id
+                ).first()
+                if not record:
+                    return False, "Session has been revoked."
+                if record.session_role == SUPER_ADMIN_ROLE:
+                    # The super admin has no users row; their role is the one given at login
+                    cached = (record.username, SUPER_ADMIN_ROLE, expires_at)
+                elif record.user_id is None:
+                    return False, "User no longer exists. Please log in again."
+                else:
+                    cached = (record.username, record.role_type, expires_at)
+            finally:
+                session.close()
+            self.role_cache[session_id] = cached
+
+        username, role_type, _ = cached
+        return True, {"username": username, "role_type": role_type}
+
+    def revoke_session(self, token):
+        """Revoke a session so its token can no longer be used."""
+        parsed = self._parse_token(token)
+        if parsed is None:
+            return
+        session_id, _ = parsed
+        self.role_cache.pop(session_id, None)
+
+        session = self.Session()
+        try:
+            session.query(UserSession).filter_by(session_id=session_id).delete()
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            raise Exception(f"Failed to revoke session: {e}")
+        finally:
+            session.close()
+        self.events.publish(RowsChanged("sessions", (session_id,)))
+
+    def purge_expired_sessions(self):
+        """Remove expired sessions from the table and the role cache."""
+        now = time.time()
+        for session_id in [key for key, value in self.role_cache.items() if value[2] <= now]:
+            del self.role_cache[session_id]
+
+        session = self.Session()
+        try:
+            deleted = session.query(UserSession).filter(UserSession.expires_at <= datetime.fromtimestamp(now)).delete()
+            session.commit()
+            return deleted
+        except Exception as e:
+            session.rollback()
+            raise Exception(f"Failed to purge expired sessions: {e}")
+        finally:
+            session.close()
@@ -0,0 +1,14 @@
+# business_logic/shared_managers_v3.py
+
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def shared_manager(factory, *args):
+    """The manager factory(*args) builds, created on first use and shared by every screen after that.
+
+    Each manager creates an engine and runs create_all() when it is constructed, so screens that
+    need the same manager, including the main screens of different roles, get one instance.
+    Worker threads should still build their own managers.
+    """
+    return factory(*args)
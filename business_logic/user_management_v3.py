@@ -8,12 +8,23 @@ import os
 import logging
 
 from database.setup_v3 import DatabaseRepository
+from business_logic.pagination_v3 import PAGE_SIZE, keyset_page, list_sort, rows_by_key, starts_with
+from business_logic.change_tracking_v3 import changes_since
+from business_logic.full_text_search_v3 import SEARCH_LIMIT, search_matches
+from business_logic.events_v3 import RowsChanged, StockChanged, event_bus
 
 
 class UserManager:
-    def __init__(self, db_path='brew_and_bite_v3.db'):
+    # Orders the user lists can be sorted in, besides user ID; each column is indexed
+    LIST_SORTS = {
+        "username": User.username.collate("NOCASE"),
+        "registration_type": User.registration_type,
+    }
+
+    def __init__(self, db_path='brew_and_bite_v3.db', events=event_bus):
         # Initialize logging
         self.repo = DatabaseRepository(db_path)
+        self.events = events  # Change events are published here after each commit
         self.logger = logging.getLogger('UserManager')
         self.logger.setLevel(logging.DEBUG)
         if not self.logger.handlers:
@@ -60,6 +71,7 @@ class UserManager:
                 role_type, company_name, company_city, company_phone, company_category
             )
             self.repo.insert_user(user_data)  # Insert user into the database
+            self.events.publish(RowsChanged("users", self._user_ids(username)))
             return True, "User registered successfully."
         except Exception as e:
             return False, f"Registration failed: {e}"
@@ -97,6 +109,14 @@ class UserManager:
         finally:
             session.close()
 
+    def _user_ids(self, username):
+        """IDs of the users with this username, for the change event of a registration."""
+        session = self.Session()
+        try:
+            return tuple(user_id for (user_id,) in session.query(User.user_id).filter_by(username=username))
+        finally:
+            session.close()
+
     def authenticate_user(self, username, password):
         """Authenticate a user."""
         try:
@@ -133,6 +153,75 @@ class UserManager:
         finally:
             session.close()
 
+    def _user_list_query(self, session, search=None, registration_type=None):
+        """Users without their password hash, as shown in the user lists; search matches the start of the username."""
+        query = session.query(User.user_id, User.username, User.contact, User.email, User.registration_type)
+        if search:
+            query = query.filter(starts_with(User.username, search))
+        if registration_type:
+            query = query.filter(User.registration_type == registration_type)
+        return query
+
+    def fetch_users_page(self, after=None, before=None, limit=PAGE_SIZE, search=None, registration_type=None,
+                         sort=None, descending=False):
+        """Retrieve one page of users, after or before a position in the list.
+
+        Users come in user ID order, or in (sort column, user ID) order when sort names one of
+        LIST_SORTS, in which case after and before are (sort value, user ID) pairs.
+        """
+        session = self.Session()
+        try:
+            query = self._user_list_query(session, search, registration_type)
+            return keyset_page(query, User.user_id, after, before, limit, list_sort(self.LIST_SORTS, sort), descending)
+        except ValueError:
+            raise
+        except Exception as e:
+            self.logger.error(f"Error retrieving users: {e}")
+            return []
+        finally:
+            session.close()
+
+    def fetch_user_rows(self, user_ids, search=None, registration_type=None):
+        """Retrieve the users with the given IDs, as in fetch_users_page(); deleted users and ones the filters exclude are left out."""
+        session = self.Session()
+        try:
+            return rows_by_key(self._user_list_query(session, search, registration_type), User.user_id, user_ids)
+        except Exception as e:
+            self.logger.error(f"Error retrieving users: {e}")
+            raise Exception(f"Failed to retrieve users: {e}")  # An empty result would read as deleted users
+        finally:
+            session.close()
+
+    def search_suppliers(self, text, limit=SEARCH_LIMIT):
+        """Search supplier company names for words starting with each word of text, best matches first."""
+        session = self.Session()
+        try:
+            matches = search_matches("suppliers_search", text, limit)
+            if matches is None:
+                return []
+            query = session.query(
+                User.user_id, User.username, User.company_name, User.company_city, User.company_category
+            ).join(matches, matches.c.rowid == User.user_id).filter(User.registration_type == "supplier")
+            return query.order_by(matches.c.rank, User.user_id).all()
+        except ValueError:
+            raise
+        except Exception as e:
+            self.logger.error(f"Error searching suppliers: {e}")
+            raise Exception(f"Failed to search suppliers: {e}")
+        finally:
+            session.close()
+
+    def fetch_user_changes(self, mark=None):
+        """User IDs inserted, updated or deleted since mark, and the next mark; see changes_since()."""
+        session = self.Session()
+        try:
+            return changes_since(session, "users", User.user_id, mark)
+        except Exception as e:
+            self.logger.error(f"Error retrieving users: {e}")
+            raise Exception(f"Failed to retrieve users: {e}")
+        finally:
+            session.close()
+
     def update_user(self, user_id, field, new_value):
         """Update a user's information."""
         session = self.Session()
@@ -148,6 +237,7 @@ class UserManager:
 
             setattr(user, field, new_value)
             session.commit()
+            self.events.publish(RowsChanged("users", (user_id,)))
             self.logger.info(f"User ID {user_id} updated: {field} set to {new_value}")
             return True, "User updated successfully."
         except Exception as e:
@@ -166,8 +256,19 @@ class UserManager:
                 self.logger.warning(f"No user found with ID: {user_id}")
                 return False, "User not found."
 
+            # A supplier's expenses and inventory items are deleted with it, by the relationship cascades
+            expense_ids = tuple(expense.expense_id for expense in user.expenses)
+            items = [(item.item_id, item.quantity) for item in user.inventory_items]
+
             session.delete(user)
             session.commit()
+            self.events.publish(RowsChanged("users", (user_id,)))
+            if expense_ids:
+                self.events.publish(RowsChanged("expenses", expense_ids))
+            if items:
+                self.events.publish(RowsChanged("inventory", tuple(item_id for item_id, quantity in items)))
+                for item_id, quantity in items:
+                    self.events.publish(StockChanged(item_id, -quantity))
             self.logger.info(f"User ID {user_id} deleted successfully.")
             return True, "User deleted successfully."
         except Exception as e:
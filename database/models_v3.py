@@ -1,8 +1,9 @@
 # database/models_v3.py
 
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, func, CheckConstraint
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, func, CheckConstraint, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
+from database.schema_objects_v3 import create_schema_objects
 
 Base = declarative_base()
 
@@ -80,3 +81,95 @@ class Expense(Base):
 
     # Relationships
     supplier = relationship("User", back_populates="expenses")
+
+
+class UserSession(Base):
+    __tablename__ = 'sessions'  # Lowercase table name for consistency
+
+    session_id = Column(String(32), primary_key=True)  # Public part of the signed token
+    username = Column(String(50), nullable=False)
+    role_type = Column(String(50), nullable=True)  # Cached role, avoids re-authenticating
+    created_at = Column(DateTime, default=func.now(), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+
+class DailySalesSummary(Base):
+    __tablename__ = 'daily_sales_summary'  # Maintained by triggers on sales and inventory
+
+    summary_date = Column(String(10), primary_key=True)  # 'YYYY-MM-DD', same as func.date(Sales.sales_date)
+    item_id = Column(Integer, primary_key=True)
+    category = Column(String, nullable=False)  # Copied from Inventory.category
+    total_sales = Column(Float, nullable=False, default=0)
+    total_quantity = Column(Integer, nullable=False, default=0)
+    sale_count = Column(Integer, nullable=False, default=0)
+
+
+class DailyExpenseSummary(Base):
+    __tablename__ = 'daily_expense_summary'  # Maintained by triggers on expenses
+
+    summary_date = Column(String(10), primary_key=True)  # 'YYYY-MM-DD', same as func.date(Expense.expense_date)
+    category = Column(String, primary_key=True)
+    supplier_id = Column(Integer, primary_key=True)  # 0 when the expense has no supplier
+    total_expenses = Column(Float, nullable=False, default=0)
+    expense_count = Column(Integer, nullable=False, default=0)
+
+
+class DailyPurchaseSummary(Base):
+    __tablename__ = 'daily_purchase_summary'  # Maintained by triggers on expenses
+
+    summary_date = Column(String(10), primary_key=True)  # 'YYYY-MM-DD', same as func.date(Expense.expense_date)
+    expense_name = Column(String, primary_key=True)  # Matches Inventory.item_name for stock purchases
+    total_items = Column(Integer, nullable=False, default=0)
+    total_cost = Column(Float, nullable=False, default=0)
+    expense_count = Column(Integer, nullable=False, default=0)
+
+
+class HourlySalesSummary(Base):
+    __tablename__ = 'hourly_sales_summary'  # Maintained by triggers on sales and inventory
+
+    summary_date = Column(String(10), primary_key=True)  # 'YYYY-MM-DD', same as func.date(Sales.sales_date)
+    hour = Column(Integer, primary_key=True)  # 0-23
+    category = Column(String, primary_key=True)  # Copied from Inventory.category
+    total_sales = Column(Float, nullable=False, default=0)
+    total_quantity = Column(Integer, nullable=False, default=0)
+    sale_count = Column(Integer, nullable=False, default=0)
+
+
+class DataVersion(Base):
+    __tablename__ = 'data_version'  # Single row bumped by triggers on every write, used to invalidate caches
+
+    version_id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+class ChangeLog(Base):
+    __tablename__ = 'change_log'  # Updated and deleted rows, written by triggers on the source tables
+    __table_args__ = {"sqlite_autoincrement": True}  # Sequence numbers are never reused after pruning
+
+    seq = Column(Integer, primary_key=True)
+    table_name = Column(String(20), nullable=False)
+    row_id = Column(Integer, nullable=False)  # Primary key of the changed row
+
+
+class FlaggedDay(Base):
+    __tablename__ = 'flagged_days'  # Unusual days found by the anomaly detection job
+
+    series = Column(String(20), primary_key=True)  # 'sales' or 'expenses'
+    flag_date = Column(String(10), primary_key=True)  # 'YYYY-MM-DD'
+    value = Column(Float, nullable=False)  # The day's total
+    median = Column(Float, nullable=False)  # Median of the preceding window
+    mad = Column(Float, nullable=False)  # Median absolute deviation of the preceding window
+    z_score = Column(Float, nullable=False)  # Robust z-score; negative for unusually low days
+    detected_at = Column(DateTime, default=func.now(), nullable=False)
+
+
+class AnomalyRun(Base):
+    __tablename__ = 'anomaly_runs'  # Last day checked per series, for incremental runs
+
+    series = Column(String(20), primary_key=True)
+    last_date = Column(String(10), nullable=False)  # 'YYYY-MM-DD'
+    run_at = Column(DateTime, default=func.now(), nullable=False)
+
+
+# Triggers and other objects that declarative models cannot express
+event.listen(Base.metadata, "after_create", create_schema_objects)
@@ -0,0 +1,16 @@
+# rebuild_rollups.py
+
+from sqlalchemy import create_engine
+from database.models_v3 import Base
+from database.schema_objects_v3 import rebuild_rollups
+
+
+def rebuild_database_rollups(db_url="sqlite:///brew_and_bite_v3.db"):
+    engine = create_engine(db_url)
+    Base.metadata.create_all(engine)  # Creates the rollup tables and triggers on older databases
+    with engine.begin() as connection:
+        rebuild_rollups(connection)
+    print("Report rollup tables rebuilt successfully.")
+
+if __name__ == "__main__":
+    rebuild_database_rollups()
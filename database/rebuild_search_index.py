@@ -0,0 +1,19 @@
+# rebuild_search_index.py
+
+from sqlalchemy import create_engine
+from database.models_v3 import Base
+from database.schema_objects_v3 import check_search_indexes, rebuild_search_indexes
+
+
+def rebuild_database_search_index(db_url="sqlite:///brew_and_bite_v3.db"):
+    engine = create_engine(db_url)
+    Base.metadata.create_all(engine)  # Creates and fills the search indexes and their triggers on older databases
+    with engine.begin() as connection:
+        rebuild_search_indexes(connection)
+        stale = check_search_indexes(connection)
+    if stale:
+        raise Exception(f"Search indexes do not match their tables after the rebuild: {', '.join(stale)}")
+    print("Full-text search indexes rebuilt successfully.")
+
+if __name__ == "__main__":
+    rebuild_database_search_index()
@@ -0,0 +1,333 @@
+# database/schema_objects_v3.py
+
+from sqlalchemy.exc import DatabaseError
+
+# Raw SQLite objects that sit next to the declarative models: rollup triggers, their backfill,
+# the data version counter, the change log and the full-text search indexes.
+# Every statement is idempotent, so they are safe to run on each create_all().
+
+ROLLUP_TABLES = ("daily_sales_summary", "daily_expense_summary", "hourly_sales_summary", "daily_purchase_summary")
+
+# Adds or removes one sale from the daily per-item rollup
+_SALES_ROLLUP_ADD = """
+    INSERT INTO daily_sales_summary (summary_date, item_id, category, total_sales, total_quantity, sale_count)
+    VALUES (
+        date(NEW.sales_date),
+        NEW.item_id,
+        COALESCE((SELECT category FROM inventory WHERE item_id = NEW.item_id), 'Unknown'),
+        NEW.total_cost,
+        NEW.quantity_sold,
+        1
+    )
+    ON CONFLICT (summary_date, item_id) DO UPDATE SET
+        total_sales = total_sales + excluded.total_sales,
+        total_quantity = total_quantity + excluded.total_quantity,
+        sale_count = sale_count + 1;
+"""
+
+_SALES_ROLLUP_REMOVE = """
+    UPDATE daily_sales_summary
+    SET total_sales = total_sales - OLD.total_cost,
+        total_quantity = total_quantity - OLD.quantity_sold,
+        sale_count = sale_count - 1
+    WHERE summary_date = date(OLD.sales_date) AND item_id = OLD.item_id;
+    DELETE FROM daily_sales_summary
+    WHERE summary_date = date(OLD.sales_date) AND item_id = OLD.item_id AND sale_count <= 0;
+"""
+
+# Adds or removes one expense from the daily per-category/supplier rollup
+_EXPENSE_ROLLUP_ADD = """
+    INSERT INTO daily_expense_summary (summary_date, category, supplier_id, total_expenses, expense_count)
+    VALUES (date(NEW.expense_date), NEW.category, COALESCE(NEW.supplier_id, 0), NEW.total_cost, 1)
+    ON CONFLICT (summary_date, category, supplier_id) DO UPDATE SET
+        total_expenses = total_expenses + excluded.total_expenses,
+        expense_count = expense_count + 1;
+"""
+
+_EXPENSE_ROLLUP_REMOVE = """
+    UPDATE daily_expense_summary
+    SET total_expenses = total_expenses - OLD.total_cost,
+        expense_count = expense_count - 1
+    WHERE summary_date = date(OLD.expense_date) AND category = OLD.category
+      AND supplier_id = COALESCE(OLD.supplier_id, 0);
+    DELETE FROM daily_expense_summary
+    WHERE summary_date = date(OLD.expense_date) AND category = OLD.category
+      AND supplier_id = COALESCE(OLD.supplier_id, 0) AND expense_count <= 0;
+"""
+
+# Purchases per expense name and day; these are the cost layers of the inventory item with that name
+_PURCHASE_ROLLUP_ADD = """
+    INSERT INTO daily_purchase_summary (summary_date, expense_name, total_items, total_cost, expense_count)
+    VALUES (date(NEW.expense_date), NEW.expense_name, NEW.total_items, NEW.total_cost, 1)
+    ON CONFLICT (summary_date, expense_name) DO UPDATE SET
+        total_items = total_items + excluded.total_items,
+        total_cost = total_cost + excluded.total_cost,
+        expense_count = expense_count + 1;
+"""
+
+_PURCHASE_ROLLUP_REMOVE = """
+    UPDATE daily_purchase_summary
+    SET total_items = total_items - OLD.total_items,
+        total_cost = total_cost - OLD.total_cost,
+        expense_count = expense_count - 1
+    WHERE summary_date = date(OLD.expense_date) AND expense_name = OLD.expense_name;
+    DELETE FROM daily_purchase_summary
+    WHERE summary_date = date(OLD.expense_date) AND expense_name = OLD.expense_name AND expense_count <= 0;
+"""
+
+# Adds or removes one sale from the hourly per-category rollup
+_HOURLY_SALES_ROLLUP_ADD = """
+    INSERT INTO hourly_sales_summary (summary_date, hour, category, total_sales, total_quantity, sale_count)
+    VALUES (
+        date(NEW.sales_date),
+        CAST(strftime('%H', NEW.sales_date) AS INTEGER),
+        COALESCE((SELECT category FROM inventory WHERE item_id = NEW.item_id), 'Unknown'),
+        NEW.total_cost,
+        NEW.quantity_sold,
+        1
+    )
+    ON CONFLICT (summary_date, hour, category) DO UPDATE SET
+        total_sales = total_sales + excluded.total_sales,
+        total_quantity = total_quantity + excluded.total_quantity,
+        sale_count = sale_count + 1;
+"""
+
+_HOURLY_SALES_ROLLUP_REMOVE = """
+    UPDATE hourly_sales_summary
+    SET total_sales = total_sales - OLD.total_cost,
+        total_quantity = total_quantity - OLD.quantity_sold,
+        sale_count = sale_count - 1
+    WHERE summary_date = date(OLD.sales_date) AND hour = CAST(strftime('%H', OLD.sales_date) AS INTEGER)
+      AND category = COALESCE((SELECT category FROM inventory WHERE item_id = OLD.item_id), 'Unknown');
+    DELETE FROM hourly_sales_summary
+    WHERE summary_date = date(OLD.sales_date) AND hour = CAST(strftime('%H', OLD.sales_date) AS INTEGER)
+      AND sale_count <= 0;
+"""
+
+# The hourly rollup is keyed by category, so a category change moves the item's sales between rows.
+# Deleting an item moves them to 'Unknown', the category sales of missing items are looked up
+# under, so later changes to those sales find their rows.
+def _hourly_category_move(item_id, old_category, new_category):
+    item_sales = f"""
+        SELECT date(sales_date) AS summary_date, CAST(strftime('%H', sales_date) AS INTEGER) AS hour,
+               SUM(total_cost) AS total_sales, SUM(quantity_sold) AS total_quantity, COUNT(*) AS sale_count
+        FROM sales WHERE item_id = {item_id} GROUP BY 1, 2
+    """
+    return f"""
+        UPDATE hourly_sales_summary
+        SET (total_sales, total_quantity, sale_count) = (
+            SELECT hourly_sales_summary.total_sales - item.total_sales,
+                   hourly_sales_summary.total_quantity - item.total_quantity,
+                   hourly_sales_summary.sale_count - item.sale_count
+            FROM ({item_sales}) AS item
+            WHERE item.summary_date = hourly_sales_summary.summary_date AND item.hour = hourly_sales_summary.hour
+        )
+        WHERE category = {old_category} AND EXISTS (
+            SELECT 1 FROM sales WHERE item_id = {item_id}
+              AND date(sales_date) = hourly_sales_summary.summary_date
+              AND CAST(strftime('%H', sales_date) AS INTEGER) = hourly_sales_summary.hour
+        );
+        DELETE FROM hourly_sales_summary WHERE category = {old_category} AND sale_count <= 0;
+        INSERT INTO hourly_sales_summary (summary_date, hour, category, total_sales, total_quantity, sale_count)
+        SELECT item.summary_date, item.hour, {new_category}, item.total_sales, item.total_quantity, item.sale_count
+        FROM ({item_sales}) AS item WHERE true
+        ON CONFLICT (summary_date, hour, category) DO UPDATE SET
+            total_sales = total_sales + excluded.total_sales,
+            total_quantity = total_quantity + excluded.total_quantity,
+            sale_count = sale_count + excluded.sale_count;
+    """
+
+
+ROLLUP_TRIGGERS = [
+    f"""CREATE TRIGGER IF NOT EXISTS sales_rollup_insert AFTER INSERT ON sales
+    BEGIN {_SALES_ROLLUP_ADD} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS sales_rollup_delete AFTER DELETE ON sales
+    BEGIN {_SALES_ROLLUP_REMOVE} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS sales_rollup_update
+    AFTER UPDATE OF item_id, quantity_sold, total_cost, sales_date ON sales
+    BEGIN {_SALES_ROLLUP_REMOVE} {_SALES_ROLLUP_ADD} END""",
+    """CREATE TRIGGER IF NOT EXISTS inventory_rollup_category AFTER UPDATE OF category ON inventory
+    BEGIN
+        UPDATE daily_sales_summary SET category = NEW.category WHERE item_id = NEW.item_id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS sales_hourly_rollup_insert AFTER INSERT ON sales
+    BEGIN {_HOURLY_SALES_ROLLUP_ADD} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS sales_hourly_rollup_delete AFTER DELETE ON sales
+    BEGIN {_HOURLY_SALES_ROLLUP_REMOVE} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS sales_hourly_rollup_update
+    AFTER UPDATE OF item_id, quantity_sold, total_cost, sales_date ON sales
+    BEGIN {_HOURLY_SALES_ROLLUP_REMOVE} {_HOURLY_SALES_ROLLUP_ADD} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS inventory_hourly_rollup_category AFTER UPDATE OF category ON inventory
+    WHEN OLD.category IS NOT NEW.category
+    BEGIN {_hourly_category_move("NEW.item_id", "OLD.category", "NEW.category")} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS inventory_rollup_delete AFTER DELETE ON inventory
+    BEGIN
+        UPDATE daily_sales_summary SET category = 'Unknown' WHERE item_id = OLD.item_id;
+        {_hourly_category_move("OLD.item_id", "OLD.category", "'Unknown'")}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS expenses_rollup_insert AFTER INSERT ON expenses
+    BEGIN {_EXPENSE_ROLLUP_ADD} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS expenses_rollup_delete AFTER DELETE ON expenses
+    BEGIN {_EXPENSE_ROLLUP_REMOVE} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS expenses_rollup_update
+    AFTER UPDATE OF expense_date, category, supplier_id, total_cost ON expenses
+    BEGIN {_EXPENSE_ROLLUP_REMOVE} {_EXPENSE_ROLLUP_ADD} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS expenses_purchase_rollup_insert AFTER INSERT ON expenses
+    BEGIN {_PURCHASE_ROLLUP_ADD} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS expenses_purchase_rollup_delete AFTER DELETE ON expenses
+    BEGIN {_PURCHASE_ROLLUP_REMOVE} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS expenses_purchase_rollup_update
+    AFTER UPDATE OF expense_date, expense_name, total_items, total_cost ON expenses
+    BEGIN {_PURCHASE_ROLLUP_REMOVE} {_PURCHASE_ROLLUP_ADD} END""",
+]
+
+# Any write to a source table bumps the data version, so cached report results can be discarded
+VERSIONED_TABLES = ("users", "inventory", "sales", "expenses")
+
+DATA_VERSION_OBJECTS = ["INSERT OR IGNORE INTO data_version (version_id, version) VALUES (1, 0)"] + [
+    f"""CREATE TRIGGER IF NOT EXISTS {table}_version_{operation.lower()} AFTER {operation} ON {table}
+    BEGIN
+        UPDATE data_version SET version = version + 1 WHERE version_id = 1;
+    END"""
+    for table in VERSIONED_TABLES
+    for operation in ("INSERT", "UPDATE", "DELETE")
+]
+
+# Updated and deleted rows are logged for the list tabs, which apply them instead of reloading.
+# Inserts need no log entry: a new row has a key above the highest one the tab has seen.
+TRACKED_TABLES = {"users": "user_id", "inventory": "item_id", "sales": "sales_id", "expenses": "expense_id"}
+
+CHANGE_LOG_ROWS = 10000  # Entries kept when the log is pruned at startup
+
+CHANGE_LOG_OBJECTS = [
+    f"""CREATE TRIGGER IF NOT EXISTS {table}_change_log_{operation.lower()} AFTER {operation} ON {table}
+    BEGIN
+        INSERT INTO change_log (table_name, row_id) VALUES ('{table}', OLD.{key});
+    END"""
+    for table, key in TRACKED_TABLES.items()
+    for operation in ("UPDATE", "DELETE")
+] + ["CREATE INDEX IF NOT EXISTS ix_change_log_table ON change_log (table_name, seq)"]
+
+# Range scans for filtered reports; created here so that existing databases get them too
+REPORT_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_sales_sales_date ON sales (sales_date)",
+    "CREATE INDEX IF NOT EXISTS ix_expenses_expense_date ON expenses (expense_date)",
+    "CREATE INDEX IF NOT EXISTS ix_daily_sales_summary_category ON daily_sales_summary (category, summary_date)",
+    "CREATE INDEX IF NOT EXISTS ix_daily_expense_summary_supplier ON daily_expense_summary (supplier_id, summary_date)",
+    "CREATE INDEX IF NOT EXISTS ix_hourly_sales_summary_category ON hourly_sales_summary (category, summary_date)",
+    "CREATE INDEX IF NOT EXISTS ix_daily_purchase_summary_name ON daily_purchase_summary (expense_name, summary_date)",
+]
+
+# Filters and sort orders of the list tabs. An index ends with the row ID, so each one also
+# serves the (column, primary key) keyset pages; names are matched by prefix, case-insensitively.
+LIST_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_sales_item_id ON sales (item_id)",
+    "CREATE INDEX IF NOT EXISTS ix_sales_total_cost ON sales (total_cost)",
+    "CREATE INDEX IF NOT EXISTS ix_expenses_supplier_id ON expenses (supplier_id)",
+    "CREATE INDEX IF NOT EXISTS ix_expenses_category ON expenses (category)",
+    "CREATE INDEX IF NOT EXISTS ix_expenses_total_cost ON expenses (total_cost)",
+    "CREATE INDEX IF NOT EXISTS ix_expenses_expense_name ON expenses (expense_name COLLATE NOCASE)",
+    "CREATE INDEX IF NOT EXISTS ix_inventory_supplier_id ON inventory (supplier_id)",
+    "CREATE INDEX IF NOT EXISTS ix_inventory_category ON inventory (category)",
+    "CREATE INDEX IF NOT EXISTS ix_inventory_item_name ON inventory (item_name COLLATE NOCASE)",
+    "CREATE INDEX IF NOT EXISTS ix_users_registration_type ON users (registration_type)",
+    "CREATE INDEX IF NOT EXISTS ix_users_username_nocase ON users (username COLLATE NOCASE)",
+]
+
+# FTS5 word indexes for free-text search: index -> (table, primary key, indexed column).
+# They are external-content tables, holding only the index and reading names from the table
+# itself; the prefix indexes make the prefix matches of search-as-you-type cheap.
+SEARCH_INDEXES = {
+    "inventory_search": ("inventory", "item_id", "item_name"),
+    "expenses_search": ("expenses", "expense_id", "expense_name"),
+    "suppliers_search": ("users", "user_id", "company_name"),  # Only suppliers have a company name
+}
+
+
+def _search_index_objects(index, table, key, column):
+    add = f"INSERT INTO {index} (rowid, {column}) VALUES (NEW.{key}, NEW.{column});"
+    remove = f"INSERT INTO {index} ({index}, rowid, {column}) VALUES ('delete', OLD.{key}, OLD.{column});"
+    return [
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {index} USING fts5(
+            {column}, content='{table}', content_rowid='{key}',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )""",
+        f"CREATE TRIGGER IF NOT EXISTS {index}_insert AFTER INSERT ON {table} BEGIN {add} END",
+        f"CREATE TRIGGER IF NOT EXISTS {index}_delete AFTER DELETE ON {table} BEGIN {remove} END",
+        f"CREATE TRIGGER IF NOT EXISTS {index}_update AFTER UPDATE OF {column} ON {table} BEGIN {remove} {add} END",
+    ]
+
+
+SEARCH_OBJECTS = [
+    statement
+    for index, (table, key, column) in SEARCH_INDEXES.items()
+    for statement in _search_index_objects(index, table, key, column)
+]
+
+ROLLUP_REBUILD = [
+    "DELETE FROM daily_sales_summary",
+    """INSERT INTO daily_sales_summary (summary_date, item_id, category, total_sales, total_quantity, sale_count)
+    SELECT date(s.sales_date), s.item_id, COALESCE(i.category, 'Unknown'),
+           SUM(s.total_cost), SUM(s.quantity_sold), COUNT(*)
+    FROM sales s LEFT JOIN inventory i ON i.item_id = s.item_id
+    GROUP BY date(s.sales_date), s.item_id""",
+    "DELETE FROM daily_expense_summary",
+    """INSERT INTO daily_expense_summary (summary_date, category, supplier_id, total_expenses, expense_count)
+    SELECT date(expense_date), category, COALESCE(supplier_id, 0), SUM(total_cost), COUNT(*)
+    FROM expenses
+    GROUP BY date(expense_date), category, COALESCE(supplier_id, 0)""",
+    "DELETE FROM daily_purchase_summary",
+    """INSERT INTO daily_purchase_summary (summary_date, expense_name, total_items, total_cost, expense_count)
+    SELECT date(expense_date), expense_name, SUM(total_items), SUM(total_cost), COUNT(*)
+    FROM expenses
+    GROUP BY date(expense_date), expense_name""",
+    "DELETE FROM hourly_sales_summary",
+    """INSERT INTO hourly_sales_summary (summary_date, hour, category, total_sales, total_quantity, sale_count)
+    SELECT date(s.sales_date), CAST(strftime('%H', s.sales_date) AS INTEGER), COALESCE(i.category, 'Unknown'),
+           SUM(s.total_cost), SUM(s.quantity_sold), COUNT(*)
+    FROM sales s LEFT JOIN inventory i ON i.item_id = s.item_id
+    GROUP BY 1, 2, 3""",
+]
+
+
+def rebuild_rollups(connection):
+    """Recompute every rollup table from the sales and expenses tables."""
+    for statement in ROLLUP_REBUILD:
+        connection.exec_driver_sql(statement)
+
+
+def rebuild_search_indexes(connection, indexes=None):
+    """Re-read the full-text search indexes (all of them by default) from their tables and compact them."""
+    for index in SEARCH_INDEXES if indexes is None else indexes:
+        connection.exec_driver_sql(f"INSERT INTO {index} ({index}) VALUES ('rebuild')")
+        connection.exec_driver_sql(f"INSERT INTO {index} ({index}) VALUES ('optimize')")
+
+
+def check_search_indexes(connection):
+    """The names of the full-text search indexes that no longer match their tables."""
+    stale = []
+    for index in SEARCH_INDEXES:
+        try:
+            connection.exec_driver_sql(f"INSERT INTO {index} ({index}, rank) VALUES ('integrity-check', 1)")
+        except DatabaseError:
+            stale.append(index)
+    return stale
+
+
+def prune_change_log(connection, keep=CHANGE_LOG_ROWS):
+    """Drop all but the latest keep change log entries; tabs that loaded before them reload in full."""
+    connection.exec_driver_sql("DELETE FROM change_log WHERE seq <= (SELECT MAX(seq) FROM change_log) - ?", (keep,))
+
+
+def create_schema_objects(target, connection, tables=(), **kw):
+    """Create triggers and indexes after create_all() and backfill rollup tables and search indexes that were just created."""
+    existing = {row[0] for row in connection.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    for statement in (ROLLUP_TRIGGERS + DATA_VERSION_OBJECTS + CHANGE_LOG_OBJECTS + REPORT_INDEXES + LIST_INDEXES
+                      + SEARCH_OBJECTS):
+        connection.exec_driver_sql(statement)
+    prune_change_log(connection)
+    if any(table.name in ROLLUP_TABLES for table in tables):
+        rebuild_rollups(connection)
+    new_indexes = [index for index in SEARCH_INDEXES if index not in existing]
+    if new_indexes:
+        rebuild_search_indexes(connection, new_indexes)  # Index the rows of databases created before search
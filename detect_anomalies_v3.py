@@ -0,0 +1,34 @@
+# detect_anomalies_v3.py
+#
+# Flags unusual days in the daily sales and expense totals, e.g. from a nightly cron job:
+#   python detect_anomalies_v3.py            # Only the days since the last run
+#   python detect_anomalies_v3.py --full     # Rescore the whole history
+
+import argparse
+from business_logic.anomaly_detection_v3 import THRESHOLD, WINDOW, AnomalyDetector
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Flag unusual days in the Brew and Bite sales and expenses.")
+    parser.add_argument("--db-url", default="sqlite:///brew_and_bite_v3.db")
+    parser.add_argument("--series", nargs="+", choices=sorted(AnomalyDetector.SERIES), help="Series to check (default: all)")
+    parser.add_argument("--end", help="Last day to check, YYYY-MM-DD (default: yesterday)")
+    parser.add_argument("--full", action="store_true", help="Rescore every day instead of only days since the last run")
+    parser.add_argument("--window", type=int, default=WINDOW, help="Preceding days each day is compared with")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="Robust z-score that flags a day")
+    args = parser.parse_args(argv)
+
+    try:
+        detector = AnomalyDetector(args.db_url, args.window, args.threshold)
+        flagged = detector.run(args.series, args.end, incremental=not args.full)
+    except ValueError as ve:
+        parser.error(str(ve))
+    for row in flagged:
+        direction = "high" if row.z_score > 0 else "low"
+        print(f"{row.date} {row.series}: {row.value:.2f} is unusually {direction} "
+              f"(median {row.median:.2f}, z-score {row.z_score:.1f})")
+    print(f"Flagged {len(flagged)} days.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# gui/db_tasks_v3.py
+
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import TclError, messagebox
+from gui.tk_events_v3 import schedule_waiting_flushes
+
+READ_WORKERS = 4  # Reads run side by side; SQLite serves them concurrently
+TIMINGS_KEPT = 200  # Recent (action, seconds) pairs kept per DbTasks
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def _executor(write):
+    """The shared read pool, or the single writer thread that keeps writes in submission order."""
+    with _executors_lock:
+        if write not in _executors:
+            _executors[write] = ThreadPoolExecutor(
+                max_workers=1 if write else READ_WORKERS, thread_name_prefix="db-write" if write else "db-read"
+            )
+        return _executors[write]
+
+
+def report_errors(action):
+    """An on_error callback in the GUIs' style: input errors as such, anything else as 'Failed to <action>'."""
+    def on_error(error):
+        if isinstance(error, ValueError):
+            messagebox.showerror("Input Error", str(error))
+        else:
+            messagebox.showerror("Error", f"Failed to {action}: {error}")
+    return on_error
+
+
+class DbTask:
+    """One submitted call: its name, when it was submitted and its Tk-side callbacks."""
+
+    def __init__(self, name, on_done, on_error):
+        self.name = name
+        self.on_done = on_done
+        self.on_error = on_error
+        self.submitted = time.perf_counter()
+
+
+class DbTasks:
+    """Runs a GUI's database calls on worker threads and completes them on the Tk loop.
+
+    Reads share a small thread pool and writes go to a single writer thread, so writes are
+    applied in the order the user made them and never wait on each other for SQLite's lock.
+    Managers open a session per method, so each call gets its own session on the thread that
+    runs it. Finished calls are queued and delivered by an after() poll that runs only while
+    calls are outstanding. While any call is outstanding the widget shows a busy cursor, and
+    every call's time from submission to completion is kept in timings and logged.
+    """
+
+    POLL_MS = 20
+
+    def __init__(self, widget, on_busy=None, busy_cursor="watch"):
+        self.widget = widget
+        self.on_busy = on_busy  # on_busy(busy) when the first call starts and the last one finishes
+        self.busy_cursor = busy_cursor
+        self.outstanding = set()
+        self.completed = queue.Queue()
+        self.polling = False
+        self.timings = deque(maxlen=TIMINGS_KEPT)
+
+    def run(self, name, function, *args, on_done=None, on_error=None, write=False, **kwargs):
+        """Call function(*args, **kwargs) on a worker thread. Returns its Future.
+
+        on_done(result) or on_error(exception) is called on the Tk loop when it finishes;
+        errors without an on_error are logged. Pass write=True for calls that change data.
+        """
+        task = DbTask(name, on_done, on_error)
+        future = _executor(write).submit(function, *args, **kwargs)
+        if not self.outstanding:
+            self._set_busy(True)
+        self.outstanding.add(task)
+        future.add_done_callback(lambda done: self.completed.put((task, done)))
+        if not self.polling:
+            self.polling = True
+            self.widget.after(self.POLL_MS, self._poll)
+        return future
+
+    def is_busy(self):
+        return bool(self.outstanding)
+
+    def drain(self, timeout=5):
+        """Wait for the outstanding calls and complete them now, as in tests or before closing."""
+        deadline = time.monotonic() + timeout
+        while self.outstanding:
+            try:
+                task, future = self.completed.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                break
+            self._complete(task, future)
+        schedule_waiting_flushes()
+
+    def _poll(self):
+        while True:
+            try:
+                task, future = self.completed.get_nowait()
+            except queue.Empty:
+                break
+            self._complete(task, future)
+        schedule_waiting_flushes()  # Change events the completed calls published, so none wait for another call
+        if self.outstanding:
+            self.widget.after(self.POLL_MS, self._poll)
+        else:
+            self.polling = False
+
+    def _complete(self, task, future):
+        if task not in self.outstanding:
+            return
+        self.outstanding.discard(task)
+        seconds = time.perf_counter() - task.submitted
+        self.timings.append((task.name, seconds))
+        logging.info(f"{task.name}: {seconds:.3f}s")
+        if not self.outstanding:
+            self._set_busy(False)
+        error = future.exception()
+        if error is None:
+            if task.on_done is not None:
+                task.on_done(future.result())
+        elif task.on_error is not None:
+            task.on_error(error)
+        else:
+            logging.error(f"{task.name} failed: {error}")
+
+    def _set_busy(self, busy):
+        if self.busy_cursor:
+            try:
+                self.widget.configure(cursor=self.busy_cursor if busy else "")
+            except TclError:
+                pass  # The widget was destroyed while the call ran
+        if self.on_busy is not None:
+            self.on_busy(busy)
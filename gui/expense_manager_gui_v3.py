@@ -3,14 +3,49 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from business_logic.expense_management_v3 import ExpenseManager
+from business_logic.shared_managers_v3 import shared_manager
 from tkcalendar import DateEntry  # Ensure tkcalendar is installed
 from datetime import datetime
+from gui.table_model_v3 import TableModel
+from gui.virtual_tree_v3 import VirtualTree
+from gui.tk_events_v3 import TkEventQueue
+from gui.db_tasks_v3 import DbTasks, report_errors
+from gui.list_filters_v3 import ListFilters, supplier_id
+from business_logic.events_v3 import RowsChanged
+
+EXPENSE_CATEGORIES = ("Food", "Beverages", "Cleaning", "Maintenance", "Other")
+# Headings that sort the lists when clicked -> sort name; None sorts by ID
+EXPENSE_SORTS = {"ID": None, "Date": "expense_date", "Category": "category", "Total Cost": "total_cost"}
+
+
+def expense_values(expense):
+    """Treeview values for a row of ExpenseManager.fetch_expenses_page()."""
+    return (
+        expense.expense_id,
+        expense.expense_date.strftime("%Y-%m-%d"),
+        expense.category,
+        expense.supplier_name or "N/A",
+        expense.expense_name,
+        expense.total_items,
+        f"${expense.unit_cost:.2f}",
+        f"${expense.total_cost:.2f}"
+    )
 
 
 class ExpenseManagerGUI(ttk.Frame):
     def __init__(self, parent, *args, **kwargs):
         super().__init__(parent, *args, **kwargs)
-        self.manager = ExpenseManager()
+        self.manager = shared_manager(ExpenseManager)
+        self.tasks = DbTasks(self)  # Database calls run off the Tk thread
+        self.expenses_model = TableModel.of_manager(lambda: self.manager, "fetch_expenses_page", "fetch_expense_rows",
+                                                    "fetch_expense_changes")  # Shared by the list tabs
+        self.expense_filters = ListFilters(self.expenses_model, self.tasks, "Load expenses", report_errors("load expenses"), {
+            "search": ("Name", None, str),
+            "category": ("Category", EXPENSE_CATEGORIES, str),
+            "supplier_id": ("Supplier", (), supplier_id),
+        })
+        self.events = TkEventQueue(self)  # Changes committed from any tab
+        self.events.subscribe(RowsChanged, self.on_rows_changed)
         self.initialize_gui()
 
     def initialize_gui(self):
@@ -36,7 +71,7 @@ class ExpenseManagerGUI(ttk.Frame):
         tk.Label(frame, text="Category:", font=("Arial", 12)).grid(row=1, column=0, padx=10, pady=5, sticky="e")
         self.category_var = tk.StringVar()
         category_menu = ttk.Combobox(frame, textvariable=self.category_var, state="readonly", font=("Arial", 12))
-        category_menu['values'] = ("Food", "Beverages", "Cleaning", "Maintenance", "Other")
+        category_menu['values'] = EXPENSE_CATEGORIES
         category_menu.grid(row=1, column=1, padx=10, pady=5, sticky="w")
         category_menu.current(0)
 
@@ -96,29 +131,22 @@ class ExpenseManagerGUI(ttk.Frame):
             self.total_cost_var.set(f"{total_cost:.2f}")
 
             # Add expense via ExpenseManager
-            self.manager.add_expense(
+            self.tasks.run(
+                "Add expense", self.manager.add_expense,
                 expense_date=expense_date,
                 category=category,
                 supplier_id=supplier_id,
                 expense_name=expense_name,
                 total_items=total_items,
-                unit_cost=unit_cost
+                unit_cost=unit_cost,
+                write=True, on_done=self.on_expense_added, on_error=report_errors("add expense")
             )
-
-            # Locate InventoryManagementGUI and refresh inventory
-            for tab in self.master.winfo_children():
-                if isinstance(tab, ttk.Notebook):
-                    for child in tab.winfo_children():
-                        if isinstance(child, InventoryManagementGUI):
-                            child.load_inventory()
-                            break
-
-            messagebox.showinfo("Success", "Expense added successfully!")
-            self.clear_add_expense_fields()
         except ValueError as ve:
             messagebox.showerror("Input Error", str(ve))
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to add expense: {e}")
+
+    def on_expense_added(self, expense):
+        messagebox.showinfo("Success", "Expense added successfully!")
+        self.clear_add_expense_fields()
 
     def clear_add_expense_fields(self):
         """Clear the fields after adding an expense."""
@@ -130,15 +158,29 @@ class ExpenseManagerGUI(ttk.Frame):
         self.unit_cost_entry.delete(0, tk.END)
         self.total_cost_var.set("0.00")
 
+    def reset(self):
+        """Clear the forms and list filters for the next user."""
+        self.clear_add_expense_fields()
+        self.update_field_var.set("")
+        self.update_value_entry.delete(0, tk.END)
+        self.expense_filters.reset()
+
     def refresh_suppliers(self):
         """Load suppliers into the dropdown."""
-        try:
-            suppliers = self.manager.get_suppliers()
-            supplier_names = [f"{supplier.user_id}: {supplier.username}" for supplier in suppliers]
-            self.supplier_menu['values'] = supplier_names
-            self.supplier_var.set("")  # Clear current selection
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load suppliers: {e}")
+        self.tasks.run("Load suppliers", self.manager.get_suppliers, on_done=self.show_suppliers,
+                       on_error=report_errors("load suppliers"))
+
+    def show_suppliers(self, suppliers):
+        supplier_names = [f"{supplier.user_id}: {supplier.username}" for supplier in suppliers]
+        self.supplier_menu['values'] = supplier_names
+        self.supplier_var.set("")  # Clear current selection
+        self.expense_filters.set_values("supplier_id", supplier_names)
+
+    def on_rows_changed(self, event):
+        """Apply expense changes committed from any tab to the expense lists."""
+        if event.table != "expenses":
+            return
+        self.expenses_model.sync_in(self.tasks, "Sync expenses", on_error=report_errors("load expenses"))
 
     # -------------------------------- View Expenses Tab --------------------------------
     def create_view_expenses_tab(self, notebook):
@@ -146,34 +188,22 @@ class ExpenseManagerGUI(ttk.Frame):
         notebook.add(frame, text="View Expenses")
 
         columns = ("ID", "Date", "Category", "Supplier", "Expense Name", "Total Items", "Unit Cost", "Total Cost")
-        self.expenses_tree = ttk.Treeview(frame, columns=columns, show="headings")
+        self.expenses_tree = VirtualTree(frame, self.expenses_model.fetch_page, expense_values, columns=columns,
+                                         key=self.expenses_model.cursor, order=self.expenses_model.order,
+                                         on_error=lambda e: messagebox.showerror("Error", f"Failed to load expenses: {e}"))
+        self.expenses_model.subscribe(self.expenses_tree)
         for col in columns:
             self.expenses_tree.heading(col, text=col)
             self.expenses_tree.column(col, anchor="center", width=100)
+        self.expense_filters.bind_headings(self.expenses_tree, EXPENSE_SORTS)
+        self.expense_filters.add_bar(frame).pack(fill="x", padx=10, pady=(10, 0))
         self.expenses_tree.pack(expand=True, fill="both", padx=10, pady=10)
 
         ttk.Button(frame, text="Refresh", command=self.load_expenses).pack(pady=5)
 
     def load_expenses(self):
-        """Load all expenses into the Treeview."""
-        try:
-            for row in self.expenses_tree.get_children():
-                self.expenses_tree.delete(row)
-            expenses = self.manager.get_all_expenses()
-            for expense in expenses:
-                supplier_name = expense.supplier.username if expense.supplier else "N/A"
-                self.expenses_tree.insert("", "end", values=(
-                    expense.expense_id,
-                    expense.expense_date.strftime("%Y-%m-%d"),
-                    expense.category,
-                    supplier_name,
-                    expense.expense_name,
-                    expense.total_items,
-                    f"${expense.unit_cost:.2f}",
-                    f"${expense.total_cost:.2f}"
-                ))
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load expenses: {e}")
+        """Reload the expense lists of every tab; they share the pages read."""
+        self.expenses_model.reload_in(self.tasks, "Load expenses", on_error=report_errors("load expenses"))
 
     # -------------------------------- Update Expense Tab --------------------------------
     def create_update_expense_tab(self, notebook):
@@ -181,10 +211,15 @@ class ExpenseManagerGUI(ttk.Frame):
         notebook.add(frame, text="Update Expense")
 
         columns = ("ID", "Date", "Category", "Supplier", "Expense Name", "Total Items", "Unit Cost", "Total Cost")
-        self.update_expenses_tree = ttk.Treeview(frame, columns=columns, show="headings")
+        self.update_expenses_tree = VirtualTree(frame, self.expenses_model.fetch_page, expense_values, columns=columns,
+                                                key=self.expenses_model.cursor, order=self.expenses_model.order,
+                                                on_error=lambda e: messagebox.showerror("Error", f"Failed to load expenses for update: {e}"))
+        self.expenses_model.subscribe(self.update_expenses_tree)
         for col in columns:
             self.update_expenses_tree.heading(col, text=col)
             self.update_expenses_tree.column(col, anchor="center", width=100)
+        self.expense_filters.bind_headings(self.update_expenses_tree, EXPENSE_SORTS)
+        self.expense_filters.add_bar(frame).pack(fill="x", padx=10, pady=(10, 0))
         self.update_expenses_tree.pack(expand=True, fill="both", padx=10, pady=10)
 
         # Update Form
@@ -206,25 +241,8 @@ class ExpenseManagerGUI(ttk.Frame):
         ttk.Button(frame, text="Refresh", command=self.load_expenses_for_update).pack(pady=5)
 
     def load_expenses_for_update(self):
-        """Load expenses into the Treeview for updating."""
-        try:
-            for row in self.update_expenses_tree.get_children():
-                self.update_expenses_tree.delete(row)
-            expenses = self.manager.get_all_expenses()
-            for expense in expenses:
-                supplier_name = expense.supplier.username if expense.supplier else "N/A"
-                self.update_expenses_tree.insert("", "end", values=(
-                    expense.expense_id,
-                    expense.expense_date.strftime("%Y-%m-%d"),
-                    expense.category,
-                    supplier_name,
-                    expense.expense_name,
-                    expense.total_items,
-                    f"${expense.unit_cost:.2f}",
-                    f"${expense.total_cost:.2f}"
-                ))
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load expenses for update: {e}")
+        """Reload the expense lists of every tab; they share the pages read."""
+        self.expenses_model.reload_in(self.tasks, "Load expenses", on_error=report_errors("load expenses for update"))
 
     def update_expense(self):
         """Update a selected expense."""
@@ -248,14 +266,11 @@ class ExpenseManagerGUI(ttk.Frame):
             elif field == "unit_cost":
                 new_value = float(new_value)
 
-            self.manager.update_expense(expense_id, field, new_value)
-            messagebox.showinfo("Success", "Expense updated successfully!")
-            self.load_expenses_for_update()
-            self.load_expenses()
+            self.tasks.run("Update expense", self.manager.update_expense, expense_id, field, new_value, write=True,
+                           on_done=lambda _: messagebox.showinfo("Success", "Expense updated successfully!"),
+                           on_error=report_errors("update expense"))
         except ValueError as ve:
             messagebox.showerror("Input Error", str(ve))
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to update expense: {e}")
 
     # -------------------------------- Delete Expense Tab --------------------------------
     def create_delete_expense_tab(self, notebook):
@@ -263,10 +278,15 @@ class ExpenseManagerGUI(ttk.Frame):
         notebook.add(frame, text="Delete Expense")
 
         columns = ("ID", "Date", "Category", "Supplier", "Expense Name", "Total Items", "Unit Cost", "Total Cost")
-        self.delete_expenses_tree = ttk.Treeview(frame, columns=columns, show="headings")
+        self.delete_expenses_tree = VirtualTree(frame, self.expenses_model.fetch_page, expense_values, columns=columns,
+                                                key=self.expenses_model.cursor, order=self.expenses_model.order,
+                                                on_error=lambda e: messagebox.showerror("Error", f"Failed to load expenses for deletion: {e}"))
+        self.expenses_model.subscribe(self.delete_expenses_tree)
         for col in columns:
             self.delete_expenses_tree.heading(col, text=col)
             self.delete_expenses_tree.column(col, anchor="center", width=100)
+        self.expense_filters.bind_headings(self.delete_expenses_tree, EXPENSE_SORTS)
+        self.expense_filters.add_bar(frame).pack(fill="x", padx=10, pady=(10, 0))
         self.delete_expenses_tree.pack(expand=True, fill="both", padx=10, pady=10)
 
         # Buttons
@@ -274,25 +294,8 @@ class ExpenseManagerGUI(ttk.Frame):
         ttk.Button(frame, text="Refresh", command=self.load_expenses_for_delete).pack(pady=5)
 
     def load_expenses_for_delete(self):
-        """Load expenses into the Treeview for deletion."""
-        try:
-            for row in self.delete_expenses_tree.get_children():
-                self.delete_expenses_tree.delete(row)
-            expenses = self.manager.get_all_expenses()
-            for expense in expenses:
-                supplier_name = expense.supplier.username if expense.supplier else "N/A"
-                self.delete_expenses_tree.insert("", "end", values=(
-                    expense.expense_id,
-                    expense.expense_date.strftime("%Y-%m-%d"),
-                    expense.category,
-                    supplier_name,
-                    expense.expense_name,
-                    expense.total_items,
-                    f"${expense.unit_cost:.2f}",
-                    f"${expense.total_cost:.2f}"
-                ))
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load expenses for deletion: {e}")
+        """Reload the expense lists of every tab; they share the pages read."""
+        self.expenses_model.reload_in(self.tasks, "Load expenses", on_error=report_errors("load expenses for deletion"))
 
     def delete_expense(self):
         """Delete a selected expense."""
@@ -307,11 +310,8 @@ class ExpenseManagerGUI(ttk.Frame):
             if not confirm:
                 return
 
-            self.manager.delete_expense(expense_id)
-            messagebox.showinfo("Success", "Expense deleted successfully!")
-            self.load_expenses_for_delete()
-            self.load_expenses()
+            self.tasks.run("Delete expense", self.manager.delete_expense, expense_id, write=True,
+                           on_done=lambda _: messagebox.showinfo("Success", "Expense deleted successfully!"),
+                           on_error=report_errors("delete expense"))
         except ValueError as ve:
             messagebox.showerror("Input Error", str(ve))
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to delete expense: {e}")
@@ -3,11 +3,49 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from business_logic.inventory_management_v3 import InventoryManager
+from business_logic.shared_managers_v3 import shared_manager
+from gui.table_model_v3 import TableModel
+from gui.virtual_tree_v3 import VirtualTree
+from gui.tk_events_v3 import TkEventQueue
+from gui.db_tasks_v3 import DbTasks, report_errors
+from gui.list_filters_v3 import ListFilters, supplier_id
+from business_logic.events_v3 import RowsChanged, StockChanged
+
+INVENTORY_CATEGORIES = ('Food', 'Tea', 'Coffee', 'Soft Drinks', 'Cleaning Products', 'Maintenance', 'Dairy Items',
+                        'Alcoholic Drinks', 'Stationary')
+# Headings that sort the lists when clicked -> sort name; None sorts by ID
+INVENTORY_SORTS = {"ID": None, "Name": "item_name", "Category": "category"}
+
+
+def inventory_values(item):
+    """Treeview values for a row of InventoryManager.fetch_inventory_page()."""
+    return (
+        item.item_id,
+        item.item_name,
+        item.category,
+        item.quantity,
+        f"${item.unit_cost:.2f}",
+        f"${item.quantity * item.unit_cost:.2f}",
+        item.supplier_name or "Unknown"
+    )
+
 
 class InventoryManagementGUI(ttk.Frame):
     def __init__(self, parent, *args, **kwargs):
         super().__init__(parent, *args, **kwargs)
-        self.manager = InventoryManager()
+        self.manager = shared_manager(InventoryManager)
+        self.tasks = DbTasks(self)  # Database calls run off the Tk thread
+        self.inventory_model = TableModel.of_manager(lambda: self.manager, "fetch_inventory_page", "fetch_inventory_rows",
+                                                     "fetch_inventory_changes",
+                                                     nocase_sorts=("item_name",))  # Shared by the list tabs
+        self.inventory_filters = ListFilters(self.inventory_model, self.tasks, "Load inventory", report_errors("load inventory"), {
+            "search": ("Name", None, str),
+            "category": ("Category", INVENTORY_CATEGORIES, str),
+            "supplier_id": ("Supplier", (), supplier_id),
+        })
+        self.events = TkEventQueue(self)  # Changes committed from any tab
+        self.events.subscribe(RowsChanged, self.on_rows_changed)
+        self.events.subscribe(StockChanged, self.on_stock_changed)
         self.initialize_gui()
 
     def initialize_gui(self):
@@ -31,7 +69,7 @@ class InventoryManagementGUI(ttk.Frame):
         tk.Label(frame, text="Category:", font=("Arial", 12)).grid(row=1, column=0, padx=10, pady=5, sticky="e")
         self.category_var = tk.StringVar()
         category_menu = ttk.Combobox(frame, textvariable=self.category_var, state="readonly", font=("Arial", 12))
-        category_menu['values'] = ('Food', 'Tea', 'Coffee', 'Soft Drinks', 'Cleaning Products', 'Maintenance', 'Dairy Items', 'Alcoholic Drinks', 'Stationary')
+        category_menu['values'] = INVENTORY_CATEGORIES
         category_menu.grid(row=1, column=1, padx=10, pady=5, sticky="w")
         category_menu.current(0)
 
@@ -53,15 +91,35 @@ class InventoryManagementGUI(ttk.Frame):
         ttk.Button(frame, text="Add Item", command=self.add_inventory_item).grid(row=5, column=0, columnspan=2, pady=10)
         ttk.Button(frame, text="Refresh Suppliers", command=self.refresh_suppliers).grid(row=6, column=0, columnspan=2, pady=5)
 
+    def on_rows_changed(self, event):
+        """Apply inventory changes committed from any tab to the inventory lists."""
+        if event.table != "inventory":
+            return
+        self.inventory_model.sync_in(self.tasks, "Sync inventory", on_error=report_errors("load inventory"))
+
+    def on_stock_changed(self, event):
+        """Show the new quantity of an item by syncing the inventory lists.
+
+        The delta is not added to the cached row: a sync or reload read on a worker may already
+        hold the new quantity, or may still apply one read before the commit. sync_in() reads the
+        logged change after whichever read is running, so the lists end on the committed quantity.
+        """
+        self.on_rows_changed(RowsChanged("inventory", (event.item_id,)))
+
     def create_view_inventory_tab(self, notebook):
         frame = ttk.Frame(notebook)
         notebook.add(frame, text="View Inventory")
 
         columns = ("ID", "Name", "Category", "Quantity", "Unit Cost", "Total Cost", "Supplier")
-        self.inventory_tree = ttk.Treeview(frame, columns=columns, show="headings")
+        self.inventory_tree = VirtualTree(frame, self.inventory_model.fetch_page, inventory_values, columns=columns,
+                                          key=self.inventory_model.cursor, order=self.inventory_model.order,
+                                          on_error=lambda e: messagebox.showerror("Error", f"Failed to load inventory: {e}"))
+        self.inventory_model.subscribe(self.inventory_tree)
         for col in columns:
             self.inventory_tree.heading(col, text=col)
             self.inventory_tree.column(col, anchor="center", width=100)
+        self.inventory_filters.bind_headings(self.inventory_tree, INVENTORY_SORTS)
+        self.inventory_filters.add_bar(frame).pack(fill="x", padx=10, pady=(10, 0))
         self.inventory_tree.pack(expand=True, fill="both", padx=10, pady=10)
 
         ttk.Button(frame, text="Refresh", command=self.load_inventory).pack(pady=5)
@@ -71,10 +129,15 @@ class InventoryManagementGUI(ttk.Frame):
         notebook.add(frame, text="Update Inventory")
 
         columns = ("ID", "Name", "Category", "Quantity", "Unit Cost", "Total Cost", "Supplier")
-        self.update_inventory_tree = ttk.Treeview(frame, columns=columns, show="headings")
+        self.update_inventory_tree = VirtualTree(frame, self.inventory_model.fetch_page, inventory_values, columns=columns,
+                                                 key=self.inventory_model.cursor, order=self.inventory_model.order,
+                                                 on_error=lambda e: messagebox.showerror("Error", f"Failed to load inventory for update: {e}"))
+        self.inventory_model.subscribe(self.update_inventory_tree)
         for col in columns:
             self.update_inventory_tree.heading(col, text=col)
             self.update_inventory_tree.column(col, anchor="center", width=100)
+        self.inventory_filters.bind_headings(self.update_inventory_tree, INVENTORY_SORTS)
+        self.inventory_filters.add_bar(frame).pack(fill="x", padx=10, pady=(10, 0))
         self.update_inventory_tree.pack(expand=True, fill="both", padx=10, pady=10)
 
         # Update Form
@@ -100,10 +163,15 @@ class InventoryManagementGUI(ttk.Frame):
         notebook.add(frame, text="Delete Inventory")
 
         columns = ("ID", "Name", "Category", "Quantity", "Unit Cost", "Total Cost", "Supplier")
-        self.delete_inventory_tree = ttk.Treeview(frame, columns=columns, show="headings")
+        self.delete_inventory_tree = VirtualTree(frame, self.inventory_model.fetch_page, inventory_values, columns=columns,
+                                                 key=self.inventory_model.cursor, order=self.inventory_model.order,
+                                                 on_error=lambda e: messagebox.showerror("Error", f"Failed to load inventory for deletion: {e}"))
+        self.inventory_model.subscribe(self.delete_inventory_tree)
         for col in columns:
             self.delete_inventory_tree.heading(col, text=col)
             self.delete_inventory_tree.column(col, anchor="center", width=100)
+        self.inventory_filters.bind_headings(self.delete_inventory_tree, INVENTORY_SORTS)
+        self.inventory_filters.add_bar(frame).pack(fill="x", padx=10, pady=(10, 0))
         self.delete_inventory_tree.pack(expand=True, fill="both", padx=10, pady=10)
 
         # Buttons
@@ -112,13 +180,14 @@ class InventoryManagementGUI(ttk.Frame):
 
     def refresh_suppliers(self):
         """Load suppliers into the dropdown."""
-        try:
-            suppliers = self.manager.fetch_all_suppliers()
-            supplier_names = [f"{supplier.user_id}: {supplier.username}" for supplier in suppliers]
-            self.supplier_menu['values'] = supplier_names
-            self.supplier_var.set("")  # Clear current selection
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load suppliers: {e}")
+        self.tasks.run("Load suppliers", self.manager.fetch_all_suppliers, on_done=self.show_suppliers,
+                       on_error=report_errors("load suppliers"))
+
+    def show_suppliers(self, suppliers):
+        supplier_names = [f"{supplier.user_id}: {supplier.username}" for supplier in suppliers]
+        self.supplier_menu['values'] = supplier_names
+        self.supplier_var.set("")  # Clear current selection
+        self.inventory_filters.set_values("supplier_id", supplier_names)
 
     def add_inventory_item(self):
         """Add a new inventory item."""
@@ -136,19 +205,21 @@ class InventoryManagementGUI(ttk.Frame):
             supplier_id = int(supplier_data.split(":")[0])
 
             # Add inventory via InventoryManager
-            self.manager.add_inventory_item(
+            self.tasks.run(
+                "Add inventory item", self.manager.add_inventory_item,
                 item_name=item_name,
                 category=category,
                 quantity=quantity,
                 unit_cost=unit_cost,
-                supplier_id=supplier_id
+                supplier_id=supplier_id,
+                write=True, on_done=self.on_inventory_item_added, on_error=report_errors("add inventory item")
             )
-            messagebox.showinfo("Success", "Inventory item added successfully!")
-            self.clear_add_inventory_fields()
         except ValueError as ve:
             messagebox.showerror("Input Error", str(ve))
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to add inventory item: {e}")
+
+    def on_inventory_item_added(self, item):
+        messagebox.showinfo("Success", "Inventory item added successfully!")
+        self.clear_add_inventory_fields()
 
     def clear_add_inventory_fields(self):
         """Clear the fields after adding an inventory item."""
@@ -158,47 +229,20 @@ class InventoryManagementGUI(ttk.Frame):
         self.unit_cost_entry.delete(0, tk.END)
         self.supplier_var.set("")
 
+    def reset(self):
+        """Clear the forms and list filters for the next user."""
+        self.clear_add_inventory_fields()
+        self.update_field_var.set("")
+        self.update_value_entry.delete(0, tk.END)
+        self.inventory_filters.reset()
+
     def load_inventory(self):
-        """Load all inventory items into the Treeview."""
-        try:
-            for row in self.inventory_tree.get_children():
-                self.inventory_tree.delete(row)
-            items = self.manager.fetch_inventory()
-            for item in items:
-                supplier_name = item.supplier.username if item.supplier else "Unknown"
-                total_cost = item.quantity * item.unit_cost
-                self.inventory_tree.insert("", "end", values=(
-                    item.item_id,
-                    item.item_name,
-                    item.category,
-                    item.quantity,
-                    f"${item.unit_cost:.2f}",
-                    f"${total_cost:.2f}",
-                    supplier_name
-                ))
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load inventory: {e}")
+        """Reload the inventory lists of every tab; they share the pages read."""
+        self.inventory_model.reload_in(self.tasks, "Load inventory", on_error=report_errors("load inventory"))
 
     def load_inventory_for_update(self):
-        """Load inventory items into the update Treeview."""
-        try:
-            for row in self.update_inventory_tree.get_children():
-                self.update_inventory_tree.delete(row)
-            items = self.manager.fetch_inventory()
-            for item in items:
-                supplier_name = item.supplier.username if item.supplier else "Unknown"
-                total_cost = item.quantity * item.unit_cost
-                self.update_inventory_tree.insert("", "end", values=(
-                    item.item_id,
-                    item.item_name,
-                    item.category,
-                    item.quantity,
-                    f"${item.unit_cost:.2f}",
-                    f"${total_cost:.2f}",
-                    supplier_name
-                ))
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load inventory for update: {e}")
+        """Reload the inventory lists of every tab; they share the pages read."""
+        self.inventory_model.reload_in(self.tasks, "Load inventory", on_error=report_errors("load inventory for update"))
 
     def update_inventory_item(self):
         """Update a selected inventory item."""
@@ -220,35 +264,15 @@ class InventoryManagementGUI(ttk.Frame):
             elif field == "unit_cost":
                 new_value = float(new_value)
 
-            self.manager.update_inventory_item(item_id, field, new_value)
-            messagebox.showinfo("Success", "Inventory item updated successfully!")
-            self.load_inventory_for_update()
-            self.load_inventory()
+            self.tasks.run("Update inventory item", self.manager.update_inventory_item, item_id, field, new_value, write=True,
+                           on_done=lambda _: messagebox.showinfo("Success", "Inventory item updated successfully!"),
+                           on_error=report_errors("update inventory item"))
         except ValueError as ve:
             messagebox.showerror("Input Error", str(ve))
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to update inventory item: {e}")
 
     def load_inventory_for_delete(self):
-        """Load inventory items into the delete Treeview."""
-        try:
-            for row in self.delete_inventory_tree.get_children():
-                self.delete_inventory_tree.delete(row)
-            items = self.manager.fetch_inventory()
-            for item in items:
-                supplier_name = item.supplier.username if item.supplier else "Unknown"
-                total_cost = item.quantity * item.unit_cost
-                self.delete_inventory_tree.insert("", "end", values=(
-                    item.item_id,
-                    item.item_name,
-                    item.category,
-                    item.quantity,
-                    f"${item.unit_cost:.2f}",
-                    f"${total_cost:.2f}",
-                    supplier_name
-                ))
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load inventory for deletion: {e}")
+        """Reload the inventory lists of every tab; they share the pages read."""
+        self.inventory_model.reload_in(self.tasks, "Load inventory", on_error=report_errors("load inventory for deletion"))
 
     def delete_inventory_item(self):
         """Delete a selected inventory item."""
@@ -263,11 +287,8 @@ class InventoryManagementGUI(ttk.Frame):
             if not confirm:
                 return
 
-            self.manager.delete_inventory_item(item_id)
-            messagebox.showinfo("Success", "Inventory item deleted successfully!")
-            self.load_inventory_for_delete()
-            self.load_inventory()
+            self.tasks.run("Delete inventory item", self.manager.delete_inventory_item, item_id, write=True,
+                           on_done=lambda _: messagebox.showinfo("Success", "Inventory item deleted successfully!"),
+                           on_error=report_errors("delete inventory item"))
         except ValueError as ve:
             messagebox.showerror("Input Error", str(ve))
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to delete inventory item: {e}")
@@ -0,0 +1,44 @@
+# gui/lazy_notebook_v3.py
+
+from tkinter import ttk
+
+
+class LazyNotebook(ttk.Notebook):
+    """A Notebook whose tabs are built the first time they are selected.
+
+    add_lazy(factory, **options) adds an empty frame as the tab; factory(frame) builds the tab's
+    widget inside it when the tab is first shown, so tabs that are never opened never construct
+    their manager or query the database. reset() prepares a built notebook for the next user.
+    """
+
+    def __init__(self, parent, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.factories = {}  # Frame path name -> factory, for tabs not built yet
+        self.built = []  # Widgets of the tabs built so far
+        self.bind("<<NotebookTabChanged>>", lambda event: self.build_selected(), add="+")
+
+    def add_lazy(self, factory, **options):
+        """Add a tab that factory(frame) builds on first selection. Returns the tab's frame."""
+        frame = ttk.Frame(self)
+        self.factories[str(frame)] = factory  # Before add(): adding the first tab selects it
+        self.add(frame, **options)
+        return frame
+
+    def build_selected(self):
+        """Build the selected tab if it has not been built yet. Returns the new widget, or None."""
+        tab = self.select()
+        factory = self.factories.get(tab)
+        if factory is None:
+            return None
+        widget = factory(self.nametowidget(tab))
+        widget.pack(expand=True, fill="both")
+        del self.factories[tab]  # Kept until built, so a failed build is retried on the next selection
+        self.built.append(widget)
+        return widget
+
+    def reset(self):
+        """Clear what the previous user left in the built tabs, through their reset(), and select the first tab."""
+        for widget in self.built:
+            if hasattr(widget, "reset"):
+                widget.reset()
+        self.select(0)
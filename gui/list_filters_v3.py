@@ -0,0 +1,114 @@
+# gui/list_filters_v3.py
+
+import tkinter as tk
+from tkinter import ttk
+
+SORT_MARKS = {False: " ▲", True: " ▼"}  # Shown after the heading of the column a list is sorted by
+
+
+class ListFilters:
+    """The search, filters and sort order shared by the list tabs of one table model.
+
+    Each list tab gets its own filter bar from add_bar(), but the bars edit the same variables,
+    so every tab shows the filters in effect. Applying them, or clicking a sortable heading,
+    reloads the model with the new query, which the manager turns into WHERE and ORDER BY
+    clauses; the rows are still read a page at a time.
+
+    fields maps each filter, by the name the manager's page method takes it under, to
+    (label, values, parse): values lists the choices of a dropdown, or is None for a text
+    entry, and parse(text) returns the filter value, raising ValueError for unusable text.
+    """
+
+    def __init__(self, model, tasks, name, on_error, fields):
+        self.model = model
+        self.tasks = tasks
+        self.name = name  # Task name of the reloads
+        self.on_error = on_error
+        self.fields = fields
+        self.variables = {field: tk.StringVar() for field in fields}
+        self.menus = {field: [] for field in fields}  # Dropdowns of each field, one per bar
+        self.headings = []  # (tree, column, sort) of each sortable heading
+        self.sort = None  # Sort name as the manager takes it; None sorts by primary key
+        self.descending = False
+
+    def add_bar(self, parent):
+        """Create a filter bar in parent and return it, for the caller to place."""
+        frame = ttk.Frame(parent)
+        column = 0
+        for field, (label, values, parse) in self.fields.items():
+            ttk.Label(frame, text=f"{label}:").grid(row=0, column=column, padx=5, pady=5, sticky="e")
+            if values is None:
+                widget = ttk.Entry(frame, textvariable=self.variables[field], width=20)
+                widget.bind("<Return>", lambda event: self.apply())
+            else:
+                widget = ttk.Combobox(frame, textvariable=self.variables[field], state="readonly", width=18)
+                widget['values'] = ("",) + tuple(values)
+                self.menus[field].append(widget)
+            widget.grid(row=0, column=column + 1, padx=5, pady=5, sticky="w")
+            column += 2
+        ttk.Button(frame, text="Apply", command=self.apply).grid(row=0, column=column, padx=5, pady=5)
+        ttk.Button(frame, text="Clear", command=self.clear).grid(row=0, column=column + 1, padx=5, pady=5)
+        return frame
+
+    def set_values(self, field, values):
+        """Replace the choices of a dropdown filter in every bar, as when suppliers are reloaded."""
+        for menu in self.menus[field]:
+            menu['values'] = ("",) + tuple(values)
+
+    def bind_headings(self, tree, sorts):
+        """Sort by a column when its heading is clicked; sorts maps column -> sort name, None for the ID."""
+        for column, sort in sorts.items():
+            tree.heading(column, command=lambda sort=sort: self.sort_by(sort))
+            self.headings.append((tree, column, sort))
+
+    def sort_by(self, sort):
+        """Sort by a column, or reverse the order if the list is already sorted by it."""
+        if sort == self.sort:
+            self.descending = not self.descending
+        else:
+            self.sort, self.descending = sort, False
+        self.apply()
+
+    def query(self):
+        """The model query for the filters entered and the sort order."""
+        query = {}
+        for field, (label, values, parse) in self.fields.items():
+            text = self.variables[field].get().strip()
+            if text:
+                query[field] = parse(text)
+        if self.sort is not None:
+            query["sort"] = self.sort
+        if self.descending:
+            query["descending"] = True
+        return query
+
+    def apply(self):
+        """Reload the lists with the filters entered."""
+        try:
+            query = self.query()
+        except ValueError as e:
+            self.on_error(e)
+            return
+        for tree, column, sort in self.headings:
+            tree.heading(column, text=column + (SORT_MARKS[self.descending] if sort == self.sort else ""))
+        self.model.reload_in(self.tasks, self.name, self.on_error, query=query)
+
+    def clear(self):
+        """Show every row again, in primary key order."""
+        for variable in self.variables.values():
+            variable.set("")
+        self.sort, self.descending = None, False
+        self.apply()
+
+    def reset(self):
+        """Clear the filters left by the previous user; the lists are only reloaded if any were set."""
+        if self.sort is not None or self.descending or any(variable.get() for variable in self.variables.values()):
+            self.clear()
+
+
+def supplier_id(text):
+    """Parse the supplier ID from a '<user_id>: <name>' dropdown entry."""
+    try:
+        return int(text.split(":")[0])
+    except ValueError:
+        raise ValueError("Please select a valid supplier.")
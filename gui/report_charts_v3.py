@@ -0,0 +1,126 @@
+# gui/report_charts_v3.py
+
+# Chart drawing for the financial reports. The functions only need a Matplotlib Axes,
+# so the same charts are drawn on the Tk canvas and on off-screen figures.
+
+import matplotlib
+from matplotlib.patches import Patch
+import numpy as np
+from business_logic.report_columns_v3 import moving_average
+
+# Bar widths in days, the unit of Matplotlib date axes
+BAR_WIDTHS = {"hour": 0.8 / 24, "day": 0.8, "week": 0.8 * 7, "month": 0.8 * 30}
+
+# Longer series are drawn as a line; bars would be too thin to see
+MAX_BARS = 150
+
+
+def _draw_series(ax, dates, values, granularity, color, label):
+    if len(values) <= MAX_BARS:
+        ax.bar(dates, values, width=BAR_WIDTHS[granularity], color=color, label=label)
+    else:
+        ax.plot(dates, values, color=color if isinstance(color, str) else 'blue', linewidth=1, label=label)
+
+
+def plot_sales_per_period(ax, columns, granularity="day", window=7):
+    """Bar chart of columnar sales totals, with a trailing moving average.
+
+    Long (downsampled) series are drawn as a line without the average.
+    """
+    _draw_series(ax, columns.date, columns.total_sales, granularity, 'blue', "Total Sales")
+    if window <= len(columns) <= MAX_BARS:
+        ax.plot(columns.date, moving_average(columns.total_sales, window), color='orange',
+                label=f"{window}-{granularity} average")
+    ax.set_title(f"Total Sales Per {granularity.capitalize()}")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Total Sales")
+    ax.tick_params(axis='x', rotation=45)
+    ax.legend()
+
+
+def plot_expenses_per_period(ax, columns, granularity="day"):
+    """Line chart of columnar expense totals."""
+    ax.plot(columns.date, columns.total_expenses, marker='o', color='red')
+    ax.set_title(f"Total Expenses Per {granularity.capitalize()}")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Total Expenses")
+    ax.tick_params(axis='x', rotation=45)
+
+
+def plot_sales_by_category(ax, data):
+    """Pie chart of sales per category."""
+    ax.pie([record.total_sales for record in data], labels=[record.category for record in data],
+           autopct="%1.1f%%", startangle=140)
+    ax.set_title("Sales By Category")
+
+
+def plot_expense_vs_sales(ax, data):
+    """Bar chart of total sales against total expenses."""
+    ax.bar(["Total Sales", "Total Expenses"], [data["total_sales"], data["total_expenses"]], color=['green', 'orange'])
+    ax.set_title("Expense vs Sales")
+    ax.set_ylabel("Amount")
+
+
+def plot_expenses_by_supplier_and_category(ax, pivot):
+    """Grouped bar chart of an expense PivotMatrix: one group per category, one bar per supplier.
+
+    All bars are drawn by a single bar() call from the matrix.
+    """
+    suppliers, categories = len(pivot.rows), len(pivot.columns)
+    bar_width = 0.8 / suppliers  # Adjust bar width based on number of suppliers
+    offsets = np.arange(suppliers) * bar_width
+    positions = np.arange(categories)[np.newaxis, :] + offsets[:, np.newaxis]
+    colors = matplotlib.colormaps["tab20"](np.arange(suppliers) % 20)
+    ax.bar(positions.ravel(), pivot.values.ravel(), bar_width, color=np.repeat(colors, categories, axis=0))
+
+    ax.set_xticks(np.arange(categories) + bar_width * (suppliers - 1) / 2)
+    ax.set_xticklabels(pivot.columns, rotation=45)
+    ax.set_xlabel("Category")
+    ax.set_ylabel("Total Expenses")
+    ax.set_title("Expenses by Supplier and Category")
+    ax.legend(handles=[Patch(color=color, label=supplier) for color, supplier in zip(colors, pivot.rows)])
+
+
+def plot_profit_and_margin(ax, columns, granularity="day"):
+    """Profit bars and cumulative profit, with the margin on a second axis."""
+    colors = np.where(columns.profit >= 0, 'green', 'red')
+    _draw_series(ax, columns.date, columns.profit, granularity, colors, "Profit")
+    ax.plot(columns.date, columns.cumulative_profit, color='black', label="Cumulative Profit")
+    ax.set_title(f"Profit and Margin Per {granularity.capitalize()}")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Amount")
+    ax.tick_params(axis='x', rotation=45)
+    ax.legend(loc="upper left")
+
+    margin_ax = ax.twinx()
+    margin_ax.plot(columns.date, columns.margin * 100, color='purple', linestyle='--', label="Margin %")
+    margin_ax.set_ylabel("Margin (%)")
+    margin_ax.legend(loc="upper right")
+
+
+def plot_top_items(ax, rows, measure="sales"):
+    """Horizontal bars of the best-selling items, labelled with their change against the previous period."""
+    values = [row.total_sales if measure == "sales" else row.total_quantity for row in rows]
+    positions = np.arange(len(rows))
+    colors = ['green' if row.change >= 0 else 'red' for row in rows]
+    ax.barh(positions, values, color=colors)
+    ax.set_yticks(positions)
+    ax.set_yticklabels([row.item_name for row in rows])
+    ax.invert_yaxis()  # Best seller on top
+    for position, value, row in zip(positions, values, rows):
+        change = "new" if row.change_percent is None else f"{row.change_percent:+.0f}%"
+        ax.annotate(change, (value, position), xytext=(3, 0), textcoords="offset points", va="center")
+    ax.set_xlabel("Total Sales" if measure == "sales" else "Quantity Sold")
+    ax.set_title("Top Items (change vs previous period)")
+
+
+def plot_sales_heatmap(ax, pivot, measure="sales"):
+    """Heatmap of a weekday x hour PivotMatrix, for spotting peak hours."""
+    image = ax.imshow(pivot.values, aspect="auto", cmap="YlOrRd")
+    ax.set_xticks(np.arange(len(pivot.columns)))
+    ax.set_xticklabels([f"{hour:02d}" for hour in pivot.columns])
+    ax.set_yticks(np.arange(len(pivot.rows)))
+    ax.set_yticklabels(pivot.rows)
+    ax.set_xlabel("Hour of Day")
+    ax.set_title("Sales by Weekday and Hour" if measure == "sales" else "Transactions by Weekday and Hour")
+    ax.figure.colorbar(image, ax=ax, label="Total Sales" if measure == "sales" else "Transactions")
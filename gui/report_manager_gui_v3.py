@@ -2,15 +2,45 @@
 
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from business_logic.report_manager_v3 import FinancialReportManager
+from business_logic.report_backends_v3 import create_report_manager
+from business_logic.shared_managers_v3 import shared_manager
+from business_logic.downsampling_v3 import MAX_CHART_POINTS, downsample_columns
+from business_logic.export_manager_v3 import ExportManager
+from gui import report_charts_v3 as charts
+from gui.report_runner_v3 import ReportRunner
+from gui.db_tasks_v3 import DbTasks, report_errors
+from datetime import date, timedelta
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import matplotlib.pyplot as plt
 
 
 class FinancialReportGUI(ttk.Frame):
+    TOP_SUPPLIERS = 10  # Suppliers shown in their own bar; the rest are grouped as "Other"
+    TOP_ITEMS = 10  # Best sellers shown by the Top Items report
+
+    # Export dataset label -> report name, or None for the raw ledgers
+    EXPORT_DATASETS = {
+        "Sales Ledger": None,
+        "Expense Ledger": None,
+        "Sales Per Period": "sales_per_day",
+        "Sales By Category": "sales_by_category",
+        "Expenses Per Period": "expenses_per_day",
+        "Expenses by Supplier and Category": "expense_by_supplier_and_category",
+    }
+
     def __init__(self, parent, *args, **kwargs):
         super().__init__(parent, *args, **kwargs)
-        self.report_manager = FinancialReportManager()
+        self.report_manager = shared_manager(create_report_manager)  # SQLite or DuckDB, as configured
+        # Reports are computed on a worker thread with its own manager and connection
+        self.report_runner = ReportRunner(
+            self, lambda: create_report_manager(self.report_manager.engine.url), on_progress=self.show_report_progress
+        )
+        # Exports get their own worker, so drawing a chart never cancels a running export, and the
+        # export button stays disabled while one runs, so a second export cannot supersede it either
+        self.export_runner = ReportRunner(
+            self, lambda: ExportManager(self.report_manager.engine.url), on_progress=self.show_export_progress
+        )
+        self.tasks = DbTasks(self)  # Other database calls, such as the supplier filter
         self.initialize_gui()
 
     def initialize_gui(self):
@@ -20,6 +50,8 @@ class FinancialReportGUI(ttk.Frame):
         notebook.add(frame, text="Financial Reports")
         notebook.pack(expand=True, fill="both")
 
+        self.create_filter_bar(frame)
+
         # Buttons for different reports
         button_frame = ttk.Frame(frame)
         button_frame.pack(pady=10)
@@ -29,6 +61,19 @@ class FinancialReportGUI(ttk.Frame):
         ttk.Button(button_frame, text="Total Expenses Per Day", command=self.display_expenses_per_day).grid(row=0, column=2, padx=5, pady=5)
         ttk.Button(button_frame, text="Expense vs Sales", command=self.display_expense_vs_sales).grid(row=0, column=3, padx=5, pady=5)
         ttk.Button(button_frame, text="Expenses by Supplier and Category", command=self.display_expenses_by_supplier_and_category).grid(row=0, column=4, padx=5, pady=5)
+        ttk.Button(button_frame, text="Profit & Margin", command=self.display_profit_and_margin).grid(row=0, column=5, padx=5, pady=5)
+        ttk.Button(button_frame, text="Sales Heatmap", command=self.display_sales_heatmap).grid(row=0, column=6, padx=5, pady=5)
+        ttk.Button(button_frame, text="Top Items", command=self.display_top_items).grid(row=0, column=7, padx=5, pady=5)
+
+        # Progress of the report being computed
+        progress_frame = ttk.Frame(frame)
+        progress_frame.pack(pady=5)
+        self.progress_label = ttk.Label(progress_frame, text="")
+        self.progress_label.grid(row=0, column=0, padx=5)
+        self.progress_bar = ttk.Progressbar(progress_frame, mode="indeterminate", length=200)
+        self.progress_bar.grid(row=0, column=1, padx=5)
+        self.cancel_button = ttk.Button(progress_frame, text="Cancel", command=self.cancel_report, state="disabled")
+        self.cancel_button.grid(row=0, column=2, padx=5)
 
         # Canvas for displaying the charts
         self.figure = plt.Figure(figsize=(10, 6), dpi=100)
@@ -36,120 +81,250 @@ class FinancialReportGUI(ttk.Frame):
         self.canvas_widget = self.canvas.get_tk_widget()
         self.canvas_widget.pack(expand=True, fill="both", padx=10, pady=10)
 
-        # Export Button
-        ttk.Button(frame, text="Export Current Report as JPEG/PNG", command=self.export_report).pack(pady=10)
+        # Export Buttons
+        export_frame = ttk.Frame(frame)
+        export_frame.pack(pady=10)
+        ttk.Button(export_frame, text="Export Current Report as JPEG/PNG", command=self.export_report).grid(row=0, column=0, padx=5)
+        self.export_dataset_var = tk.StringVar(value="Sales Ledger")
+        export_menu = ttk.Combobox(export_frame, textvariable=self.export_dataset_var, state="readonly", width=32)
+        export_menu['values'] = list(self.EXPORT_DATASETS)
+        export_menu.grid(row=0, column=1, padx=5)
+        self.export_data_button = ttk.Button(export_frame, text="Export Data as CSV/Parquet", command=self.export_data)
+        self.export_data_button.grid(row=0, column=2, padx=5)
+
+    def create_filter_bar(self, frame):
+        """Date range, granularity, category and supplier filters shared by all reports."""
+        filter_frame = ttk.Frame(frame)
+        filter_frame.pack(pady=5)
+
+        ttk.Label(filter_frame, text="Start (YYYY-MM-DD):").grid(row=0, column=0, padx=5, pady=5, sticky="e")
+        self.start_entry = ttk.Entry(filter_frame, width=12)
+        self.start_entry.grid(row=0, column=1, padx=5, pady=5)
+
+        ttk.Label(filter_frame, text="End (YYYY-MM-DD):").grid(row=0, column=2, padx=5, pady=5, sticky="e")
+        self.end_entry = ttk.Entry(filter_frame, width=12)
+        self.end_entry.grid(row=0, column=3, padx=5, pady=5)
+
+        ttk.Label(filter_frame, text="Granularity:").grid(row=0, column=4, padx=5, pady=5, sticky="e")
+        self.granularity_var = tk.StringVar(value="auto")
+        granularity_menu = ttk.Combobox(filter_frame, textvariable=self.granularity_var, state="readonly", width=8)
+        granularity_menu['values'] = ("auto", "hour", "day", "week", "month")
+        granularity_menu.grid(row=0, column=5, padx=5, pady=5)
+
+        ttk.Label(filter_frame, text="Category:").grid(row=1, column=0, padx=5, pady=5, sticky="e")
+        self.category_var = tk.StringVar()
+        category_menu = ttk.Combobox(filter_frame, textvariable=self.category_var, width=18)
+        category_menu['values'] = ("", 'Food', 'Tea', 'Coffee', 'Soft Drinks', 'Cleaning Products', 'Maintenance',
+                                   'Dairy Items', 'Alcoholic Drinks', 'Stationary', 'Beverages', 'Cleaning', 'Other')
+        category_menu.grid(row=1, column=1, padx=5, pady=5)
+
+        ttk.Label(filter_frame, text="Supplier:").grid(row=1, column=2, padx=5, pady=5, sticky="e")
+        self.supplier_var = tk.StringVar()
+        self.supplier_menu = ttk.Combobox(filter_frame, textvariable=self.supplier_var, state="readonly", width=18)
+        self.supplier_menu.grid(row=1, column=3, padx=5, pady=5)
+        self.refresh_suppliers()
+
+        ttk.Button(filter_frame, text="Last 7 Days", command=lambda: self.set_date_range(7)).grid(row=1, column=4, padx=5, pady=5)
+        ttk.Button(filter_frame, text="Last 30 Days", command=lambda: self.set_date_range(30)).grid(row=1, column=5, padx=5, pady=5)
+        ttk.Button(filter_frame, text="All Time", command=lambda: self.set_date_range(None)).grid(row=1, column=6, padx=5, pady=5)
+
+    def refresh_suppliers(self):
+        """Load suppliers into the supplier filter."""
+        self.tasks.run("Load suppliers", self.report_manager.get_suppliers, on_done=self.show_suppliers,
+                       on_error=report_errors("load suppliers"))
+
+    def show_suppliers(self, suppliers):
+        self.supplier_menu['values'] = [""] + [f"{supplier.user_id}: {supplier.company_name}" for supplier in suppliers]
+        self.supplier_var.set("")
+
+    def set_date_range(self, days):
+        """Fill the date range with the last number of days, or clear it for all time."""
+        self.start_entry.delete(0, tk.END)
+        self.end_entry.delete(0, tk.END)
+        if days is not None:
+            today = date.today()
+            self.start_entry.insert(0, (today - timedelta(days=days - 1)).isoformat())
+            self.end_entry.insert(0, today.isoformat())
+
+    def reset(self):
+        """Clear the filters and chart for the next user; a running export is left to finish."""
+        self.cancel_report()
+        self.set_date_range(None)
+        self.granularity_var.set("auto")
+        self.category_var.set("")
+        self.supplier_var.set("")
+        self.export_dataset_var.set("Sales Ledger")
+        self.clear_chart()
+        self.canvas.draw()
+
+    def get_filters(self, with_granularity=False):
+        """Read the filter bar into keyword arguments for the report manager."""
+        supplier_data = self.supplier_var.get()
+        filters = {
+            "start": self.start_entry.get().strip() or None,
+            "end": self.end_entry.get().strip() or None,
+            "category": self.category_var.get().strip() or None,
+            "supplier": int(supplier_data.split(":")[0]) if ":" in supplier_data else None
+        }
+        if with_granularity:
+            filters["granularity"] = self.granularity_var.get()
+        return filters
+
+    def destroy(self):
+        self.report_runner.shutdown()
+        self.export_runner.shutdown()
+        super().destroy()
 
     def clear_chart(self):
         """Clear the current chart."""
         self.figure.clf()
 
-    def display_sales_per_day(self):
-        """Display total sales per day as a bar chart."""
-        self.clear_chart()
-        data = self.report_manager.calculate_total_sales_per_day()
-        if not data:
-            messagebox.showinfo("Info", "No sales data available.")
-            return
+    def run_report(self, name, compute, draw, empty_message, is_empty=lambda data: not len(data)):
+        """Compute a report in the background, then draw it with draw(data) on the Tk loop.
 
-        dates = [record.date for record in data]
-        totals = [record.total_sales for record in data]
+        compute(manager) runs on the worker thread; a newer report supersedes this one.
+        """
+        self.report_runner.submit(
+            name, compute,
+            lambda data: self.show_report(data, draw, empty_message, is_empty),
+            self.show_report_error
+        )
 
-        ax = self.figure.add_subplot(111)
-        ax.bar(dates, totals, color='blue')
-        ax.set_title("Total Sales Per Day")
-        ax.set_xlabel("Date")
-        ax.set_ylabel("Total Sales")
-        ax.tick_params(axis='x', rotation=45)
+    def show_report(self, data, draw, empty_message, is_empty):
+        """Draw a computed report on the chart canvas."""
+        self.clear_chart()
+        if is_empty(data):
+            self.canvas.draw()
+            messagebox.showinfo("Info", empty_message)
+            return
+        draw(data)
         self.figure.tight_layout()
         self.canvas.draw()
 
-    def display_sales_by_category(self):
-        """Display sales by category as a pie chart."""
-        self.clear_chart()
-        data = self.report_manager.calculate_sales_by_category()
-        if not data:
-            messagebox.showinfo("Info", "No sales data available.")
-            return
+    def show_report_error(self, error):
+        if isinstance(error, ValueError):
+            messagebox.showerror("Input Error", str(error))
+        else:
+            messagebox.showerror("Error", f"Failed to generate report: {error}")
 
-        categories = [record.category for record in data]
-        totals = [record.total_sales for record in data]
+    def show_report_progress(self, job, state):
+        """Reflect the state of the running report in the progress bar."""
+        if state == "started":
+            self.progress_label.config(text=f"Computing {job.name}...")
+            self.cancel_button.config(state="normal")
+        elif state == "progress":
+            self.progress_bar.step(5)
+        else:
+            self.progress_label.config(text="")
+            self.progress_bar.config(value=0)
+            self.cancel_button.config(state="disabled")
 
-        ax = self.figure.add_subplot(111)
-        ax.pie(totals, labels=categories, autopct="%1.1f%%", startangle=140)
-        ax.set_title("Sales By Category")
-        self.canvas.draw()
+    def cancel_report(self):
+        """Cancel the report being computed."""
+        self.report_runner.cancel()
+        self.show_report_progress(None, "finished")
 
-    def display_expenses_per_day(self):
-        """Display total expenses per day as a line chart."""
-        self.clear_chart()
-        data = self.report_manager.calculate_total_expenses_per_day()
-        if not data:
-            messagebox.showinfo("Info", "No expense data available.")
-            return
+    def run_time_series_report(self, name, compute, value_name, method, plot, empty_message):
+        """Run a per-period report: resolves 'auto' granularity and downsamples long series on the worker.
 
-        dates = [record.date for record in data]
-        totals = [record.total_expenses for record in data]
+        compute(manager, filters) returns ReportColumns; plot(ax, data, granularity) draws them.
+        """
+        filters = self.get_filters(with_granularity=True)
 
-        ax = self.figure.add_subplot(111)
-        ax.plot(dates, totals, marker='o', color='red')
-        ax.set_title("Total Expenses Per Day")
-        ax.set_xlabel("Date")
-        ax.set_ylabel("Total Expenses")
-        ax.tick_params(axis='x', rotation=45)
-        self.figure.tight_layout()
-        self.canvas.draw()
+        def compute_series(manager):
+            granularity = filters["granularity"]
+            if granularity == "auto":
+                granularity = manager.suggest_granularity(filters["start"], filters["end"])
+            data = compute(manager, dict(filters, granularity=granularity))
+            return granularity, downsample_columns(data, value_name, MAX_CHART_POINTS, method)
 
-    def display_expense_vs_sales(self):
-        """Display total expense vs total sales as a bar chart."""
-        self.clear_chart()
-        data = self.report_manager.calculate_expense_vs_sales()
-        if data is None:
-            messagebox.showinfo("Info", "No sales or expense data available.")
-            return
+        self.run_report(
+            name, compute_series,
+            lambda result: plot(self.figure.add_subplot(111), result[1], result[0]),
+            empty_message,
+            is_empty=lambda result: not len(result[1])
+        )
 
-        categories = ["Total Sales", "Total Expenses"]
-        totals = [data["total_sales"], data["total_expenses"]]
+    def display_sales_per_day(self):
+        """Display total sales per day as a bar chart with a moving average."""
+        self.run_time_series_report(
+            "Total Sales",
+            lambda manager, filters: manager.calculate_total_sales_per_day(**filters, columnar=True),
+            "total_sales", "lttb", charts.plot_sales_per_period,
+            "No sales data available."
+        )
 
-        ax = self.figure.add_subplot(111)
-        ax.bar(categories, totals, color=['green', 'orange'])
-        ax.set_title("Expense vs Sales")
-        ax.set_ylabel("Amount")
-        self.figure.tight_layout()
-        self.canvas.draw()
+    def display_sales_by_category(self):
+        """Display sales by category as a pie chart."""
+        filters = self.get_filters()
+        self.run_report(
+            "Sales By Category",
+            lambda manager: manager.calculate_sales_by_category(**filters),
+            lambda data: charts.plot_sales_by_category(self.figure.add_subplot(111), data),
+            "No sales data available."
+        )
+
+    def display_expenses_per_day(self):
+        """Display total expenses per day as a line chart."""
+        # Min/max downsampling keeps every expense spike visible
+        self.run_time_series_report(
+            "Total Expenses",
+            lambda manager, filters: manager.calculate_total_expenses_per_day(**filters, columnar=True),
+            "total_expenses", "minmax", charts.plot_expenses_per_period,
+            "No expense data available."
+        )
+
+    def display_expense_vs_sales(self):
+        """Display total expense vs total sales as a bar chart."""
+        filters = self.get_filters()
+        self.run_report(
+            "Expense vs Sales",
+            lambda manager: manager.calculate_expense_vs_sales(**filters),
+            lambda data: charts.plot_expense_vs_sales(self.figure.add_subplot(111), data),
+            "No sales or expense data available.",
+            is_empty=lambda data: data is None
+        )
 
     def display_expenses_by_supplier_and_category(self):
         """Display expenses by supplier and category as a grouped bar chart."""
-        self.clear_chart()
-        data = self.report_manager.calculate_expense_by_supplier_and_category()
-        if not data:
-            messagebox.showinfo("Info", "No expense data available.")
-            return
+        filters = self.get_filters()
+        self.run_report(
+            "Expenses by Supplier and Category",
+            lambda manager: manager.calculate_expense_pivot(**filters, top_n=self.TOP_SUPPLIERS),
+            lambda data: charts.plot_expenses_by_supplier_and_category(self.figure.add_subplot(111), data),
+            "No expense data available.",
+            is_empty=lambda data: not data.rows
+        )
 
-        # Extract unique suppliers and categories
-        suppliers = sorted(list(set([record.supplier for record in data])))
-        categories = sorted(list(set([record.category for record in data])))
-
-        # Prepare data
-        supplier_category_expenses = {supplier: {category: 0 for category in categories} for supplier in suppliers}
-        for record in data:
-            supplier_category_expenses[record.supplier][record.category] += record.total_expenses
-
-        # Plot grouped bar chart
-        ax = self.figure.add_subplot(111)
-        bar_width = 0.8 / len(suppliers)  # Adjust bar width based on number of suppliers
-        indices = range(len(categories))
-        for i, supplier in enumerate(suppliers):
-            expenses = [supplier_category_expenses[supplier][category] for category in categories]
-            ax.bar([x + i * bar_width for x in indices], expenses, bar_width, label=supplier)
-
-        ax.set_xticks([x + bar_width * (len(suppliers) - 1) / 2 for x in indices])
-        ax.set_xticklabels(categories, rotation=45)
-        ax.set_xlabel("Category")
-        ax.set_ylabel("Total Expenses")
-        ax.set_title("Expenses by Supplier and Category")
-        ax.legend()
-        self.figure.tight_layout()
-        self.canvas.draw()
+    def display_profit_and_margin(self):
+        """Display profit per period, cumulative profit and margin."""
+        self.run_time_series_report(
+            "Profit & Margin",
+            lambda manager, filters: manager.calculate_profit_series(**filters),
+            "profit", "lttb", charts.plot_profit_and_margin,
+            "No sales or expense data available."
+        )
+
+    def display_sales_heatmap(self):
+        """Display sales per weekday and hour of day as a heatmap."""
+        filters = self.get_filters()
+        self.run_report(
+            "Sales Heatmap",
+            lambda manager: manager.calculate_sales_heatmap(**filters),
+            lambda data: charts.plot_sales_heatmap(self.figure.add_subplot(111), data),
+            "No sales data available.",
+            is_empty=lambda data: not data.values.any()
+        )
+
+    def display_top_items(self):
+        """Display the best-selling items and their change against the previous period."""
+        filters = self.get_filters()
+        self.run_report(
+            "Top Items",
+            lambda manager: manager.calculate_top_items(**filters, top_n=self.TOP_ITEMS),
+            lambda data: charts.plot_top_items(self.figure.add_subplot(111), data),
+            "No sales data available."
+        )
 
     def export_report(self):
         """Export the current chart as a JPEG or PNG file."""
@@ -164,3 +339,46 @@ class FinancialReportGUI(ttk.Frame):
             messagebox.showinfo("Success", f"Report saved as {file_path}")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save report: {e}")
+
+    def export_data(self):
+        """Stream the selected ledger or report rows, with the current filters, to a CSV or Parquet file."""
+        dataset = self.export_dataset_var.get()
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv"), ("Parquet files", "*.parquet")]
+        )
+        if not file_path:
+            return
+        export_format = "parquet" if file_path.lower().endswith(".parquet") else "csv"
+        filters = self.get_filters(with_granularity=True)
+        report = self.EXPORT_DATASETS[dataset]
+
+        def export(manager):
+            if dataset == "Sales Ledger":
+                return manager.export_sales(file_path, export_format, filters["start"], filters["end"])
+            if dataset == "Expense Ledger":
+                return manager.export_expenses(file_path, export_format, filters["start"], filters["end"])
+            report_filters = dict(filters)
+            if report in ("sales_by_category", "expense_by_supplier_and_category"):
+                report_filters.pop("granularity")
+            elif report_filters["granularity"] == "auto":
+                report_filters["granularity"] = manager.report_manager.suggest_granularity(
+                    filters["start"], filters["end"]
+                )
+            return manager.export_report(report, file_path, export_format, **report_filters)
+
+        self.export_data_button.config(state="disabled")
+        self.export_runner.submit(
+            f"{dataset} export", export,
+            lambda stats: messagebox.showinfo(
+                "Success",
+                f"Exported {stats['rows']} rows to {stats['path']} "
+                f"in {stats['seconds']:.1f}s ({stats['rows_per_second']:.0f} rows/s)."
+            ),
+            lambda error: messagebox.showerror("Input Error" if isinstance(error, ValueError) else "Error", str(error))
+        )
+
+    def show_export_progress(self, job, state):
+        """Enable the export button again once the running export has finished or failed."""
+        if state == "finished":
+            self.export_data_button.config(state="normal")
@@ -0,0 +1,161 @@
+# gui/report_runner_v3.py
+
+import queue
+import threading
+from sqlalchemy import event
+
+
+class ReportJob:
+    """One report request: compute(manager) runs on the worker, on_done(result) on the Tk loop."""
+
+    def __init__(self, job_id, name, compute, on_done, on_error=None):
+        self.job_id = job_id
+        self.name = name
+        self.compute = compute
+        self.on_done = on_done
+        self.on_error = on_error
+        self.cancelled = threading.Event()
+
+
+class ReportRunner:
+    """Runs report queries on a background thread so the Tk event loop stays responsive.
+
+    The worker owns its own FinancialReportManager, and with it its own engine and connections.
+    Only the newest request matters: submitting a report drops any request still waiting and
+    cancels the one running, whose query is interrupted through SQLite's progress handler.
+    The worker posts events to a queue that the Tk side drains with after(), so Tk is only
+    ever touched from the thread running mainloop().
+    """
+
+    POLL_MS = 50
+    PROGRESS_STEPS = 10000  # SQLite VM instructions between progress events
+
+    def __init__(self, widget, manager_factory, on_progress=None):
+        self.widget = widget
+        self.manager_factory = manager_factory
+        self.on_progress = on_progress  # on_progress(job, state), state: "started", "progress" or "finished"
+        self.condition = threading.Condition()
+        self.pending = None
+        self.current = None
+        self.latest = None
+        self.next_id = 0
+        self.stopped = False
+        self.polling = False
+        self.events = queue.Queue()
+        self.thread = threading.Thread(target=self._work, name="report-runner", daemon=True)
+        self.thread.start()
+
+    def submit(self, name, compute, on_done, on_error=None):
+        """Queue a report, superseding any report that is waiting or running."""
+        with self.condition:
+            self.next_id += 1
+            job = ReportJob(self.next_id, name, compute, on_done, on_error)
+            if self.current is not None:
+                self.current.cancelled.set()
+            self.pending = job  # Rapid clicks coalesce: a waiting job is simply replaced
+            self.latest = job
+            self.condition.notify()
+        self._start_polling()
+        return job
+
+    def cancel(self):
+        """Cancel the waiting and running reports."""
+        with self.condition:
+            self.pending = None
+            if self.current is not None:
+                self.current.cancelled.set()
+            self.latest = None
+
+    def shutdown(self):
+        """Stop the worker thread after the running report."""
+        self.cancel()
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+
+    def is_busy(self):
+        with self.condition:
+            return self.pending is not None or self.current is not None
+
+    # Worker thread
+
+    def _work(self):
+        manager = None
+        while True:
+            with self.condition:
+                while self.pending is None and not self.stopped:
+                    self.condition.wait()
+                if self.stopped:
+                    return
+                job = self.current = self.pending
+                self.pending = None
+
+            self.events.put((job, "started", None))
+            try:
+                if manager is None:
+                    manager = self.manager_factory()
+                    event.listen(manager.engine, "checkout", self._install_progress_handler)
+                result = job.compute(manager)
+                outcome = ("cancelled", None) if job.cancelled.is_set() else ("done", result)
+            except Exception as e:
+                outcome = ("cancelled", None) if job.cancelled.is_set() else ("error", e)
+            with self.condition:
+                # Queued before the runner stops looking busy, so the poll loop cannot miss it
+                self.events.put((job,) + outcome)
+                self.current = None
+
+    def _install_progress_handler(self, dbapi_connection, connection_record, connection_proxy):
+        dbapi_connection.set_progress_handler(self._query_progress, self.PROGRESS_STEPS)
+
+    def _query_progress(self):
+        # Called by SQLite on the worker thread; a non-zero return aborts the running statement
+        job = self.current
+        if job is None:
+            return 0
+        if job.cancelled.is_set():
+            return 1
+        self.events.put((job, "progress", None))
+        return 0
+
+    # Tk thread
+
+    def _start_polling(self):
+        if not self.polling:
+            self.polling = True
+            self.widget.after(self.POLL_MS, self._poll)
+
+    def _poll(self):
+        """Deliver worker events on the Tk loop; keeps polling while reports are outstanding."""
+        progressed = set()
+        while True:
+            try:
+                job, state, payload = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if state == "progress":
+                progressed.add(job)  # Report progress at most once per poll
+                continue
+            self._deliver(job, state, payload)
+        for job in progressed:
+            if job is self.latest and self.on_progress:
+                self.on_progress(job, "progress")
+
+        if self.is_busy() or not self.events.empty():
+            self.widget.after(self.POLL_MS, self._poll)
+        else:
+            self.polling = False
+
+    def _deliver(self, job, state, payload):
+        if job is not self.latest:
+            return  # Superseded or cancelled; its result is no longer wanted
+        if state == "started":
+            if self.on_progress:
+                self.on_progress(job, "started")
+            return
+        self.latest = None
+        if self.on_progress:
+            self.on_progress(job, "finished")
+        if state == "done":
+            job.on_done(payload)
+        elif state == "error" and job.on_error:
+            job.on_error(payload)
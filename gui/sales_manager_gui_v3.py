@@ -1,13 +1,45 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from business_logic.sales_management_v3 import SalesManager
+from business_logic.shared_managers_v3 import shared_manager
+from gui.table_model_v3 import TableModel
+from gui.virtual_tree_v3 import VirtualTree
+from gui.tk_events_v3 import TkEventQueue
+from gui.db_tasks_v3 import DbTasks, report_errors
+from gui.list_filters_v3 import ListFilters
+from business_logic.events_v3 import RowsChanged
+
+# Headings that sort the lists when clicked -> sort name; None sorts by ID
+SALES_SORTS = {"Sales ID": None, "Total Cost": "total_cost", "Sales Date": "sales_date"}
+
+
+def sales_values(record):
+    """Treeview values for a row of SalesManager.fetch_sales_page()."""
+    return (
+        record.sales_id,
+        record.item_name,
+        record.quantity_sold,
+        f"${record.unit_price:.2f}",
+        f"${record.total_cost:.2f}",
+        record.sales_date.strftime("%Y-%m-%d %H:%M:%S")
+    )
 
 
 class SalesManagerGUI(ttk.Frame):
     def __init__(self, parent, *args, **kwargs):
         super().__init__(parent, *args, **kwargs)
-        self.manager = SalesManager()
+        self.manager = shared_manager(SalesManager)
+        self.tasks = DbTasks(self)  # Database calls run off the Tk thread
+        self.sales_model = TableModel.of_manager(lambda: self.manager, "fetch_sales_page", "fetch_sales_rows",
+                                                 "fetch_sales_changes")  # Shared by the list tabs
+        self.sales_filters = ListFilters(self.sales_model, self.tasks, "Load sales", report_errors("load sales records"), {
+            "search": ("Item Name", None, str),
+        })
         self.sales_data = []  # Holds multiple sales items
+        self.sales_rows = []  # The sales_tree row of each item in sales_data
+        self.registering = False  # A sale is being registered on the writer thread
+        self.events = TkEventQueue(self)  # Changes committed from any tab
+        self.events.subscribe(RowsChanged, self.on_rows_changed)
         self.initialize_gui()
 
     def initialize_gui(self):
@@ -59,15 +91,17 @@ class SalesManagerGUI(ttk.Frame):
             self.sales_tree.column(col, anchor="center", width=150)
         self.sales_tree.grid(row=6, column=0, columnspan=3, padx=10, pady=10)
 
-    def refresh_items(self):
+    def refresh_items(self, clear_selection=True):
         """Load inventory items into the dropdown."""
-        try:
-            items = self.manager.fetch_inventory_items()
-            item_names = [f"{item['item_name']} (ID: {item['item_id']})" for item in items]
+        self.tasks.run("Load inventory items", self.manager.fetch_inventory_items,
+                       on_done=lambda items: self.show_items(items, clear_selection),
+                       on_error=report_errors("load inventory items"))
+
+    def show_items(self, items, clear_selection=True):
+        item_names = [f"{item['item_name']} (ID: {item['item_id']})" for item in items]
+        if clear_selection:
             self.item_var.set("")
-            self.item_menu['values'] = item_names
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load inventory items: {e}")
+        self.item_menu['values'] = item_names
 
     def add_to_sale(self):
         """Add an item to the current sale."""
@@ -92,12 +126,15 @@ class SalesManagerGUI(ttk.Frame):
                 "total_cost": total_cost
             })
 
-            self.sales_tree.insert("", "end", values=(item.split(" (ID:")[0], quantity, f"${unit_price:.2f}", f"${total_cost:.2f}"))
+            self.sales_rows.append(self.sales_tree.insert(
+                "", "end", values=(item.split(" (ID:")[0], quantity, f"${unit_price:.2f}", f"${total_cost:.2f}")
+            ))
 
             current_total = float(self.total_cost_var.get())
             updated_total = current_total + total_cost
             self.total_cost_var.set(f"{updated_total:.2f}")
-            self.register_button.config(state="normal")
+            if not self.registering:  # Items added during a registration wait for the next one
+                self.register_button.config(state="normal")
 
             self.item_menu.set("")
             self.quantity_entry.delete(0, tk.END)
@@ -114,51 +151,86 @@ class SalesManagerGUI(ttk.Frame):
             if not self.sales_data:
                 raise ValueError("No items in the sales list.")
 
-            self.manager.register_sales(self.sales_data)
-            messagebox.showinfo("Success", "Sales registered successfully!")
+            self.registering = True
+            self.register_button.config(state="disabled")  # Until this sale is registered
+            submitted = list(self.sales_data)
+            self.tasks.run("Register sales", self.manager.register_sales, submitted, write=True,
+                           on_done=lambda result: self.on_sales_registered(submitted),
+                           on_error=self.on_register_sales_failed)
 
-            self.sales_data.clear()
-            for row in self.sales_tree.get_children():
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to register sales: {e}")
+
+    def on_sales_registered(self, submitted):
+        """Remove the registered items from the sale; items added while it was registered stay."""
+        messagebox.showinfo("Success", "Sales registered successfully!")
+
+        self.registering = False
+        registered = {id(sale) for sale in submitted}  # Not in the cart any more if reset() emptied it
+        kept = []
+        for sale, row in zip(self.sales_data, self.sales_rows):
+            if id(sale) in registered:
                 self.sales_tree.delete(row)
+            else:
+                kept.append((sale, row))
+        self.sales_data = [sale for sale, row in kept]
+        self.sales_rows = [row for sale, row in kept]
 
-            self.total_cost_var.set("0.00")
-            self.register_button.config(state="disabled")
-            self.refresh_items()
+        self.total_cost_var.set(f"{sum(sale['total_cost'] for sale in self.sales_data):.2f}")
+        if self.sales_data:
+            self.register_button.config(state="normal")
+        self.refresh_items()
 
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to register sales: {e}")
+    def reset(self):
+        """Empty the sale and forms for the next user; a registration already submitted still completes."""
+        self.sales_data, self.sales_rows = [], []
+        for row in self.sales_tree.get_children():
+            self.sales_tree.delete(row)
+        self.total_cost_var.set("0.00")
+        self.register_button.config(state="disabled")
+        self.item_menu.set("")
+        self.quantity_entry.delete(0, tk.END)
+        self.unit_price_entry.delete(0, tk.END)
+        self.update_field_var.set("")
+        self.update_value_entry.delete(0, tk.END)
+        self.sales_filters.reset()
+
+    def on_register_sales_failed(self, error):
+        self.registering = False
+        self.register_button.config(state="normal")  # The sale is kept, to try again
+        messagebox.showerror("Error", f"Failed to register sales: {error}")
 
     # -------------------------------- View All Sales Tab --------------------------------
+    def on_rows_changed(self, event):
+        """Apply sales changes committed from any tab, and list items added or renamed elsewhere."""
+        if event.table == "inventory":
+            self.refresh_items(clear_selection=False)  # Keeps the sale being entered
+            return
+        if event.table != "sales":
+            return
+        self.sales_model.sync_in(self.tasks, "Sync sales", on_error=report_errors("load sales records"))
+
     def create_view_all_sales_tab(self, notebook):
         frame = ttk.Frame(notebook)
         notebook.add(frame, text="View All Sales")
 
         columns = ("Sales ID", "Item Name", "Quantity", "Unit Price", "Total Cost", "Sales Date")
-        self.view_sales_tree = ttk.Treeview(frame, columns=columns, show="headings")
+        self.view_sales_tree = VirtualTree(frame, self.sales_model.fetch_page, sales_values, columns=columns,
+                                           key=self.sales_model.cursor, order=self.sales_model.order,
+                                           on_error=lambda e: messagebox.showerror("Error", f"Failed to load sales records: {e}"))
+        self.sales_model.subscribe(self.view_sales_tree)
         for col in columns:
             self.view_sales_tree.heading(col, text=col)
             self.view_sales_tree.column(col, anchor='center')
+        self.sales_filters.bind_headings(self.view_sales_tree, SALES_SORTS)
+        self.sales_filters.add_bar(frame).pack(fill="x", padx=10, pady=(10, 0))
         self.view_sales_tree.pack(expand=True, fill="both", padx=10, pady=10)
 
         tk.Button(frame, text="Refresh", command=self.load_sales).pack(pady=5)
 
     def load_sales(self):
-        """Load all sales records into the Treeview."""
-        try:
-            for row in self.view_sales_tree.get_children():
-                self.view_sales_tree.delete(row)
-            records = self.manager.fetch_sales_records()
-            for record in records:
-                self.view_sales_tree.insert("", "end", values=(
-                    record.sales_id,
-                    record.item_name,
-                    record.quantity_sold,
-                    f"${record.unit_price:.2f}",
-                    f"${record.total_cost:.2f}",
-                    record.sales_date.strftime("%Y-%m-%d %H:%M:%S")
-                ))
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load sales records: {e}")
+        """Reload the sales lists of every tab; they share the pages read."""
+        self.sales_model.reload_in(self.tasks, "Load sales", on_error=report_errors("load sales records"))
 
     # -------------------------------- Update Sales Tab --------------------------------
     def create_update_sales_tab(self, notebook):
@@ -166,10 +238,15 @@ class SalesManagerGUI(ttk.Frame):
         notebook.add(frame, text="Update Sales")
 
         columns = ("Sales ID", "Item Name", "Quantity", "Unit Price", "Total Cost", "Sales Date")
-        self.update_sales_tree = ttk.Treeview(frame, columns=columns, show="headings")
+        self.update_sales_tree = VirtualTree(frame, self.sales_model.fetch_page, sales_values, columns=columns,
+                                             key=self.sales_model.cursor, order=self.sales_model.order,
+                                             on_error=lambda e: messagebox.showerror("Error", f"Failed to load sales records for update: {e}"))
+        self.sales_model.subscribe(self.update_sales_tree)
         for col in columns:
             self.update_sales_tree.heading(col, text=col)
             self.update_sales_tree.column(col, anchor='center')
+        self.sales_filters.bind_headings(self.update_sales_tree, SALES_SORTS)
+        self.sales_filters.add_bar(frame).pack(fill="x", padx=10, pady=(10, 0))
         self.update_sales_tree.pack(expand=True, fill="both", padx=10, pady=10)
 
         form_frame = ttk.Frame(frame)
@@ -192,22 +269,8 @@ class SalesManagerGUI(ttk.Frame):
         tk.Button(button_frame, text="Refresh", command=self.load_sales_for_update).grid(row=0, column=1, padx=5)
 
     def load_sales_for_update(self):
-        """Load sales records into the update Treeview."""
-        try:
-            for row in self.update_sales_tree.get_children():
-                self.update_sales_tree.delete(row)
-            records = self.manager.fetch_sales_records()
-            for record in records:
-                self.update_sales_tree.insert("", "end", values=(
-                    record.sales_id,
-                    record.item_name,
-                    record.quantity_sold,
-                    f"${record.unit_price:.2f}",
-                    f"${record.total_cost:.2f}",
-                    record.sales_date.strftime("%Y-%m-%d %H:%M:%S")
-                ))
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load sales records for update: {e}")
+        """Reload the sales lists of every tab; they share the pages read."""
+        self.sales_model.reload_in(self.tasks, "Load sales", on_error=report_errors("load sales records for update"))
 
     def update_sales_record(self):
         """Update a selected sales record."""
@@ -228,15 +291,12 @@ class SalesManagerGUI(ttk.Frame):
             elif field == "unit_price":
                 new_value = float(new_value)
 
-            self.manager.update_sales_record(sales_id, field, new_value)
-            messagebox.showinfo("Success", "Sales record updated successfully!")
-            self.load_sales_for_update()
-            self.load_sales()
+            self.tasks.run("Update sales record", self.manager.update_sales_record, sales_id, field, new_value, write=True,
+                           on_done=lambda _: messagebox.showinfo("Success", "Sales record updated successfully!"),
+                           on_error=report_errors("update sales record"))
 
         except ValueError as ve:
             messagebox.showerror("Input Error", str(ve))
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to update sales record: {e}")
 
     # -------------------------------- Delete Sales Tab --------------------------------
     def create_delete_sales_tab(self, notebook):
@@ -244,10 +304,15 @@ class SalesManagerGUI(ttk.Frame):
         notebook.add(frame, text="Delete Sales")
 
         columns = ("Sales ID", "Item Name", "Quantity", "Unit Price", "Total Cost", "Sales Date")
-        self.delete_sales_tree = ttk.Treeview(frame, columns=columns, show="headings")
+        self.delete_sales_tree = VirtualTree(frame, self.sales_model.fetch_page, sales_values, columns=columns,
+                                             key=self.sales_model.cursor, order=self.sales_model.order,
+                                             on_error=lambda e: messagebox.showerror("Error", f"Failed to load sales records for deletion: {e}"))
+        self.sales_model.subscribe(self.delete_sales_tree)
         for col in columns:
             self.delete_sales_tree.heading(col, text=col)
             self.delete_sales_tree.column(col, anchor='center')
+        self.sales_filters.bind_headings(self.delete_sales_tree, SALES_SORTS)
+        self.sales_filters.add_bar(frame).pack(fill="x", padx=10, pady=(10, 0))
         self.delete_sales_tree.pack(expand=True, fill="both", padx=10, pady=10)
 
         button_frame = ttk.Frame(frame)
@@ -257,22 +322,8 @@ class SalesManagerGUI(ttk.Frame):
         tk.Button(button_frame, text="Refresh", command=self.load_sales_for_delete).grid(row=0, column=1, padx=5)
 
     def load_sales_for_delete(self):
-        """Load sales records into the delete Treeview."""
-        try:
-            for row in self.delete_sales_tree.get_children():
-                self.delete_sales_tree.delete(row)
-            records = self.manager.fetch_sales_records()
-            for record in records:
-                self.delete_sales_tree.insert("", "end", values=(
-                    record.sales_id,
-                    record.item_name,
-                    record.quantity_sold,
-                    f"${record.unit_price:.2f}",
-                    f"${record.total_cost:.2f}",
-                    record.sales_date.strftime("%Y-%m-%d %H:%M:%S")
-                ))
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load sales records for deletion: {e}")
+        """Reload the sales lists of every tab; they share the pages read."""
+        self.sales_model.reload_in(self.tasks, "Load sales", on_error=report_errors("load sales records for deletion"))
 
     def delete_sales_record(self):
         """Delete a selected sales record."""
@@ -287,14 +338,11 @@ class SalesManagerGUI(ttk.Frame):
             if not confirm:
                 return
 
-            self.manager.delete_sales_record(sales_id)
-            messagebox.showinfo("Success", "Sales record deleted successfully!")
-            self.load_sales_for_delete()
-            self.load_sales()
+            self.tasks.run("Delete sales record", self.manager.delete_sales_record, sales_id, write=True,
+                           on_done=lambda _: messagebox.showinfo("Success", "Sales record deleted successfully!"),
+                           on_error=report_errors("delete sales record"))
         except ValueError as ve:
             messagebox.showerror("Input Error", str(ve))
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to delete sales record: {e}")
 
 
 if __name__ == "__main__":
@@ -314,6 +362,8 @@ class SalesManagerGUI(ttk.Frame):
         super().__init__(parent, *args, **kwargs)
         self.manager = SalesManager()
         self.sales_data = []  # Holds multiple sales items
+        self.sales_rows = []  # The sales_tree row of each item in sales_data
+        self.registering = False  # A sale is being registered on the writer thread
         self.initialize_gui()
 
     def initialize_gui(self):
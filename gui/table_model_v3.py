@@ -0,0 +1,263 @@
+# gui/table_model_v3.py
+
+from collections import OrderedDict, namedtuple
+from business_logic.pagination_v3 import PAGE_SIZE
+
+MAX_PAGES = 20  # Pages cached per model; evicted pages are read again when a view scrolls back
+
+_NOCASE = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")  # SQLite's NOCASE folds ASCII only
+
+
+class _Descending:
+    """A list position that compares the other way round, for lists in descending order."""
+
+    __slots__ = ("position",)
+
+    def __init__(self, position):
+        self.position = position
+
+    def __eq__(self, other):
+        return self.position == other.position
+
+    def __lt__(self, other):
+        return other.position < self.position
+
+    def __le__(self, other):
+        return other.position <= self.position
+
+
+class TableModel:
+    """The rows of one table, read once and shared by every tree that shows them.
+
+    fetch(after=None, before=None, limit=n) is a keyset page source, fetch_rows(keys) returns
+    the rows with the given primary keys and fetch_changes(mark) returns (next mark, keys of the
+    rows changed since mark), as the managers' fetch_*_changes() do. Each page is read from the
+    database once per reload(), however many views page through it, and each row is held once,
+    as a namedtuple keyed by its primary key. Views subscribe with refresh(), update_row(row,
+    append) and remove_row(key), and every row change is pushed to all of them; update_row()
+    returns False when it cannot show the row in order.
+
+    reload_in() and sync_in() run the database half of reload() and sync() on a DbTasks worker
+    and apply the result on the Tk loop.
+
+    query holds the filters and sort order every page is read with, as keyword arguments of
+    fetch(); the filters, without sort and descending, are passed to fetch_rows() as well, so
+    rows changed to no longer match are removed from the views. Views page with cursor(row)
+    and place changed rows by order(row); nocase_sorts names the sorts the database compares
+    case-insensitively (COLLATE NOCASE), which order() folds the same way.
+    """
+
+    def __init__(self, fetch, fetch_rows, fetch_changes, max_pages=MAX_PAGES, nocase_sorts=()):
+        self.fetch = fetch
+        self.fetch_rows = fetch_rows
+        self.fetch_changes = fetch_changes
+        self.max_pages = max_pages
+        self.nocase_sorts = frozenset(nocase_sorts)
+        self.mark = None  # Change high-water mark of the last load; None until the views are loaded
+        self.query = {}  # Filters and sort of the rows shown, as fetch() keyword arguments
+        self.loads = 0  # reload_in() calls made; only the latest one is applied
+        self.rows = {}  # Primary key -> row
+        self.pages = OrderedDict()  # (after, before, limit) -> primary keys of the page's rows, least recent first
+        self.row_type = None
+        self.views = []
+        self.syncing = False  # A sync_in() read is running
+        self.sync_again = False  # Changes were reported while it ran
+
+    @classmethod
+    def of_manager(cls, manager, fetch, fetch_rows, fetch_changes, **options):
+        """A model over the manager methods with the given names, looked up on manager() at each call.
+
+        The screens pass lambda: self.manager, so a test that replaces the manager is read from.
+        """
+        return cls(lambda **query: getattr(manager(), fetch)(**query),
+                   lambda keys, **filters: getattr(manager(), fetch_rows)(keys, **filters),
+                   lambda mark=None: getattr(manager(), fetch_changes)(mark), **options)
+
+    def subscribe(self, view):
+        self.views.append(view)
+
+    def unsubscribe(self, view):
+        self.views.remove(view)
+
+    def fetch_page(self, after=None, before=None, limit=PAGE_SIZE):
+        """Page source for the views: a cached page, or one read from the database."""
+        request = (after, before, limit)
+        keys = self.pages.get(request)
+        if keys is not None:
+            self.pages.move_to_end(request)
+            return [self.rows[key] for key in keys]
+        return self._cache_page(request, self.fetch(after=after, before=before, limit=limit, **self.query))
+
+    def cursor(self, row):
+        """The position of row in the list, which views page after and before: its key, or (sort value, key)."""
+        sort = self.query.get("sort")
+        return row[0] if sort is None else (getattr(row, sort), row[0])
+
+    def order(self, row):
+        """The position of row as the database orders the list, for comparing rows: cursor(row),
+        with NOCASE sort values folded, that compares the other way round in descending order."""
+        sort = self.query.get("sort")
+        if sort is None:
+            position = row[0]
+        else:
+            value = getattr(row, sort)
+            if sort in self.nocase_sorts and isinstance(value, str):
+                value = value.translate(_NOCASE)
+            position = (value, row[0])
+        return _Descending(position) if self.query.get("descending") else position
+
+    def filters(self):
+        """The query without its sort order, for fetch_rows()."""
+        return {name: value for name, value in self.query.items() if name not in ("sort", "descending")}
+
+    def read_first_page(self, query=None):
+        """The database half of reload(): (query, change mark, first page). Safe to call on a worker thread.
+
+        query replaces the current one when the result is applied; by default it is kept.
+        """
+        query = dict(self.query if query is None else query)
+        mark = self.fetch_changes(None)[0]  # Taken first, so writes made during the load are applied by sync()
+        return query, mark, self.fetch(limit=PAGE_SIZE, **query)
+
+    def reload(self, loaded=None):
+        """Forget every cached row and reload the views, which read the first page once between them.
+
+        loaded is a read_first_page() result read on a worker thread; the views then find the
+        first page in the cache instead of reading it on the Tk thread.
+        """
+        self.mark = None
+        if loaded is None:
+            loaded = self.query, self.fetch_changes(None)[0], None
+        self.query, mark, first_page = loaded
+        self.rows.clear()
+        self.pages.clear()
+        if first_page is not None:
+            self._cache_page((None, None, PAGE_SIZE), first_page)
+        for view in list(self.views):
+            view.refresh()
+        self.mark = mark
+
+    def set_query(self, query):
+        """Show the rows query selects, in its order, from the first page."""
+        self.reload(self.read_first_page(query))
+
+    def reload_in(self, tasks, name, on_error=None, query=None):
+        """reload() with the database read on a tasks worker, optionally with a new query.
+
+        When reloads overlap only the latest one is applied, whichever finishes last.
+        """
+        self.loads += 1
+        load = self.loads
+
+        def done(loaded):
+            if load == self.loads:
+                self.reload(loaded)
+
+        tasks.run(name, self.read_first_page, query, on_done=done, on_error=on_error)
+
+    def read_changes(self):
+        """The database half of sync(), safe to call on a worker thread; None before the first load."""
+        mark, query = self.mark, self.query
+        if mark is None:
+            return None
+        next_mark, keys = self.fetch_changes(mark)
+        return query, mark, next_mark, keys, self.fetch_rows(keys, **self.filters()) if keys else []
+
+    def sync(self, changes=None, reload=None):
+        """Apply only the inserts, updates and deletes made since the last load to the views.
+
+        changes is a read_changes() result read on a worker thread. Does nothing before the
+        first load, and reloads in full, with reload() or the given reload, when the change log
+        no longer reaches back to the last load or a view cannot show a changed row in order.
+        """
+        if changes is None:
+            changes = self.read_changes()
+        if changes is None:
+            return
+        if reload is None:
+            reload = self.reload
+        query, mark, next_mark, keys, rows = changes
+        if mark != self.mark or query != self.query:
+            return  # Read before a reload, which has these changes already
+        if keys is None:
+            return reload()
+        in_order = not keys or self.refresh_rows(keys, rows)
+        self.mark = next_mark
+        if not in_order:
+            reload()
+
+    def sync_in(self, tasks, name, on_error=None):
+        """sync() with the reads on a tasks worker. Calls made while one runs are folded into one more."""
+        if self.mark is None:
+            return
+        if self.syncing:
+            self.sync_again = True
+            return
+        self.syncing = True
+
+        def done(changes):
+            self.syncing = False
+            self.sync(changes, reload=lambda: self.reload_in(tasks, name, on_error))
+            if self.sync_again:
+                self.sync_again = False
+                self.sync_in(tasks, name, on_error)
+
+        def failed(error):
+            self.syncing = self.sync_again = False
+            if on_error is not None:
+                on_error(error)
+
+        tasks.run(name, self.read_changes, on_done=done, on_error=failed)
+
+    def refresh_rows(self, keys, rows=None):
+        """Read the given rows again and push them to the views; rows that no longer exist or match are removed.
+
+        rows, when given, are the rows already read for keys. Returns False when a view could not
+        show a row in order, because its sort value changed or it is new and sorts before the end
+        of the loaded rows; the views then need a reload.
+        """
+        missing = set(keys)
+        if rows is None:
+            rows = self.fetch_rows(missing, **self.filters())
+        if any(row[0] not in self.rows for row in rows):
+            self.pages.clear()  # New rows belong on pages that were read without them
+        rows = [self._keep(row) for row in rows]
+        in_order = True
+        for row in rows:
+            missing.discard(row[0])
+            for view in list(self.views):
+                if view.update_row(row) is False:
+                    in_order = False
+        if missing:
+            self.pages.clear()  # Cached pages would now come up short, which views take as the end of the table
+            for key in missing:
+                self.rows.pop(key, None)
+                for view in list(self.views):
+                    view.remove_row(key)
+        return in_order
+
+    def put_row(self, row):
+        """Push a row whose new values are already known, and whose place in the order is unchanged, without reading it."""
+        row = self._keep(row)
+        for view in list(self.views):
+            view.update_row(row, False)
+
+    def _cache_page(self, request, rows):
+        rows = [self._keep(row) for row in rows]
+        self.pages[request] = [row[0] for row in rows]
+        if len(self.pages) > self.max_pages:
+            self._evict()
+        return rows
+
+    def _keep(self, row):
+        if self.row_type is None:
+            self.row_type = namedtuple("Row", row._fields)
+        row = self.row_type._make(row)
+        self.rows[row[0]] = row
+        return row
+
+    def _evict(self):
+        self.pages.popitem(last=False)
+        cached = set().union(*self.pages.values())
+        for key in [key for key in self.rows if key not in cached]:
+            del self.rows[key]
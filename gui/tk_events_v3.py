@@ -0,0 +1,82 @@
+# gui/tk_events_v3.py
+
+import threading
+from business_logic.events_v3 import coalesce, event_bus
+
+_waiting = set()  # Queues that got events on other threads and still need a flush scheduled
+_waiting_lock = threading.Lock()
+
+
+class TkEventQueue:
+    """Delivers change events from the bus to a widget's handlers, once per Tk frame.
+
+    Events published before the event loop next goes idle are merged with coalesce() and
+    handled together from one after_idle() callback, so a burst of commits (a sale of ten
+    items, say) costs each view one update. The queue unsubscribes from the bus when the
+    widget is destroyed.
+
+    Create the queue on the Tk thread. Events published on other threads, such as DbTasks
+    workers, are held until schedule_waiting_flushes() runs on the Tk thread.
+    """
+
+    def __init__(self, widget, bus=event_bus):
+        self.widget = widget
+        self.bus = bus
+        self.handlers = {}  # Event type -> handlers
+        self.pending = []
+        self.flush_scheduled = False
+        self.closed = False
+        self.lock = threading.Lock()
+        self.thread = threading.current_thread()
+        if hasattr(widget, "bind"):
+            widget.bind("<Destroy>", self._on_destroy, add="+")
+
+    def subscribe(self, event_type, handler):
+        """Call handler(event) on the Tk thread for each coalesced event of event_type."""
+        if event_type not in self.handlers:
+            self.handlers[event_type] = []
+            self.bus.subscribe(event_type, self._deliver)
+        self.handlers[event_type].append(handler)
+
+    def close(self):
+        """Stop receiving events."""
+        self.closed = True
+        for event_type in self.handlers:
+            self.bus.unsubscribe(event_type, self._deliver)
+
+    def _deliver(self, event):
+        with self.lock:
+            self.pending.append(event)
+            if self.flush_scheduled or self.closed:
+                return
+            self.flush_scheduled = True
+        if threading.current_thread() is self.thread:
+            self.widget.after_idle(self.flush)
+        else:
+            with _waiting_lock:
+                _waiting.add(self)  # Tk is only touched from its own thread
+
+    def flush(self):
+        """Handle the events received since the last flush."""
+        with self.lock:
+            events, self.pending = self.pending, []
+            self.flush_scheduled = False
+        if self.closed:
+            return
+        for event in coalesce(events):
+            for handler in list(self.handlers.get(type(event), ())):
+                handler(event)
+
+    def _on_destroy(self, event):
+        if event.widget is self.widget:
+            self.close()
+
+
+def schedule_waiting_flushes():
+    """Schedule the flushes of queues that received events on other threads. Call on the Tk thread."""
+    with _waiting_lock:
+        queues = list(_waiting)
+        _waiting.clear()
+    for event_queue in queues:
+        if not event_queue.closed:
+            event_queue.widget.after_idle(event_queue.flush)
@@ -3,15 +3,38 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from business_logic.user_management_v3 import UserManager  # Updated import
+from business_logic.shared_managers_v3 import shared_manager
+from gui.table_model_v3 import TableModel
+from gui.virtual_tree_v3 import VirtualTree
+from gui.tk_events_v3 import TkEventQueue
+from gui.db_tasks_v3 import DbTasks, report_errors
+from gui.list_filters_v3 import ListFilters
+from business_logic.events_v3 import RowsChanged
 import logging
 from logging.handlers import RotatingFileHandler
 
+# Headings that sort the lists when clicked -> sort name; None sorts by ID
+USER_SORTS = {"ID": None, "Username": "username", "Type": "registration_type"}
+
+
+def user_values(user):
+    """Treeview values for a row of UserManager.fetch_users_page()."""
+    return (user.user_id, user.username, user.contact, user.email, user.registration_type)
 
 
 class UserManagementGUI(ttk.Frame):
     def __init__(self, parent, *args, **kwargs):
         super().__init__(parent, *args, **kwargs)
-        self.user_manager = UserManager()
+        self.user_manager = shared_manager(UserManager)
+        self.tasks = DbTasks(self)  # Database calls run off the Tk thread
+        self.users_model = TableModel.of_manager(lambda: self.user_manager, "fetch_users_page", "fetch_user_rows",
+                                                 "fetch_user_changes", nocase_sorts=("username",))  # Shared by the list tabs
+        self.user_filters = ListFilters(self.users_model, self.tasks, "Load users", report_errors("load users"), {
+            "search": ("Username", None, str),
+            "registration_type": ("Type", ("customer", "admin", "supplier"), str),
+        })
+        self.events = TkEventQueue(self)  # Changes committed from any tab
+        self.events.subscribe(RowsChanged, self.on_rows_changed)
         self.initialize_gui()
 
     def initialize_gui(self):
@@ -89,7 +112,9 @@ class UserManagementGUI(ttk.Frame):
         notebook.add(frame, text="View All Users")
 
         # Users Treeview
-        self.users_tree = ttk.Treeview(frame, columns=("ID", "Username", "Contact", "Email", "Type"), show="headings")
+        self.users_tree = VirtualTree(frame, self.users_model.fetch_page, user_values, key=self.users_model.cursor, order=self.users_model.order,
+                                      columns=("ID", "Username", "Contact", "Email", "Type"))
+        self.users_model.subscribe(self.users_tree)
         self.users_tree.heading("ID", text="ID")
         self.users_tree.heading("Username", text="Username")
         self.users_tree.heading("Contact", text="Contact")
@@ -100,6 +125,8 @@ class UserManagementGUI(ttk.Frame):
         self.users_tree.column("Contact", width=100, anchor="center")
         self.users_tree.column("Email", width=200, anchor="center")
         self.users_tree.column("Type", width=100, anchor="center")
+        self.user_filters.bind_headings(self.users_tree, USER_SORTS)
+        self.user_filters.add_bar(frame).pack(fill="x", padx=10, pady=(10, 0))
         self.users_tree.pack(expand=True, fill="both", padx=10, pady=10)
 
         # Refresh Button
@@ -111,7 +138,9 @@ class UserManagementGUI(ttk.Frame):
         notebook.add(frame, text="Update/Delete Users")
 
         # Users Treeview
-        self.update_tree = ttk.Treeview(frame, columns=("ID", "Username", "Contact", "Email", "Type"), show="headings")
+        self.update_tree = VirtualTree(frame, self.users_model.fetch_page, user_values, key=self.users_model.cursor, order=self.users_model.order,
+                                       columns=("ID", "Username", "Contact", "Email", "Type"))
+        self.users_model.subscribe(self.update_tree)
         self.update_tree.heading("ID", text="ID")
         self.update_tree.heading("Username", text="Username")
         self.update_tree.heading("Contact", text="Contact")
@@ -122,6 +151,8 @@ class UserManagementGUI(ttk.Frame):
         self.update_tree.column("Contact", width=100, anchor="center")
         self.update_tree.column("Email", width=200, anchor="center")
         self.update_tree.column("Type", width=100, anchor="center")
+        self.user_filters.bind_headings(self.update_tree, USER_SORTS)
+        self.user_filters.add_bar(frame).pack(fill="x", padx=10, pady=(10, 0))
         self.update_tree.pack(expand=True, fill="both", padx=10, pady=10)
 
         # Update Form
@@ -177,33 +208,31 @@ class UserManagementGUI(ttk.Frame):
             self.company_category_label.grid(row=8, column=0, padx=10, pady=5, sticky="w")
             self.company_category_menu.grid(row=8, column=1, padx=10, pady=5, sticky="w")
 
+    def reset(self):
+        """Clear the forms and list filters for the next user."""
+        self.registration_type_var.set("customer")  # Hides the admin and supplier fields
+        for entry in (self.username_entry, self.password_entry, self.contact_entry, self.email_entry,
+                      self.company_name_entry, self.company_city_entry, self.company_phone_entry):
+            entry.delete(0, tk.END)
+        self.role_type_entry.set("")
+        self.company_category_var.set("")
+        self.field_var.set("")
+        self.new_value_entry.delete(0, tk.END)
+        self.user_filters.reset()
+
     def load_users(self):
-        """Load all users into the Treeview."""
-        for row in self.users_tree.get_children():
-            self.users_tree.delete(row)
-        users = self.user_manager.get_all_users()
-        for user in users:
-            self.users_tree.insert("", "end", values=(
-                user.user_id,
-                user.username,
-                user.contact,
-                user.email,
-                user.registration_type
-            ))
+        """Reload the user lists of every tab; they share the pages read."""
+        self.users_model.reload_in(self.tasks, "Load users", on_error=report_errors("load users"))
 
     def load_users_for_update(self):
-        """Load users into the update Treeview."""
-        for row in self.update_tree.get_children():
-            self.update_tree.delete(row)
-        users = self.user_manager.get_all_users()
-        for user in users:
-            self.update_tree.insert("", "end", values=(
-                user.user_id,
-                user.username,
-                user.contact,
-                user.email,
-                user.registration_type
-            ))
+        """Reload the user lists of every tab; they share the pages read."""
+        self.users_model.reload_in(self.tasks, "Load users", on_error=report_errors("load users"))
+
+    def on_rows_changed(self, event):
+        """Apply user changes committed from any tab, or at registration, to the user lists."""
+        if event.table != "users":
+            return
+        self.users_model.sync_in(self.tasks, "Sync users", on_error=report_errors("load users"))
 
     # -------------------------------- Action Methods --------------------------------
     def handle_register(self):
@@ -245,8 +274,8 @@ class UserManagementGUI(ttk.Frame):
                 logging.error("Registration attempted with missing common fields.")
                 return
 
-            # Initialize UserManager
-            self.user_manager.register_user(
+            self.tasks.run(
+                "Register user", self.user_manager.register_user,
                 username=username,
                 password=password,
                 contact=int(contact),
@@ -256,12 +285,11 @@ class UserManagementGUI(ttk.Frame):
                 company_name=company_name,
                 company_city=company_city,
                 company_phone=company_phone,
-                company_category=company_category
+                company_category=company_category,
+                write=True, on_error=report_errors("register user"),
+                on_done=lambda outcome: self.show_outcome(
+                    outcome, f"User '{username}' registered successfully as {registration_type.capitalize()}!")
             )
-            messagebox.showinfo("Success",
-                                f"User '{username}' registered successfully as {registration_type.capitalize()}!")
-            logging.info(f"User '{username}' registered successfully as '{registration_type}'.")
-            self.load_users()
         except ValueError as ve:
             messagebox.showerror("Input Error", str(ve))
             logging.error(f"Input Error during registration: {ve}")
@@ -290,10 +318,9 @@ class UserManagementGUI(ttk.Frame):
             elif field in ["user_id", "supplier_id"]:
                 new_value = int(new_value)
 
-            self.user_manager.update_user(user_id, field, new_value)
-            messagebox.showinfo("Success", "User updated successfully!")
-            logging.info(f"User ID {user_id} updated: Field='{field}', New Value='{new_value}'")
-            self.load_users_for_update()
+            self.tasks.run("Update user", self.user_manager.update_user, user_id, field, new_value, write=True,
+                           on_done=lambda outcome: self.show_outcome(outcome, "User updated successfully!"),
+                           on_error=report_errors("update user"))
         except ValueError as ve:
             messagebox.showerror("Input Error", str(ve))
             logging.error(f"Input Error during user update: {ve}")
@@ -316,10 +343,9 @@ class UserManagementGUI(ttk.Frame):
                 logging.info(f"Deletion cancelled for User ID {user_id}")
                 return
 
-            self.user_manager.delete_user(user_id)
-            messagebox.showinfo("Success", "User deleted successfully!")
-            logging.info(f"User ID {user_id} deleted successfully.")
-            self.load_users_for_update()
+            self.tasks.run("Delete user", self.user_manager.delete_user, user_id, write=True,
+                           on_done=lambda outcome: self.show_outcome(outcome, "User deleted successfully!"),
+                           on_error=report_errors("delete user"))
         except ValueError as ve:
             messagebox.showerror("Input Error", str(ve))
             logging.error(f"Input Error during user deletion: {ve}")
@@ -327,6 +353,16 @@ class UserManagementGUI(ttk.Frame):
             messagebox.showerror("Error", f"Failed to delete user: {e}")
             logging.error(f"Error during user deletion: {e}")
 
+    def show_outcome(self, outcome, success_message):
+        """Report the (success, message) a UserManager write returned."""
+        success, message = outcome
+        if success:
+            messagebox.showinfo("Success", success_message)
+            logging.info(message)
+        else:
+            messagebox.showerror("Error", message)
+            logging.error(message)
+
 if __name__ == "__main__":
     root = tk.Tk()
     app = UserManagementGUI(root)
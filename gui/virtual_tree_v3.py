@@ -0,0 +1,216 @@
+# gui/virtual_tree_v3.py
+
+from operator import itemgetter
+from tkinter import ttk
+from business_logic.pagination_v3 import PAGE_SIZE
+
+MAX_ROWS = 4 * PAGE_SIZE  # Rows kept in Tk at once
+CHUNK_ROWS = 50  # Rows inserted per after() callback
+EDGE = 0.1  # Fraction of the window from either end at which the next page is fetched
+
+
+class RowWindow:
+    """The loaded slice of a keyset-paginated result: at most max_rows consecutive rows in key order.
+
+    fetch(after=None, before=None, limit=n) returns up to n rows in key order, either the first
+    rows or the rows just after or before the given key. Paging past max_rows drops rows from the
+    far end of the window; they are fetched again when the user scrolls back to them.
+
+    key(row) is the cursor pages are fetched after and before; order(row), by default the same,
+    compares rows in the order the source returns them, for placing changed rows.
+    """
+
+    def __init__(self, fetch, key=itemgetter(0), page_size=PAGE_SIZE, max_rows=MAX_ROWS, order=None):
+        if max_rows < 2 * page_size:
+            raise ValueError("The row window must hold at least two pages.")
+        self.fetch = fetch
+        self.key = key
+        self.order = key if order is None else order
+        self.page_size = page_size
+        self.max_rows = max_rows
+        self.rows = []
+        self.more_before = False
+        self.more_after = False
+
+    def reset(self):
+        """Load the first page in place of the window. Returns its rows."""
+        self.rows = list(self.fetch(limit=self.page_size))
+        self.more_before = False
+        self.more_after = len(self.rows) == self.page_size
+        return self.rows
+
+    def next_page(self):
+        """Load the page after the window. Returns (new rows, number of rows dropped from the start)."""
+        if not self.more_after or not self.rows:
+            return [], 0
+        rows = list(self.fetch(after=self.key(self.rows[-1]), limit=self.page_size))
+        self.more_after = len(rows) == self.page_size
+        dropped = max(len(self.rows) + len(rows) - self.max_rows, 0)
+        if dropped:
+            self.more_before = True
+        self.rows = self.rows[dropped:] + rows
+        return rows, dropped
+
+    def previous_page(self):
+        """Load the page before the window. Returns (new rows, number of rows dropped from the end)."""
+        if not self.more_before or not self.rows:
+            return [], 0
+        rows = list(self.fetch(before=self.key(self.rows[0]), limit=self.page_size))
+        self.more_before = len(rows) == self.page_size
+        dropped = max(len(self.rows) + len(rows) - self.max_rows, 0)
+        if dropped:
+            self.more_after = True
+        self.rows = rows + self.rows[:len(self.rows) - dropped]
+        return rows, dropped
+
+    def replace(self, row):
+        """Put row in place of the window row with the same primary key if it keeps its place in the order.
+
+        Returns True if it did, False if the row moved and None if it is not in the window.
+        """
+        for index, current in enumerate(self.rows):
+            if current[0] == row[0]:
+                if self.order(current) != self.order(row):
+                    return False
+                self.rows[index] = row
+                return True
+        return None
+
+    def append(self, row):
+        """Add a new row after the window if it sorts last and the window ends at the end of the table.
+
+        Returns True if it did, None if the row belongs on a page outside the window, and False
+        if it sorts among the window's rows, where it cannot be put in order.
+        """
+        if self.rows and self.order(row) <= self.order(self.rows[-1]):
+            if self.more_before and self.order(row) < self.order(self.rows[0]):
+                return None
+            return False
+        if self.more_after:
+            return None
+        self.rows.append(row)
+        return True
+
+    def remove(self, key):
+        """Remove the row with the given primary key from the window, if it is there."""
+        self.rows = [row for row in self.rows if row[0] != key]
+
+
+class VirtualTree(ttk.Treeview):
+    """A Treeview over a keyset-paginated source that keeps only a window of rows in Tk.
+
+    Scrolling near either end of the window fetches the next page, and pages are inserted
+    CHUNK_ROWS at a time from after() callbacks so that no page blocks the event loop for long.
+    Rows start with their primary key, which becomes the item ID, so the selection and
+    item(iid, "values") work as on a plain Treeview.
+    """
+
+    def __init__(self, parent, fetch, format_row, key=itemgetter(0), page_size=PAGE_SIZE, max_rows=MAX_ROWS,
+                 on_error=None, order=None, **kwargs):
+        kwargs.setdefault("show", "headings")
+        super().__init__(parent, **kwargs)
+        self.window = RowWindow(fetch, key, page_size, max_rows, order)
+        self.format_row = format_row
+        self.on_error = on_error  # on_error(exception) for pages fetched while scrolling
+        self.scrollbar = None  # Optional scrollbar that follows the view
+        self.rendering = None  # after() ID of the next chunk while a page is being inserted
+        self.edge_check = None
+        self.failed = False
+        self.configure(yscrollcommand=self._on_yview)
+
+    def refresh(self):
+        """Reload from the first page. The first chunk is shown before this returns; errors propagate."""
+        self._cancel()
+        self.failed = False
+        rows = self.window.reset()
+        items = self.get_children()
+        if items:
+            self.delete(*items)
+        self._insert_chunk(rows, 0, at_start=False)
+
+    def update_row(self, row, append=True):
+        """Show the new values of a row in the window, or, if append, a new row at the end of the table.
+
+        Returns False when the row cannot be shown in order: its sort value changed, or it is new
+        and sorts among the rows shown. The caller then reloads the tree.
+        """
+        replaced = self.window.replace(row)
+        if replaced:
+            if self.exists(row[0]):
+                self.item(row[0], values=self.format_row(row))
+            return True
+        if replaced is False or not append:
+            return replaced is None
+        appended = self.window.append(row)
+        if appended and not self.exists(row[0]):
+            self.insert("", "end", iid=row[0], values=self.format_row(row))
+        return appended is not False
+
+    def remove_row(self, key):
+        """Remove a deleted row, if it is in the window."""
+        self.window.remove(key)
+        if self.exists(key):
+            self.delete(key)
+
+    def _cancel(self):
+        for callback in (self.rendering, self.edge_check):
+            if callback is not None:
+                self.after_cancel(callback)
+        self.rendering = self.edge_check = None
+
+    def _on_yview(self, first, last):
+        if self.scrollbar is not None:
+            self.scrollbar.set(first, last)
+        if self.rendering is None and self.edge_check is None and not self.failed:
+            self.edge_check = self.after_idle(self._check_edges)
+
+    def _check_edges(self):
+        """Fetch the next or previous page when the view is near that end of the window."""
+        self.edge_check = None
+        if self.rendering is not None or not self.winfo_exists():
+            return
+        first, last = self.yview()
+        try:
+            if last >= 1 - EDGE and self.window.more_after:
+                top = self._top_item()
+                rows, dropped = self.window.next_page()
+                if dropped:
+                    self.delete(*self.get_children()[:dropped])
+                    self._restore_top(top)
+                self._insert_chunk(rows, 0, at_start=False)
+            elif first <= EDGE and self.window.more_before:
+                rows, dropped = self.window.previous_page()
+                if dropped:
+                    self.delete(*self.get_children()[-dropped:])
+                self._insert_chunk(rows, 0, at_start=True)
+        except Exception as e:
+            self.failed = True  # Stop paging until the next refresh instead of failing on every scroll
+            if self.on_error is None:
+                raise
+            self.on_error(e)
+
+    def _insert_chunk(self, rows, start, at_start):
+        top = self._top_item() if at_start else None
+        chunk = rows[start:start + CHUNK_ROWS]
+        for offset, row in enumerate(chunk):
+            if self.exists(row[0]):
+                continue  # Appended by update_row() while this page was being inserted
+            self.insert("", start + offset if at_start else "end", iid=row[0], values=self.format_row(row))
+        if at_start:
+            self._restore_top(top)  # Rows added above the view must not move it
+        start += len(chunk)
+        if start < len(rows):
+            self.rendering = self.after(1, self._insert_chunk, rows, start, at_start)
+        else:
+            self.rendering = None
+            self.edge_check = self.after_idle(self._check_edges)  # The page may not fill the view
+
+    def _top_item(self):
+        items = self.get_children()
+        if not items:
+            return None
+        return items[min(int(self.yview()[0] * len(items) + 0.5), len(items) - 1)]
+
+    def _restore_top(self, item):
+        if item is not None and self.exists(item):
+            self.yview_moveto(self.index(item) / len(self.get_children()))
@@ -7,9 +7,13 @@ from gui.expense_manager_gui_v3 import ExpenseManagerGUI
 from gui.inventory_gui_v3 import InventoryManagementGUI
 from gui.report_manager_gui_v3 import FinancialReportGUI
 from gui.sales_manager_gui_v3 import SalesManagerGUI
+from gui.lazy_notebook_v3 import LazyNotebook
 from business_logic.user_management_v3 import UserManager
+from business_logic.session_management_v3 import SessionManager
+from business_logic.shared_managers_v3 import shared_manager
 from database.setup_v3 import DatabaseRepository
 import logging
+import time
 
 # Super Admin Credentials
 SUPER_ADMIN_USERNAME = "admin"
@@ -23,15 +27,34 @@ class MainApplication(tk.Tk):
         self.geometry("800x600")
         self.user_role = None
         self.registration_type = None
-        self.user_manager = UserManager()  # Initialize UserManager
+        self.user_manager = shared_manager(UserManager)  # The same instance as the User Management tabs
+        self.session_manager = SessionManager()  # Signed session tokens for fast cashier switches
+        self.session_token = None
+        self.session_tokens = {}  # username -> token for users who logged in on this till
+        self.main_screens = {}  # role -> main screen, hidden at logout and shown again at the next login
+        self.screen_sessions = {}  # role -> session token the main screen was last shown for
+        self.login_started = None  # perf_counter() of the login being shown
+        self.login_latencies = []  # (role, seconds from login to an idle main screen)
         self.repo = DatabaseRepository()  # Initialize Database Repository
         self.repo.initialize_tables()  # Ensure tables exist
         self.initialize_login_screen()
 
+    def destroy(self):
+        self.session_manager.close()
+        super().destroy()
+
+    def clear_screen(self):
+        """Remove the current screen. Main screens are only hidden, to be reused at the next login."""
+        main_screens = set(map(str, self.main_screens.values()))
+        for widget in self.winfo_children():
+            if str(widget) in main_screens:
+                widget.pack_forget()
+            else:
+                widget.destroy()
+
     def initialize_login_screen(self):
         """Display the login/registration screen."""
-        for widget in self.winfo_children():
-            widget.destroy()
+        self.clear_screen()
 
         # Welcome Screen
         tk.Label(self, text="Welcome to Brew and Bite Cafe", font=("Arial", 16)).pack(pady=20)
@@ -53,8 +76,7 @@ class MainApplication(tk.Tk):
             return
 
         self.registration_type = registration_type
-        for widget in self.winfo_children():
-            widget.destroy()
+        self.clear_screen()
 
         tk.Label(self, text=f"Registration for {registration_type.capitalize()}", font=("Arial", 14)).pack(pady=20)
 
@@ -171,8 +193,7 @@ class MainApplication(tk.Tk):
 
     def initialize_login_form(self):
         """Display the login form."""
-        for widget in self.winfo_children():
-            widget.destroy()
+        self.clear_screen()
 
         tk.Label(self, text="Login", font=("Arial", 16)).pack(pady=20)
         tk.Label(self, text="Username:").pack(pady=5)
@@ -189,10 +210,11 @@ class MainApplication(tk.Tk):
         """Handle the login logic."""
         username = self.username_entry.get()
         password = self.password_entry.get()
+        self.login_started = time.perf_counter()
 
         # Super Admin Login
         if username == SUPER_ADMIN_USERNAME and password == SUPER_ADMIN_PASSWORD:
-            self.user_role = "super_admin"
+            self.start_session(username, "super_admin")
             self.initialize_main_screen()
             return
 
@@ -200,49 +222,108 @@ class MainApplication(tk.Tk):
         try:
             success, user_data = self.user_manager.authenticate_user(username, password)
             if success:
-                self.user_role = user_data.get("role_type")  # Extract role type
+                self.start_session(username, user_data.get("role_type"))  # Extract role type
                 self.initialize_main_screen()
             else:
+                self.login_started = None
                 messagebox.showerror("Error", user_data)  # user_data contains error message
         except Exception as e:
+            self.login_started = None
             messagebox.showerror("Error", f"Login failed: {e}")
 
+    def start_session(self, username, role_type):
+        """Create a session token for a user who passed the password check."""
+        self.user_role = role_type
+        self.session_token = self.session_manager.create_session(username, role_type)
+        self.session_tokens[username] = self.session_token
+
+    def initialize_switch_user_form(self):
+        """Display the form for switching to another cashier who is already logged in."""
+        self.clear_screen()
+
+        tk.Label(self, text="Switch User", font=("Arial", 16)).pack(pady=20)
+        tk.Label(self, text="Username:").pack(pady=5)
+        self.switch_user_var = tk.StringVar()
+        switch_user_menu = ttk.Combobox(self, textvariable=self.switch_user_var)
+        switch_user_menu['values'] = tuple(self.session_tokens)
+        switch_user_menu.pack(pady=5)
+
+        tk.Button(self, text="Switch", command=self.handle_switch_user).pack(pady=10)
+        tk.Button(self, text="Back", command=self.initialize_main_screen).pack(pady=5)
+
+    def handle_switch_user(self):
+        """Switch to another user using their session token instead of a password check."""
+        username = self.switch_user_var.get()
+        token = self.session_tokens.get(username)
+        if token is None:
+            messagebox.showerror("Error", "No active session for this user. Please log in.")
+            self.initialize_login_form()
+            return
+
+        success, session_data = self.session_manager.validate_session(token)
+        if not success:
+            # Expired or revoked sessions still require the full password check
+            del self.session_tokens[username]
+            messagebox.showerror("Error", session_data)
+            self.initialize_login_form()
+            self.username_entry.insert(0, username)
+            return
+
+        self.user_role = session_data.get("role_type")
+        self.session_token = token
+        self.login_started = time.perf_counter()
+        self.initialize_main_screen()
+
     def initialize_main_screen(self):
-        """Initialize the main application screen."""
-        for widget in self.winfo_children():
-            widget.destroy()
+        """Show the main screen for the user's role, built at the role's first login.
+
+        A screen last shown for another session is reset first, so each login starts from empty forms.
+        """
+        self.clear_screen()
 
         if self.user_role in ["customer", "supplier"]:
             # Restrict customer and supplier access
+            self.login_started = None
             messagebox.showerror("Access Denied", "You do not have access to this system.")
             self.initialize_login_screen()
             return
 
-        notebook = ttk.Notebook(self)
+        notebook = self.main_screens.get(self.user_role)
+        if notebook is None:
+            notebook = self.main_screens[self.user_role] = self.build_main_screen(self.user_role)
+        elif self.screen_sessions[self.user_role] != self.session_token:
+            notebook.reset()  # Nothing the previous user entered, such as a sale in progress, carries over
+        self.screen_sessions[self.user_role] = self.session_token
         notebook.pack(expand=True, fill="both")
+        if self.login_started is not None:
+            self.after_idle(self.record_login_latency)
+
+    def build_main_screen(self, role):
+        """Create the notebook of tabs for a role; each tab is built when it is first selected."""
+        notebook = LazyNotebook(self)
 
         # Super Admin Access
-        if self.user_role == "super_admin":
-            notebook.add(UserManagementGUI(notebook), text="User Management")
-            notebook.add(ExpenseManagerGUI(notebook), text="Expense Management")
-            notebook.add(InventoryManagementGUI(notebook), text="Inventory Management")
-            notebook.add(SalesManagerGUI(notebook), text="Sales Management")
-            notebook.add(FinancialReportGUI(notebook), text="Financial Reports")
+        if role == "super_admin":
+            notebook.add_lazy(UserManagementGUI, text="User Management")
+            notebook.add_lazy(ExpenseManagerGUI, text="Expense Management")
+            notebook.add_lazy(InventoryManagementGUI, text="Inventory Management")
+            notebook.add_lazy(SalesManagerGUI, text="Sales Management")
+            notebook.add_lazy(FinancialReportGUI, text="Financial Reports")
 
         # Office Staff Access
-        elif self.user_role == "Office Staff":
-            notebook.add(UserManagementGUI(notebook), text="User Management")
-            notebook.add(ExpenseManagerGUI(notebook), text="Expense Management")
-            notebook.add(InventoryManagementGUI(notebook), text="Inventory Management")
-            notebook.add(SalesManagerGUI(notebook), text="Sales Management")
-            notebook.add(FinancialReportGUI(notebook), text="Financial Reports")
+        elif role == "Office Staff":
+            notebook.add_lazy(UserManagementGUI, text="User Management")
+            notebook.add_lazy(ExpenseManagerGUI, text="Expense Management")
+            notebook.add_lazy(InventoryManagementGUI, text="Inventory Management")
+            notebook.add_lazy(SalesManagerGUI, text="Sales Management")
+            notebook.add_lazy(FinancialReportGUI, text="Financial Reports")
 
         # Barista Access
-        elif self.user_role == "Barista":
-            notebook.add(InventoryManagementGUI(notebook), text="Inventory Management")
-            notebook.add(SalesManagerGUI(notebook), text="Sales Management")
-            notebook.add(UserManagementGUI(notebook),
-                         text="Customer Management")  # Use "User Management" for customer tab
+        elif role == "Barista":
+            notebook.add_lazy(InventoryManagementGUI, text="Inventory Management")
+            notebook.add_lazy(SalesManagerGUI, text="Sales Management")
+            notebook.add_lazy(UserManagementGUI,
+                              text="Customer Management")  # Use "User Management" for customer tab
 
         # Logout Tab
         logout_frame = ttk.Frame(notebook)
@@ -252,13 +333,44 @@ class MainApplication(tk.Tk):
             text="Logout",
             command=self.logout,
         ).pack(pady=50)
+        ttk.Button(
+            logout_frame,
+            text="Switch User",
+            command=self.initialize_switch_user_form,
+        ).pack(pady=10)
+        ttk.Button(
+            logout_frame,
+            text="Login Another User",
+            command=self.initialize_login_form,
+        ).pack(pady=10)
+        notebook.build_selected()
+        return notebook
+
+    def record_login_latency(self):
+        """Log the time from the login click to the main screen being idle and ready for input."""
+        if self.login_started is None:
+            return
+        seconds = time.perf_counter() - self.login_started
+        self.login_started = None
+        self.login_latencies.append((self.user_role, seconds))
+        logging.info(f"Login to interactive for role '{self.user_role}': {seconds:.3f}s")
 
     def logout(self):
         """Handle user logout."""
         confirm = messagebox.askyesno("Confirm Logout", "Are you sure you want to logout?")
         if confirm:
-            self.user_role = None
-            self.initialize_login_screen()
+            self.end_session()
+
+    def end_session(self):
+        """Revoke the current session and return to the login screen."""
+        if self.session_token:
+            self.session_manager.revoke_session(self.session_token)
+            self.session_tokens = {
+                username: token for username, token in self.session_tokens.items() if token != self.session_token
+            }
+        self.session_token = None
+        self.user_role = None
+        self.initialize_login_screen()
 
 
 if __name__ == "__main__":
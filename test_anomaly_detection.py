@@ -0,0 +1,68 @@
+import unittest
+from datetime import datetime, timedelta
+import numpy as np
+from business_logic.anomaly_detection_v3 import AnomalyDetector, robust_z_scores
+from database.models_v3 import Sales, Expense
+from test_fixtures import seed_supplier_and_item
+
+
+class TestAnomalyDetection(unittest.TestCase):
+
+    def setUp(self):
+        """A month of steady sales and expenses, with a day without sales and a doubled invoice."""
+        self.detector = AnomalyDetector(db_url="sqlite:///:memory:", window=14)
+        session = self.detector.Session()
+        seed_supplier_and_item(session, quantity=500)
+        first_day = datetime(2024, 1, 1, 9)
+        session.add_all(
+            Sales(item_id=1, quantity_sold=10 + day % 3, unit_price=3.0, total_cost=3.0 * (10 + day % 3),
+                  sales_date=first_day + timedelta(days=day))
+            for day in range(30) if day != 20  # The till recorded nothing on 2024-01-21
+        )
+        session.add_all(
+            Expense(expense_date=datetime(2024, 1, 1) + timedelta(days=day), category="Food", supplier_id=1,
+                    expense_name="Milk", total_items=10, unit_cost=cost, total_cost=10 * cost)
+            for day, cost in [(day, 5.0 + day % 3 / 10) for day in range(0, 28, 2)] + [(28, 10.2)]  # Invoiced twice on 2024-01-29
+        )
+        session.commit()
+        session.close()
+
+    def test_robust_z_scores(self):
+        """Test scores against the preceding window only, and the fallbacks for flat windows."""
+        z_scores, medians, mads = robust_z_scores([10, 12, 11, 10, 12, 40], 4, min_periods=2)
+        self.assertTrue(np.isnan(z_scores[:2]).all())
+        self.assertEqual((medians[5], mads[5]), (11.5, 0.5))  # Window 12, 11, 10, 12
+        self.assertAlmostEqual(z_scores[5], 0.6745 * 28.5 / 0.5)
+        flat, _, _ = robust_z_scores([5, 5, 5, 5, 9, 5], 4, min_periods=2)
+        np.testing.assert_array_equal(flat[2:], [0.0, 0.0, np.inf, 0.0])
+
+    def test_run_flags_and_stores_unusual_days(self):
+        """Test that the missing sales day and the doubled invoice are flagged and stored."""
+        flagged = self.detector.run(end="2024-01-30")
+        self.assertEqual([(row.series, row.date) for row in flagged],
+                         [("sales", "2024-01-21"), ("expenses", "2024-01-29")])
+        self.assertLess(flagged[0].z_score, 0)
+        stored = self.detector.get_flagged_days()
+        self.assertEqual([(day.flag_date, day.series) for day in stored],
+                         [("2024-01-29", "expenses"), ("2024-01-21", "sales")])
+
+    def test_incremental_run_only_scores_new_days(self):
+        """Test that an incremental run scores the days after the last run and keeps earlier flags."""
+        self.assertEqual([row.date for row in self.detector.run(["sales"], end="2024-01-25")], ["2024-01-21"])
+        self.assertEqual(self.detector.run(["sales"], end="2024-01-25"), [])  # Nothing new to score
+
+        session = self.detector.Session()
+        session.add(Sales(item_id=1, quantity_sold=100, unit_price=3.0, total_cost=300.0,
+                          sales_date=datetime(2024, 1, 31, 9)))
+        session.commit()
+        session.close()
+        flagged = self.detector.run(["sales"], end="2024-01-31")
+        self.assertEqual([row.date for row in flagged], ["2024-01-31"])
+        self.assertEqual([day.flag_date for day in self.detector.get_flagged_days(series="sales")],
+                         ["2024-01-31", "2024-01-21"])
+        with self.assertRaises(ValueError):
+            self.detector.run(["profit"])
+
+
+if __name__ == "__main__":
+    unittest.main()
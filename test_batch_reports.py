@@ -0,0 +1,58 @@
+import unittest
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from batch_reports_v3 import REPORTS, render_reports
+from business_logic.report_manager_v3 import FinancialReportManager
+from database.models_v3 import Sales, Expense
+from test_fixtures import seed_supplier_and_item
+
+
+class TestBatchReports(unittest.TestCase):
+
+    def setUp(self):
+        """Create a small database file that worker processes can open."""
+        self.directory = tempfile.mkdtemp()
+        self.db_url = f"sqlite:///{os.path.join(self.directory, 'reports.db')}"
+        session = FinancialReportManager(self.db_url).Session()
+        seed_supplier_and_item(session)
+        session.add_all([
+            Sales(item_id=1, quantity_sold=2, unit_price=3.0, total_cost=6.0, sales_date=datetime(2024, 1, 1, 9)),
+            Expense(expense_date=datetime(2024, 1, 1), category="Food", supplier_id=1, expense_name="Flour",
+                    total_items=2, unit_cost=5.0, total_cost=10.0),
+        ])
+        session.commit()
+        session.close()
+        self.output_dir = os.path.join(self.directory, "out")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_render_all_reports_in_process_pool(self):
+        """Test that every report is rendered to a PNG and a PDF by worker processes."""
+        written = render_reports(self.db_url, self.output_dir, "2024-01-01", "2024-01-31",
+                                 formats=("png", "pdf"), workers=2)
+        self.assertEqual(sum(len(paths) for paths in written.values()), 2 * len(REPORTS))
+        with open(os.path.join(self.output_dir, "total_sales_2024-01-01_2024-01-31.png"), "rb") as image:
+            self.assertEqual(image.read(8), b"\x89PNG\r\n\x1a\n")
+        with open(os.path.join(self.output_dir, "profit_and_margin_2024-01-01_2024-01-31.pdf"), "rb") as document:
+            self.assertEqual(document.read(5), b"%PDF-")
+
+    def test_empty_range_skips_reports(self):
+        """Test that reports without data are skipped instead of drawing empty charts."""
+        written = render_reports(self.db_url, self.output_dir, "2030-01-01", "2030-01-31", workers=0,
+                                 reports=["total_sales", "expense_vs_sales"])
+        self.assertEqual(written, {"total_sales": [], "expense_vs_sales": []})
+
+    def test_invalid_arguments(self):
+        """Test that invalid formats and dates raise ValueError before any work starts."""
+        with self.assertRaises(ValueError):
+            render_reports(self.db_url, self.output_dir, formats=("gif",))
+        with self.assertRaises(ValueError):
+            render_reports(self.db_url, self.output_dir, start="2024-31-01")
+        self.assertFalse(os.path.exists(self.output_dir))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+import unittest
+import threading
+import time
+from business_logic.events_v3 import EventBus, RowsChanged
+from gui.db_tasks_v3 import DbTasks
+from gui.table_model_v3 import TableModel
+from gui.tk_events_v3 import TkEventQueue
+from test_table_model import FakeTable, FakeView, Row
+
+
+class FakeWidget:
+    """Stands in for a Tk widget: after() and after_idle() callbacks are run by pump() on the test thread."""
+
+    def __init__(self):
+        self.callbacks = []
+
+    def after(self, ms, callback):
+        self.callbacks.append(callback)
+
+    def after_idle(self, callback):
+        self.callbacks.append(callback)
+
+    def pump(self, tasks, timeout=5):
+        deadline = time.time() + timeout
+        while (self.callbacks or tasks.is_busy()) and time.time() < deadline:
+            if self.callbacks:
+                self.callbacks.pop(0)()
+            else:
+                time.sleep(0.01)
+
+
+class TestDbTasks(unittest.TestCase):
+
+    def setUp(self):
+        self.widget = FakeWidget()
+        self.busy = []
+        self.tasks = DbTasks(self.widget, on_busy=self.busy.append, busy_cursor=None)
+
+    def test_result_delivered_on_tk_loop(self):
+        """Test that a call runs on a worker and its result comes back through after() on the calling thread."""
+        results = []
+        self.tasks.run("Worker name", lambda: threading.current_thread().name,
+                       on_done=lambda name: results.append((name, threading.current_thread())))
+        self.assertTrue(self.tasks.is_busy())
+        self.widget.pump(self.tasks)
+
+        self.assertEqual(len(results), 1)
+        self.assertTrue(results[0][0].startswith("db-read"))
+        self.assertIs(results[0][1], threading.current_thread())
+        self.assertEqual(self.busy, [True, False])
+        self.assertEqual([name for name, seconds in self.tasks.timings], ["Worker name"])
+
+    def test_errors_delivered_to_on_error(self):
+        """Test that a failing call reports its exception, or logs it when there is no on_error."""
+        errors = []
+
+        def fail():
+            raise ValueError("bad input")
+
+        self.tasks.run("Failing", fail, on_done=errors.append, on_error=lambda error: errors.append(str(error)))
+        self.widget.pump(self.tasks)
+        self.assertEqual(errors, ["bad input"])
+
+        with self.assertLogs(level="ERROR"):
+            self.tasks.run("Failing unhandled", fail)
+            self.widget.pump(self.tasks)
+
+    def test_writes_run_in_submission_order(self):
+        """Test that writes share one thread and are applied in the order they were made."""
+        applied = []
+
+        def write(value, delay):
+            time.sleep(delay)
+            applied.append((value, threading.current_thread().name))
+
+        for value, delay in enumerate([0.05, 0.0, 0.02]):
+            self.tasks.run("Write", write, value, delay, write=True)
+        self.tasks.drain()
+
+        self.assertEqual([value for value, thread in applied], [0, 1, 2])
+        self.assertEqual(len({thread for value, thread in applied}), 1)
+        self.assertFalse(self.tasks.is_busy())
+
+    def test_events_published_on_workers_reach_the_tk_thread(self):
+        """Test that a change event published by a worker is handled on the thread that polls."""
+        bus = EventBus()
+        event_queue = TkEventQueue(self.widget, bus)
+        received = []
+        event_queue.subscribe(RowsChanged, lambda event: received.append((event, threading.current_thread())))
+
+        self.tasks.run("Publish", bus.publish, RowsChanged("sales", (1,)), write=True)
+        self.widget.pump(self.tasks)
+
+        self.assertEqual(received, [(RowsChanged("sales", (1,)), threading.current_thread())])
+
+
+class TestTableModelTasks(unittest.TestCase):
+
+    def setUp(self):
+        self.widget = FakeWidget()
+        self.tasks = DbTasks(self.widget, busy_cursor=None)
+        self.table = FakeTable(25)
+        self.model = TableModel(self.table.fetch, self.table.fetch_rows, self.table.fetch_changes)
+        self.views = [FakeView(self.model) for _ in range(2)]
+        for view in self.views:
+            self.model.subscribe(view)
+
+    def test_reload_in_reads_the_first_page_on_a_worker(self):
+        """Test that the views find the first page the worker read in the cache."""
+        for view in self.views:
+            view.refresh = lambda view=view: setattr(view, "rows", self.model.fetch_page())  # A full page, as VirtualTree reads
+        self.model.reload_in(self.tasks, "Load")
+        self.assertEqual(self.views[0].rows, [])  # Nothing is shown until the read completes
+        self.widget.pump(self.tasks)
+
+        self.assertEqual(self.table.reads, 1)
+        self.assertEqual([len(view.rows) for view in self.views], [25, 25])
+
+    def test_overlapping_syncs_are_folded_into_one_more(self):
+        """Test that sync_in() calls made while one runs cost a single extra read."""
+        self.model.reload()
+        self.table.write(3, "Renamed")
+        for _ in range(3):
+            self.model.sync_in(self.tasks, "Sync")
+        self.table.write(4, "Renamed too")
+        self.widget.pump(self.tasks)
+
+        self.assertEqual([name for name, seconds in self.tasks.timings], ["Sync", "Sync"])
+        self.assertIn(("update", Row(4, "Renamed too")), self.views[0].changes)
+        self.assertEqual(self.model.rows[3].item_name, "Renamed")
+        self.assertFalse(self.model.syncing)
+
+    def test_rows_out_of_order_reload_on_a_worker(self):
+        """Test that a sync a view cannot apply in order is followed by a reload_in() instead of a read on the Tk thread."""
+        self.model.reload()
+        self.views[0].in_order = False
+        self.table.write(3, "Renamed")
+        self.model.sync_in(self.tasks, "Sync")
+        self.widget.pump(self.tasks)
+
+        self.assertEqual([name for name, seconds in self.tasks.timings], ["Sync", "Sync"])
+        self.assertEqual(self.model.mark, len(self.table.changed))
+        self.assertEqual(self.views[1].rows[2], Row(3, "Renamed"))
+
+    def test_sync_read_before_a_reload_is_discarded(self):
+        """Test that changes read for an older load are not applied over a newer one."""
+        self.model.reload()
+        self.table.write(3, "Renamed")
+        changes = self.model.read_changes()
+        self.model.reload()
+        self.model.sync(changes)
+        self.assertEqual(self.views[0].changes, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+from datetime import datetime, timedelta
+import numpy as np
+from business_logic.demand_forecast_v3 import DemandForecaster, demand_matrix, forecast_demand, reorder_quantities
+from database.models_v3 import Inventory, Sales
+from test_fixtures import seed_supplier_and_item
+
+
+class TestDemandForecast(unittest.TestCase):
+
+    def test_forecast_repeats_weekday_pattern(self):
+        """Test that a steady weekly pattern is forecast unchanged, including days without sales."""
+        pattern = np.array([10, 10, 10, 10, 20, 30, 0.0])  # Monday first
+        matrix = np.tile(pattern, (2, 8)) * np.array([[1.0], [0.0]])
+        forecast = forecast_demand(matrix, np.datetime64("2024-01-01"), 9)  # A Monday
+        np.testing.assert_allclose(forecast[0], np.concatenate((pattern, pattern[:2])))
+        np.testing.assert_array_equal(forecast[1], np.zeros(9))
+
+    def test_demand_matrix_and_reorder_quantities(self):
+        """Test scattering rollup rows into a matrix and ordering up to forecast plus safety stock."""
+        matrix = demand_matrix(np.array([2, 1, 2, 9]), np.array(["2024-01-01", "2024-01-02", "2024-01-03", "2024-01-01"],
+                                                               dtype="datetime64[D]"),
+                               np.array([4, 5, 6, 7]), np.array([1, 2]), "2024-01-01", "2024-01-03")
+        np.testing.assert_array_equal(matrix, [[0, 5, 0], [4, 0, 6]])  # Item 9 is not in the inventory
+
+        demand, safety_stock, quantities = reorder_quantities(np.full((2, 4), 2.5), [3, 20], np.ones((2, 7)))
+        np.testing.assert_array_equal(demand, [10.0, 10.0])
+        np.testing.assert_array_equal(safety_stock, [0.0, 0.0])  # No variation in recent demand
+        np.testing.assert_array_equal(quantities, [7, 0])
+
+    def test_suggest_reorders(self):
+        """Test reorder suggestions from the sales history in the database."""
+        forecaster = DemandForecaster(db_url="sqlite:///:memory:")
+        session = forecaster.Session()
+        seed_supplier_and_item(session, quantity=10)
+        session.add(Inventory(item_id=2, item_name="Scone", category="Food", quantity=100, unit_cost=0.5, supplier_id=1))
+        first_day = datetime(2024, 1, 1, 9)
+        session.add_all(
+            Sales(item_id=item_id, quantity_sold=quantity, unit_price=3.0, total_cost=3.0 * quantity,
+                  sales_date=first_day + timedelta(days=day))
+            for day in range(28) for item_id, quantity in ((1, 4), (2, 1))
+        )
+        session.commit()
+        session.close()
+
+        reorders = forecaster.suggest_reorders(cover_days=7)
+        self.assertEqual(list(reorders.item_name), ["Latte"])  # 100 scones cover a week of demand
+        np.testing.assert_allclose(reorders.forecast_demand, [28.0], rtol=1e-3)  # Days before the first sale weigh in slightly
+        np.testing.assert_array_equal(reorders.reorder_quantity, [18])
+
+        forecast = forecaster.forecast(horizon=3, category="Food")
+        np.testing.assert_array_equal(forecast.item_ids, [2])
+        self.assertEqual(forecast.dates[0], np.datetime64("2024-01-29"))
+        np.testing.assert_allclose(forecast.values, [[1.0, 1.0, 1.0]], rtol=1e-3)
+        with self.assertRaises(ValueError):
+            forecaster.forecast(horizon=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+from datetime import date, datetime
+import numpy as np
+from business_logic.downsampling_v3 import choose_granularity, lttb_indices, min_max_indices, downsample_columns
+from business_logic.report_columns_v3 import ReportColumns
+from business_logic.report_manager_v3 import FinancialReportManager
+from database.models_v3 import Inventory, Sales
+
+
+class TestDownsampling(unittest.TestCase):
+
+    def setUp(self):
+        self.dates = np.datetime64("2024-01-01") + np.arange(1000)
+        self.values = np.sin(np.arange(1000) / 50.0)
+        self.values[321] = 10.0  # A spike that must survive downsampling
+
+    def test_lttb_keeps_endpoints_and_spike(self):
+        """Test that LTTB returns the requested number of ordered points, with endpoints and spikes."""
+        indices = lttb_indices(self.dates, self.values, 100)
+        self.assertEqual(len(indices), 100)
+        self.assertEqual((indices[0], indices[-1]), (0, 999))
+        self.assertTrue(np.all(np.diff(indices) > 0))
+        self.assertIn(321, indices)
+
+    def test_min_max_keeps_extremes(self):
+        """Test that min/max downsampling keeps each bucket's extremes in time order."""
+        indices = min_max_indices(self.values, 100)
+        self.assertLessEqual(len(indices), 100)
+        self.assertTrue(np.all(np.diff(indices) > 0))
+        self.assertIn(321, indices)
+        self.assertIn(int(np.argmin(self.values)), indices)
+
+    def test_short_series_unchanged(self):
+        """Test that series within the limit are returned as they are."""
+        columns = ReportColumns({"date": self.dates[:10], "total_sales": self.values[:10]})
+        self.assertIs(downsample_columns(columns, "total_sales", 400), columns)
+
+    def test_downsample_columns_keeps_columns_aligned(self):
+        """Test that every column is downsampled with the same indices."""
+        columns = ReportColumns({"date": self.dates, "total_sales": self.values, "index": np.arange(1000)})
+        reduced = downsample_columns(columns, "total_sales", 50, method="minmax")
+        np.testing.assert_array_equal(reduced.date, self.dates[reduced.index])
+        with self.assertRaises(ValueError):
+            downsample_columns(columns, "total_sales", 50, method="mean")
+
+    def test_choose_granularity(self):
+        """Test that the finest granularity within the point budget is chosen."""
+        self.assertEqual(choose_granularity(date(2024, 1, 1), date(2024, 1, 3), 400), "hour")
+        self.assertEqual(choose_granularity(date(2024, 1, 1), date(2024, 6, 30), 400), "day")
+        self.assertEqual(choose_granularity(date(2024, 1, 1), date(2029, 12, 31), 400), "week")
+        self.assertEqual(choose_granularity(date(2000, 1, 1), date(2024, 12, 31), 400), "month")
+
+    def test_suggest_granularity_uses_data_span(self):
+        """Test that open date ranges are bounded by the first and last day with data."""
+        report_manager = FinancialReportManager(db_url="sqlite:///:memory:")
+        self.assertEqual(report_manager.suggest_granularity(), "day")
+        session = report_manager.Session()
+        session.add(Inventory(item_id=1, item_name="Latte", category="Coffee", quantity=5, unit_cost=1.0, supplier_id=1))
+        session.add_all([
+            Sales(item_id=1, quantity_sold=1, unit_price=3.0, total_cost=3.0, sales_date=datetime(2020, 1, 1)),
+            Sales(item_id=1, quantity_sold=1, unit_price=3.0, total_cost=3.0, sales_date=datetime(2024, 1, 1)),
+        ])
+        session.commit()
+        session.close()
+        self.assertEqual(report_manager.suggest_granularity(), "week")
+        self.assertEqual(report_manager.suggest_granularity(start="2023-12-31"), "hour")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+import unittest
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from unittest.mock import patch
+import numpy as np
+from business_logic.report_backends_v3 import create_report_manager
+from business_logic.report_manager_v3 import FinancialReportManager
+from database.models_v3 import Inventory, Sales, Expense
+from test_fixtures import seed_supplier_and_item
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+try:
+    duckdb.connect().execute("INSTALL sqlite; LOAD sqlite")
+    DUCKDB_AVAILABLE = True
+except Exception:  # duckdb or its sqlite extension is not installed
+    DUCKDB_AVAILABLE = False
+
+
+@unittest.skipUnless(DUCKDB_AVAILABLE, "duckdb with the sqlite extension is not installed")
+class TestDuckDBReportManager(unittest.TestCase):
+
+    def setUp(self):
+        """Create a small SQLite database file for DuckDB to read."""
+        self.directory = tempfile.mkdtemp()
+        self.db_url = f"sqlite:///{os.path.join(self.directory, 'reports.db')}"
+        self.sqlite_manager = create_report_manager(self.db_url, "sqlite")
+        session = self.sqlite_manager.Session()
+        seed_supplier_and_item(session)
+        session.add(Inventory(item_id=2, item_name="Scone", category="Food", quantity=50, unit_cost=0.5, supplier_id=1))
+        session.add_all([
+            Sales(item_id=1, quantity_sold=2, unit_price=3.0, total_cost=6.0, sales_date=datetime(2024, 1, 1, 9)),
+            Sales(item_id=2, quantity_sold=1, unit_price=2.0, total_cost=2.0, sales_date=datetime(2024, 1, 1, 10)),
+            Sales(item_id=1, quantity_sold=1, unit_price=3.0, total_cost=3.0, sales_date=datetime(2024, 1, 8, 9)),
+            Expense(expense_date=datetime(2024, 1, 1), category="Food", supplier_id=1, expense_name="Flour",
+                    total_items=2, unit_cost=5.0, total_cost=10.0),
+        ])
+        session.commit()
+        session.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def assertSameReports(self, manager):
+        for granularity in ("hour", "day", "week", "month"):
+            self.assertEqual(
+                [tuple(row) for row in manager.calculate_total_sales_per_day(granularity=granularity)],
+                [tuple(row) for row in self.sqlite_manager.calculate_total_sales_per_day(granularity=granularity)]
+            )
+            columnar = manager.calculate_total_expenses_per_day(granularity=granularity, columnar=True)
+            expected = self.sqlite_manager.calculate_total_expenses_per_day(granularity=granularity, columnar=True)
+            np.testing.assert_array_equal(columnar.date, expected.date)
+        self.assertEqual([tuple(row) for row in manager.calculate_sales_by_category(category="Coffee")], [("Coffee", 9.0)])
+        self.assertEqual(manager.calculate_expense_vs_sales(start="2024-01-02"),
+                         self.sqlite_manager.calculate_expense_vs_sales(start="2024-01-02"))
+        self.assertEqual(manager.calculate_expense_pivot(top_n=1).rows, ["Beans Ltd"])
+        np.testing.assert_array_equal(manager.calculate_sales_heatmap(measure="transactions").values,
+                                      self.sqlite_manager.calculate_sales_heatmap(measure="transactions").values)
+
+    def test_attach_matches_sqlite(self):
+        """Test that DuckDB scanning the SQLite file returns the same reports."""
+        self.assertSameReports(create_report_manager(self.db_url, "duckdb"))
+
+    def test_mirror_matches_sqlite_and_refreshes(self):
+        """Test that the mirror returns the same reports and follows new writes."""
+        manager = create_report_manager(self.db_url, "duckdb-mirror")
+        self.assertSameReports(manager)
+        session = self.sqlite_manager.Session()
+        session.add(Sales(item_id=2, quantity_sold=1, unit_price=2.0, total_cost=2.0, sales_date=datetime(2024, 2, 1, 9)))
+        session.commit()
+        session.close()
+        self.assertEqual(manager.calculate_total_sales_per_day(granularity="month")[-1], ("2024-02", 2.0))
+
+    def test_sales_of_deleted_items_match_sqlite(self):
+        """Test that sales of a deleted item are still counted, under 'Unknown', by both backends."""
+        session = self.sqlite_manager.Session()
+        session.connection().exec_driver_sql("DELETE FROM inventory WHERE item_id = 2")
+        session.commit()
+        session.close()
+        expected = [tuple(row) for row in self.sqlite_manager.calculate_sales_by_category()]
+        self.assertEqual(expected, [("Coffee", 9.0), ("Unknown", 2.0)])
+        for backend in ("duckdb", "duckdb-mirror"):
+            manager = create_report_manager(self.db_url, backend)
+            self.assertEqual([tuple(row) for row in manager.calculate_sales_by_category()], expected)
+            self.assertEqual([tuple(row) for row in manager.calculate_sales_by_category(category="Unknown")],
+                             [("Unknown", 2.0)])
+            self.assertEqual(manager.calculate_expense_vs_sales(), self.sqlite_manager.calculate_expense_vs_sales())
+            self.assertEqual([tuple(row) for row in manager.calculate_total_sales_per_day()],
+                             [tuple(row) for row in self.sqlite_manager.calculate_total_sales_per_day()])
+
+    def test_invalid_backend(self):
+        """Test that unknown backends and in-memory databases are rejected."""
+        with self.assertRaises(ValueError):
+            create_report_manager(self.db_url, "postgres")
+        with self.assertRaises(ValueError):
+            create_report_manager("sqlite:///:memory:", "duckdb")
+
+
+class FakeConnection:
+    """A DuckDB connection whose statements fail while they are listed in failing."""
+
+    def __init__(self, failing):
+        self.failing = set(failing)
+        self.statements = []
+
+    def execute(self, statement):
+        self.statements.append(statement)
+        if statement in self.failing:
+            raise duckdb.IOException(f"{statement} failed: no network")
+
+
+@unittest.skipIf(duckdb is None, "duckdb is not installed")
+class TestSqliteExtension(unittest.TestCase):
+
+    def test_installed_extension_is_loaded_without_a_download(self):
+        """Test that LOAD is tried first and INSTALL only runs when it fails."""
+        from business_logic.duckdb_report_manager_v3 import DuckDBUnavailable, load_sqlite_extension
+        connection = FakeConnection([])
+        load_sqlite_extension(connection)
+        self.assertEqual(connection.statements, ["LOAD sqlite"])
+
+        connection = FakeConnection(["LOAD sqlite", "INSTALL sqlite"])
+        with self.assertRaises(DuckDBUnavailable):
+            load_sqlite_extension(connection)
+        self.assertEqual(connection.statements, ["LOAD sqlite", "INSTALL sqlite"])
+
+    def test_backend_falls_back_to_sqlite(self):
+        """Test that a DuckDB backend whose extension cannot be loaded is replaced by the SQLite one."""
+        from business_logic.duckdb_report_manager_v3 import DuckDBUnavailable
+        directory = tempfile.mkdtemp()
+        try:
+            db_url = f"sqlite:///{os.path.join(directory, 'reports.db')}"
+            with patch("business_logic.duckdb_report_manager_v3.load_sqlite_extension",
+                       side_effect=DuckDBUnavailable("Failed to load the DuckDB sqlite extension")):
+                with self.assertLogs(level="WARNING"):
+                    manager = create_report_manager(db_url, "duckdb-mirror", mirror_path=os.path.join(directory, "m.duckdb"))
+            self.assertIs(type(manager), FinancialReportManager)
+            self.assertEqual(manager.calculate_total_sales_per_day(), [])
+            manager.engine.dispose()
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    unittest.main()
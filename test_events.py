@@ -0,0 +1,130 @@
+import unittest
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from business_logic.events_v3 import EventBus, RowsChanged, StockChanged, coalesce
+from business_logic.sales_management_v3 import SalesManager
+from business_logic.user_management_v3 import UserManager
+from database.models_v3 import Expense, Inventory
+from gui.tk_events_v3 import TkEventQueue
+from test_fixtures import seed_supplier_and_item
+
+
+class FakeWidget:
+    """Stands in for a Tk widget: after_idle() callbacks are run by idle()."""
+
+    def __init__(self):
+        self.callbacks = []
+
+    def after_idle(self, callback):
+        self.callbacks.append(callback)
+
+    def idle(self):
+        while self.callbacks:
+            self.callbacks.pop(0)()
+
+
+class TestEventBus(unittest.TestCase):
+
+    def test_publish_reaches_subscribers_of_the_event_type(self):
+        """Test that handlers get only their event type and a failing handler does not stop the others."""
+        bus = EventBus()
+        received = []
+
+        def failing(event):
+            raise RuntimeError("view gone")
+
+        bus.subscribe(RowsChanged, failing)
+        bus.subscribe(RowsChanged, received.append)
+        bus.subscribe(StockChanged, lambda event: received.append("stock"))
+        with self.assertLogs(level="ERROR"):
+            bus.publish(RowsChanged("sales", (1,)))
+        self.assertEqual(received, [RowsChanged("sales", (1,))])
+
+        bus.unsubscribe(RowsChanged, received.append)
+        bus.unsubscribe(RowsChanged, failing)
+        bus.publish(RowsChanged("sales", (2,)))
+        self.assertEqual(len(received), 1)
+
+    def test_coalesce(self):
+        """Test that keys are merged per table and stock deltas summed per item."""
+        events = [RowsChanged("sales", (3,)), StockChanged(1, -2), RowsChanged("inventory", (1,)),
+                  RowsChanged("sales", (1, 3)), StockChanged(1, -1), StockChanged(2, 5), StockChanged(2, -5)]
+        self.assertEqual(coalesce(events), [RowsChanged("sales", (1, 3)), StockChanged(1, -3),
+                                            RowsChanged("inventory", (1,))])
+
+    def test_tk_queue_handles_a_burst_once_per_frame(self):
+        """Test that events published before the loop goes idle are handled together."""
+        bus = EventBus()
+        widget = FakeWidget()
+        queue = TkEventQueue(widget, bus)
+        received = []
+        queue.subscribe(RowsChanged, received.append)
+        for key in range(1, 4):
+            bus.publish(RowsChanged("users", (key,)))
+        self.assertEqual((received, len(widget.callbacks)), ([], 1))
+        widget.idle()
+        self.assertEqual(received, [RowsChanged("users", (1, 2, 3))])
+
+        queue.close()
+        bus.publish(RowsChanged("users", (4,)))
+        widget.idle()
+        self.assertEqual(len(received), 1)
+
+
+class TestManagerEvents(unittest.TestCase):
+
+    def test_register_sales_publishes_after_commit(self):
+        """Test that a sale publishes its Sales IDs and one stock change per item."""
+        bus = EventBus()
+        received = []
+        bus.subscribe(RowsChanged, received.append)
+        bus.subscribe(StockChanged, received.append)
+        manager = SalesManager(db_url="sqlite:///:memory:", events=bus)
+        session = manager.Session()
+        seed_supplier_and_item(session, item_id=7, quantity=100)
+        session.commit()
+        session.close()
+
+        manager.register_sales([{"item_id": 7, "quantity": 2, "unit_price": 3.0},
+                                {"item_id": 7, "quantity": 1, "unit_price": 3.0}])
+        self.assertEqual(received, [RowsChanged("sales", (1, 2)), StockChanged(7, -3)])
+
+        with self.assertRaises(ValueError):
+            manager.register_sales([{"item_id": 7, "quantity": 500, "unit_price": 3.0}])
+        self.assertEqual(len(received), 2)  # Nothing was committed, so nothing is published
+
+    def test_delete_supplier_publishes_cascaded_rows(self):
+        """Test that deleting a supplier also publishes the expenses and inventory items deleted with it."""
+        directory = tempfile.mkdtemp()
+        try:
+            bus = EventBus()
+            received = []
+            bus.subscribe(RowsChanged, received.append)
+            bus.subscribe(StockChanged, received.append)
+            manager = UserManager(db_path=os.path.join(directory, "users.db"), events=bus)
+            session = manager.Session()
+            seed_supplier_and_item(session, item_id=7, quantity=40)
+            session.add(Inventory(item_id=8, item_name="Scone", category="Food", quantity=5, unit_cost=0.5, supplier_id=1))
+            session.add_all([
+                Expense(expense_id=3, expense_date=datetime(2024, 1, 1), category="Food", supplier_id=1,
+                        expense_name="Latte", total_items=40, unit_cost=1.0, total_cost=40.0),
+                Expense(expense_id=4, expense_date=datetime(2024, 1, 2), category="Food", supplier_id=1,
+                        expense_name="Scone", total_items=5, unit_cost=0.5, total_cost=2.5),
+            ])
+            session.commit()
+            session.close()
+
+            self.assertEqual(manager.delete_user(1), (True, "User deleted successfully."))
+            self.assertEqual(received, [
+                RowsChanged("users", (1,)), RowsChanged("expenses", (3, 4)), RowsChanged("inventory", (7, 8)),
+                StockChanged(7, -40), StockChanged(8, -5)
+            ])
+            manager.engine.dispose()
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
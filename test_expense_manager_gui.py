@@ -2,14 +2,19 @@ import unittest
 from unittest.mock import MagicMock, patch
 import tkinter as tk
 from gui.expense_manager_gui_v3 import ExpenseManagerGUI
+from collections import namedtuple
 from datetime import date, datetime
 
+ExpenseRow = namedtuple("ExpenseRow", ["expense_id", "expense_date", "category", "supplier_name", "expense_name",
+                                       "total_items", "unit_cost", "total_cost"])
+
 
 class TestExpenseManagerGUI(unittest.TestCase):
     def setUp(self):
         """Set up the GUI and mock the ExpenseManager."""
         self.root = tk.Tk()
         self.gui = ExpenseManagerGUI(self.root)
+        self.gui.tasks.drain()  # The supplier list read on construction
         self.gui.manager = MagicMock()  # Mock the ExpenseManager
 
     def tearDown(self):
@@ -27,6 +32,7 @@ class TestExpenseManagerGUI(unittest.TestCase):
         self.gui.unit_cost_entry.insert(0, "5.00")
 
         self.gui.add_expense()
+        self.gui.tasks.drain()
 
         self.gui.manager.add_expense.assert_called_once_with(
             expense_date=date(2024, 1, 1),  # Use a date object to match the actual call
@@ -74,6 +80,7 @@ class TestExpenseManagerGUI(unittest.TestCase):
         self.gui.manager.get_suppliers.side_effect = Exception("Database error")
 
         self.gui.refresh_suppliers()
+        self.gui.tasks.drain()
 
         mock_showerror.assert_called_once_with("Error", "Failed to load suppliers: Database error")
 
@@ -100,40 +107,25 @@ class TestExpenseManagerGUI(unittest.TestCase):
     @patch("tkinter.messagebox.showerror")
     def test_load_expenses_failure(self, mock_showerror):
         """Test loading expenses with a failure."""
-        self.gui.manager.get_all_expenses.side_effect = Exception("Database error")
+        self.gui.manager.fetch_expenses_page.side_effect = Exception("Database error")
 
         self.gui.load_expenses()
+        self.gui.tasks.drain()
 
         mock_showerror.assert_called_once_with("Error", "Failed to load expenses: Database error")
 
     def test_load_expenses_success(self):
         """Test loading expenses successfully."""
-        self.gui.manager.get_all_expenses.return_value = [
-            MagicMock(
-                expense_id=1,
-                expense_date=date(2024, 1, 1),
-                category="Food",
-                supplier=MagicMock(username="Supplier A"),
-                expense_name="Expense A",
-                total_items=10,
-                unit_cost=5.00,
-                total_cost=50.00,
-            ),
-            MagicMock(
-                expense_id=2,
-                expense_date=date(2024, 1, 2),
-                category="Beverages",
-                supplier=None,
-                expense_name="Expense B",
-                total_items=20,
-                unit_cost=3.00,
-                total_cost=60.00,
-            ),
+        self.gui.manager.fetch_expenses_page.return_value = [
+            ExpenseRow(1, datetime(2024, 1, 1), "Food", "Supplier A", "Expense A", 10, 5.00, 50.00),
+            ExpenseRow(2, datetime(2024, 1, 2), "Beverages", None, "Expense B", 20, 3.00, 60.00),
         ]
 
         self.gui.load_expenses()
+        self.gui.tasks.drain()
 
         self.assertEqual(len(self.gui.expenses_tree.get_children()), 2)
+        self.assertEqual(self.gui.expenses_tree.item(2, "values")[3], "N/A")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,97 @@
+import unittest
+import csv
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from business_logic.export_manager_v3 import ExportManager, pyarrow
+from database.models_v3 import Sales, Expense
+from test_fixtures import seed_supplier_and_item
+
+
+class TestExportManager(unittest.TestCase):
+
+    def setUp(self):
+        """Set up an ExportManager over an in-memory database with a few hundred sales."""
+        self.export_manager = ExportManager(db_url="sqlite:///:memory:", page_size=100)
+        session = self.export_manager.Session()
+        seed_supplier_and_item(session)
+        session.add_all([
+            Sales(item_id=1, quantity_sold=1, unit_price=3.0, total_cost=3.0, sales_date=datetime(2024, 1, 1 + i % 3, 9))
+            for i in range(250)
+        ])
+        session.add_all([
+            Expense(expense_date=datetime(2024, 1, 1), category="Food", supplier_id=1, expense_name="Flour",
+                    total_items=2, unit_cost=5.0, total_cost=10.0),
+            Expense(expense_date=datetime(2024, 1, 2), category="Rent", supplier_id=None, expense_name="Rent",
+                    total_items=1, unit_cost=500.0, total_cost=500.0),
+        ])
+        session.commit()
+        session.close()
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def read_csv(self, name):
+        with open(os.path.join(self.directory, name), newline="") as exported:
+            return list(csv.reader(exported))
+
+    def test_export_sales_csv_in_pages(self):
+        """Test that the sales ledger is written page by page with throughput statistics."""
+        pages = []
+        stats = self.export_manager.export_sales(os.path.join(self.directory, "sales.csv"), on_progress=pages.append)
+        self.assertEqual(pages, [100, 200, 250])
+        self.assertEqual(stats["rows"], 250)
+        self.assertGreater(stats["rows_per_second"], 0)
+        rows = self.read_csv("sales.csv")
+        self.assertEqual(rows[0], ["sales_id", "item_id", "item_name", "category", "quantity_sold", "unit_price",
+                                   "total_cost", "sales_date"])
+        self.assertEqual(len(rows), 251)
+
+    def test_export_expenses_date_range(self):
+        """Test that expense exports keep rows without a supplier and honour the date range."""
+        stats = self.export_manager.export_expenses(os.path.join(self.directory, "expenses.csv"), start="2024-01-02")
+        self.assertEqual(stats["rows"], 1)
+        self.assertEqual(self.read_csv("expenses.csv")[1][4:6], ["", "Rent"])
+
+    def test_export_report_csv(self):
+        """Test that report rows are exported with the report's filters."""
+        self.export_manager.export_report("sales_per_day", os.path.join(self.directory, "report.csv"), granularity="month")
+        self.assertEqual(self.read_csv("report.csv"), [["date", "total_sales"], ["2024-01", "750.0"]])
+
+    def test_invalid_export_requests(self):
+        """Test that unknown formats and reports raise ValueError."""
+        with self.assertRaises(ValueError):
+            self.export_manager.export_sales(os.path.join(self.directory, "sales.xlsx"), "xlsx")
+        with self.assertRaises(ValueError):
+            self.export_manager.export_report("profit", os.path.join(self.directory, "report.csv"))
+
+    def test_interrupted_export_leaves_no_partial_file(self):
+        """Test that an export stopped part way removes its rows and keeps the file it would have replaced."""
+        path = os.path.join(self.directory, "sales.csv")
+        with open(path, "w") as existing:
+            existing.write("previous export")
+
+        def interrupt(rows):
+            raise RuntimeError("Interrupted")  # As a cancelled export's query is
+
+        with self.assertRaises(Exception):
+            self.export_manager.export_sales(path, on_progress=interrupt)
+        self.assertEqual(os.listdir(self.directory), ["sales.csv"])
+        with open(path) as existing:
+            self.assertEqual(existing.read(), "previous export")
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_export_sales_parquet_row_groups(self):
+        """Test that each page becomes one Parquet row group."""
+        import pyarrow.parquet
+        path = os.path.join(self.directory, "sales.parquet")
+        self.export_manager.export_sales(path, "parquet")
+        parquet_file = pyarrow.parquet.ParquetFile(path)
+        self.assertEqual((parquet_file.metadata.num_rows, parquet_file.metadata.num_row_groups), (250, 3))
+        self.assertEqual(str(parquet_file.schema_arrow.field("sales_date").type), "timestamp[us]")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,12 @@
+from database.models_v3 import User, Inventory
+
+
+def seed_supplier_and_item(session, **overrides):
+    """Add the supplier "Beans Ltd" and its "Latte" item to session; overrides replace the item's columns."""
+    session.add(User(user_id=1, username="supplier1", password="x", contact="1", email="s@example.com",
+                     registration_type="supplier", company_name="Beans Ltd", company_category="Food"))
+    columns = dict(item_id=1, item_name="Latte", category="Coffee", quantity=50, unit_cost=1.0, supplier_id=1)
+    columns.update(overrides)
+    item = Inventory(**columns)
+    session.add(item)
+    return item
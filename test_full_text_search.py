@@ -0,0 +1,112 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+from sqlalchemy import create_engine
+from business_logic.expense_management_v3 import ExpenseManager
+from business_logic.full_text_search_v3 import match_prefixes
+from business_logic.inventory_management_v3 import InventoryManager
+from business_logic.user_management_v3 import UserManager
+from database.models_v3 import Base, Expense, Inventory, User
+from database.schema_objects_v3 import SEARCH_OBJECTS, check_search_indexes, rebuild_search_indexes
+
+
+class TestMatchPrefixes(unittest.TestCase):
+
+    def test_words_are_quoted_prefixes(self):
+        """Test that each word becomes a quoted prefix term and FTS5 syntax is taken literally."""
+        self.assertEqual(match_prefixes("oat mil"), '"oat"* "mil"*')
+        self.assertEqual(match_prefixes('milk" OR NEAR(x'), '"milk"* "OR"* "NEAR"* "x"*')
+        self.assertIsNone(match_prefixes(" - * "))
+        self.assertIsNone(match_prefixes(None))
+
+
+class TestFullTextSearch(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.directory, "search.db")
+        self.db_url = f"sqlite:///{self.db_path}"
+        self.expenses = ExpenseManager(db_url=self.db_url)
+        self.inventory = InventoryManager(db_url=self.db_url)
+        session = self.expenses.Session()
+        session.add(User(user_id=1, username="oatly", password="x", contact="1", email="o@example.com",
+                         registration_type="supplier", company_name="Oat Milk Company", company_category="Food"))
+        session.add(User(user_id=2, username="beans", password="x", contact="1", email="b@example.com",
+                         registration_type="supplier", company_name="Café Beans Roasters", company_category="Food"))
+        session.add(User(user_id=3, username="guest", password="x", contact="1", email="g@example.com",
+                         registration_type="customer"))
+        for item_id, name in enumerate(["Oat Milk", "Oat Milk Barista Oat Blend", "Whole Milk", "Oatcakes"], 1):
+            session.add(Inventory(item_id=item_id, item_name=name, category="Food", quantity=1, unit_cost=1.0,
+                                  supplier_id=1))
+        for expense_id, name in enumerate(["Oat milk invoice", "Coffee beans", "Oat milk crates", "Milk"], 1):
+            session.add(Expense(expense_id=expense_id, expense_date=datetime(2024, 1, expense_id), category="Food",
+                                supplier_id=1, expense_name=name, total_items=1, unit_cost=1.0, total_cost=1.0))
+        session.commit()
+        session.close()
+
+    def tearDown(self):
+        self.expenses.engine.dispose()
+        self.inventory.engine.dispose()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_prefix_matches_ranked(self):
+        """Test that every word must start a word of the name, and short names, which the words make up more of, rank first."""
+        self.assertEqual([row.item_id for row in self.inventory.search_inventory("oat")], [4, 1, 2])
+        self.assertEqual([row.item_id for row in self.inventory.search_inventory("oat mil")], [1, 2])
+        self.assertEqual([row.expense_id for row in self.expenses.search_expenses("MILK inv")], [1])
+        self.assertEqual(self.expenses.search_expenses("  "), [])
+        self.assertEqual(self.inventory.search_inventory("oat", limit=1)[0].supplier_name, "oatly")
+        with self.assertRaises(ValueError):
+            self.inventory.search_inventory("oat", limit=0)
+
+    def test_triggers_keep_indexes_in_sync(self):
+        """Test that inserts, renames and deletes are searchable at once."""
+        self.inventory.add_inventory_item("Oat Flour", "Food", 5, 2.0, 1)
+        self.inventory.update_inventory_item(1, "item_name", "Soy Milk")
+        self.inventory.delete_inventory_item(4)
+        self.assertEqual(sorted(row.item_name for row in self.inventory.search_inventory("oat")),
+                         ["Oat Flour", "Oat Milk Barista Oat Blend"])
+        self.assertEqual([row.item_id for row in self.inventory.search_inventory("soy")], [1])
+        self.expenses.delete_expense(1)
+        self.assertEqual(sorted(row.expense_id for row in self.expenses.search_expenses("oat")),
+                         [3, 5])  # 5 is the purchase recorded for the Oat Flour added above
+        with self.expenses.engine.connect() as connection:
+            self.assertEqual(check_search_indexes(connection), [])
+
+    def test_search_suppliers(self):
+        """Test that supplier company names are searched, ignoring accents, and users without one are not."""
+        users = UserManager(db_path=self.db_path)
+        try:
+            self.assertEqual([row.user_id for row in users.search_suppliers("cafe")], [2])
+            self.assertEqual([row.company_name for row in users.search_suppliers("oat")], ["Oat Milk Company"])
+            self.assertEqual(users.search_suppliers("guest"), [])
+        finally:
+            users.engine.dispose()
+
+    def test_existing_database_is_indexed(self):
+        """Test that a database created before the search indexes gets them filled, and rebuild repairs them."""
+        engine = create_engine(self.db_url)
+        with engine.begin() as connection:
+            for index in ("inventory_search", "expenses_search", "suppliers_search"):
+                connection.exec_driver_sql(f"DROP TABLE {index}")
+                for operation in ("insert", "delete", "update"):
+                    connection.exec_driver_sql(f"DROP TRIGGER {index}_{operation}")
+        Base.metadata.create_all(engine)
+        self.assertEqual([row.item_id for row in self.inventory.search_inventory("oat mil")], [1, 2])
+
+        with engine.begin() as connection:
+            connection.exec_driver_sql("DROP TRIGGER inventory_search_update")
+            connection.exec_driver_sql("UPDATE inventory SET item_name = 'Rice Milk' WHERE item_id = 1")
+            self.assertEqual(check_search_indexes(connection), ["inventory_search"])
+            rebuild_search_indexes(connection)
+            for statement in SEARCH_OBJECTS:
+                connection.exec_driver_sql(statement)
+            self.assertEqual(check_search_indexes(connection), [])
+        self.assertEqual([row.item_id for row in self.inventory.search_inventory("rice")], [1])
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    unittest.main()
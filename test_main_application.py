@@ -0,0 +1,69 @@
+import unittest
+import os
+import shutil
+import tempfile
+from business_logic.shared_managers_v3 import shared_manager
+from gui.sales_manager_gui_v3 import SalesManagerGUI
+from main_v3 import MainApplication
+
+PASSWORD = "secret"
+
+
+class TestMainApplication(unittest.TestCase):
+    def setUp(self):
+        """Start the application in an empty directory, where it keeps its database, with two baristas."""
+        self.working_directory = os.getcwd()
+        self.directory = tempfile.mkdtemp()
+        os.chdir(self.directory)
+        shared_manager.cache_clear()  # Managers of other tests use another database file
+        self.app = MainApplication()
+        for username in ("barista1", "barista2"):
+            success, message = self.app.user_manager.register_user(
+                username=username, password=PASSWORD, contact=5550100, email=f"{username}@example.com",
+                registration_type="admin", role_type="Barista"
+            )
+            self.assertTrue(success, message)
+
+    def tearDown(self):
+        """Destroy the application and its database."""
+        self.app.destroy()
+        shared_manager.cache_clear()
+        os.chdir(self.working_directory)
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def login(self, username):
+        self.app.initialize_login_form()
+        self.app.username_entry.insert(0, username)
+        self.app.password_entry.insert(0, PASSWORD)
+        self.app.handle_login()
+        self.app.update()
+
+    def sales_tab(self):
+        notebook = self.app.main_screens["Barista"]
+        notebook.select(1)  # Sales Management
+        notebook.build_selected()
+        return next(widget for widget in notebook.built if isinstance(widget, SalesManagerGUI))
+
+    def test_next_user_starts_with_an_empty_sale(self):
+        """Test that a sale left in progress at logout is not shown to the next user of the reused screen."""
+        self.login("barista1")
+        sales = self.sales_tab()
+        sales.item_var.set("Latte (ID: 1)")
+        sales.quantity_entry.insert(0, "2")
+        sales.unit_price_entry.insert(0, "3.00")
+        sales.add_to_sale()
+        sales.quantity_entry.insert(0, "5")  # Half-entered next item
+        self.assertEqual(len(sales.sales_data), 1)
+        self.app.end_session()
+
+        self.login("barista2")
+        self.assertIs(self.sales_tab(), sales)  # The screen is reused, not rebuilt
+        self.assertEqual(sales.sales_data, [])
+        self.assertEqual(sales.sales_tree.get_children(), ())
+        self.assertEqual(sales.total_cost_var.get(), "0.00")
+        self.assertEqual(sales.quantity_entry.get(), "")
+        self.assertEqual(str(sales.register_button.cget("state")), "disabled")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,425 @@
+import unittest
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from unittest.mock import patch
+import numpy as np
+from business_logic.report_manager_v3 import FinancialReportManager
+from database.models_v3 import User, Inventory, Sales, Expense
+from test_fixtures import seed_supplier_and_item
+
+
+class TestFinancialReportManager(unittest.TestCase):
+
+    def setUp(self):
+        """Set up the FinancialReportManager with a small in-memory dataset."""
+        self.report_manager = FinancialReportManager(db_url="sqlite:///:memory:")
+        session = self.report_manager.Session()
+        seed_supplier_and_item(session)
+        session.add(Inventory(item_id=2, item_name="Scone", category="Food", quantity=50, unit_cost=0.5, supplier_id=1))
+        session.add_all([
+            Sales(item_id=1, quantity_sold=2, unit_price=3.0, total_cost=6.0, sales_date=datetime(2024, 1, 1, 9)),
+            Sales(item_id=2, quantity_sold=1, unit_price=2.0, total_cost=2.0, sales_date=datetime(2024, 1, 1, 10)),
+            Sales(item_id=1, quantity_sold=1, unit_price=3.0, total_cost=3.0, sales_date=datetime(2024, 1, 2, 9)),
+            Expense(expense_date=datetime(2024, 1, 1), category="Food", supplier_id=1, expense_name="Flour",
+                    total_items=2, unit_cost=5.0, total_cost=10.0),
+        ])
+        session.commit()
+        session.close()
+
+    def test_calculate_total_sales_per_day(self):
+        """Test that daily sales are served from the rollup table."""
+        results = self.report_manager.calculate_total_sales_per_day()
+        self.assertEqual([(r.date, r.total_sales) for r in results], [("2024-01-01", 8.0), ("2024-01-02", 3.0)])
+
+    def test_calculate_sales_by_category(self):
+        """Test sales grouped by inventory category."""
+        results = dict((r.category, r.total_sales) for r in self.report_manager.calculate_sales_by_category())
+        self.assertEqual(results, {"Coffee": 9.0, "Food": 2.0})
+
+    def test_rollup_follows_updates_and_deletes(self):
+        """Test that the rollup changes with sales updates, deletes and category changes."""
+        session = self.report_manager.Session()
+        sale = session.query(Sales).filter_by(item_id=2).first()
+        sale.total_cost = 4.0
+        session.commit()
+        session.query(Inventory).filter_by(item_id=2).first().category = "Tea"
+        session.commit()
+        session.delete(session.query(Sales).filter_by(sales_date=datetime(2024, 1, 2, 9)).first())
+        session.commit()
+        session.close()
+
+        per_day = self.report_manager.calculate_total_sales_per_day()
+        self.assertEqual([(r.date, r.total_sales) for r in per_day], [("2024-01-01", 10.0)])
+        by_category = dict((r.category, r.total_sales) for r in self.report_manager.calculate_sales_by_category())
+        self.assertEqual(by_category, {"Coffee": 6.0, "Tea": 4.0})
+
+    def test_calculate_expense_vs_sales(self):
+        """Test total sales against total expenses."""
+        result = self.report_manager.calculate_expense_vs_sales()
+        self.assertEqual(result, {"total_sales": 11.0, "total_expenses": 10.0, "difference": 1.0})
+
+    def test_calculate_expense_by_supplier_and_category(self):
+        """Test expenses grouped by supplier company and category."""
+        results = self.report_manager.calculate_expense_by_supplier_and_category()
+        self.assertEqual([tuple(r) for r in results], [("Beans Ltd", "Food", 10.0)])
+
+    def test_rebuild_rollups(self):
+        """Test that a rebuild recomputes the same figures."""
+        before = self.report_manager.calculate_total_sales_per_day()
+        self.report_manager.rebuild_rollups()
+        self.assertEqual(self.report_manager.calculate_total_sales_per_day(), before)
+
+    def test_report_cache_hit(self):
+        """Test that a repeated report is served from the cache."""
+        first = self.report_manager.calculate_total_sales_per_day()
+        second = self.report_manager.calculate_total_sales_per_day()
+        self.assertEqual(first, second)
+        stats = self.report_manager.cache_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_cached_results_are_not_shared_with_callers(self):
+        """Test that mutating a result, down to its nested lists and dicts, does not change later cache hits."""
+        report = self.report_manager.generate_comprehensive_report()
+        report["sales_per_day"].clear()
+        report["expense_vs_sales"]["total_sales"] = 0.0
+        again = self.report_manager.generate_comprehensive_report()
+        self.assertEqual(len(again["sales_per_day"]), 2)
+        self.assertEqual(again["expense_vs_sales"]["total_sales"], 11.0)
+
+        columns = self.report_manager.calculate_total_sales_per_day(columnar=True)
+        columns.names.clear()
+        with self.assertRaises(ValueError):
+            columns.total_sales[0] = 0.0  # Columns stay read-only
+        again = self.report_manager.calculate_total_sales_per_day(columnar=True)
+        self.assertEqual(len(again), 2)
+        self.assertEqual(self.report_manager.cache_stats()["hits"], 2)
+
+    def test_report_cache_invalidated_by_write(self):
+        """Test that a new sale invalidates cached results."""
+        self.report_manager.calculate_total_sales_per_day()
+        session = self.report_manager.Session()
+        session.add(Sales(item_id=2, quantity_sold=1, unit_price=2.0, total_cost=2.0, sales_date=datetime(2024, 1, 3, 9)))
+        session.commit()
+        session.close()
+
+        results = self.report_manager.calculate_total_sales_per_day()
+        self.assertEqual(results[-1].date, "2024-01-03")
+        self.assertEqual(self.report_manager.cache_stats()["misses"], 2)
+
+    def test_report_cache_lru_eviction(self):
+        """Test that the least recently used result is evicted from a full cache."""
+        report_manager = FinancialReportManager(db_url="sqlite:///:memory:", cache_size=2)
+        report_manager.calculate_total_sales_per_day()
+        report_manager.calculate_sales_by_category()
+        report_manager.calculate_total_sales_per_day()
+        report_manager.calculate_total_expenses_per_day()  # Evicts sales_by_category
+        report_manager.calculate_total_sales_per_day()
+        stats = report_manager.cache_stats()
+        self.assertEqual((stats["hits"], stats["evictions"], stats["entries"]), (2, 1, 2))
+
+    def test_generate_comprehensive_report(self):
+        """Test that the combined report matches the individual reports."""
+        report = self.report_manager.generate_comprehensive_report()
+        self.assertEqual([tuple(r) for r in report["sales_per_day"]],
+                         [tuple(r) for r in self.report_manager.calculate_total_sales_per_day()])
+        self.assertEqual(report["expense_vs_sales"], self.report_manager.calculate_expense_vs_sales())
+        self.assertEqual([tuple(r) for r in report["expense_by_supplier_and_category"]],
+                         [("Beans Ltd", "Food", 10.0)])
+
+    def test_generate_comprehensive_report_parallel_in_memory(self):
+        """Test that the parallel engine falls back to one snapshot for in-memory databases."""
+        report = self.report_manager.generate_comprehensive_report(parallel=True)
+        self.assertEqual(report["expense_vs_sales"]["total_sales"], 11.0)
+
+    def test_sales_report_date_range_and_category(self):
+        """Test that date range and category filters restrict the rollup rows."""
+        results = self.report_manager.calculate_total_sales_per_day(start="2024-01-02", end="2024-01-31")
+        self.assertEqual([(r.date, r.total_sales) for r in results], [("2024-01-02", 3.0)])
+        results = self.report_manager.calculate_total_sales_per_day(category="Food")
+        self.assertEqual([(r.date, r.total_sales) for r in results], [("2024-01-01", 2.0)])
+
+    def test_sales_report_granularity(self):
+        """Test hourly and monthly buckets."""
+        hourly = self.report_manager.calculate_total_sales_per_day(end="2024-01-01", granularity="hour")
+        self.assertEqual([(r.date, r.total_sales) for r in hourly], [("2024-01-01 09:00", 6.0), ("2024-01-01 10:00", 2.0)])
+        monthly = self.report_manager.calculate_total_sales_per_day(granularity="month")
+        self.assertEqual([(r.date, r.total_sales) for r in monthly], [("2024-01", 11.0)])
+
+    def test_expense_report_supplier_filter(self):
+        """Test that the supplier filter applies to expense reports."""
+        self.assertEqual(self.report_manager.calculate_expense_vs_sales(supplier=2)["total_expenses"], 0)
+        self.assertEqual(self.report_manager.calculate_expense_vs_sales(supplier=1)["total_expenses"], 10.0)
+
+    def test_invalid_report_filters(self):
+        """Test that invalid filters raise ValueError."""
+        with self.assertRaises(ValueError) as context:
+            self.report_manager.calculate_total_sales_per_day(granularity="year")
+        self.assertEqual(str(context.exception), "Invalid granularity: year")
+        with self.assertRaises(ValueError):
+            self.report_manager.calculate_total_sales_per_day(start="01/01/2024")
+
+    def test_columnar_sales_per_day(self):
+        """Test that columnar results are typed NumPy arrays."""
+        columns = self.report_manager.calculate_total_sales_per_day(columnar=True)
+        self.assertEqual(columns.date.dtype, np.dtype("datetime64[D]"))
+        self.assertEqual(columns.total_sales.dtype, np.float64)
+        np.testing.assert_array_equal(columns.date, np.array(["2024-01-01", "2024-01-02"], dtype="datetime64[D]"))
+        np.testing.assert_array_equal(columns.total_sales, [8.0, 3.0])
+        self.assertFalse(columns.total_sales.flags.writeable)
+
+    def test_columnar_periods_are_dates(self):
+        """Test that hourly, weekly and monthly columnar periods parse as dates."""
+        hourly = self.report_manager.calculate_total_sales_per_day(granularity="hour", columnar=True)
+        self.assertEqual(hourly.date[0], np.datetime64("2024-01-01T09"))
+        weekly = self.report_manager.calculate_total_expenses_per_day(granularity="week", columnar=True)
+        self.assertEqual(weekly.date[0], np.datetime64("2024-01-01"))  # A Monday
+        monthly = self.report_manager.calculate_total_sales_per_day(start="2030-01-01", granularity="month", columnar=True)
+        self.assertEqual(len(monthly), 0)
+
+    def test_calculate_profit_series(self):
+        """Test the aligned profit series and its vectorized derived columns."""
+        series = self.report_manager.calculate_profit_series(window=2)
+        np.testing.assert_array_equal(series.total_expenses, [10.0, 0.0])
+        np.testing.assert_array_equal(series.profit, [-2.0, 3.0])
+        np.testing.assert_array_equal(series.margin, [-0.25, 1.0])
+        np.testing.assert_array_equal(series.cumulative_profit, [-2.0, 1.0])
+        np.testing.assert_array_equal(series.sales_moving_average, [8.0, 5.5])
+
+    def test_calculate_expense_pivot(self):
+        """Test the dense supplier x category matrix with a top-N and "Other" row."""
+        session = self.report_manager.Session()
+        for user_id, amount in ((2, 4.0), (3, 1.0)):
+            session.add(User(user_id=user_id, username=f"supplier{user_id}", password="x", contact="1",
+                             email=f"s{user_id}@example.com", registration_type="supplier",
+                             company_name=f"Supplier {user_id}", company_category="Food"))
+            session.add(Expense(expense_date=datetime(2024, 1, 2), category="Milk", supplier_id=user_id,
+                                expense_name="Milk", total_items=1, unit_cost=amount, total_cost=amount))
+        session.commit()
+        session.close()
+
+        pivot = self.report_manager.calculate_expense_pivot()
+        self.assertEqual(pivot.rows, ["Beans Ltd", "Supplier 2", "Supplier 3"])
+        self.assertEqual(pivot.columns, ["Food", "Milk"])
+        np.testing.assert_array_equal(pivot.values, [[10.0, 0.0], [0.0, 4.0], [0.0, 1.0]])
+
+        top = self.report_manager.calculate_expense_pivot(top_n=1)
+        self.assertEqual(top.rows, ["Beans Ltd", "Other"])
+        np.testing.assert_array_equal(top.values, [[10.0, 0.0], [0.0, 5.0]])
+        with self.assertRaises(ValueError):
+            self.report_manager.calculate_expense_pivot(top_n=0)
+
+    def test_calculate_sales_heatmap(self):
+        """Test sales per weekday and hour, from the hourly rollup and with a supplier filter."""
+        heatmap = self.report_manager.calculate_sales_heatmap()
+        self.assertEqual(heatmap.rows[0], "Monday")  # 2024-01-01 was a Monday
+        self.assertEqual(heatmap.values.shape, (7, 24))
+        self.assertEqual((heatmap.values[0, 9], heatmap.values[0, 10], heatmap.values[1, 9]), (6.0, 2.0, 3.0))
+        self.assertEqual(heatmap.values.sum(), 11.0)
+
+        coffee = self.report_manager.calculate_sales_heatmap(category="Coffee", measure="transactions")
+        self.assertEqual((coffee.values[0, 9], coffee.values[1, 9], coffee.values.sum()), (1.0, 1.0, 2.0))
+        by_supplier = self.report_manager.calculate_sales_heatmap(supplier=1)
+        np.testing.assert_array_equal(by_supplier.values, heatmap.values)
+        with self.assertRaises(ValueError):
+            self.report_manager.calculate_sales_heatmap(measure="profit")
+
+    def test_hourly_rollup_follows_writes(self):
+        """Test that the hourly rollup matches a rebuild after updates, deletes and category changes."""
+        session = self.report_manager.Session()
+        session.query(Sales).filter_by(item_id=2).first().sales_date = datetime(2024, 1, 3, 15)
+        session.commit()
+        session.query(Inventory).filter_by(item_id=1).first().category = "Tea"
+        session.commit()
+        session.delete(session.query(Sales).filter_by(sales_date=datetime(2024, 1, 2, 9)).first())
+        session.commit()
+        session.close()
+
+        tea = self.report_manager.calculate_sales_heatmap(category="Tea")
+        self.assertEqual(tea.values[0, 9], 6.0)
+        self.assertEqual(tea.values.sum(), 6.0)
+        before = self.report_manager.calculate_sales_heatmap()
+        self.assertEqual((before.values[2, 15], before.values.sum()), (2.0, 8.0))
+        with self.report_manager.engine.connect() as connection:
+            rows = sorted(connection.exec_driver_sql("SELECT * FROM hourly_sales_summary").fetchall())
+        self.report_manager.rebuild_rollups()
+        with self.report_manager.engine.connect() as connection:
+            self.assertEqual(sorted(connection.exec_driver_sql("SELECT * FROM hourly_sales_summary").fetchall()), rows)
+
+    def test_rollups_follow_sales_of_deleted_items(self):
+        """Test that sales of a deleted item move to 'Unknown' and can still be edited and deleted."""
+        with self.report_manager.engine.begin() as connection:
+            connection.exec_driver_sql("DELETE FROM inventory WHERE item_id = 1")
+            connection.exec_driver_sql("UPDATE sales SET total_cost = 5.0 WHERE item_id = 1 AND sales_date LIKE '2024-01-01%'")
+            connection.exec_driver_sql("DELETE FROM sales WHERE item_id = 1 AND sales_date LIKE '2024-01-02%'")
+
+        self.assertEqual(self.report_manager.calculate_sales_heatmap(category="Coffee").values.sum(), 0.0)
+        self.assertEqual(self.report_manager.calculate_sales_heatmap().values.sum(), 7.0)
+        tables = ("daily_sales_summary", "hourly_sales_summary")
+        with self.report_manager.engine.connect() as connection:
+            rows = [sorted(connection.exec_driver_sql(f"SELECT * FROM {table}").fetchall()) for table in tables]
+        self.report_manager.rebuild_rollups()
+        with self.report_manager.engine.connect() as connection:
+            self.assertEqual([sorted(connection.exec_driver_sql(f"SELECT * FROM {table}").fetchall())
+                              for table in tables], rows)
+
+    def add_latte_purchases(self):
+        session = self.report_manager.Session()
+        session.add_all([
+            Expense(expense_date=datetime(2024, 1, 1), category="Beverages", supplier_id=1, expense_name="Latte",
+                    total_items=2, unit_cost=0.8, total_cost=1.6),
+            Expense(expense_date=datetime(2024, 1, 2), category="Beverages", supplier_id=1, expense_name="Latte",
+                    total_items=5, unit_cost=1.2, total_cost=6.0),
+        ])
+        session.commit()
+        session.close()
+
+    def test_calculate_gross_margin(self):
+        """Test FIFO and weighted-average cost of goods sold from purchase layers."""
+        self.add_latte_purchases()
+        fifo = self.report_manager.calculate_gross_margin()
+        np.testing.assert_array_equal(fifo.date, np.array(["2024-01-01", "2024-01-02"], dtype="datetime64[D]"))
+        # Lattes use the 0.8 layer, then the 1.2 layer; scones have no purchases and use Inventory.unit_cost
+        np.testing.assert_allclose(fifo.cogs, [1.6 + 0.5, 1.2])
+        np.testing.assert_allclose(fifo.gross_profit, [8.0 - 2.1, 3.0 - 1.2])
+        np.testing.assert_allclose(fifo.gross_margin, [5.9 / 8.0, 1.8 / 3.0])
+
+        average = self.report_manager.calculate_gross_margin(start="2024-01-02", method="average")
+        np.testing.assert_allclose(average.cogs, [7.6 / 7])
+        monthly = self.report_manager.calculate_gross_margin(granularity="month")
+        np.testing.assert_allclose(monthly.cogs, [3.3])
+        with self.assertRaises(ValueError):
+            self.report_manager.calculate_gross_margin(method="lifo")
+        with self.assertRaises(ValueError):
+            self.report_manager.calculate_gross_margin(granularity="hour")
+
+    def test_fifo_only_uses_purchases_made_by_the_sale(self):
+        """Test that sales do not consume later purchases, and items sharing a name do not share layers."""
+        session = self.report_manager.Session()
+        session.add_all([
+            Expense(expense_date=datetime(2024, 1, 2), category="Beverages", supplier_id=1, expense_name="Latte",
+                    total_items=1, unit_cost=1.2, total_cost=1.2),
+            Expense(expense_date=datetime(2024, 1, 3), category="Beverages", supplier_id=1, expense_name="Latte",
+                    total_items=10, unit_cost=0.1, total_cost=1.0),
+            Inventory(item_id=3, item_name="Latte", category="Coffee", quantity=5, unit_cost=2.0, supplier_id=1),
+            Sales(item_id=3, quantity_sold=1, unit_price=3.0, total_cost=3.0, sales_date=datetime(2024, 1, 3, 9)),
+        ])
+        session.commit()
+        session.close()
+
+        # Day 1 has no purchases yet, so both lattes use Inventory.unit_cost; day 2 uses that day's layer
+        margins = self.report_manager.calculate_item_margins(end="2024-01-02")
+        self.assertEqual(list(margins.item_id), [1, 2])
+        np.testing.assert_allclose(margins.cogs, [2 * 1.0 + 1.2, 0.5])
+        # The second Latte item keeps its own unit cost instead of taking the first item's purchases
+        margins = self.report_manager.calculate_item_margins(start="2024-01-03")
+        self.assertEqual(list(margins.item_id), [3])
+        np.testing.assert_allclose(margins.cogs, [2.0])
+        average = self.report_manager.calculate_item_margins(end="2024-01-02", method="average")
+        np.testing.assert_allclose(average.cogs, [2 * 1.0 + 1.2, 0.5])
+
+    def test_calculate_item_margins_follow_purchase_changes(self):
+        """Test per-item margins and that edited purchases update the cost layers."""
+        self.add_latte_purchases()
+        margins = self.report_manager.calculate_item_margins()
+        self.assertEqual(list(margins.item_name), ["Latte", "Scone"])
+        np.testing.assert_array_equal(margins.quantity, [3, 1])
+        np.testing.assert_allclose(margins.cogs, [2.8, 0.5])
+
+        session = self.report_manager.Session()
+        purchase = session.query(Expense).filter_by(expense_name="Latte", total_items=2).first()
+        purchase.total_items, purchase.total_cost = 3, 3.0
+        session.commit()
+        session.close()
+        np.testing.assert_allclose(self.report_manager.calculate_item_margins(category="Coffee").cogs, [3.0])
+        with self.report_manager.engine.connect() as connection:
+            rows = sorted(connection.exec_driver_sql("SELECT * FROM daily_purchase_summary").fetchall())
+        self.report_manager.rebuild_rollups()
+        with self.report_manager.engine.connect() as connection:
+            self.assertEqual(sorted(connection.exec_driver_sql("SELECT * FROM daily_purchase_summary").fetchall()), rows)
+
+    def test_calculate_top_items(self):
+        """Test best sellers over a window and their change against the previous period."""
+        top = self.report_manager.calculate_top_items(start="2024-01-02", end="2024-01-02")
+        self.assertEqual(len(top), 1)
+        self.assertEqual((top[0].rank, top[0].item_name, top[0].total_sales), (1, "Latte", 3.0))
+        self.assertEqual((top[0].previous_total, top[0].change, top[0].previous_rank), (6.0, -3.0, 1))
+        self.assertEqual(top[0].change_percent, -50.0)
+
+        by_quantity = self.report_manager.calculate_top_items(start="2024-01-01", end="2024-01-01", measure="quantity")
+        self.assertEqual([(row.item_name, row.total_quantity) for row in by_quantity], [("Latte", 2), ("Scone", 1)])
+        self.assertIsNone(by_quantity[0].change_percent)  # Nothing sold the day before
+        self.assertEqual([row.item_name for row in self.report_manager.calculate_top_items(top_n=1)], ["Latte"])
+        with self.assertRaises(ValueError):
+            self.report_manager.calculate_top_items(top_n=0)
+
+
+class TestParallelComprehensiveReport(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a FinancialReportManager over a database file, which pooled connections can share."""
+        self.directory = tempfile.mkdtemp()
+        self.report_manager = FinancialReportManager(db_url=f"sqlite:///{os.path.join(self.directory, 'reports.db')}")
+        session = self.report_manager.Session()
+        seed_supplier_and_item(session)
+        session.add(Inventory(item_id=2, item_name="Scone", category="Food", quantity=50, unit_cost=0.5, supplier_id=1))
+        session.add_all([
+            Sales(item_id=1, quantity_sold=2, unit_price=3.0, total_cost=6.0, sales_date=datetime(2024, 1, 1, 9)),
+            Sales(item_id=2, quantity_sold=1, unit_price=2.0, total_cost=2.0, sales_date=datetime(2024, 1, 1, 10)),
+            Sales(item_id=1, quantity_sold=1, unit_price=3.0, total_cost=3.0, sales_date=datetime(2024, 1, 2, 9)),
+            Expense(expense_date=datetime(2024, 1, 1), category="Food", supplier_id=1, expense_name="Flour",
+                    total_items=2, unit_cost=5.0, total_cost=10.0),
+        ])
+        session.commit()
+        session.close()
+
+    def tearDown(self):
+        self.report_manager.engine.dispose()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def assertSameReport(self, report, expected):
+        self.assertEqual(report.keys(), expected.keys())
+        for section, rows in expected.items():
+            if section == "expense_vs_sales":
+                self.assertEqual(report[section], rows)
+            else:
+                self.assertEqual([tuple(row) for row in report[section]], [tuple(row) for row in rows], section)
+
+    def test_parallel_sections_match_the_snapshot(self):
+        """Test that sections computed on the thread pool match the single-statement report."""
+        engine = self.report_manager.comprehensive_engine
+        serial = self.report_manager.generate_comprehensive_report(category="Coffee")
+        with patch.object(engine, "generate_snapshot", wraps=engine.generate_snapshot) as snapshot:
+            parallel = self.report_manager.generate_comprehensive_report(category="Coffee", parallel=True)
+        snapshot.assert_not_called()  # The thread pool's result was used
+        self.assertSameReport(parallel, serial)
+        self.assertEqual(parallel["expense_vs_sales"]["total_sales"], 9.0)
+
+    def test_write_during_parallel_report_falls_back_to_a_snapshot(self):
+        """Test that a write between the two data version reads discards the pool's sections."""
+        engine = self.report_manager.comprehensive_engine
+        data_version = engine._data_version
+        reads = []
+
+        def data_version_with_a_write():
+            reads.append(True)
+            if len(reads) == 2:  # After the sections were computed, before the version is compared
+                session = self.report_manager.Session()
+                session.add(Sales(item_id=2, quantity_sold=2, unit_price=2.0, total_cost=4.0,
+                                  sales_date=datetime(2024, 1, 3, 9)))
+                session.commit()
+                session.close()
+            return data_version()
+
+        with patch.object(engine, "_data_version", side_effect=data_version_with_a_write), \
+                patch.object(engine, "generate_snapshot", wraps=engine.generate_snapshot) as snapshot:
+            report = self.report_manager.generate_comprehensive_report(parallel=True)
+        self.assertEqual(len(reads), 2)
+        snapshot.assert_called_once()
+        self.assertEqual(report["expense_vs_sales"]["total_sales"], 15.0)  # Includes the sale written meanwhile
+        self.assertSameReport(report, self.report_manager.generate_comprehensive_report())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import unittest
+import threading
+import time
+from business_logic.report_manager_v3 import FinancialReportManager
+from gui.report_runner_v3 import ReportRunner
+
+
+class FakeWidget:
+    """Stands in for a Tk widget: after() callbacks are run by pump() on the test thread."""
+
+    def __init__(self):
+        self.callbacks = []
+
+    def after(self, ms, callback):
+        self.callbacks.append(callback)
+
+    def pump(self, runner, timeout=5):
+        deadline = time.time() + timeout
+        while (self.callbacks or runner.is_busy()) and time.time() < deadline:
+            if self.callbacks:
+                self.callbacks.pop(0)()
+            else:
+                time.sleep(0.01)
+
+
+class TestReportRunner(unittest.TestCase):
+
+    def setUp(self):
+        """Start a runner whose worker owns an in-memory report manager."""
+        self.widget = FakeWidget()
+        self.progress = []
+        self.runner = ReportRunner(
+            self.widget, lambda: FinancialReportManager(db_url="sqlite:///:memory:"),
+            on_progress=lambda job, state: self.progress.append((job.name, state))
+        )
+
+    def tearDown(self):
+        self.runner.shutdown()
+
+    def test_result_delivered_on_tk_loop(self):
+        """Test that results come back through after() on the calling thread."""
+        results = []
+        self.runner.submit("Expense vs Sales", lambda manager: manager.calculate_expense_vs_sales(),
+                           lambda data: results.append((threading.current_thread(), data)))
+        self.widget.pump(self.runner)
+        self.assertEqual(results, [(threading.current_thread(), {"total_sales": 0, "total_expenses": 0, "difference": 0})])
+        self.assertEqual(self.progress, [("Expense vs Sales", "started"), ("Expense vs Sales", "finished")])
+
+    def test_errors_delivered_to_on_error(self):
+        """Test that a failing report reports its exception."""
+        errors = []
+        self.runner.submit("Sales", lambda manager: manager.calculate_total_sales_per_day(granularity="year"),
+                           lambda data: self.fail("should not succeed"), errors.append)
+        self.widget.pump(self.runner)
+        self.assertIsInstance(errors[0], ValueError)
+
+    def test_rapid_requests_coalesce(self):
+        """Test that only the newest of several rapid requests delivers a result."""
+        release = threading.Event()
+        started = threading.Event()
+        ran, results = [], []
+
+        def slow(manager):
+            started.set()
+            release.wait(5)
+            return "first"
+
+        def compute(name):
+            def run(manager):
+                ran.append(name)
+                return name
+            return run
+
+        first = self.runner.submit("first", slow, results.append)
+        started.wait(5)
+        self.runner.submit("second", compute("second"), results.append)
+        self.runner.submit("third", compute("third"), results.append)
+        self.assertTrue(first.cancelled.is_set())
+        release.set()
+        self.widget.pump(self.runner)
+
+        self.assertEqual(ran, ["third"])  # The waiting "second" request was replaced
+        self.assertEqual(results, ["third"])
+
+    def test_cancel_interrupts_query(self):
+        """Test that cancelling aborts a running SQLite statement."""
+        errors, results = [], []
+        long_query = ("WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 100000000) "
+                      "SELECT count(*) FROM n")
+
+        def compute(manager):
+            session = manager.Session()
+            try:
+                return session.connection().exec_driver_sql(long_query).scalar()
+            finally:
+                session.close()
+
+        job = self.runner.submit("long", compute, results.append, errors.append)
+        time.sleep(0.2)
+        self.runner.cancel()
+        self.widget.pump(self.runner)
+        self.assertTrue(job.cancelled.is_set())
+        self.assertEqual((results, errors), ([], []))
+        self.assertFalse(self.runner.is_busy())
+
+
+if __name__ == "__main__":
+    unittest.main()
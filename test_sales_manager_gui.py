@@ -0,0 +1,46 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import tkinter as tk
+from gui.sales_manager_gui_v3 import SalesManagerGUI
+
+
+class TestSalesManagerGUI(unittest.TestCase):
+    def setUp(self):
+        """Set up the GUI and mock the SalesManager."""
+        self.root = tk.Tk()
+        self.gui = SalesManagerGUI(self.root)
+        self.gui.tasks.drain()  # The item list read on construction
+        self.gui.manager = MagicMock()  # Mock the SalesManager
+        self.gui.manager.fetch_inventory_items.return_value = []
+
+    def tearDown(self):
+        """Destroy the GUI."""
+        self.root.destroy()
+
+    def add_item(self, item_id, quantity):
+        self.gui.item_var.set(f"Item {item_id} (ID: {item_id})")
+        self.gui.quantity_entry.insert(0, str(quantity))
+        self.gui.unit_price_entry.insert(0, "2.00")
+        self.gui.add_to_sale()
+
+    @patch("tkinter.messagebox.showinfo")
+    def test_items_added_while_registering_are_kept(self, mock_showinfo):
+        """Test that a sale being registered cannot be submitted again, and items added meanwhile stay."""
+        self.add_item(1, 2)
+        self.gui.register_sale()
+        self.add_item(2, 3)
+        self.assertEqual(str(self.gui.register_button.cget("state")), "disabled")
+
+        self.gui.tasks.drain()
+
+        self.gui.manager.register_sales.assert_called_once()
+        self.assertEqual([sale["item_id"] for sale in self.gui.manager.register_sales.call_args.args[0]], [1])
+        self.assertEqual([sale["item_id"] for sale in self.gui.sales_data], [2])
+        self.assertEqual([self.gui.sales_tree.item(row, "values")[0] for row in self.gui.sales_tree.get_children()],
+                         ["Item 2"])
+        self.assertEqual(self.gui.total_cost_var.get(), "6.00")
+        self.assertEqual(str(self.gui.register_button.cget("state")), "normal")
+
+
+if __name__ == "__main__":
+    unittest.main()
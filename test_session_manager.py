@@ -0,0 +1,133 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from business_logic.events_v3 import EventBus, RowsChanged
+from business_logic.session_management_v3 import SessionManager
+from database.models_v3 import User
+
+
+class TestSessionManager(unittest.TestCase):
+
+    def setUp(self):
+        """Set up the SessionManager with an in-memory database."""
+        self.events = EventBus()
+        self.session_manager = SessionManager(db_url="sqlite:///:memory:", secret_key="test-secret", events=self.events)
+        session = self.session_manager.Session()
+        session.add(User(user_id=1, username="barista1", password="x", contact="1", email="b@example.com",
+                         registration_type="admin", role_type="Barista"))
+        session.commit()
+        session.close()
+
+    def tearDown(self):
+        self.session_manager.close()
+
+    def test_create_and_validate_session(self):
+        """Test that a new session validates with its cached role."""
+        token = self.session_manager.create_session("barista1", "Barista")
+        success, session_data = self.session_manager.validate_session(token)
+        self.assertTrue(success)
+        self.assertEqual(session_data, {"username": "barista1", "role_type": "Barista"})
+
+    def test_validate_session_cache_miss_reads_table(self):
+        """Test that a cleared role cache falls back to the sessions table."""
+        token = self.session_manager.create_session("barista1", "Barista")
+        self.session_manager.role_cache.clear()
+        success, session_data = self.session_manager.validate_session(token)
+        self.assertTrue(success)
+        self.assertEqual(session_data["role_type"], "Barista")
+
+    def test_validate_session_tampered_token(self):
+        """Test that a token with a modified expiry is rejected."""
+        token = self.session_manager.create_session("barista1", "Barista")
+        session_id, expires_at, signature = token.split(".")
+        tampered = f"{session_id}.{int(expires_at) + 3600}.{signature}"
+        success, message = self.session_manager.validate_session(tampered)
+        self.assertFalse(success)
+        self.assertEqual(message, "Invalid session token.")
+
+    def test_validate_session_expired(self):
+        """Test that an expired session forces a new login."""
+        token = self.session_manager.create_session("barista1", "Barista")
+        expires_at = int(token.split(".")[1])
+        with patch('business_logic.session_management_v3.time.time', return_value=expires_at + 1):
+            success, message = self.session_manager.validate_session(token)
+        self.assertFalse(success)
+        self.assertEqual(message, "Session expired. Please log in again.")
+
+    def test_revoke_session(self):
+        """Test that a revoked session can no longer be used."""
+        token = self.session_manager.create_session("barista1", "Barista")
+        self.session_manager.revoke_session(token)
+        success, message = self.session_manager.validate_session(token)
+        self.assertFalse(success)
+        self.assertEqual(message, "Session has been revoked.")
+
+    def test_purge_expired_sessions(self):
+        """Test that expired sessions are removed from the table."""
+        token = self.session_manager.create_session("barista1", "Barista")
+        expires_at = int(token.split(".")[1])
+        with patch('business_logic.session_management_v3.time.time', return_value=expires_at + 1):
+            deleted = self.session_manager.purge_expired_sessions()
+        self.assertEqual(deleted, 1)
+        self.assertEqual(self.session_manager.role_cache, {})
+
+    def test_user_changes_drop_cached_roles(self):
+        """Test that a demoted or deleted user does not keep the role cached at login."""
+        token = self.session_manager.create_session("barista1", "Manager")
+        session = self.session_manager.Session()
+        user = session.query(User).filter_by(user_id=1).first()
+        user.role_type = "Trainee"
+        session.commit()
+        self.events.publish(RowsChanged("users", (1,)))
+        self.assertEqual(self.session_manager.validate_session(token), (True, {"username": "barista1", "role_type": "Trainee"}))
+
+        session.delete(user)
+        session.commit()
+        session.close()
+        self.events.publish(RowsChanged("users", (1,)))
+        success, message = self.session_manager.validate_session(token)
+        self.assertFalse(success)
+        self.assertEqual(message, "User no longer exists. Please log in again.")
+
+    def test_super_admin_survives_user_changes(self):
+        """Test that a super admin session, which has no users row, still validates after the role cache is dropped."""
+        token = self.session_manager.create_session("admin", "super_admin")
+        self.assertEqual(self.session_manager.validate_session(token), (True, {"username": "admin", "role_type": "super_admin"}))
+        self.events.publish(RowsChanged("users", (1,)))
+        self.assertEqual(self.session_manager.role_cache, {})
+        self.assertEqual(self.session_manager.validate_session(token), (True, {"username": "admin", "role_type": "super_admin"}))
+
+    def test_close_unsubscribes(self):
+        """Test that a closed manager no longer receives change events."""
+        token = self.session_manager.create_session("barista1", "Barista")
+        self.session_manager.close()
+        self.assertEqual(self.events.handlers[RowsChanged], [])
+        self.events.publish(RowsChanged("sessions", (token.split(".")[0],)))
+        self.assertEqual(len(self.session_manager.role_cache), 1)
+
+    def test_revoke_through_another_manager(self):
+        """Test that a session revoked through another manager is not served from this one's cache."""
+        directory = tempfile.mkdtemp()
+        try:
+            db_url = f"sqlite:///{os.path.join(directory, 'sessions.db')}"
+            first = SessionManager(db_url=db_url, secret_key="test-secret", events=self.events)
+            second = SessionManager(db_url=db_url, secret_key="test-secret", events=self.events)
+            session = first.Session()
+            session.add(User(user_id=1, username="barista1", password="x", contact="1", email="b@example.com",
+                             registration_type="admin", role_type="Barista"))
+            session.commit()
+            session.close()
+            token = first.create_session("barista1", "Barista")
+            self.assertTrue(second.validate_session(token)[0])
+            first.revoke_session(token)
+            self.assertEqual(second.validate_session(token), (False, "Session has been revoked."))
+            first.close()
+            second.close()
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+from business_logic.shared_managers_v3 import shared_manager
+from business_logic.sales_management_v3 import SalesManager
+
+
+class CountingManager:
+    created = 0
+
+    def __init__(self, db_url="sqlite:///:memory:"):
+        CountingManager.created += 1
+        self.db_url = db_url
+
+
+class TestSharedManagers(unittest.TestCase):
+
+    def test_one_manager_per_factory_and_arguments(self):
+        """Test that screens asking for the same manager get the same instance."""
+        first = shared_manager(CountingManager)
+        self.assertIs(shared_manager(CountingManager), first)
+        other = shared_manager(CountingManager, "sqlite:///other.db")
+        self.assertIsNot(other, first)
+        self.assertEqual(other.db_url, "sqlite:///other.db")
+        self.assertEqual(CountingManager.created, 2)
+
+    def test_shared_real_manager(self):
+        """Test that a shared SalesManager builds its engine once."""
+        manager = shared_manager(SalesManager, "sqlite:///:memory:")
+        self.assertIs(shared_manager(SalesManager, "sqlite:///:memory:").engine, manager.engine)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,309 @@
+import unittest
+from collections import namedtuple
+from datetime import datetime
+from business_logic.expense_management_v3 import ExpenseManager
+from business_logic.sales_management_v3 import SalesManager
+from database.models_v3 import User, Inventory, Sales, Expense
+from database.schema_objects_v3 import prune_change_log
+from gui.table_model_v3 import TableModel
+from test_fixtures import seed_supplier_and_item
+
+Row = namedtuple("Row", ["item_id", "item_name"])
+
+
+class FakeTable:
+    """A keyset page source over a dict of rows that counts database reads."""
+
+    def __init__(self, count):
+        self.rows = {key: Row(key, f"Item {key}") for key in range(1, count + 1)}
+        self.changed = []  # Keys written since the table was created, in order
+        self.reads = 0
+
+    def write(self, key, name=None):
+        """Insert, update or (with no name) delete a row."""
+        if name is None:
+            del self.rows[key]
+        else:
+            self.rows[key] = Row(key, name)
+        self.changed.append(key)
+
+    def fetch(self, after=None, before=None, limit=10, search=None):
+        self.reads += 1
+        keys = sorted(key for key in self.rows if (after is None or key > after) and (before is None or key < before)
+                      and self.matches(key, search))
+        keys = keys[-limit:] if before is not None else keys[:limit]
+        return [self.rows[key] for key in keys]
+
+    def fetch_rows(self, keys, search=None):
+        self.reads += 1
+        return [self.rows[key] for key in sorted(keys) if key in self.rows and self.matches(key, search)]
+
+    def matches(self, key, search):
+        return search is None or self.rows[key].item_name.startswith(search)
+
+    def fetch_changes(self, mark=None):
+        if mark is None:
+            return len(self.changed), []
+        return len(self.changed), sorted(set(self.changed[mark:]))
+
+
+class FakeView:
+    """Stands in for a VirtualTree: shows the first page and records row changes."""
+
+    def __init__(self, model):
+        self.model = model
+        self.rows = []
+        self.changes = []
+        self.in_order = None  # What update_row() returns; False asks the model for a reload
+
+    def refresh(self):
+        self.rows = self.model.fetch_page(limit=10)
+
+    def update_row(self, row, append=True):
+        self.changes.append(("update", row))
+        return self.in_order
+
+    def remove_row(self, key):
+        self.changes.append(("remove", key))
+
+
+class TestTableModel(unittest.TestCase):
+
+    def setUp(self):
+        self.table = FakeTable(25)
+        self.model = TableModel(self.table.fetch, self.table.fetch_rows, self.table.fetch_changes, max_pages=2)
+        self.views = [FakeView(self.model) for _ in range(3)]
+        for view in self.views:
+            self.model.subscribe(view)
+
+    def test_views_share_one_read_per_page(self):
+        """Test that the view, update and delete lists read the first page once between them."""
+        self.model.reload()
+        self.assertEqual(self.table.reads, 1)
+        self.assertEqual([view.rows[0] for view in self.views], [Row(1, "Item 1")] * 3)
+        self.assertIs(self.views[0].rows[0], self.views[2].rows[0])  # One copy of each row
+
+        self.model.reload()
+        self.assertEqual(self.table.reads, 2)  # A reload reads the database again
+
+    def test_of_manager_reads_through_the_current_manager(self):
+        """Test that a model over manager methods follows a manager replaced after it was built."""
+        screen = type("Screen", (), {})()
+        screen.manager = self.table
+        model = TableModel.of_manager(lambda: screen.manager, "fetch", "fetch_rows", "fetch_changes")
+        self.assertEqual(model.fetch(limit=2), [Row(1, "Item 1"), Row(2, "Item 2")])
+
+        screen.manager = FakeTable(1)
+        screen.manager.write(1, "Replaced")
+        self.assertEqual(model.fetch_rows([1]), [Row(1, "Replaced")])
+        self.assertEqual(model.fetch_changes(0), (1, [1]))
+        self.assertEqual(model.fetch_changes(), (1, []))
+        self.assertEqual(self.table.reads, 1)
+
+    def test_row_changes_are_pushed_to_every_view(self):
+        """Test that an edited row is read alone and a deleted row is removed from every view."""
+        self.model.reload()
+        self.table.rows[3] = Row(3, "Renamed")
+        del self.table.rows[4]
+        self.model.refresh_rows([3, 4])
+
+        self.assertEqual(self.table.reads, 2)
+        for view in self.views:
+            self.assertEqual(view.changes, [("update", Row(3, "Renamed")), ("remove", 4)])
+        self.assertEqual(self.model.rows[3].item_name, "Renamed")
+        self.assertNotIn(4, self.model.rows)
+        self.assertEqual(len(self.model.fetch_page(limit=10)), 10)  # The short page is read again
+        self.assertEqual(self.table.reads, 3)
+
+    def test_sync_applies_only_the_changes_since_the_load(self):
+        """Test that sync() reads just the written rows and pushes them to the views."""
+        self.model.sync()
+        self.assertEqual(self.table.reads, 0)  # Nothing is loaded yet, so there is nothing to bring up to date
+        self.model.reload()
+        self.table.write(3, "Renamed")
+        self.table.write(4)
+        self.table.write(26, "New")
+        self.model.sync()
+
+        self.assertEqual(self.table.reads, 2)  # The first page, then rows 3, 4 and 26 in one read
+        self.assertEqual(self.views[0].changes, [("update", Row(3, "Renamed")), ("update", Row(26, "New")),
+                                                 ("remove", 4)])
+        self.model.sync()
+        self.assertEqual(self.table.reads, 2)  # No changes, no row reads
+
+    def test_put_row_pushes_known_values_without_a_read(self):
+        """Test that a row built from an event reaches every view and the cache."""
+        self.model.reload()
+        self.model.put_row(self.model.rows[2]._replace(item_name="Patched"))
+        self.assertEqual(self.table.reads, 1)
+        self.assertEqual([view.changes for view in self.views], [[("update", Row(2, "Patched"))]] * 3)
+        self.assertEqual(self.model.fetch_page(limit=10)[1].item_name, "Patched")
+
+    def test_sync_reloads_when_the_change_log_was_pruned(self):
+        """Test that a model whose mark is older than the change log reloads its views."""
+        self.table.fetch_changes = lambda mark=None: (0, [] if mark is None else None)
+        self.model.fetch_changes = self.table.fetch_changes
+        self.model.reload()
+        self.views[0].rows = []
+        self.model.sync()
+        self.assertEqual(len(self.views[0].rows), 10)
+        self.assertEqual(self.table.reads, 2)
+
+    def test_query_filters_pages_and_changed_rows(self):
+        """Test that pages and changed rows are read with the query, and rows that stop matching are removed."""
+        self.model.set_query({"search": "Item 2"})
+        self.assertEqual([row.item_id for row in self.views[0].rows], [2] + list(range(20, 26)))
+        self.table.write(20, "Renamed")
+        self.table.write(3, "Item 2b")
+        self.model.sync()
+
+        self.assertEqual(self.views[0].changes, [("update", Row(3, "Item 2b")), ("remove", 20)])
+        self.assertEqual(self.model.fetch_page(limit=10)[0], Row(2, "Item 2"))
+
+    def test_cursor_follows_the_sort(self):
+        """Test that views page by key, or by (sort value, key) when the query sorts by a column."""
+        row = Row(7, "Item 7")
+        self.assertEqual(self.model.cursor(row), 7)
+        self.model.query = {"sort": "item_name", "descending": True, "search": "Item"}
+        self.assertEqual(self.model.cursor(row), ("Item 7", 7))
+        self.assertEqual(self.model.filters(), {"search": "Item"})
+
+    def test_order_folds_nocase_sorts_and_follows_direction(self):
+        """Test that rows compare as the database orders them: NOCASE names folded, descending reversed."""
+        model = TableModel(self.table.fetch, self.table.fetch_rows, self.table.fetch_changes, nocase_sorts=("item_name",))
+        apple, zebra = Row(9, "apple"), Row(2, "Zebra")
+        self.assertLess(model.order(zebra), model.order(apple))  # Key order
+        model.query = {"sort": "item_name"}
+        self.assertLess(model.order(apple), model.order(zebra))
+        self.assertEqual(model.cursor(zebra), ("Zebra", 2))  # Pages still seek on the stored value
+        model.query = {"sort": "item_name", "descending": True}
+        self.assertLess(model.order(zebra), model.order(apple))
+        self.model.query = {"sort": "item_name"}
+        self.assertLess(self.model.order(zebra), self.model.order(apple))  # Case-sensitive without nocase_sorts
+
+    def test_sync_reloads_rows_a_view_cannot_place(self):
+        """Test that a changed row a view cannot show in order reloads the views instead."""
+        self.model.reload()
+        self.views[1].in_order = False
+        self.table.write(3, "Renamed")
+        self.model.sync()
+        self.assertEqual(self.table.reads, 3)  # The first page, row 3, then the first page again
+        self.assertEqual(self.model.mark, len(self.table.changed))
+        self.model.sync()
+        self.assertEqual(self.table.reads, 3)
+
+    def test_least_recent_pages_are_evicted(self):
+        """Test that only max_pages pages and their rows are kept."""
+        self.model.fetch_page(limit=10)
+        self.model.fetch_page(after=10, limit=10)
+        self.model.fetch_page(after=20, limit=10)
+        self.assertEqual(list(self.model.pages), [(10, None, 10), (20, None, 10)])
+        self.assertEqual(sorted(self.model.rows), list(range(11, 26)))
+        self.model.fetch_page(after=10, limit=10)
+        self.assertEqual(self.table.reads, 3)
+
+
+class TestChangeTracking(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = SalesManager(db_url="sqlite:///:memory:")
+        session = self.manager.Session()
+        seed_supplier_and_item(session, quantity=100)
+        session.add_all(self.sale(sales_id) for sales_id in range(1, 6))
+        session.commit()
+        session.close()
+
+    def sale(self, sales_id):
+        return Sales(sales_id=sales_id, item_id=1, quantity_sold=1, unit_price=3.0, total_cost=3.0,
+                     sales_date=datetime(2024, 1, 1, 9))
+
+    def test_fetch_sales_changes(self):
+        """Test that inserts are found by key and updates and deletes through the change log."""
+        mark, keys = self.manager.fetch_sales_changes()
+        self.assertEqual(keys, [])
+        self.manager.update_sales_record(2, "quantity_sold", 4)
+        self.manager.delete_sales_record(3)
+        session = self.manager.Session()
+        session.add(self.sale(6))
+        session.query(Inventory).filter_by(item_id=1).update({"quantity": 50})  # Another table's change
+        session.commit()
+        session.close()
+
+        mark, keys = self.manager.fetch_sales_changes(mark)
+        self.assertEqual(keys, [2, 3, 6])
+        self.assertEqual(self.manager.fetch_sales_changes(mark), (mark, []))
+
+    def test_pruned_change_log(self):
+        """Test that a mark older than the pruned change log asks for a full reload."""
+        mark, _ = self.manager.fetch_sales_changes()
+        for quantity in range(2, 5):
+            self.manager.update_sales_record(1, "quantity_sold", quantity)
+        with self.manager.engine.begin() as connection:
+            prune_change_log(connection, keep=1)
+        self.assertIsNone(self.manager.fetch_sales_changes(mark)[1])
+
+
+class TestListQueries(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = ExpenseManager(db_url="sqlite:///:memory:")
+        session = self.manager.Session()
+        for user_id in (1, 2):
+            session.add(User(user_id=user_id, username=f"supplier{user_id}", password="x", contact="1",
+                             email=f"s{user_id}@example.com", registration_type="supplier",
+                             company_name=f"Supplier {user_id}", company_category="Food"))
+        for expense_id in range(1, 31):
+            session.add(Expense(expense_id=expense_id, expense_date=datetime(2024, 1, 1 + expense_id % 7),
+                                category="Food" if expense_id % 3 else "Cleaning", supplier_id=1 + expense_id % 2,
+                                expense_name=f"Oat milk {expense_id}" if expense_id % 5 == 0 else f"Beans {expense_id}",
+                                total_items=1, unit_cost=float(expense_id % 4), total_cost=float(expense_id % 4)))
+        session.commit()
+        session.close()
+
+    def read_all(self, page_size=4, **query):
+        """Page forward through the whole list, then back from its end, with the cursors a view would use."""
+        def cursor(row):
+            return row[0] if query.get("sort") is None else (getattr(row, query["sort"]), row[0])
+
+        rows = self.manager.fetch_expenses_page(limit=page_size, **query)
+        pages = [rows]
+        while len(pages[-1]) == page_size:
+            pages.append(self.manager.fetch_expenses_page(after=cursor(pages[-1][-1]), limit=page_size, **query))
+        forward = [row.expense_id for page in pages for row in page]
+        before = self.manager.fetch_expenses_page(before=cursor(pages[-1][0]), limit=page_size, **query) if len(pages) > 1 else []
+        return forward, [row.expense_id for row in before]
+
+    def test_sorted_pages_follow_sort_value_then_id(self):
+        """Test that keyset pages sorted by a column, either way, cover every row once in order."""
+        by_cost = sorted(range(1, 31), key=lambda expense_id: (expense_id % 4, expense_id))
+        forward, before = self.read_all(sort="total_cost")
+        self.assertEqual(forward, by_cost)
+        self.assertEqual(before, by_cost[-6:-2])  # The four rows before the last page, which holds two
+        forward, before = self.read_all(sort="total_cost", descending=True)
+        self.assertEqual(forward, by_cost[::-1])
+        self.assertEqual(self.read_all(sort="expense_date")[0],
+                         sorted(range(1, 31), key=lambda expense_id: (expense_id % 7, expense_id)))
+
+    def test_filters(self):
+        """Test that the search, category and supplier filters combine and apply to rows read by ID."""
+        forward, _ = self.read_all(search="oat", supplier_id=2)
+        self.assertEqual(forward, [5, 15, 25])
+        self.assertEqual(self.read_all(category="Cleaning", supplier_id=1)[0], [6, 12, 18, 24, 30])
+        self.assertEqual(self.read_all(search="%")[0], [])  # Taken literally
+        rows = self.manager.fetch_expense_rows([4, 5, 6], search="Oat")
+        self.assertEqual([row.expense_id for row in rows], [5])
+
+        with self.assertRaises(ValueError):
+            self.manager.fetch_expenses_page(sort="supplier_name")
+
+    def test_supplier_filter_uses_its_index(self):
+        """Test that one supplier's expenses are found through ix_expenses_supplier_id, not a table scan."""
+        with self.manager.engine.connect() as connection:
+            plan = connection.exec_driver_sql(
+                "EXPLAIN QUERY PLAN SELECT expense_id FROM expenses WHERE supplier_id = 1 ORDER BY expense_id"
+            ).fetchall()
+        self.assertIn("ix_expenses_supplier_id", " ".join(str(step) for step in plan))
+
+
+if __name__ == "__main__":
+    unittest.main()
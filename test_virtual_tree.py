@@ -0,0 +1,113 @@
+import unittest
+from datetime import datetime
+from business_logic.pagination_v3 import keyset_page
+from business_logic.sales_management_v3 import SalesManager
+from database.models_v3 import Sales
+from gui.virtual_tree_v3 import RowWindow
+from test_fixtures import seed_supplier_and_item
+
+
+class ListSource:
+    """Keyset-paginated rows (key,) for keys 1..count, recording each fetch."""
+
+    def __init__(self, count):
+        self.keys = list(range(1, count + 1))
+        self.calls = []
+
+    def __call__(self, after=None, before=None, limit=10):
+        self.calls.append((after, before, limit))
+        if before is not None:
+            return [(key,) for key in self.keys if key < before][-limit:]
+        return [(key,) for key in self.keys if after is None or key > after][:limit]
+
+
+class TestRowWindow(unittest.TestCase):
+
+    def test_pages_forward_and_drops_rows_from_the_start(self):
+        """Test that paging past max_rows keeps a sliding window of consecutive rows."""
+        source = ListSource(45)
+        window = RowWindow(source, page_size=10, max_rows=25)
+        self.assertEqual(len(window.reset()), 10)
+        self.assertEqual((window.more_before, window.more_after), (False, True))
+
+        self.assertEqual(window.next_page(), ([(key,) for key in range(11, 21)], 0))
+        rows, dropped = window.next_page()
+        self.assertEqual((rows[0], dropped), ((21,), 5))
+        self.assertEqual([row[0] for row in window.rows], list(range(6, 31)))
+        self.assertTrue(window.more_before)
+
+        window.next_page()
+        rows, dropped = window.next_page()
+        self.assertEqual((rows, dropped), ([(41,), (42,), (43,), (44,), (45,)], 5))
+        self.assertFalse(window.more_after)
+        self.assertEqual(window.next_page(), ([], 0))
+        self.assertEqual(source.calls[-1], (40, None, 10))  # Pages seek past the last key, never use an offset
+
+    def test_pages_backward_and_drops_rows_from_the_end(self):
+        """Test that scrolling back refetches the dropped rows before the window."""
+        window = RowWindow(ListSource(45), page_size=10, max_rows=25)
+        window.reset()
+        for _ in range(4):
+            window.next_page()
+        self.assertEqual(window.rows[0], (21,))
+
+        rows, dropped = window.previous_page()
+        self.assertEqual((rows[0], rows[-1], dropped), ((11,), (20,), 10))
+        self.assertEqual([row[0] for row in window.rows], list(range(11, 36)))
+        self.assertTrue(window.more_after)
+        window.previous_page()
+        self.assertEqual(window.rows[0], (1,))
+        window.previous_page()  # The page before row 1 is empty
+        self.assertFalse(window.more_before)
+        with self.assertRaises(ValueError):
+            RowWindow(ListSource(1), page_size=10, max_rows=15)
+
+    def test_new_rows_are_appended_only_at_the_end_of_the_table(self):
+        """Test that a new row joins the window only once the window reaches the last page."""
+        window = RowWindow(ListSource(15), page_size=10, max_rows=25)
+        window.reset()
+        self.assertFalse(window.append((16,)))  # Row 16 will be on a later page
+        window.next_page()
+        self.assertTrue(window.append((16,)))
+        self.assertFalse(window.append((3,)))
+        self.assertEqual(window.rows[-2:], [(15,), (16,)])
+
+    def test_rows_that_move_in_the_order_are_not_patched(self):
+        """Test that a row whose sort position changed, or a new row sorting among the window's, is refused."""
+        names = {key: f"Item {key:02d}" for key in range(1, 16)}
+        order = lambda row: (row[1].lower(), row[0])
+        window = RowWindow(lambda after=None, before=None, limit=10: [(key, names[key]) for key in sorted(names)][:limit],
+                           page_size=10, max_rows=25, order=order)
+        window.reset()
+        self.assertTrue(window.replace((2, "ITEM 02")))  # Same place ignoring case
+        self.assertFalse(window.replace((2, "Item 99")))
+        self.assertIsNone(window.replace((20, "Item 20")))
+        self.assertEqual(window.rows[1], (2, "ITEM 02"))
+        self.assertIsNone(window.append((16, "item 99")))  # Past the window, on a later page
+        self.assertFalse(window.append((17, "apple")))  # Among the window's rows
+
+
+class TestKeysetPages(unittest.TestCase):
+
+    def test_fetch_sales_page(self):
+        """Test that sales pages seek on the sales ID in both directions."""
+        manager = SalesManager(db_url="sqlite:///:memory:")
+        session = manager.Session()
+        seed_supplier_and_item(session, quantity=100)
+        session.add_all(Sales(sales_id=sales_id, item_id=1, quantity_sold=1, unit_price=3.0, total_cost=3.0,
+                              sales_date=datetime(2024, 1, 1, 9)) for sales_id in range(1, 8))
+        session.commit()
+        session.close()
+
+        self.assertEqual([row.sales_id for row in manager.fetch_sales_page(limit=3)], [1, 2, 3])
+        self.assertEqual([row.sales_id for row in manager.fetch_sales_page(after=3, limit=3)], [4, 5, 6])
+        self.assertEqual([row.sales_id for row in manager.fetch_sales_page(before=3, limit=3)], [1, 2])
+        self.assertEqual(manager.fetch_sales_page(after=7), [])
+        self.assertEqual(manager.fetch_sales_page(limit=1)[0].item_name, "Latte")
+        self.assertEqual([row.sales_id for row in manager.fetch_sales_rows([5, 2, 99])], [2, 5])
+        with self.assertRaises(ValueError):
+            keyset_page(None, Sales.sales_id, limit=0)
+
+
+if __name__ == "__main__":
+    unittest.main()